@@ -1,46 +1,39 @@
 import streamlit as st
 import streamlit.components.v1 as components
-from groq import Groq
-from tavily import TavilyClient
-from streamlit_autorefresh import st_autorefresh
-import requests
 
-import edge_tts
-import asyncio
 import json
 import os
-import tempfile
-import re
-import uuid
 import hashlib
-import base64
 import time
-import sqlite3
 from datetime import datetime, timedelta
-from zoneinfo import ZoneInfo
-from typing import Optional
 
-
-# =========================
-# ASSISTENTE (NOME/PERSONA)
-# =========================
-ASSISTANT_NAME = "Zoe"
-ASSISTANT_TAGLINE = "Parceira bro 🤜🤛"
-ASSISTANT_ONE_LINER = "Jovem, animada, informal, direta ao ponto — gírias leves e uns emojis na medida."
-
-
-ZOE_PERSONA = f"""
-Você é {ASSISTANT_NAME}, uma assistente com vibe de parceira “bro” (descontraída).
-Estilo de fala:
-- Português do Brasil.
-- Tom jovem, animado e informal.
-- Use emojis às vezes (sem exagero).
-- Pode usar gírias leves como “bora”, “top”, “beleza”, “fechou”.
-- Seja prática e não enrole.
-- Pareça alguém que tomaria um café com o usuário (acolhedora, mas objetiva).
-- Quando precisar negar algo, seja firme e educada.
-- Evite textão: prefira respostas curtas e úteis.
-""".strip()
+from assistente.config import (
+    ASSISTANT_NAME, ASSISTANT_TAGLINE, ASSISTANT_ONE_LINER,
+    FUSO_BR, AUTO_REFRESH_MS, ASSETS_DIR, STATIC_URL_PREFIX,
+    CLIENT_TIMERS_MAX, CLIENT_TIMERS_HORIZON_H, CLIENT_TIMER_SLACK_MS, USER_DEFAULT,
+)
+from assistente.conexoes import get_groq, get_tavily
+from assistente.tempo import (
+    now_floor_minute, format_dt, today_key,
+)
+from assistente import storage
+from assistente.storage import (
+    load_settings, save_settings, load_daily_state,
+    load_avatar_src, save_uploaded_avatar, load_chat_history,
+    load_summary, save_summary, carregar_tarefas, tarefas_path,
+)
+from assistente.memoria import init_db, add_event, search_memories, run_memory_maintenance
+from assistente.tarefas import (
+    alterar_por_id, concluir_tarefa, descrever_recorrencia, normalizar_tarefa, proximos_lembretes,
+    reagendar_lote, tarefas_vencidas,
+)
+from assistente.rotinas import build_lembretes
+from assistente.clima import geocode_city
+from assistente.llm import update_summary_with_llm, ouvir_audio
+from assistente.pipeline import processar_turno
+from assistente.telegram import chat_do_usuario, enviar_telegram, fila_status as telegram_fila_status
+from assistente.tts import falar_bytes
+from assistente import agendador, despacho, estatico, perf, telemetria, usuario
 
 
 # =========================
@@ -53,276 +46,94 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-# MUDANÇA: Modelo mais rápido para evitar lentidão
-MODEL_ID = "llama-3.1-8b-instant"
-ARQUIVO_TAREFAS = "tarefas.json"
-
-FUSO_BR = ZoneInfo("America/Sao_Paulo")
-DB_PATH = "jarvis_memory.db"
-SUMMARY_PATH = "summary.txt"
-
-REMINDER_SCHEDULE_MIN = [0, 10, 30, 120]
-QUIET_START = 22
-QUIET_END = 7
-
-AUTO_REFRESH_MS = 10_000  # 10s
-
 # =========================
-# ROTINAS (BRIEFING / LEMBRETES / FECHAMENTO)
+# USUÁRIO (cada um com seus arquivos/banco em usuarios/<id>/)
 # =========================
-SETTINGS_PATH = "miga_settings.json"
-DAILY_STATE_PATH = "miga_daily_state.json"
-
-DEFAULT_SETTINGS = {
-    "city_name": "Ilhéus, BA",
-    "lat": None,
-    "lon": None,
-    "briefing_enabled": True,
-    "briefing_time": "07:00",
-    "smart_enabled": True,
-    "leave_time": "07:20",          # horário típico de sair (pra lembrete de chuva)
-    "rain_threshold": 60,           # % chance de chuva pra lembrar guarda-chuva
-    "heat_threshold": 30,           # °C pra lembrete de água
-    "closing_enabled": True,
-    "closing_time": "21:30",
-    "avatar_path": "avatar.png",
-}
-
-def load_settings() -> dict:
-    if not os.path.exists(SETTINGS_PATH):
-        return dict(DEFAULT_SETTINGS)
+def identificar_usuario() -> str:
+    """Login do Streamlit (st.user, se [auth] estiver configurado) > link assinado ?u=<id>&t=<token> > usuário padrão."""
     try:
-        data = json.loads(open(SETTINGS_PATH, "r", encoding="utf-8").read() or "{}")
-        if not isinstance(data, dict):
-            return dict(DEFAULT_SETTINGS)
-        merged = dict(DEFAULT_SETTINGS)
-        merged.update(data)
-        return merged
-    except Exception:
-        return dict(DEFAULT_SETTINGS)
-
-def save_settings(s: dict) -> None:
-    try:
-        tmp = SETTINGS_PATH + ".tmp"
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(s, f, ensure_ascii=False, indent=2)
-        os.replace(tmp, SETTINGS_PATH)
+        u = getattr(st, "user", None)
+        if u is not None and u.get("is_logged_in") and (u.get("email") or u.get("sub")):
+            return u.get("email") or u.get("sub")
     except Exception:
         pass
-
-
-def _avatar_guess_mime(path: str) -> str:
-    p = (path or "").lower()
-    if p.endswith(".jpg") or p.endswith(".jpeg"):
-        return "image/jpeg"
-    if p.endswith(".webp"):
-        return "image/webp"
-    return "image/png"
-
-def load_avatar_data_uri(settings: dict) -> Optional[str]:
-    """Carrega avatar do disco e devolve data-uri (pra usar no HTML)."""
-    try:
-        ap = (settings or {}).get("avatar_path") or "avatar.png"
-        if not os.path.exists(ap):
-            return None
-        data = open(ap, "rb").read()
-        if not data:
-            return None
-        mime = _avatar_guess_mime(ap)
-        b64 = base64.b64encode(data).decode("utf-8")
-        return f"data:{mime};base64,{b64}"
-    except Exception:
-        return None
-
-def save_uploaded_avatar(uploaded_file, settings: dict) -> dict:
-    """Salva o avatar enviado e atualiza settings['avatar_path']"""
-    if uploaded_file is None:
-        return settings
-    try:
-        fn = (uploaded_file.name or "").lower()
-        ext = ".png"
-        if fn.endswith(".jpg") or fn.endswith(".jpeg"):
-            ext = ".jpg"
-        elif fn.endswith(".webp"):
-            ext = ".webp"
-        out_path = "avatar" + ext
-        with open(out_path, "wb") as f:
-            f.write(uploaded_file.getvalue())
-        s = dict(settings or {})
-        s["avatar_path"] = out_path
-        return s
-    except Exception:
-        return settings
-
-def load_daily_state() -> dict:
-    if not os.path.exists(DAILY_STATE_PATH):
-        return {}
-    try:
-        data = json.loads(open(DAILY_STATE_PATH, "r", encoding="utf-8").read() or "{}")
-        return data if isinstance(data, dict) else {}
-    except Exception:
-        return {}
-
-def save_daily_state(s: dict) -> None:
-    try:
-        tmp = DAILY_STATE_PATH + ".tmp"
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(s, f, ensure_ascii=False, indent=2)
-        os.replace(tmp, DAILY_STATE_PATH)
-    except Exception:
-        pass
-
-def parse_hhmm(hhmm: str) -> Optional[tuple]:
-    try:
-        hhmm = (hhmm or "").strip()
-        m = re.match(r"^(\d{1,2}):(\d{2})$", hhmm)
-        if not m:
-            return None
-        h = max(0, min(23, int(m.group(1))))
-        mi = max(0, min(59, int(m.group(2))))
-        return (h, mi)
-    except Exception:
-        return None
-
-def same_minute(dt: datetime, hhmm: str) -> bool:
-    p = parse_hhmm(hhmm)
-    if not p:
-        return False
-    return dt.hour == p[0] and dt.minute == p[1]
-
-def today_key(dt: datetime) -> str:
-    return dt.strftime("%Y-%m-%d")
-
-def geocode_city(city_name: str) -> Optional[dict]:
-    """Resolve cidade -> lat/lon usando Open-Meteo Geocoding (sem chave)."""
-    try:
-        q = (city_name or "").strip()
-        if not q:
-            return None
-        url = "https://geocoding-api.open-meteo.com/v1/search"
-        r = requests.get(url, params={"name": q, "count": 1, "language": "pt", "format": "json"}, timeout=6)
-        j = r.json()
-        results = j.get("results") or []
-        if not results:
-            return None
-        top = results[0]
-        return {
-            "name": top.get("name"),
-            "admin1": top.get("admin1"),
-            "country": top.get("country"),
-            "lat": top.get("latitude"),
-            "lon": top.get("longitude"),
-        }
-    except Exception:
-        return None
-
-def fetch_weather(lat: float, lon: float) -> Optional[dict]:
-    """Clima de hoje + agora via Open-Meteo (sem chave)."""
-    try:
-        url = "https://api.open-meteo.com/v1/forecast"
-        params = {
-            "latitude": lat,
-            "longitude": lon,
-            "current": "temperature_2m,is_day,precipitation,weather_code,wind_speed_10m",
-            "daily": "temperature_2m_max,temperature_2m_min,precipitation_probability_max,precipitation_sum",
-            "timezone": "America/Sao_Paulo",
-            "forecast_days": 1,
-        }
-        r = requests.get(url, params=params, timeout=6)
-        j = r.json()
-
-        cur = j.get("current") or {}
-        daily = j.get("daily") or {}
-
-        def first(arr, default=None):
-            try:
-                return (arr or [default])[0]
-            except Exception:
-                return default
-
-        out = {
-            "temp_now": cur.get("temperature_2m"),
-            "wind": cur.get("wind_speed_10m"),
-            "temp_max": first(daily.get("temperature_2m_max")),
-            "temp_min": first(daily.get("temperature_2m_min")),
-            "rain_prob": first(daily.get("precipitation_probability_max")),
-            "rain_sum": first(daily.get("precipitation_sum")),
-        }
-        return out
-    except Exception:
-        return None
-
-def tasks_today_summary(tarefas: list, dt: datetime) -> dict:
-    day = today_key(dt)
-    active = [t for t in tarefas if t.get("status") != "silenciada"]
-    todays = [t for t in active if (t.get("data_hora","").startswith(day))]
-    # ordena pelas próximas
-    todays_sorted = sorted(todays, key=lambda x: x.get("data_hora",""))
-    next3 = todays_sorted[:3]
-    return {"count": len(todays_sorted), "next": next3}
-
-def build_briefing(settings: dict, tarefas: list, dt: datetime) -> str:
-    city = settings.get("city_name") or "sua cidade"
-    w = None
-    if settings.get("lat") is not None and settings.get("lon") is not None:
-        w = fetch_weather(settings["lat"], settings["lon"])
-    ts = tasks_today_summary(tarefas, dt)
-
-    header = f"☀️ **Briefing Matinal** — {dt.strftime('%d/%m/%Y')}\n📍 *{city}*"
-    parts = [header]
-
-    if w:
-        rain_prob = w.get("rain_prob")
-        tmin = w.get("temp_min")
-        tmax = w.get("temp_max")
-        temp_now = w.get("temp_now")
-
-        chuva_txt = "🌧️" if (isinstance(rain_prob, (int, float)) and rain_prob >= 50) else "🌤️"
-        rp_txt = f"{int(rain_prob)}%" if isinstance(rain_prob, (int, float)) else "?"
-        now_txt = f"{round(temp_now)}°C" if isinstance(temp_now, (int, float)) else "?"
-        min_txt = f"{round(tmin)}°C" if isinstance(tmin, (int, float)) else "?"
-        max_txt = f"{round(tmax)}°C" if isinstance(tmax, (int, float)) else "?"
-
-        parts.append(f"\n{chuva_txt} **Clima hoje:** {min_txt}–{max_txt} | agora {now_txt} | chuva **{rp_txt}**")
-        if isinstance(rain_prob, (int, float)) and rain_prob >= int(settings.get("rain_threshold", 60)):
-            parts.append("☂️ *Dica rápida:* chance alta de chuva — guarda-chuva/jaqueta podem salvar teu dia.")
-        if isinstance(tmax, (int, float)) and tmax >= int(settings.get("heat_threshold", 30)):
-            parts.append("💧 *Dica rápida:* calor forte hoje — água e protetor valem ouro.")
-
-    # tarefas
-    parts.append(f"\n📌 **Hoje:** {ts['count']} tarefa(s) na agenda.")
-    if ts["next"]:
-        lines = []
-        for t in ts["next"]:
-            try:
-                hhmm = (t.get("data_hora","")[-5:])
-            except Exception:
-                hhmm = ""
-            lines.append(f"• **{hhmm}** — {t.get('descricao','')}")
-        parts.append("\n".join(lines))
-    else:
-        parts.append("• Nada marcado — dia livre pra atacar um objetivo grande 😄")
-
-    # foco do dia (simples, sem inventar demais)
-    foco = ts["next"][0]["descricao"] if ts["next"] else "fazer 1 coisa que empurre tua vida pra frente"
-    parts.append(f"\n🎯 **Foco do dia:** {foco}")
-
-    return "\n".join(parts).strip()
-
-def build_closing_prompt(dt: datetime) -> str:
-    return (
-        f"🌙 **Fechamento do dia** ({dt.strftime('%d/%m')})\n"
-        "Manda em 1–3 linhas:\n"
-        "1) O que você fez hoje?\n"
-        "2) O que ficou pendente?\n"
-        "3) Leve / normal / pesado?"
-    )
-
-
-# =========================
-# CSS / UI (GEMINI-LIKE CLEAN)
-# =========================
-def inject_css():
+    # ?u= sozinho não abre nada: sem o token do link (ver assistente/usuario.py) fica no padrão
+    uid = st.query_params.get("u")
+    if uid and usuario.link_confere(uid, st.query_params.get("t")):
+        return uid
+    return USER_DEFAULT
+
+_uid = usuario.definir(identificar_usuario())
+if st.session_state.get("usuario") != _uid:
+    # trocou de usuário na mesma aba: nada do estado anterior pode vazar
+    for _k in list(st.session_state.keys()):
+        del st.session_state[_k]
+    st.session_state.usuario = _uid
+
+# Profiler do rerun: fases + chamadas externas vão pro SQLite (ver "⚙️ Performance" e /stats)
+_prof = perf.RerunProfiler()
+
+def rerun(fase: str = "turno") -> None:
+    """st.rerun() que fecha a fase atual e grava o profiler antes de reiniciar o script."""
+    perf.lap(fase)
+    _prof.finish()
+    st.rerun()
+
+
+# =========================
+# CSS / JS (GEMINI-LIKE CLEAN) — fontes em assets/
+# =========================
+# Com static serving, CSS e JS viram arquivos com hash no nome (assistente/estatico.py) e cada
+# rerun manda só este stub: ele busca e injeta no documento do app uma vez por aba (id com o hash).
+# O Streamlit serve .css/.js estáticos como text/plain + nosniff, por isso fetch + <style>/<script>
+# em vez de <link>/<script src>.
+_ASSET_STUB = """
+<script>
+(function(){
+  const doc = window.parent.document;
+  if (!doc.querySelector('meta[name="apple-mobile-web-app-capable"]')) {
+    [["viewport", "width=device-width, initial-scale=1, maximum-scale=1, user-scalable=0"],
+     ["apple-mobile-web-app-capable", "yes"],
+     ["apple-mobile-web-app-status-bar-style", "black-translucent"]].forEach(([n, c]) => {
+      let m = doc.querySelector('meta[name="' + n + '"]');
+      if (!m) { m = doc.createElement("meta"); m.name = n; doc.head.appendChild(m); }
+      m.content = c;
+    });
+  }
+  function load(kind, file){
+    const id = "zoe-" + file;
+    if (doc.getElementById(id)) return;
+    fetch(new URL(__PREFIX__ + file, doc.baseURI)).then(r => r.ok ? r.text() : Promise.reject(r.status)).then(txt => {
+      if (doc.getElementById(id)) return;
+      doc.querySelectorAll('[data-zoe-asset="' + kind + '"]').forEach(e => e.remove());
+      const el = doc.createElement(kind === "css" ? "style" : "script");
+      el.id = id;
+      el.dataset.zoeAsset = kind;
+      el.textContent = txt;
+      doc.head.appendChild(el);
+    }).catch(() => {});
+  }
+  load("css", __CSS__);
+  load("js", __JS__);
+})();
+</script>
+"""
+
+def inject_assets():
+    css_path = os.path.join(ASSETS_DIR, "zoe.css")
+    js_path = os.path.join(ASSETS_DIR, "drawer.js")
+    if estatico.servindo():
+        css_fn = estatico.publicar_arquivo(css_path, "zoe", ".css")
+        js_fn = estatico.publicar_arquivo(js_path, "drawer", ".js")
+        if css_fn and js_fn:
+            components.html(
+                _ASSET_STUB.replace("__PREFIX__", json.dumps(STATIC_URL_PREFIX))
+                .replace("__CSS__", json.dumps(css_fn)).replace("__JS__", json.dumps(js_fn)),
+                height=0,
+            )
+            return
+
+    # sem static serving: manda tudo inline (comportamento antigo)
     st.markdown(
         """
         <meta name="viewport" content="width=device-width, initial-scale=1, maximum-scale=1, user-scalable=0">
@@ -331,474 +142,57 @@ def inject_css():
         """,
         unsafe_allow_html=True
     )
+    css = estatico.ler_arquivo(css_path).decode("utf-8")
+    js = estatico.ler_arquivo(js_path).decode("utf-8")
+    st.markdown(f"<style>\n{css}\n</style>", unsafe_allow_html=True)
+    components.html(f"<script>\n{js}\n</script>", height=0)
 
-    st.markdown(
-        """
-        <style>
-        /* --- Remove tralhas Streamlit --- */
-        header[data-testid="stHeader"] { display:none !important; }
-        footer { display:none !important; }
-        #MainMenu { display:none !important; }
-        .stDeployButton { display:none !important; }
-        [data-testid="stToolbar"] { display:none !important; }
-        [data-testid="stDecoration"] { display:none !important; }
-        [data-testid="stStatusWidget"] { display:none !important; }
-        .viewerBadge_container__1QSob { display:none !important; }
-
-        :root{
-            --bg:#050607;
-            --bg2:#0a0b0d;
-            --text: rgba(255,255,255,0.92);
-            --muted: rgba(255,255,255,0.62);
-            --stroke: rgba(255,255,255,0.10);
-            --card: rgba(255,255,255,0.06);
-            --card2: rgba(255,255,255,0.035);
-        }
-
-        [data-testid="stAppViewContainer"]{
-            background: linear-gradient(180deg, var(--bg2) 0%, var(--bg) 100%);
-        }
-
-        /* Espaço pro topbar e pro chat input */
-        .block-container{
-            padding-top: 66px !important;
-            padding-bottom: 130px !important; /* espaço extra pro mic */
-            padding-left: 14px !important;
-            padding-right: 14px !important;
-            max-width: 720px !important;
-        }
-
-        /* ===== TOPBAR ===== */
-        .topbar{
-            position: fixed;
-            top: 0; left: 0; right: 0;
-            height: 56px;
-            display:flex;
-            align-items:center;
-            justify-content:center;
-            background: rgba(5,6,7,0.92);
-            border-bottom: 1px solid rgba(255,255,255,0.08);
-            backdrop-filter: blur(10px);
-            z-index: 999;
-        }
-        .topbar-inner{
-            width: min(720px, 100%);
-            padding: 0 14px;
-            display:flex;
-            align-items:center;
-            justify-content:space-between;
-        }
-        .hamb{
-            width:38px;
-            height:38px;
-            border-radius: 12px;
-            border: 1px solid rgba(255,255,255,0.10);
-            background: rgba(255,255,255,0.06);
-            display:flex;
-            align-items:center;
-            justify-content:center;
-            color: rgba(255,255,255,0.90);
-            font-size: 18px;
-            user-select:none;
-            cursor:pointer;
-        }
-        .tb-title{
-            font-weight: 800;
-            letter-spacing:0.2px;
-            color: rgba(255,255,255,0.92);
-            font-size: 16px;
-            display:flex;
-            align-items:baseline;
-            gap: 8px;
-            white-space: nowrap;
-        }
-        .tb-sub{
-            font-weight: 600;
-            color: rgba(255,255,255,0.65);
-            font-size: 12px;
-        }
-        .tb-right{
-            width:38px; height:38px;
-        }
-
-        /* ===== Sidebar como Drawer (não depende do botão nativo) ===== */
-        section[data-testid="stSidebar"]{
-            position: fixed !important;
-            top: 0 !important;
-            left: 0 !important;
-            height: 100vh !important;
-            width: 320px !important;
-            max-width: 85vw !important;
-            background: rgba(5,6,7,0.98) !important;
-            border-right: 1px solid rgba(255,255,255,0.10) !important;
-            transform: translateX(-110%) !important;
-            transition: transform 180ms ease !important;
-            z-index: 1002 !important;
-            overflow-y: auto !important;
-            padding-top: 56px !important; /* pra não ficar atrás da topbar */
-        }
-        section[data-testid="stSidebar"].sb-open{
-            transform: translateX(0%) !important;
-        }
-
-        /* Dimmer visual (NÃO bloqueia clique) quando drawer abre */
-        body::before{
-            content: "";
-            position: fixed;
-            inset: 0;
-            background: rgba(0,0,0,0.45);
-            opacity: 0;
-            pointer-events: none; /* <- nunca trava a tela */
-            transition: opacity 160ms ease;
-            z-index: 997; /* abaixo do topbar/input, acima do conteúdo */
-        }
-        body.sb-dim-on::before{
-            opacity: 1;
-        }
-
-        /* ===== Chat input fixo + espaço pro mic ===== */
-        [data-testid="stChatInput"]{
-            position: fixed;
-            left: 0; right: 0; bottom: 0;
-            padding: 10px 14px 16px 14px;
-            background: rgba(5,6,7,0.92);
-            border-top: 1px solid rgba(255,255,255,0.10);
-            backdrop-filter: blur(10px);
-            z-index: 998;
-        }
-
-        /* Dá espaço à direita dentro do textarea pro botão mic */
-        [data-testid="stChatInput"] textarea{
-            padding-right: 58px !important;
-            border-radius: 16px !important;
-        }
-
-        /* ===== Mic (audio_input) colado no chat input ===== */
-        div[data-testid="stAudioInput"]{
-            position: fixed !important;
-            right: 22px !important;
-            bottom: 86px !important; /* acima do chat input */
-            z-index: 999 !important;
-            width: 44px !important;
-        }
-
-        /* Esconde textos do audio_input e deixa só o botão */
-        div[data-testid="stAudioInput"] label,
-        div[data-testid="stAudioInput"] small,
-        div[data-testid="stAudioInput"] p,
-        div[data-testid="stAudioInput"] [data-testid="stFileUploaderDropzoneInstructions"]{
-            display:none !important;
-        }
-
-        /* Tenta reduzir a UI do áudio depois de gravar */
-        div[data-testid="stAudioInput"] audio{
-            display:none !important;
-        }
-
-        div[data-testid="stAudioInput"] button{
-            width: 44px !important;
-            height: 44px !important;
-            border-radius: 999px !important;
-            border: 1px solid rgba(255,255,255,0.14) !important;
-            background: rgba(255,255,255,0.08) !important;
-        }
-
-        /* Scrollbar discreta */
-        ::-webkit-scrollbar { width: 4px; }
-        ::-webkit-scrollbar-thumb { background: rgba(255,255,255,0.18); border-radius: 4px; }
-        
-        /* ===== Minimal chat bubbles ===== */
-        div[data-testid="stChatMessage"]{
-            padding: 0.15rem 0 !important;
-        }
-        div[data-testid="stChatMessageContent"]{
-            background: var(--card2) !important;
-            border: 1px solid rgba(255,255,255,0.08) !important;
-            border-radius: 16px !important;
-            padding: 12px 14px !important;
-        }
-        div[data-testid="stChatMessageContent"] p,
-        div[data-testid="stChatMessageContent"] li{
-            color: var(--text) !important;
-        }
-        .stCaption{ color: var(--muted) !important; }
-
-        /* ===== Avatar na topbar ===== */
-        .tb-left{ display:flex; align-items:center; gap: 10px; }
-        .avatar{
-            width: 34px; height: 34px; border-radius: 999px; overflow:hidden;
-            border: 1px solid rgba(255,255,255,0.14);
-            background: rgba(255,255,255,0.06);
-            flex: 0 0 auto;
-        }
-        .avatar img{ width:100%; height:100%; object-fit: cover; display:block; }
-        .avatar-fallback{
-            width: 34px; height: 34px; border-radius: 999px;
-            border: 1px solid rgba(255,255,255,0.14);
-            background: rgba(255,255,255,0.06);
-            display:flex; align-items:center; justify-content:center;
-            color: rgba(255,255,255,0.86); font-weight: 800;
-        }
-
-        /* ===== Botões mais minimal ===== */
-        .stButton > button{
-            border-radius: 14px !important;
-            border: 1px solid rgba(255,255,255,0.10) !important;
-            background: rgba(255,255,255,0.06) !important;
-        }
-        .stButton > button:hover{
-            border-color: rgba(255,255,255,0.18) !important;
-            background: rgba(255,255,255,0.08) !important;
-        }
-
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
-
-inject_css()
-
-
-# =========================
-# JS: Sidebar como Drawer (sem overlay bloqueando clique)
-# =========================
-components.html(
-    """
-    <script>
-      (function(){
-        const doc = window.parent.document;
-
-        // limpeza de versões antigas (overlay que travava clique)
-        try {
-          const old = doc.getElementById('sb-overlay');
-          if (old) old.remove();
-        } catch(e) {}
-
-        function getSidebar(){
-          return doc.querySelector('section[data-testid="stSidebar"]');
-        }
-        function getHamb(){
-          return doc.getElementById("hamb-btn");
-        }
-        function setDim(on){
-          doc.body.classList.toggle("sb-dim-on", !!on);
-        }
-
-        function openSidebar(){
-          const sb = getSidebar();
-          if (!sb){ setDim(false); return; }
-          sb.classList.add("sb-open");
-          setDim(true);
-        }
-
-        function closeSidebar(){
-          const sb = getSidebar();
-          if (sb) sb.classList.remove("sb-open");
-          setDim(false);
-        }
-
-        function isOpen(){
-          const sb = getSidebar();
-          return !!(sb && sb.classList.contains("sb-open"));
-        }
-
-        function toggleSidebar(){
-          if (isOpen()) closeSidebar();
-          else openSidebar();
-        }
-
-        function bindHamburger(){
-          const hamb = getHamb();
-          if (hamb && !hamb.dataset.bound){
-            hamb.dataset.bound = "1";
-            hamb.addEventListener("click", (e) => {
-              e.preventDefault();
-              e.stopPropagation();
-              toggleSidebar();
-            }, true);
-          }
-        }
-
-        function bindGlobalHandlers(){
-          if (doc.body.dataset.sbGlobalBound) return;
-          doc.body.dataset.sbGlobalBound = "1";
-
-          doc.addEventListener("keydown", (e) => {
-            if (e.key === "Escape") closeSidebar();
-          });
-
-          // Fecha ao clicar fora (capture = true). Sem overlay = nunca trava a tela.
-          doc.addEventListener("click", (e) => {
-            if (!isOpen()) return;
-            const sb = getSidebar();
-            const hamb = getHamb();
-            const t = e.target;
-
-            if (sb && sb.contains(t)) return;
-            if (hamb && hamb.contains(t)) return;
-
-            closeSidebar();
-          }, true);
-        }
-
-        // força estado limpo ao carregar (evita tela cinza presa)
-        closeSidebar();
-
-        // Rebind porque o Streamlit re-renderiza
-        const iv = setInterval(() => {
-          bindHamburger();
-          bindGlobalHandlers();
-
-          // auto-corrige dim caso o DOM tenha re-renderizado
-          const sb = getSidebar();
-          setDim(!!(sb && sb.classList.contains("sb-open")));
-        }, 250);
-
-        setTimeout(()=>clearInterval(iv), 20000);
-
-        // segurança extra: se algo ficar “preso”, ESC sempre limpa
-        window.parent.__closeSidebar = closeSidebar;
-      })();
-    </script>
-    """,
-    height=0
-)
+inject_assets()
+perf.lap("assets")
 
 
 # =========================
 # CONEXÕES
 # =========================
 try:
-    client = Groq(api_key=st.secrets["GROQ_API_KEY"])
-    tavily = TavilyClient(api_key=st.secrets["TAVILY_API_KEY"])
+    client = get_groq()
+    get_tavily()
 except Exception:
     st.error("⚠️ Erro nas chaves API. Verifique secrets.toml.")
     st.stop()
+perf.lap("conexoes")
 
 
 # =========================
-# TELEGRAM
-# =========================
-def enviar_telegram(mensagem: str):
-    token = st.secrets.get("TELEGRAM_TOKEN")
-    chat_id = st.secrets.get("TELEGRAM_CHAT_ID")
-    if not token or not chat_id:
-        return
-
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    try:
-        data = {"chat_id": chat_id, "text": mensagem, "parse_mode": "Markdown"}
-        requests.post(url, data=data, timeout=5)
-    except Exception:
-        pass
-
-
-
-# =========================
-# STORAGE CHAT (PERSISTÊNCIA DIÁRIA)
+# STORAGE (erros de gravação vão pra sidebar)
 # =========================
-CHAT_HISTORY_PATH = "chat_history.json"
-CHAT_MAX_MESSAGES = 400
-
-def chat_history_path() -> str:
-    """Caminho absoluto do arquivo de histórico do chat."""
-    return os.path.abspath(CHAT_HISTORY_PATH)
-
-def load_chat_history() -> tuple:
-    """Carrega histórico do chat do disco. Retorna (day_key, messages)."""
-    path = chat_history_path()
-    today = today_key(datetime.now(FUSO_BR))
-    if not os.path.exists(path):
-        return (today, [])
-    try:
-        raw = json.loads(open(path, "r", encoding="utf-8").read() or "{}")
-        if isinstance(raw, dict):
-            day = str(raw.get("day") or today)
-            msgs = raw.get("messages") or []
-        elif isinstance(raw, list):
-            # compat: versões antigas podem ter salvado só a lista
-            day = today
-            msgs = raw
-        else:
-            return (today, [])
-
-        if not isinstance(msgs, list):
-            msgs = []
-
-        cleaned = []
-        for m in msgs:
-            if not isinstance(m, dict):
-                continue
-            role = m.get("role")
-            content = m.get("content")
-            if role not in ("user", "assistant", "system"):
-                continue
-            if content is None:
-                continue
-            mm = dict(m)
-            mm["role"] = role
-            mm["content"] = str(content)
-            cleaned.append(mm)
-
-        return (day, cleaned)
-    except Exception:
-        return (today, [])
-
-def save_chat_history(day: str, messages: list) -> None:
-    """Salva histórico do chat de forma atômica (resistente a reruns)."""
-    path = chat_history_path()
-    base_dir = os.path.dirname(path) or "."
-    os.makedirs(base_dir, exist_ok=True)
+def atualizar_tarefas(mudanca) -> list:
+    """Lê → mudanca(lista) → grava com compare-and-swap (relê e reaplica se outra aba gravou no meio)."""
+    lista, erro = storage.atualizar_tarefas(mudanca)
+    st.session_state.last_storage_error = erro
+    return [normalizar_tarefa(t) for t in lista]
 
-    payload = {"day": str(day), "messages": messages}
-    tmp_path = ""
+def _normalizar_lista(lista: list) -> list:
+    return [normalizar_tarefa(t) for t in lista]
 
-    try:
-        with tempfile.NamedTemporaryFile(
-            mode="w", encoding="utf-8", delete=False, dir=base_dir,
-            prefix=os.path.basename(path) + ".", suffix=".tmp"
-        ) as f:
-            json.dump(payload, f, ensure_ascii=False, indent=2)
-            f.flush()
-            try:
-                os.fsync(f.fileno())
-            except Exception:
-                pass
-            tmp_path = f.name
-
-        os.replace(tmp_path, path)
-        st.session_state.last_chat_storage_error = ""
-    except Exception as e:
-        try:
-            if tmp_path and os.path.exists(tmp_path):
-                os.remove(tmp_path)
-        except Exception:
-            pass
-        st.session_state.last_chat_storage_error = f"{type(e).__name__}: {e}"
 
 def ensure_chat_day_is_today() -> None:
     """Se virou o dia (00:00), limpa o chat automaticamente."""
     today = today_key(datetime.now(FUSO_BR))
     if st.session_state.get("chat_day") != today:
+        # o bot/API podem já ter escrito no chat de hoje: relê em vez de zerar o arquivo
+        dia, msgs = load_chat_history()
         st.session_state.chat_day = today
-        st.session_state.memoria = []
-        save_chat_history(today, st.session_state.memoria)
+        st.session_state.memoria = msgs if dia == today else []
 
 def chat_add(role: str, content: str, **extra) -> None:
-    """Append no chat + persistência no disco."""
-    ensure_chat_day_is_today()
-
+    """Append no chat do disco (relido sob trava: bot/API gravam o mesmo arquivo) e a sessão vira o que ficou lá."""
     m = {"role": role, "content": content}
     if extra:
         m.update(extra)
-
-    st.session_state.memoria.append(m)
-
-    # corte de segurança (evita arquivo gigante)
-    if len(st.session_state.memoria) > CHAT_MAX_MESSAGES:
-        st.session_state.memoria = st.session_state.memoria[-CHAT_MAX_MESSAGES:]
-
-    save_chat_history(st.session_state.chat_day, st.session_state.memoria)
+    dia, msgs, erro = storage.anexar_chat(m)
+    st.session_state.chat_day, st.session_state.memoria = dia, msgs
+    st.session_state.last_chat_storage_error = erro
 
 
 # =========================
@@ -813,8 +207,6 @@ if "memoria" not in st.session_state or "chat_day" not in st.session_state:
         _day, _msgs = _today, []
     st.session_state.chat_day = _day
     st.session_state.memoria = _msgs
-    # garante que o arquivo exista/esteja alinhado
-    save_chat_history(st.session_state.chat_day, st.session_state.memoria)
 if "ultimo_audio_hash" not in st.session_state:
     st.session_state.ultimo_audio_hash = None
 if "last_alert_fingerprint" not in st.session_state:
@@ -851,45 +243,17 @@ except Exception:
     pass
 
 
-
-
 # Rotinas: estado diário / dedupe
 if "settings" not in st.session_state:
     st.session_state.settings = load_settings()
 if "daily_state" not in st.session_state:
     st.session_state.daily_state = load_daily_state()
-if "briefing_sent" not in st.session_state:
-    st.session_state.briefing_sent = st.session_state.daily_state.get("briefing_sent")  # YYYY-MM-DD ou None
-if "closing_sent" not in st.session_state:
-    st.session_state.closing_sent = st.session_state.daily_state.get("closing_sent")    # YYYY-MM-DD ou None
-if "smart_flags" not in st.session_state:
-    st.session_state.smart_flags = st.session_state.daily_state.get("smart_flags", {})  # dict
 if "awaiting_closing" not in st.session_state:
     st.session_state.awaiting_closing = bool(st.session_state.daily_state.get("awaiting_closing", False))
 
 
 ensure_chat_day_is_today()
-
-# =========================
-# UTILS TEMPO & FORMAT
-# =========================
-def now_br() -> datetime:
-    return datetime.now(FUSO_BR)
-
-def now_floor_minute() -> datetime:
-    a = now_br()
-    return a.replace(second=0, microsecond=0)
-
-def format_dt(dt: datetime) -> str:
-    return dt.strftime("%Y-%m-%d %H:%M")
-
-def parse_dt(s: str) -> datetime:
-    return datetime.strptime(s, "%Y-%m-%d %H:%M").replace(tzinfo=FUSO_BR)
-
-def em_horario_silencioso(agora: datetime) -> bool:
-    h = agora.hour
-    return (h >= QUIET_START) or (h < QUIET_END)
-
+perf.lap("session_state")
 
 # =========================
 # NOTIFICAÇÃO BROWSER (JS)
@@ -907,15 +271,17 @@ def request_notification_permission():
         height=0,
     )
 
-def browser_notify(title: str, body: str):
+def browser_notify(title: str, body: str, tag: str = ""):
     payload_title = json.dumps(title)
     payload_body = json.dumps(body)
+    payload_tag = json.dumps(tag or "")
     components.html(
         f"""<script>
         (function() {{
           try {{
             if ('Notification' in window && Notification.permission === 'granted') {{
-              new Notification({payload_title}, {{ body: {payload_body} }});
+              // tag igual à do timer do navegador: se ele já mostrou, esta só substitui (sem duplicar)
+              new Notification({payload_title}, {{ body: {payload_body}, tag: {payload_tag} || undefined }});
             }}
           }} catch(e) {{}}
         }})();
@@ -927,268 +293,8 @@ def browser_notify(title: str, body: str):
 # =========================
 # MEMÓRIA LONGA (SQLite)
 # =========================
-def db():
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    conn.execute("PRAGMA journal_mode=WAL;")
-    return conn
-
-def init_db():
-    conn = db()
-    conn.execute("""
-    CREATE TABLE IF NOT EXISTS events (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        ts TEXT NOT NULL,
-        kind TEXT NOT NULL,
-        content TEXT NOT NULL,
-        meta TEXT
-    )
-    """)
-    try:
-        conn.execute("""
-        CREATE VIRTUAL TABLE IF NOT EXISTS events_fts
-        USING fts5(content, content='events', content_rowid='id')
-        """)
-        conn.execute("""
-        CREATE TRIGGER IF NOT EXISTS events_ai
-        AFTER INSERT ON events
-        BEGIN
-            INSERT INTO events_fts(rowid, content) VALUES (new.id, new.content);
-        END;
-        """)
-    except Exception:
-        pass
-    conn.commit()
-    conn.close()
-
-def add_event(kind: str, content: str, meta: str = ""):
-    content = (content or "").strip()
-    if not content:
-        return
-    conn = db()
-    ts = now_br().strftime("%Y-%m-%d %H:%M:%S")
-    conn.execute("INSERT INTO events(ts, kind, content, meta) VALUES (?,?,?,?)", (ts, kind, content, meta))
-    conn.commit()
-    conn.close()
-
-def search_memories(query: str, limit: int = 8):
-    query = (query or "").strip()
-    if not query:
-        return []
-    conn = db()
-    try:
-        rows = conn.execute(
-            "SELECT e.ts, e.kind, e.content FROM events_fts f "
-            "JOIN events e ON e.id = f.rowid "
-            "WHERE events_fts MATCH ? ORDER BY rank LIMIT ?",
-            (query, limit)
-        ).fetchall()
-    except Exception:
-        rows = conn.execute(
-            "SELECT ts, kind, content FROM events WHERE content LIKE ? ORDER BY id DESC LIMIT ?",
-            (f"%{query}%", limit)
-        ).fetchall()
-    conn.close()
-    return rows
-
 init_db()
-
-
-# =========================
-# RESUMO VIVO
-# =========================
-def load_summary() -> str:
-    if not os.path.exists(SUMMARY_PATH):
-        return "Resumo vazio."
-    try:
-        return open(SUMMARY_PATH, "r", encoding="utf-8").read().strip() or "Resumo vazio."
-    except Exception:
-        return "Resumo vazio."
-
-def save_summary(texto: str):
-    if not texto:
-        return
-    with open(SUMMARY_PATH, "w", encoding="utf-8") as f:
-        f.write(texto)
-
-def update_summary_with_llm(new_info: str):
-    if not new_info:
-        return
-    resumo_atual = load_summary()
-    prompt = f"""
-{ZOE_PERSONA}
-
-Atualize o RESUMO VIVO do usuário. Mantenha curto (max 20 linhas).
-
-RESUMO ATUAL:
-{resumo_atual}
-
-NOVA INFO:
-{new_info}
-
-Devolva APENAS o resumo novo.
-""".strip()
-    try:
-        resp = client.chat.completions.create(
-            model=MODEL_ID,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2
-        ).choices[0].message.content
-        save_summary(resp)
-    except Exception:
-        pass
-
-
-# =========================
-# STORAGE TAREFAS
-# =========================
-def tarefas_path() -> str:
-    """Caminho absoluto para o arquivo de tarefas (evita surpresas com cwd)."""
-    return os.path.abspath(ARQUIVO_TAREFAS)
-
-def carregar_tarefas() -> list:
-    path = tarefas_path()
-    if not os.path.exists(path):
-        return []
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data if isinstance(data, list) else []
-    except Exception:
-        return []
-
-def salvar_tarefas(lista: list) -> None:
-    """
-    Escrita atômica e resistente a reruns do Streamlit.
-    Usa arquivo temporário *único* no mesmo diretório e faz os.replace().
-    Em caso de erro, não derruba o app: guarda o erro em st.session_state.last_storage_error.
-    """
-    path = tarefas_path()
-    base_dir = os.path.dirname(path) or "."
-    os.makedirs(base_dir, exist_ok=True)
-
-    tmp_path = ""
-    try:
-        # Temp único evita colisão quando o Streamlit dá rerun/autorefresh.
-        with tempfile.NamedTemporaryFile(
-            mode="w", encoding="utf-8", delete=False, dir=base_dir,
-            prefix=os.path.basename(path) + ".", suffix=".tmp"
-        ) as f:
-            json.dump(lista, f, ensure_ascii=False, indent=2)
-            f.flush()
-            try:
-                os.fsync(f.fileno())
-            except Exception:
-                pass
-            tmp_path = f.name
-
-        os.replace(tmp_path, path)
-        st.session_state.last_storage_error = ""
-    except Exception as e:
-        # limpeza best-effort
-        try:
-            if tmp_path and os.path.exists(tmp_path):
-                os.remove(tmp_path)
-        except Exception:
-            pass
-        st.session_state.last_storage_error = f"{type(e).__name__}: {e}"
-
-def limpar_texto(s: str) -> str:
-    s = (s or "").lower()
-    s = re.sub(r"[^a-z0-9áàâãéèêíìîóòôõúùûç\s]", " ", s)
-    return re.sub(r"\s+", " ", s).strip()
-
-
-# =========================
-# INTENÇÕES (GUARDA-CORPOS)
-# =========================
-
-_WEEKDAY_PT = [
-    "segunda-feira", "terça-feira", "quarta-feira",
-    "quinta-feira", "sexta-feira", "sábado", "domingo"
-]
-
-def is_date_question(tnorm: str) -> bool:
-    # cobre variações tipo: "que dia é/era hoje?", "qual a data de hoje?", "hoje é que dia?"
-    return bool(re.search(r"\b(que dia (e|é|era) hoje|qual a data( de hoje)?|data de hoje|hoje (e|é) que dia)\b", tnorm))
-
-
-def is_time_question(tnorm: str) -> bool:
-    return bool(re.search(r"\b(que horas|horas s[aã]o|que hora)\b", tnorm))
-
-def is_memory_question(tnorm: str) -> bool:
-    # usuário pedindo pra lembrar o que foi dito/perguntado antes
-    pats = [
-        r"o que eu (te )?perguntei", r"o que eu falei", r"o que eu disse",
-        r"qual foi minha (ultima|última) pergunta", r"qual foi a (ultima|última) coisa que eu",
-        r"lembra( do)? que eu", r"você lembra( do)? que eu"
-    ]
-    return any(re.search(p, tnorm) for p in pats)
-
-def summarize_previous_user_messages(memoria: list, k: int = 4) -> str:
-    # pega as últimas mensagens do usuário (exclui a atual, que já está no fim)
-    user_msgs = [m.get("content","").strip() for m in (memoria or []) if m.get("role") == "user" and str(m.get("content","")).strip()]
-    if len(user_msgs) <= 1:
-        return "Ainda não tenho histórico suficiente aqui nesse chat 😅"
-    prev = user_msgs[:-1][-k:]
-    bullets = "\n".join([f"- {x}" for x in prev])
-    return f"Você tinha me perguntado isso aqui mais cedo:\n{bullets}"
-
-def is_task_create_intent(tnorm: str) -> bool:
-    # Só cria tarefa quando o usuário realmente pede um lembrete/tarefa
-    triggers = [
-        "me lembra", "me lembre", "lembra de", "lembrete", "agenda", "agende", "agendar",
-        "marca pra", "marcar pra", "marcar para", "anota", "anote", "cria uma tarefa", "criar uma tarefa",
-        "me avisa", "me notifica", "programa um lembrete", "seta um lembrete", "coloca na agenda"
-    ]
-    if any(t in tnorm for t in triggers):
-        return True
-
-    # formato “amanhã 15:00 pagar conta” (sem 'me lembra'), bem típico
-    if re.search(r"\b(hoje|amanh[aã]|depois de amanh[aã]|segunda|ter[cç]a|quarta|quinta|sexta|s[aá]bado|domingo)\b", tnorm) and re.search(r"\b\d{1,2}:\d{2}\b", tnorm):
-        return True
-    if re.search(r"\b\d{1,2}/\d{1,2}(/\d{2,4})?\b", tnorm) and (re.search(r"\b\d{1,2}:\d{2}\b", tnorm) or "às" in tnorm or "as " in tnorm):
-        return True
-
-    return False
-
-def is_task_done_intent(tnorm: str) -> bool:
-    triggers = [
-        "marcar como feito", "marca como feito", "conclui", "concluí", "concluido", "concluído",
-        "feito", "já fiz", "ja fiz", "finalizei", "remover tarefa", "remove tarefa", "apagar tarefa",
-        "deletar tarefa", "cancelar tarefa"
-    ]
-    return any(t in tnorm for t in triggers)
-
-def response_looks_like_non_answer(resp_txt: str) -> bool:
-    r = limpar_texto(resp_txt or "")
-    bad = [
-        "nao sei", "não sei", "nao tenho certeza", "não tenho certeza", "nao consigo",
-        "não consigo", "nao tenho acesso", "não tenho acesso", "nao lembro", "não lembro",
-        "preciso de mais contexto", "nao encontrei", "não encontrei", "use /web", "usa /web"
-    ]
-    return any(b in r for b in bad)
-
-def should_auto_web(user_txt: str, resp_txt: str) -> bool:
-    # Só dispara web quando a resposta claramente é “não sei/usa web”.
-    t = limpar_texto(user_txt or "")
-    # não faz web pra perguntas de memória/local
-    if is_memory_question(t) or is_time_question(t) or is_date_question(t):
-        return False
-    # evita web quando o usuário explicitamente não quer web
-    if "sem web" in t or "não use web" in t or "nao use web" in t:
-        return False
-    return response_looks_like_non_answer(resp_txt)
-
-def normalizar_tarefa(d: dict) -> dict:
-    agora = now_floor_minute()
-    d = dict(d)
-    d.setdefault("id", str(uuid.uuid4())[:8])
-    d.setdefault("status", "ativa")
-    d.setdefault("remind_count", 0)
-    d.setdefault("created_at", format_dt(agora))
-    d.setdefault("next_remind_at", d.get("data_hora"))
-    d.setdefault("snoozed_until", None)
-    return d
+perf.lap("init_db")
 
 
 # =========================
@@ -1208,912 +314,166 @@ def should_process_input(texto: str) -> bool:
 
 
 # =========================
-# PARSER NLP
-# =========================
-def parse_relativo(texto: str):
-    t = limpar_texto(texto)
-    if "daqui um minuto" in t or "daqui 1 minuto" in t or "em 1 minuto" in t:
-        return timedelta(minutes=1)
-    m = re.search(r"(daqui|em)\s+(\d+)\s*(min|h|hora)", t)
-    if not m:
-        return None
-    n = int(m.group(2))
-    u = m.group(3)
-    if "h" in u or "hora" in u:
-        return timedelta(hours=n)
-    return timedelta(minutes=n)
-
-def ajustar_futuro(dt: datetime, agora: datetime) -> datetime:
-    if dt >= agora:
-        return dt
-    tentativa = dt + timedelta(hours=12)
-    if tentativa >= agora:
-        return tentativa
-    return dt + timedelta(days=1)
-
-def extrair_dados_tarefa(texto: str):
-    agora = now_floor_minute()
-    delta = parse_relativo(texto)
-    if delta:
-        return {"descricao": texto.split(" em ")[0].split(" daqui ")[0], "data_hora": format_dt(agora + delta)}
-
-    prompt = f"""
-{ZOE_PERSONA}
-
-Agora é {format_dt(agora)}. O user disse: "{texto}".
-Extraia JSON: {{"descricao": "...", "data_hora": "YYYY-MM-DD HH:MM"}}
-Se hora não for dita, assuma o próximo horário lógico.
-""".strip()
-
-    try:
-        resp = client.chat.completions.create(
-            model=MODEL_ID,
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"},
-        )
-        data = json.loads(resp.choices[0].message.content)
-        dt = parse_dt(data["data_hora"])
-        data["data_hora"] = format_dt(ajustar_futuro(dt, agora))
-        return data
-    except Exception:
-        return None
-
-
-
-
-# =========================
-# CHAT CONTEXTO (LIMPEZA)
-# =========================
-def to_llm_messages(memoria: list, limit: int = 20) -> list:
-    """Converte o histórico do Streamlit (que pode ter chaves extras) para o formato aceito pelo LLM."""
-    out = []
-    if not memoria:
-        return out
-    for m in memoria[-limit:]:
-        try:
-            role = m.get("role")
-            content = m.get("content")
-        except Exception:
-            continue
-        if role not in ("user", "assistant", "system"):
-            continue
-        if content is None:
-            continue
-        out.append({"role": role, "content": str(content)})
-    return out
-
-def format_recent_dialogue(memoria: list, limit: int = 8) -> str:
-    """Cria um resumo curtinho do diálogo recente (pra roteamento/decisão)."""
-    parts = []
-    for m in to_llm_messages(memoria, limit=limit):
-        who = "Usuário" if m["role"] == "user" else ASSISTANT_NAME
-        txt = m["content"].strip().replace("\n", " ")
-        if len(txt) > 160:
-            txt = txt[:160] + "…"
-        parts.append(f"- {who}: {txt}")
-    return "\n".join(parts).strip()
-
-# =========================
-# ROUTER
-# =========================
-def router_llm(texto: str, tarefas: list) -> dict:
-    agora = format_dt(now_floor_minute())
-    resumo_tarefas = "\n".join([f"{i}: {t['descricao']}" for i, t in enumerate(tarefas)])
-    recent_chat = format_recent_dialogue(st.session_state.memoria[:-1] if "memoria" in st.session_state else [], limit=10)
-
-    prompt = f"""
-{ZOE_PERSONA}
-
-Agora é {agora}.
-Tarefas pendentes:
-{resumo_tarefas}
-
-Conversa recente (pra manter contexto):
-{recent_chat}
-
-Mensagem do usuário: "{texto}"
-
-Você vai escolher **UMA** ação.
-
-Regras MUITO importantes (pra não viajar):
-1) **TASK_CREATE** só quando o usuário pedir explicitamente um lembrete/tarefa.
-   Exemplos: "me lembra...", "lembrete", "agenda/agende", "anota", "marca pra...", "me avisa", "me notifica".
-   Perguntas tipo "o que é X?", "que dia é hoje?", "qual a hora?", "explica X" **NÃO** são tarefas.
-2) **TASK_DONE** só quando o usuário pedir pra concluir/remover uma tarefa.
-   Exemplos: "marcar como feito", "já fiz", "concluí", "remove/apaga a tarefa".
-3) **WEB_SEARCH** quando a pergunta depende de dados atuais (notícia, preço, resultado, "hoje/atual") OU quando você não tem confiança alta pra responder sem pesquisar.
-4) Caso contrário, use **CHAT**.
-
-Se escolher TASK_DONE, use "task_index" da tarefa mais relacionada. Se não tiver, use -1.
-Se escolher WEB_SEARCH, "search_query" deve ser uma consulta curta e objetiva (ou "" se não aplicar).
-
-Responda APENAS o JSON:
-{{
-  "action": "TASK_CREATE" ou "TASK_DONE" ou "WEB_SEARCH" ou "CHAT",
-  "task_index": (número da tarefa ou -1),
-  "minutes": (minutos para adiar ou 0),
-  "search_query": (termo de busca ou "")
-}}
-""".strip()
-
-    default_response = {"action": "CHAT", "task_index": -1, "minutes": 0, "search_query": ""}
-
-    try:
-        resp = client.chat.completions.create(
-            model=MODEL_ID,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0,
-        )
-        raw = resp.choices[0].message.content
-        match = re.search(r"\{.*\}", raw, re.DOTALL)
-        if match:
-            data = json.loads(match.group(0))
-            if "Action" in data and "action" not in data:
-                data["action"] = data["Action"]
-            if "action" not in data:
-                data["action"] = "CHAT"
-            return data
-        return default_response
-    except Exception:
-        return default_response
-
-def parse_slash_command(raw: str) -> Optional[dict]:
-    """
-    Comandos começando com '/' NÃO podem passar por limpar_texto (que remove '/').
-    Aceita: /web <consulta>  |  /web  (sem consulta)  |  /chat
-    """
-    s = (raw or "").strip()
-    m = re.match(r"^/(web|chat)\b\s*(.*)$", s, flags=re.IGNORECASE)
-    if not m:
-        return None
-    cmd = (m.group(1) or "").lower()
-    arg = (m.group(2) or "").strip()
-    if cmd == "web":
-        # Se o user forçou /web mas a intenção é cotação, usa o caminho de finanças (mais confiável).
-        tnorm = limpar_texto(arg)
-        tck = _extract_b3_ticker(arg)
-        if tck and any(k in tnorm for k in ["cotacao", "cotação", "preco", "preço", "valor", "quanto", "cotação hoje", "preço hoje"]):
-            return {"action": "FINANCE_QUOTE", "ticker": tck, "from_slash_web": True}
-        return {"action": "WEB_SEARCH", "search_query": arg}
-    if cmd == "chat":
-        return {"action": "CHAT"}
-    return None
-
-
-def detect_weather_request(raw: str, settings: dict) -> Optional[dict]:
-    """
-    Detecta pedidos de clima/previsão e responde via Open‑Meteo (sem depender de busca/LLM).
-    - Se o usuário não disser a cidade, usa settings['city_name'].
-    - Entende 'amanhã'.
-    """
-    t = limpar_texto(raw)
-
-    # Evita falso positivo com "tempo" em outros contextos.
-    is_weather = any(k in t for k in ["previsao do tempo", "previsão do tempo", "clima", "temperatura", "vai chover", "chuva"])
-    if not is_weather:
-        # 'tempo' sozinho é ambíguo; só aceita se vier junto de pista meteorológica.
-        if "tempo" not in t or not any(x in t for x in ["previs", "chuva", "temperatur", "clima"]):
-            return None
-
-    day_offset = 1 if any(x in t for x in ["amanha", "amanhã"]) else 0
-
-    # Tentativa leve de extrair cidade no final da frase: "em X", "para X", "no X", "na X"
-    city = None
-    m = re.search(r"(?:\bem\b|\bpara\b|\bpra\b|\bno\b|\bna\b)\s+([a-zà-ÿ0-9\s\-\.,]+)$", t, flags=re.IGNORECASE)
-    if m:
-        city = (m.group(1) or "").strip()
-        city = re.sub(r"\b(hoje|amanha|amanhã)\b", "", city).strip(" ,.-")
-        if len(city) < 2:
-            city = None
-
-    if not city:
-        city = (settings or {}).get("city_name") or "Ilhéus, BA"
-
-    return {"action": "WEATHER", "city": city, "day_offset": day_offset}
-
-
-def fetch_weather_days(lat: float, lon: float, days: int = 2) -> Optional[dict]:
-    """Clima de hoje + próximos dias via Open‑Meteo (sem chave)."""
-    try:
-        days = max(1, min(7, int(days)))
-        url = "https://api.open-meteo.com/v1/forecast"
-        params = {
-            "latitude": lat,
-            "longitude": lon,
-            "current": "temperature_2m,is_day,precipitation,weather_code,wind_speed_10m",
-            "daily": "temperature_2m_max,temperature_2m_min,precipitation_probability_max,precipitation_sum",
-            "timezone": "America/Sao_Paulo",
-            "forecast_days": days,
-        }
-        r = requests.get(url, params=params, timeout=6)
-        j = r.json()
-        cur = j.get("current") or {}
-        daily = j.get("daily") or {}
-
-        return {
-            "current": {
-                "temp_now": cur.get("temperature_2m"),
-                "wind": cur.get("wind_speed_10m"),
-            },
-            "dates": daily.get("time") or [],
-            "temp_max": daily.get("temperature_2m_max") or [],
-            "temp_min": daily.get("temperature_2m_min") or [],
-            "rain_prob": daily.get("precipitation_probability_max") or [],
-            "rain_sum": daily.get("precipitation_sum") or [],
-        }
-    except Exception:
-        return None
-
-
-def resolve_city_coords(settings: dict, city: str) -> Optional[dict]:
-    """
-    Resolve cidade -> coords.
-    Se bater com a cidade padrão e já tiver lat/lon, reaproveita.
-    """
-    s_city = (settings or {}).get("city_name") or ""
-    s_lat = (settings or {}).get("lat")
-    s_lon = (settings or {}).get("lon")
-
-    if city and s_city and city.strip().lower() == s_city.strip().lower() and s_lat is not None and s_lon is not None:
-        return {"city": s_city, "lat": float(s_lat), "lon": float(s_lon)}
-
-    g = geocode_city(city)
-    if not g:
-        return None
-    display = g.get("name") or city
-    admin1 = g.get("admin1")
-    if admin1 and admin1 not in display:
-        display = f"{display}, {admin1}"
-    return {"city": display, "lat": float(g["lat"]), "lon": float(g["lon"])}
-
-
-def format_weather_reply(city_display: str, w: dict, day_offset: int) -> str:
-    """Formata uma resposta curta e estável."""
-    try:
-        idx = max(0, min(len(w.get("dates", [])) - 1, int(day_offset)))
-    except Exception:
-        idx = 0
-
-    def pick(arr, i):
-        try:
-            return arr[i]
-        except Exception:
-            return None
-
-    date_str = pick(w.get("dates", []), idx)
-    tmin = pick(w.get("temp_min", []), idx)
-    tmax = pick(w.get("temp_max", []), idx)
-    rp = pick(w.get("rain_prob", []), idx)
-    rsum = pick(w.get("rain_sum", []), idx)
-    now_temp = (w.get("current") or {}).get("temp_now")
-
-    label = "Amanhã" if idx == 1 else "Hoje"
-    d_txt = ""
-    try:
-        if date_str:
-            d = datetime.fromisoformat(str(date_str))
-            d_txt = f" ({d.strftime('%d/%m')})"
-    except Exception:
-        d_txt = ""
-
-    def fmt_c(v):
-        return f"{round(v)}°C" if isinstance(v, (int, float)) else "?"
-    def fmt_pct(v):
-        return f"{int(v)}%" if isinstance(v, (int, float)) else "?"
-    def fmt_mm(v):
-        return f"{round(v, 1)}mm" if isinstance(v, (int, float)) else "?"
-
-    line1 = f"🌦️ **{label}{d_txt} em {city_display}:** {fmt_c(tmin)}–{fmt_c(tmax)} | chance de chuva **{fmt_pct(rp)}**"
-    extras = []
-    if isinstance(now_temp, (int, float)) and idx == 0:
-        extras.append(f"agora {fmt_c(now_temp)}")
-    if isinstance(rsum, (int, float)):
-        extras.append(f"chuva acumulada {fmt_mm(rsum)}")
-
-    if extras:
-        line1 += " (" + " | ".join(extras) + ")"
-
-    # dica simples
-    if isinstance(rp, (int, float)) and rp >= 60:
-        line1 += "\n☂️ Leva guarda-chuva pra não tomar prejuízo 😄"
-    elif isinstance(tmax, (int, float)) and tmax >= 30:
-        line1 += "\n💧 Vai estar quente — água e protetor ajudam demais."
-
-    return line1
-
-
-def _extract_b3_ticker(texto: str) -> str:
-    """Tenta extrair um ticker B3 do texto (ex: KNCR11, PETR4)."""
-    if not texto:
-        return ""
-    m = re.search(r"\b([A-Za-z]{4}\d{1,2})\b", str(texto))
-    if not m:
-        return ""
-    return m.group(1).upper()
-
-
-def decidir_acao(texto: str, tarefas: list, settings: dict) -> dict:
-    # 0) comandos slash primeiro (sem limpar_texto)
-    cmd = parse_slash_command(texto)
-    if cmd:
-        return cmd
-
-    # 1) clima via API (sem web/LLM)
-    wreq = detect_weather_request(texto, settings)
-    if wreq:
-        return wreq
-
-    # 2) finanças (cotação/dividendos) — tenta resolver por API antes de web/LLM
-    t = limpar_texto(texto)
-    ticker = _extract_b3_ticker(texto)
-
-    if ticker:
-        wants_price = any(k in t for k in ["cotacao", "cotação", "preco", "preço", "quanto ta", "quanto tá", "valor", "price"])
-        wants_div = any(k in t for k in ["dividendo", "dividendos", "rendimento", "rendimentos", "provento", "proventos", "pagamento", "data-com", "data com", "quando vou receber"])
-        if wants_price:
-            return {"action": "FINANCE_QUOTE", "ticker": ticker}
-        if wants_div:
-            return {"action": "FINANCE_DIVIDENDS", "ticker": ticker}
-
-
-        # Se a pergunta for "o que é/quem é/sobre" + ticker, faz uma busca mais esperta (evita dicionário/Wikipedia aleatório).
-        wants_info = any(k in t for k in [
-            "o que e", "oq e", "o q e", "que e", "sobre", "significa", "defina", "explica", "do que se trata",
-            "fii", "fundo", "etf", "acao", "ação"
-        ])
-        if wants_info:
-            # Query expandida pra puxar páginas de finanças brasileiras
-            if ticker == "KNCR11":
-                return {"action": "LOCAL_TICKER_INFO", "ticker": ticker}
-            # Query expandida pra puxar páginas de finanças brasileiras (evita dicionário aleatório)
-            return {"action": "WEB_SEARCH", "search_query": f"{ticker} FII B3 descrição"}
-    # 3) heurística simples de coisas que pedem web
-    if any(x in t for x in ["cotacao", "cotação", "preco", "preço", "noticia", "notícia", "quem ganhou", "resultado", "últimas", "atualizacao", "atualização"]):
-        return {"action": "WEB_SEARCH", "search_query": texto}
-
-    # 4) fallback: roteador via LLM
-    return router_llm(texto, tarefas)
-
-
-
-# =========================
-# WEB / AUDIO
-# =========================
-def buscar_tavily(q: str, max_results: int = 5):
-    """Busca via Tavily e devolve uma lista de fontes (title/url/content)."""
-    q = (q or "").strip()
-    if not q:
-        return []
-    try:
-        r = tavily.search(query=q, max_results=int(max_results))
-        results = r.get("results", []) or []
-        cleaned = []
-        for it in results:
-            if not isinstance(it, dict):
-                continue
-            title = (it.get("title") or "").strip()
-            url = (it.get("url") or "").strip()
-            content = (it.get("content") or "").strip()
-            if not content and it.get("snippet"):
-                content = str(it.get("snippet") or "").strip()
-            if not (title or url or content):
-                continue
-            cleaned.append({"title": title, "url": url, "content": content})
-        return cleaned
-    except Exception:
-        return []
-
-
-def _format_tavily_sources(results: list, limit: int = 5) -> str:
-    """Formata as fontes de forma legível e rastreável (com URL)."""
-    out = []
-    try:
-        lim = max(1, int(limit))
-    except Exception:
-        lim = 5
-
-    for i, it in enumerate((results or [])[:lim], start=1):
-        if not isinstance(it, dict):
-            continue
-        title = (it.get("title") or "Fonte").strip()
-        url = (it.get("url") or "").strip()
-        content = (it.get("content") or "").strip()
-
-        # deixa o trecho curto (evita prompt gigante)
-        if len(content) > 650:
-            content = content[:650] + "…"
-
-        if url:
-            out.append(f"[{i}] {title}\nURL: {url}\nTrecho: {content}")
-        else:
-            out.append(f"[{i}] {title}\nTrecho: {content}")
-
-    return "\n\n".join(out).strip()
-
-def _llm_answer_from_web(user_question: str, tavily_results: list) -> dict:
-    """Pede pro LLM responder *somente* com base nas fontes, em JSON."""
-    sources_txt = _format_tavily_sources(tavily_results, limit=5)
-    user_question = (user_question or "").strip()
-
-    prompt = f"""{ZOE_PERSONA}
-
-Você recebeu fontes de busca na web.
-
-REGRAS (anti-alucinação):
-- Responda APENAS com base nas FONTES abaixo.
-- Se as fontes não trouxerem a informação necessária, diga claramente que **não achou**.
-- NÃO invente números (preço, %, datas, dividendos). Se não estiver nas fontes, não use.
-- Se citar um número, ele deve aparecer em algum Trecho das fontes.
-- Traga no máximo 3 fontes.
-
-FONTES:
-{sources_txt}
-
-PERGUNTA:
-{user_question}
-
-Retorne JSON estrito (apenas JSON) no formato:
-{{
-  "answer": "resposta final, curta e útil (tom da Zoe)",
-  "confidence": 0-100,
-  "missing": ["o que faltou nas fontes (opcional)"],
-  "used_sources": [
-    {{"title": "título", "url": "url", "note": "o que essa fonte sustenta"}}
-  ]
-}}
-
-Dica: Se não tiver fonte confiável, coloque confidence baixo e explique no campo answer.
-""".strip()
-
-    try:
-        resp = client.chat.completions.create(
-            model=MODEL_ID,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-            response_format={"type": "json_object"},
-        ).choices[0].message.content
-        data = json.loads(resp)
-        return data if isinstance(data, dict) else {}
-    except Exception:
-        return {}
-
-def _render_web_json(data: dict) -> str:
-    """Transforma o JSON do LLM em texto final (com fontes)."""
-    data = data if isinstance(data, dict) else {}
-    ans = (data.get("answer") or "").strip()
-    used = data.get("used_sources") or []
-    conf = data.get("confidence")
-    missing = data.get("missing") or []
-
-    # fallback seguro
-    if not ans:
-        ans = "Achei alguns resultados, mas não ficou confiável o suficiente pra eu cravar 😅"
-
-    lines = [ans]
-
-    # se ficou incerto, deixa explícito (sem drama)
-    try:
-        if isinstance(conf, (int, float)) and float(conf) < 55:
-            lines.append("\n⚠️ *Tô com confiança baixa porque as fontes vieram fracas/contraditórias.*")
-    except Exception:
-        pass
-
-    if missing:
-        # 1-2 itens só, pra não virar textão
-        miss = "; ".join([str(x) for x in missing[:2] if str(x).strip()])
-        if miss:
-            lines.append(f"\n🧩 Faltou nas fontes: {miss}")
-
-    # fontes
-    cleaned = []
-    for it in used[:3]:
-        if not isinstance(it, dict):
-            continue
-        title = (it.get("title") or "Fonte").strip()
-        url = (it.get("url") or "").strip()
-        if url:
-            cleaned.append(f"- [{title}]({url})")
-    if cleaned:
-        lines.append("\n**Fontes:**\n" + "\n".join(cleaned))
-
-    return "\n".join(lines).strip()
-
-def ouvir_audio(uploaded_file):
-    try:
-        b = uploaded_file.getvalue()
-        return client.audio.transcriptions.create(
-            file=("audio.wav", b, "audio/wav"),
-            model="whisper-large-v3",
-            response_format="text",
-            language="pt",
-        )
-    except Exception:
-        return None
-
-def falar_bytes(texto: str):
-    try:
-        out = f"tts_{uuid.uuid4().hex[:5]}.mp3"
-        asyncio.run(edge_tts.Communicate(texto, "pt-BR-FranciscaNeural").save(out))
-        b = open(out, "rb").read()
-        os.remove(out)
-        return b
-    except Exception:
-        return None
-# =========================
-# FINANÇAS (cotação/dividendos) - via API (sem "alucinação" de web)
-# =========================
-def _get_secret(name: str, default=None):
-    try:
-        return st.secrets.get(name, default)
-    except Exception:
-        return default
-
-
-# =========================
-# FINANCE (cotações)
-# =========================
-_B3_TICKER_RE = re.compile(r"^[A-Z]{4}\d{1,2}$")
-
-def _is_b3_ticker(ticker: str) -> bool:
-    t = (ticker or "").strip().upper()
-    return bool(_B3_TICKER_RE.match(t))
-
-def _to_yahoo_symbol(ticker: str) -> str:
-    """Converte ticker B3 (ex: KNCR11) -> símbolo Yahoo (ex: KNCR11.SA)."""
-    t = (ticker or "").strip().upper()
-    if not t:
-        return ""
-    if t.endswith(".SA"):
-        return t
-    # padrão B3 (ações/FIIs) costuma usar sufixo .SA no Yahoo
-    if _is_b3_ticker(t):
-        return f"{t}.SA"
-    return t
-
-def fetch_yahoo_quote(ticker: str) -> dict:
-    """Consulta cotação direta no Yahoo Finance (sem chave)."""
-    symbol = _to_yahoo_symbol(ticker)
-    if not symbol:
-        return {}
-
-    headers = {
-        "User-Agent": "Mozilla/5.0",
-        "Accept": "application/json,text/plain,*/*",
-    }
-
-    # Tenta endpoint de quote primeiro (mais leve), depois chart (tem meta também).
-    urls = [
-        f"https://query1.finance.yahoo.com/v7/finance/quote?symbols={symbol}",
-        f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?interval=1m&range=1d",
-    ]
-
-    last_err = None
-    for url in urls:
-        try:
-            r = requests.get(url, headers=headers, timeout=8)
-            if r.status_code != 200:
-                last_err = f"HTTP {r.status_code}"
-                continue
-            j = r.json() if r.content else {}
-            if "quoteResponse" in j:
-                items = (j.get("quoteResponse") or {}).get("result") or []
-                it = items[0] if items else {}
-                if isinstance(it, dict) and it.get("regularMarketPrice") is not None:
-                    it["_provider"] = "yahoo"
-                    it["_symbol"] = symbol
-                    return it
-            if "chart" in j:
-                res = (((j.get("chart") or {}).get("result") or [])[:1] or [{}])[0] or {}
-                meta = res.get("meta") or {}
-                if isinstance(meta, dict) and meta.get("regularMarketPrice") is not None:
-                    out = dict(meta)
-                    out["_provider"] = "yahoo"
-                    out["_symbol"] = symbol
-                    return out
-            last_err = "payload vazio"
-        except Exception as e:
-            last_err = str(e)
-
-    return {"_error": f"yahoo_fail:{last_err}"}
-
-def fetch_brapi_quote(ticker: str) -> dict:
-    """Consulta cotação via brapi.dev (usa dados do Yahoo)."""
-    ticker = (ticker or "").strip().upper()
-    if not ticker:
-        return {}
-    token = os.environ.get("BRAPI_TOKEN") or _get_secret("BRAPI_TOKEN", None)
-
-    # brapi costuma aceitar tanto 'KNCR11' quanto 'KNCR11.SA' — tenta ambos
-    candidates = []
-    if ticker:
-        candidates.append(ticker)
-    if _is_b3_ticker(ticker):
-        candidates.append(f"{ticker}.SA")
-    if ticker.endswith(".SA") and _is_b3_ticker(ticker[:-3]):
-        candidates.append(ticker[:-3])
-
-    headers = {"User-Agent": "Mozilla/5.0", "Accept": "application/json"}
-
-    last_err = None
-    for tk in list(dict.fromkeys([c for c in candidates if c])):  # dedupe preservando ordem
-        url = f"https://brapi.dev/api/quote/{tk}"
-        params = {"range": "1d", "interval": "1d"}
-        if token:
-            params["token"] = token
-        try:
-            r = requests.get(url, params=params, headers=headers, timeout=8)
-            if r.status_code != 200:
-                last_err = f"HTTP {r.status_code}"
-                continue
-            j = r.json() if r.content else {}
-            res = (j.get("results") or [])
-            if not res:
-                last_err = "results vazio"
-                continue
-            it = res[0] or {}
-            if isinstance(it, dict) and it:
-                it["_provider"] = "brapi"
-                it["_symbol"] = tk
-                return it
-            last_err = "item inválido"
-        except Exception as e:
-            last_err = str(e)
-
-    return {"_error": f"brapi_fail:{last_err}"}
-
-def fetch_finance_quote(ticker: str) -> dict:
-    """Tenta cotação por múltiplas fontes (prioriza Yahoo direto, depois brapi)."""
-    # 1) Yahoo direto (normalmente mais estável do que depender de token da brapi)
-    q = fetch_yahoo_quote(ticker)
-    if q and not q.get("_error") and q.get("regularMarketPrice") is not None:
-        return q
-
-    # 2) brapi
-    q2 = fetch_brapi_quote(ticker)
-    if q2 and not q2.get("_error") and q2.get("regularMarketPrice") is not None:
-        return q2
-
-    # 3) se ambos falharam, devolve o erro mais útil
-    if q and q.get("_error"):
-        return q
-    if q2 and q2.get("_error"):
-        return q2
-    return {}
-
-
-
-def local_ticker_info_answer(ticker: str) -> str:
-    """Respostas locais (sem web) para tickers bem conhecidos — evita busca ruim."""
-    t = (ticker or "").strip().upper()
-    if t == "KNCR11":
-        return (
-            "**KNCR11** é o ticker do FII **Kinea Rendimentos Imobiliários** (B3).\n\n"
-            "- Tipo: geralmente classificado como **fundo de papel** (focado em crédito).\n"
-            "- Onde investe: majoritariamente em **CRIs** (Certificados de Recebíveis Imobiliários) e instrumentos de renda fixa ligados ao mercado imobiliário.\n"
-            "- Como costuma gerar rendimento: juros/recebíveis desses títulos (e pode variar com inflação/juros, dependendo do portfólio).\n\n"
-            "Se você me disser o que você quer analisar (risco, dividendos, preço, comparação com outro FII), eu direciono certinho."
-        )
-    return f"Esse ticker (**{t}**) parece ser da B3, mas eu precisaria pesquisar pra te dar a descrição exata sem chutar."
-
-def _fmt_money(v) -> str:
-    try:
-        return f"R$ {float(v):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    except Exception:
-        return "—"
-
-
-def format_quote_answer(ticker: str, quote: dict) -> str:
-    """Monta resposta humaninha da cotação."""
-    ticker = (ticker or "").strip().upper()
-
-    # erros / vazio
-    if not quote or (isinstance(quote, dict) and quote.get("_error") and quote.get("regularMarketPrice") is None):
-        return (
-            f"Não consegui puxar a cotação de **{ticker}** agora 😅 "
-            "(pode ser instabilidade/limite na fonte). Tenta de novo em alguns segundos."
-        )
-
-    price = quote.get("regularMarketPrice") or quote.get("price") or quote.get("regularMarketLastPrice")
-    change_pct = quote.get("regularMarketChangePercent") or quote.get("changePercent")
-    upd = quote.get("regularMarketTime") or quote.get("updatedAt")  # epoch ou string
-    name = quote.get("longName") or quote.get("shortName") or quote.get("name") or ticker
-
-    # horário (se vier em epoch)
-    upd_txt = ""
-    try:
-        if isinstance(upd, (int, float)) and upd > 10_000:
-            dt = datetime.fromtimestamp(float(upd), tz=FUSO_BR)
-            upd_txt = dt.strftime("%d/%m %H:%M")
-        elif isinstance(upd, str) and upd:
-            upd_txt = str(upd)
-    except Exception:
-        upd_txt = ""
-
-    provider = (quote.get("_provider") or "").lower()
-    footer = ""
-    if provider == "yahoo":
-        footer = "📌 *Dados via Yahoo Finance (consulta direta).*"
-
-    elif provider == "brapi":
-        footer = "📌 *Dados via brapi.dev (Yahoo Finance).*"
-
-    else:
-        footer = "📌 *Dados via fonte externa.*"
-
-
-    parts = [f"💹 **{ticker}** ({name}) tá em **{_fmt_money(price)}**"]
-    try:
-        if isinstance(change_pct, (int, float)):
-            parts.append(f"({float(change_pct):+.2f}% no dia)")
-    except Exception:
-        pass
-    if upd_txt:
-        parts.append(f"• atualizado {upd_txt}")
-    return (" ".join(parts).strip() + "\n\n" + footer).strip()
-
-
-
-def fetch_brapi_dividends_hint(ticker: str) -> dict:
-    """Tenta obter alguma info de dividendos (se a API fornecer)."""
-    q = fetch_brapi_quote(ticker)
-    # dependendo do payload, isso pode existir
-    div = q.get("dividendsData") or q.get("dividends") or {}
-    if isinstance(div, dict) and div:
-        return {"quote": q, "div": div}
-    return {"quote": q, "div": {}}
-
-
-
-# =========================
-# PROACTIVE ALERT
-# =========================
-def pick_due_task(tarefas: list, agora: datetime) -> Optional[dict]:
-    if em_horario_silencioso(agora):
-        return None
-    candidates = []
-    for t in tarefas:
-        if t.get("status") == "silenciada":
-            continue
-        try:
-            nr = parse_dt(t.get("next_remind_at") or t["data_hora"])
-            if agora >= nr:
-                diff = (agora - parse_dt(t["data_hora"])).total_seconds() / 60
-                candidates.append((diff, t))
-        except Exception:
-            continue
-    if candidates:
-        candidates.sort(key=lambda x: x[0], reverse=True)
-        return candidates[0][1]
-    return None
-
-def schedule_next(agora: datetime, t: dict) -> dict:
-    t = dict(t)
-    t["remind_count"] = t.get("remind_count", 0) + 1
-    t["snoozed_until"] = None
-    if t["remind_count"] >= len(REMINDER_SCHEDULE_MIN):
-        t["status"] = "silenciada"
-        t["next_remind_at"] = format_dt(agora + timedelta(days=365))
-    else:
-        mins = REMINDER_SCHEDULE_MIN[t["remind_count"]]
-        t["next_remind_at"] = format_dt(agora + timedelta(minutes=mins))
-    return t
-
-
-# =========================
-# REFRESH LOOP
+# TAREFAS (carregadas a cada rerun do app)
 # =========================
 agora = now_floor_minute()
 _raw_tarefas = carregar_tarefas()
 tarefas = [normalizar_tarefa(t) for t in _raw_tarefas]
 # Regrava só se mudou (evita escrita desnecessária + reduz chance de colisão em reruns)
 if tarefas != _raw_tarefas or (not os.path.exists(tarefas_path())):
-    salvar_tarefas(tarefas)
+    tarefas = atualizar_tarefas(_normalizar_lista)
+settings = st.session_state.settings
+perf.lap("tarefas")
 
 # =========================
-# ROTINAS PROATIVAS (sem mexer no seu sistema de tarefas)
+# NOTIFICAÇÕES PENDENTES (rotinas/alertas enfileiram; o corpo do app mostra)
 # =========================
-settings = st.session_state.settings
-daily_state = st.session_state.daily_state
-today = today_key(agora)
-
-# 1) Briefing matinal (uma vez por dia)
-if settings.get("briefing_enabled", True) and not em_horario_silencioso(agora) and same_minute(agora, settings.get("briefing_time","07:00")):
-    if st.session_state.briefing_sent != today:
-        msg = build_briefing(settings, tarefas, agora)
-        enviar_telegram(msg)
-        browser_notify("Briefing Matinal", "Te mandei o briefing do dia ✅")
-        add_event("briefing", msg)
-        st.session_state.briefing_sent = today
-        daily_state["briefing_sent"] = today
-        save_daily_state(daily_state)
-
-# 2) Lembretes inteligentes (clima) — sem duplicar com tarefas
-if settings.get("smart_enabled", True) and not em_horario_silencioso(agora):
-    # tenta pegar clima se tiver lat/lon
-    w = None
-    if settings.get("lat") is not None and settings.get("lon") is not None:
-        w = fetch_weather(settings["lat"], settings["lon"])
-
-    flags = dict(st.session_state.smart_flags or {})
-    flags.setdefault(today, {})
-
-    if w:
-        rain_prob = w.get("rain_prob")
-        tmax = w.get("temp_max")
-
-        # Guarda-chuva no horário de sair
-        if isinstance(rain_prob, (int, float)) and rain_prob >= int(settings.get("rain_threshold", 60)):
-            if same_minute(agora, settings.get("leave_time","07:20")) and not flags[today].get("umbrella"):
-                m = f"☂️ Chuva forte na previsão hoje ({int(rain_prob)}%). Se for sair agora, leva guarda-chuva/jaqueta 😄"
-                enviar_telegram(m)
-                browser_notify("Lembrete (clima)", "Chance alta de chuva — guarda-chuva!")
-                add_event("smart_reminder", m)
-                flags[today]["umbrella"] = True
-
-        # Hidratação ao meio-dia se calor
-        if isinstance(tmax, (int, float)) and tmax >= int(settings.get("heat_threshold", 30)):
-            if same_minute(agora, "12:00") and not flags[today].get("water"):
-                m = f"💧 Hoje tá pra {round(tmax)}°C. Água agora = menos sofrimento depois 😅"
-                enviar_telegram(m)
-                browser_notify("Lembrete (saúde)", "Calor forte — água!")
-                add_event("smart_reminder", m)
-                flags[today]["water"] = True
-
-    st.session_state.smart_flags = flags
-    daily_state["smart_flags"] = flags
-    save_daily_state(daily_state)
-
-# 3) Fechamento diário (uma vez por dia)
-if settings.get("closing_enabled", True) and same_minute(agora, settings.get("closing_time","21:30")):
-    if st.session_state.closing_sent != today:
-        m = build_closing_prompt(agora)
-        enviar_telegram(m)
-        browser_notify("Fechamento do dia", "Me conta rapidinho como foi seu dia ✅")
-        add_event("closing_prompt", m)
-        st.session_state.closing_sent = today
-        st.session_state.awaiting_closing = True
-        daily_state["closing_sent"] = today
-        daily_state["awaiting_closing"] = True
-        save_daily_state(daily_state)
+if "pending_notifications" not in st.session_state:
+    st.session_state.pending_notifications = []
 
+def notificar(title: str, body: str, tag: str = "") -> None:
+    st.session_state.pending_notifications.append((title, body, tag))
 
-tarefa_alertada = pick_due_task(tarefas, agora)
-if tarefa_alertada:
-    next_at = tarefa_alertada.get("next_remind_at") or tarefa_alertada.get("data_hora")
-    fp = f"{tarefa_alertada['id']}::{next_at}"
 
-    if st.session_state.last_alert_fingerprint != fp:
-        st.session_state.last_alert_fingerprint = fp
+# =========================
+# TICK (st.fragment): rotinas + alerta de tarefa, sem rerodar chat/sidebar
+# =========================
+# A cada AUTO_REFRESH_MS só este fragmento roda. Se algo disparou (mensagem no chat, notificação,
+# áudio), pede um rerun do app inteiro pra tela refletir. No rerun normal ele roda junto, inline.
+# Custo por tick: "total:tick" no painel ⚙️ Performance (antes era "total:rerun" a cada 10s).
+@st.fragment(run_every=AUTO_REFRESH_MS / 1000)
+def tick(tarefas: list) -> list:
+    # no tick isolado os argumentos são os do último rerun do app: relê as tarefas do disco
+    usuario.definir(st.session_state.usuario)
+    tick_prof = None if perf.current() else perf.RerunProfiler(kind="tick")
+    agora = now_floor_minute()
+    if tick_prof is not None:
+        tarefas = [normalizar_tarefa(t) for t in carregar_tarefas()]
+        perf.lap("tarefas")
+    notificacoes_antes = len(st.session_state.pending_notifications)
+    fp_antes = st.session_state.last_alert_fingerprint
+
+    # =========================
+    # ROTINAS PROATIVAS (sem mexer no seu sistema de tarefas)
+    # =========================
+    settings = st.session_state.settings
+    daily_state = st.session_state.daily_state
+
+    # Manutenção da memória longa (throttled no próprio banco; quase sempre só 1 SELECT)
+    run_memory_maintenance(settings)
+    perf.lap("manutencao")
+    # briefing, guarda-chuva, água, fechamento: vencem por prazo (ver assistente/agendador.py)
+    saiu = agendador.rodar_vencidas({
+        "settings": settings, "agora": agora, "tarefas": tarefas,
+        "daily_state": daily_state, "notificar": notificar,
+    })
+    if "closing" in saiu:
+        st.session_state.awaiting_closing = True
 
-        mensagem_alerta = (
-            f"🔔 **Ei! Lembrete na área:** {tarefa_alertada['descricao']}\n\n"
-            f"⏰ **{tarefa_alertada['data_hora']}**"
+    perf.lap("rotinas")
+
+    # todas as vencidas de uma vez: uma mensagem, uma notificação, um TTS, uma gravação
+    vencidas = tarefas_vencidas(tarefas, agora)
+    perf.lap("tarefas_vencidas")
+    if vencidas:
+        fp = "|".join(f"{t['id']}::{t.get('next_remind_at') or t.get('data_hora')}" for t in vencidas)
+
+        if st.session_state.last_alert_fingerprint != fp:
+            st.session_state.last_alert_fingerprint = fp
+            # outra aba/worker já disparou alguma? então só vão as que esta sessão reivindicou
+            minhas = set(despacho.reivindicar_varios([despacho.chave_tarefa(t) for t in vencidas], "app"))
+            lote = [t for t in vencidas if despacho.chave_tarefa(t) in minhas]
+            if lote:
+                msg = build_lembretes(lote, agora)
+                chat_add("assistant", msg["chat"])
+
+                tag = f"{lote[0]['id']}::{lote[0].get('next_remind_at') or lote[0].get('data_hora')}" if len(lote) == 1 \
+                    else f"lote::{format_dt(agora)}"
+                notificar(msg["titulo"], msg["corpo"], tag=tag)
+                enviar_telegram(msg["telegram"], chat_do_usuario(settings))
+
+                b = falar_bytes(msg["fala"])
+                if b:
+                    st.session_state.last_audio_bytes = b
+
+                tarefas = atualizar_tarefas(reagendar_lote(lote, agora))
+                add_event("alert", "Disparado: " + " | ".join(t["descricao"] for t in lote))
+    perf.lap("alerta")
+
+    if tick_prof is not None:
+        novidade = (
+            len(st.session_state.pending_notifications) != notificacoes_antes
+            or st.session_state.last_alert_fingerprint != fp_antes
         )
+        tick_prof.finish()
+        if novidade:
+            st.rerun()
+    return tarefas
 
-        chat_add("assistant", mensagem_alerta)
+tarefas = tick(tarefas) or tarefas
 
-        browser_notify("Lembrete", tarefa_alertada["descricao"])
-        enviar_telegram(f"🔔 *ALERTA*: {tarefa_alertada['descricao']}\n⏰ {tarefa_alertada['data_hora']}")
+# notificações do navegador enfileiradas pelo tick (ou por este rerun)
+for _title, _body, _tag in st.session_state.pending_notifications:
+    browser_notify(_title, _body, _tag)
+st.session_state.pending_notifications = []
 
-        b = falar_bytes("Atenção, você tem um lembrete.")
-        if b:
-            st.session_state.last_audio_bytes = b
-
-        updated = schedule_next(agora, tarefa_alertada)
-        tarefas = [updated if x["id"] == tarefa_alertada["id"] else x for x in tarefas]
-        salvar_tarefas(tarefas)
-        add_event("alert", f"Disparado: {tarefa_alertada['descricao']}")
 
+# =========================
+# TIMERS NO NAVEGADOR (próximos lembretes + horários das rotinas)
+# =========================
+# O navegador recebe [[epoch_ms, tag, título, corpo], ...] e, na hora exata, mostra a notificação
+# e clica o botão escondido "zoe_wake" → rerun do app, que dispara o alerta de verdade (chat,
+# Telegram, TTS, schedule_next). Rotina entra sem título: só acorda o servidor no minuto certo.
+# Mesmo agendamento → mesmo HTML → o iframe não é recriado e os timers seguem rodando.
+_agenda_js = [
+    [int(x["at"].timestamp() * 1000), x["tag"], "Lembrete", x["descricao"]]
+    for x in proximos_lembretes(tarefas, agora, CLIENT_TIMERS_MAX, CLIENT_TIMERS_HORIZON_H)
+] + [
+    [int(dt.timestamp() * 1000), "", "", ""]
+    for dt in agendador.proximos_prazos(settings, agora)
+    if dt <= agora + timedelta(hours=CLIENT_TIMERS_HORIZON_H)
+]
+components.html(
+    f"""<script>
+    (function(){{
+      const w = window.parent;
+      const agenda = {json.dumps(sorted(_agenda_js), ensure_ascii=False)};
+      (w.__zoeTimers || []).forEach((id) => w.clearTimeout(id));
+      w.__zoeTimers = [];
+      function wake(){{
+        const doc = w.document;
+        const b = doc.querySelector('.st-key-zoe_wake button')
+          || [...doc.querySelectorAll('button')].find((x) => x.innerText.trim() === "⏰");
+        if (b) b.click();
+      }}
+      agenda.forEach(([at, tag, title, body]) => {{
+        const ms = at - Date.now() + {CLIENT_TIMER_SLACK_MS};
+        if (ms < 0 || ms > 2147483647) return;
+        w.__zoeTimers.push(w.setTimeout(() => {{
+          try {{
+            if (title && 'Notification' in w && w.Notification.permission === 'granted') {{
+              new w.Notification(title, {{ body: body, tag: tag || undefined }});
+            }}
+          }} catch(e) {{}}
+          wake();
+        }}, ms));
+      }});
+    }})();
+    </script>""",
+    height=0,
+)
+st.button("⏰", key="zoe_wake")  # escondido no CSS; clicado pelos timers acima
 
 
 # =========================
 # TOPBAR (hamburger + avatar)
 # =========================
-_avatar_uri = load_avatar_data_uri(st.session_state.settings)
+_avatar_uri = load_avatar_src(st.session_state.settings, static=estatico.servindo())
 _avatar_html = (
     f'<div class="avatar"><img src="{_avatar_uri}" alt="avatar"></div>'
     if _avatar_uri else f'<div class="avatar-fallback">{ASSISTANT_NAME[:1].upper()}</div>'
 )
+perf.lap("avatar")
 
 _topbar_html = f'''
 <div class="topbar">
@@ -2128,7 +488,7 @@ _topbar_html = f'''
 </div>
 '''
 st.markdown(_topbar_html, unsafe_allow_html=True)
-
+perf.lap("topbar")
 
 
 # =========================
@@ -2156,10 +516,10 @@ with st.sidebar:
                 st.session_state.settings = save_uploaded_avatar(up, st.session_state.settings)
                 save_settings(st.session_state.settings)
                 st.toast("Avatar salvo ✅")
-                st.rerun()
+                rerun("sidebar")
 
         cur = (st.session_state.settings or {}).get("avatar_path") or "avatar.png"
-        if os.path.exists(cur):
+        if os.path.exists(usuario.caminho(cur)):
             st.caption(f"Atual: `{cur}`")
 
     # ===== Ações rápidas =====
@@ -2167,12 +527,15 @@ with st.sidebar:
     with colA:
         if st.button("🔔 Teste", use_container_width=True, help="Teste Telegram + notificação do navegador"):
             request_notification_permission()
-            enviar_telegram(f"Teste de notificação da {ASSISTANT_NAME}! 🤖")
+            enviar_telegram(f"Teste de notificação da {ASSISTANT_NAME}! 🤖", chat_do_usuario(st.session_state.settings))
             st.toast("Teste enviado (Telegram + Browser).")
     with colB:
         if st.button("🧹 Áudio", use_container_width=True, help="Limpa o cache do último TTS"):
             st.session_state.last_audio_bytes = None
             st.toast("Cache de áudio limpo.")
+    _fila_tg = telegram_fila_status()
+    if _fila_tg.get("pendente") or _fila_tg.get("falhou"):
+        st.caption(f"Telegram: {_fila_tg.get('pendente', 0)} na fila, {_fila_tg.get('falhou', 0)} com falha")
 
     if st.session_state.last_audio_bytes:
         st.caption("Último áudio (TTS)")
@@ -2185,6 +548,10 @@ with st.sidebar:
         s = dict(st.session_state.settings)
 
         s["city_name"] = st.text_input("Cidade (para clima)", value=s.get("city_name","Ilhéus, BA"))
+        s["telegram_chat_id"] = st.text_input(
+            "Chat do Telegram (id)", value=str(s.get("telegram_chat_id") or ""),
+            help="Pra onde vão briefing, lembretes e fechamento. Vazio: só o usuário padrão usa o chat dos segredos.",
+        ).strip()
         c1, c2 = st.columns(2)
         with c1:
             s["briefing_enabled"] = st.toggle("Briefing matinal", value=bool(s.get("briefing_enabled", True)))
@@ -2219,7 +586,7 @@ with st.sidebar:
                 st.session_state.settings = dict(s)
                 save_settings(st.session_state.settings)
                 st.toast("Configurações salvas ✅")
-                st.rerun()
+                rerun("sidebar")
 
         if s.get("lat") is not None and s.get("lon") is not None:
             st.caption(f"Lat/Lon: {float(s['lat']):.3f}, {float(s['lon']):.3f}")
@@ -2232,37 +599,41 @@ with st.sidebar:
             st.caption("Vazia.")
         else:
             for t in sorted(tarefas, key=lambda x: x.get("data_hora", ""))[:12]:
-                st.write(f"• **{t.get('data_hora','')}** — {t.get('descricao','')[:80]}")
+                rec = f" · 🔁 {descrever_recorrencia(t['recorrencia'])}" if t.get("recorrencia") else ""
+                st.write(f"• **{t.get('data_hora','')}** — {t.get('descricao','')[:80]}{rec}")
 
     with st.expander("✅ Gerenciar tarefas", expanded=False):
         tarefas = [normalizar_tarefa(t) for t in carregar_tarefas()]
-        salvar_tarefas(tarefas)
 
         if not tarefas:
             st.info("Sem tarefas.")
         else:
             for t in sorted(tarefas, key=lambda x: x.get("data_hora", ""))[:25]:
-                st.write(f"**{t.get('data_hora','')}** — {t.get('descricao','')}")
+                rec = f" · 🔁 {descrever_recorrencia(t['recorrencia'])}" if t.get("recorrencia") else ""
+                st.write(f"**{t.get('data_hora','')}** — {t.get('descricao','')}{rec}")
                 c1, c2, c3 = st.columns(3)
-                if c1.button("✅", key=f"done_{t['id']}", help="Feito"):
-                    tarefas = [x for x in tarefas if x["id"] != t["id"]]
-                    salvar_tarefas(tarefas)
+                if c1.button("✅", key=f"done_{t['id']}", help="Feito (recorrente: vai pra próxima)"):
+                    tarefas = atualizar_tarefas(alterar_por_id(t["id"], lambda x: concluir_tarefa(x, now_floor_minute())))
                     update_summary_with_llm(f"Concluiu: {t['descricao']}")
                     add_event("task_done", f"Feito: {t['descricao']}")
-                    st.rerun()
+                    rerun("sidebar")
                 if c2.button("💤", key=f"sno_{t['id']}", help="Soneca +30min"):
-                    t["next_remind_at"] = format_dt(now_floor_minute() + timedelta(minutes=30))
-                    t["snoozed_until"] = t["next_remind_at"]
-                    t["remind_count"] = 0
-                    salvar_tarefas(tarefas)
+                    def _soneca(x):
+                        x["next_remind_at"] = format_dt(now_floor_minute() + timedelta(minutes=30))
+                        x["snoozed_until"] = x["next_remind_at"]
+                        x["remind_count"] = 0
+                        return x
+                    tarefas = atualizar_tarefas(alterar_por_id(t["id"], _soneca))
                     add_event("task_snooze", f"Soneca: {t['descricao']} +30min")
-                    st.rerun()
+                    rerun("sidebar")
                 if c3.button("🔕", key=f"sil_{t['id']}", help="Silenciar"):
-                    t["status"] = "silenciada"
-                    t["next_remind_at"] = format_dt(now_floor_minute() + timedelta(days=365))
-                    salvar_tarefas(tarefas)
+                    def _silenciar(x):
+                        x["status"] = "silenciada"
+                        x["next_remind_at"] = format_dt(now_floor_minute() + timedelta(days=365))
+                        return x
+                    tarefas = atualizar_tarefas(alterar_por_id(t["id"], _silenciar))
                     add_event("task_silence", f"Silenciada: {t['descricao']}")
-                    st.rerun()
+                    rerun("sidebar")
                 st.divider()
 
     # ===== Memória =====
@@ -2285,13 +656,28 @@ with st.sidebar:
                         st.write(content)
                         st.divider()
 
+    # ===== Performance (p50/p95 por fase do rerun) =====
+    with st.expander("⚙️ Performance", expanded=False):
+        st.caption(f"Este rerun até aqui: {_prof.total_ms():.0f}ms • mesma tabela no chat com /stats")
+        if st.toggle("Mostrar estatísticas", key="perf_show"):
+            st.markdown(perf.format_perf_stats(perf.perf_stats()))
+            slow = perf.slowest_runs(3)
+            if slow:
+                st.caption("Reruns mais lentos (e a fase mais cara):")
+                for ts, _, total, fase, ms in slow:
+                    flag = "🐢 " if total >= perf.PERF_SLOW_RERUN_MS else ""
+                    st.caption(f"{flag}{ts} • {total:.0f}ms • `{fase}` {ms:.0f}ms")
+            st.caption("Chamadas ao LLM (últimos 7 dias):")
+            st.markdown(telemetria.format_llm_stats(telemetria.llm_stats(), telemetria.llm_daily()))
+
     st.divider()
     if st.button("🗑️ Limpar chat", use_container_width=True):
-        ensure_chat_day_is_today()
+        st.session_state.chat_day, st.session_state.last_chat_storage_error = storage.limpar_chat()
         st.session_state.memoria = []
-        save_chat_history(st.session_state.chat_day, st.session_state.memoria)
         st.toast("Chat limpo.")
-        st.rerun()
+        rerun("sidebar")
+
+perf.lap("sidebar")
 
 # =========================
 # CHAT (ÚNICA COISA NA TELA PRINCIPAL)
@@ -2309,6 +695,9 @@ for m in st.session_state.memoria[-24:]:
             st.caption("💹 Usei cotação via brapi.dev (Yahoo Finance).")
 
 
+perf.lap("chat_render")
+
+
 # =========================
 # INPUT: texto (fixo) + mic colado na barra
 # =========================
@@ -2326,6 +715,7 @@ if audio_val:
         if transcrito:
             texto_input = str(transcrito).strip()
             usou_voz = True
+perf.lap("input")
 
 
 # =========================
@@ -2362,287 +752,30 @@ if st.session_state.pending_input:
         add_event("chat_user", user_txt)
         st.session_state.pending_user_added = True
 
-    # Recarrega tarefas (garante consistência)
-    tarefas = [normalizar_tarefa(t) for t in carregar_tarefas()]
-    salvar_tarefas(tarefas)
-
-
-web_used = False
-weather_used = False
-finance_used = False
-resp_txt = ""
 
 # =========================
-# FECHAMENTO DIÁRIO (captura resposta do usuário)
+# TURNO (assistente/pipeline.py — o mesmo do bot e da API)
 # =========================
-# A LÓGICA AGORA SÓ EXECUTA SE TIVER TEXTO DO USUÁRIO
 if user_txt:
-    # 1. Comando manual
-    if user_txt.strip().lower().startswith("/fechamento"):
-        st.session_state.awaiting_closing = True
-        st.session_state.daily_state["awaiting_closing"] = True
-        save_daily_state(st.session_state.daily_state)
-        resp_txt = build_closing_prompt(now_floor_minute())
-        chat_add("assistant", resp_txt)
-        add_event("closing_prompt_manual", resp_txt)
-        clear_pending()
-        st.rerun()
-    # 2. Resposta de fechamento (se pendente)
-    elif st.session_state.awaiting_closing and not user_txt.strip().startswith("/"):
-        add_event("daily_review", user_txt)
-        update_summary_with_llm(f"Fechamento do dia: {user_txt}")
-        st.session_state.awaiting_closing = False
-        st.session_state.daily_state["awaiting_closing"] = False
-        save_daily_state(st.session_state.daily_state)
-        resp_txt = "Fechou 😄 Registrei teu fechamento de hoje. Amanhã eu já ajusto o teu briefing/lembretes com base nisso."
-        chat_add("assistant", resp_txt)
-        add_event("chat_assistant", resp_txt)
-        clear_pending()
-        st.rerun()
-    # 3. Lógica Normal (ELSE) - só roda se não caiu nos anteriores
-    else:
-        # Atalho determinístico: hora / data / memória de curto prazo
-        tnorm = limpar_texto(user_txt)
-
-        if is_time_question(tnorm):
-            agora_br = now_br()
-            resp_txt = f"Agora no Brasil são **{agora_br.strftime('%H:%M')}** ({agora_br.strftime('%d/%m/%Y')})."
-            chat_add("assistant", resp_txt)
-            add_event("chat_assistant", resp_txt)
-            clear_pending()
-            st.rerun()
-        if is_date_question(tnorm):
-            agora_br = now_br()
-            wd = _WEEKDAY_PT[agora_br.weekday()]
-            resp_txt = f"Hoje é **{wd}**, **{agora_br.strftime('%d/%m/%Y')}**."
-            chat_add("assistant", resp_txt)
-            add_event("chat_assistant", resp_txt)
-            clear_pending()
-            st.rerun()
-        if is_memory_question(tnorm):
-            resp_txt = summarize_previous_user_messages(st.session_state.memoria, k=5)
-            chat_add("assistant", resp_txt)
-            add_event("chat_assistant", resp_txt)
-            clear_pending()
-            st.rerun()
-        with st.spinner(f"{ASSISTANT_NAME} tá pensando..."):
-            acao = decidir_acao(user_txt, tarefas, settings)
-
-            # Guarda-corpos: evita a Zoe criar/concluir tarefa sem o usuário pedir
-            if acao.get("action") == "TASK_CREATE" and not is_task_create_intent(tnorm):
-                # era pergunta, não tarefa
-                acao = {"action": "CHAT", "task_index": -1, "minutes": 0, "search_query": ""}
-
-            if acao.get("action") == "TASK_DONE" and not is_task_done_intent(tnorm):
-                # não pediu pra concluir nada
-                acao = {"action": "CHAT", "task_index": -1, "minutes": 0, "search_query": ""}
-
-            if acao.get("action") == "TASK_CREATE":
-                d = extrair_dados_tarefa(user_txt)
-                if d:
-                    d = normalizar_tarefa(d)
-                    tarefas.append(d)
-                    salvar_tarefas(tarefas)
-                    resp_txt = f"Fechou! ✅ Agendei **{d['descricao']}** pra **{d['data_hora']}**."
-                    add_event("task_create", resp_txt)
-                    update_summary_with_llm(f"Nova tarefa: {d['descricao']} @ {d['data_hora']}")
-                else:
-                    resp_txt = "Beleza… mas não peguei a data/hora 😅 Ex: *me lembra de X amanhã às 15:00*."
-
-            elif acao.get("action") == "LOCAL_TICKER_INFO":
-                ticker = (acao.get("ticker") or "").strip().upper()
-                resp_txt = local_ticker_info_answer(ticker)
-                add_event("ticker_info_local", ticker)
-
-            elif acao.get("action") == "FINANCE_QUOTE":
-                finance_used = True
-                ticker = (acao.get("ticker") or "").strip().upper()
-                quote = fetch_finance_quote(ticker)
-                resp_txt = format_quote_answer(ticker, quote)
-                add_event("finance_quote", f"{ticker}: {(quote or {}).get('regularMarketPrice')}")
-
-            elif acao.get("action") == "FINANCE_DIVIDENDS":
-                finance_used = True
-                ticker = (acao.get("ticker") or "").strip().upper()
-                pack = fetch_brapi_dividends_hint(ticker)
-                quote = (pack or {}).get("quote") or {}
-                div = (pack or {}).get("div") or {}
-
-                # Se a API não trouxer dividendos, não chuta — direciona pro /web ou pede o rendimento por cota
-                if not div:
-                    base = ""
-                    if quote:
-                        base = format_quote_answer(ticker, quote) + "\n\n"
-                    resp_txt = (
-                        base
-                        + f"Sobre **dividendos/rendimentos** de **{ticker}**: eu não consegui puxar isso da API agora (nem sempre vem no payload).\n"
-                        + "Pra eu calcular certinho quanto você vai receber e as datas, me manda o **rendimento por cota** do último mês (ex: `R$ 1,05/cota`) "
-                        + f"ou usa **/web** assim: `/web rendimento por cota e data de pagamento {ticker}`"
-                    )
-                else:
-                    resp_txt = f"Tenho alguns dados de dividendos pra **{ticker}**, mas a estrutura da API pode variar.\n\nSe você me disser quantas cotas você tem, eu calculo o total. 😉"
-                add_event("finance_dividends", ticker)
+    with st.spinner(f"{ASSISTANT_NAME} tá pensando..."):
+        st.session_state.daily_state["awaiting_closing"] = bool(st.session_state.awaiting_closing)
+        turno = processar_turno(user_txt, st.session_state.memoria, settings, st.session_state.daily_state)
+    st.session_state.awaiting_closing = bool(st.session_state.daily_state.get("awaiting_closing"))
+    tarefas = turno["tarefas"]
+    if turno["acao"] in ("TASK_CREATE", "TASK_DONE"):
+        st.session_state.last_storage_error = turno["erro_tarefas"]
+    if turno["web_query"]:
+        st.session_state.last_web_query = turno["web_query"]
+    chat_add("assistant", turno["texto"], **turno["flags"])
+
+    # Se veio de voz, TTS curtinho (opcional) — só nas respostas "de verdade", não em comandos/atalhos
+    if usou_voz_proc and turno["texto"] and turno["acao"] not in ("CLOSING_PROMPT", "STATS", "CLOSING_REVIEW", "SHORTCUT"):
+        b = falar_bytes(turno["texto"][:180])
+        if b:
+            st.session_state.last_audio_bytes = b
 
-            elif acao.get("action") == "WEB_SEARCH":
-                q = (acao.get("search_query") or "").strip()
+    clear_pending()
+    rerun()
 
-                # Se o usuário digitou só "/web" (sem consulta), não faz busca vazia.
-                if not q:
-                    resp_txt = "Manda o que você quer pesquisar depois do **/web** 😄\nEx: `/web previsão do tempo em Ilhéus`"
-                    add_event("web_search", "Q: (vazio)")
-                else:
-                    st.session_state.last_web_query = q
-
-                    # --- Busca com "boost" para tickers B3/FIIs ---
-                    ticker_guess = _extract_b3_ticker(q) or _extract_b3_ticker(user_txt)
-                    tnorm_q = limpar_texto(q)
-                    wants_ticker_info = bool(ticker_guess) and any(k in tnorm_q for k in [
-                        "o que e", "oq e", "o q e", "que e", "sobre", "significa", "defina", "explica",
-                        "fii", "fundo", "acao", "ação", "etf"
-                    ])
-
-                    def _results_look_relevant(res: list, ticker: str) -> bool:
-                        if not ticker or not res:
-                            return False
-                        tck = ticker.lower()
-                        for it in res:
-                            if not isinstance(it, dict):
-                                continue
-                            txt = f"{it.get('title','')} {it.get('content','')} {it.get('url','')}".lower()
-                            # bom sinal: menciona o ticker
-                            if tck in txt:
-                                return True
-                            # bom sinal: contexto Brasil/B3/FII
-                            if any(k in txt for k in ["fii", "fundo imobili", "b3", "bolsa", "cvm", "cri", "kinea", "rendimentos imobili"]):
-                                return True
-                        return False
-
-                    # 1ª tentativa
-                    results = buscar_tavily(q, max_results=5)
-
-                    # 2ª tentativa (só quando parece ticker e os resultados vieram nada a ver)
-                    if ticker_guess and wants_ticker_info and (not results or not _results_look_relevant(results, ticker_guess)):
-                        nome = ""
-                        try:
-                            qdata = fetch_brapi_quote(ticker_guess) or {}
-                            nome = (qdata.get("longName") or qdata.get("shortName") or qdata.get("companyName") or "").strip()
-                        except Exception:
-                            nome = ""
-                        q2 = f"{ticker_guess} {nome} FII fundo imobiliário B3 descrição".strip()
-                        q2 = re.sub(r"\s+", " ", q2)
-                        results2 = buscar_tavily(q2, max_results=5)
-                        if results2:
-                            results = results2
-                            st.session_state.last_web_query = q2
-
-                    if not results:
-                        resp_txt = "Não consegui puxar resultados confiáveis da web agora 😅 Tenta reformular a pergunta ou tentar daqui a pouco."
-                    else:
-                        web_used = True
-                        # Se foi /web, não deixa o '/web' contaminar a pergunta pro LLM
-                        question_for_llm = q if user_txt.strip().lower().startswith("/web") else user_txt
-                        data = _llm_answer_from_web(question_for_llm, results)
-                        resp_txt = _render_web_json(data) if data else "Achei umas fontes, mas deu ruim pra montar a resposta 😅"
-                    add_event("web_search", f"Q: {q}")
-
-
-            elif acao.get("action") == "WEATHER":
-                weather_used = True
-                city_req = (acao.get("city") or (settings.get("city_name") if settings else "") or "Ilhéus, BA").strip()
-                info = resolve_city_coords(settings, city_req)
-                # Cache: se for a cidade padrão e ainda não tem coords, salva pra evitar geocode toda hora
-                try:
-                    if info and settings and (settings.get("city_name","").strip().lower() == city_req.strip().lower()) and (settings.get("lat") is None or settings.get("lon") is None):
-                        settings["city_name"] = info["city"]
-                        settings["lat"] = info["lat"]
-                        settings["lon"] = info["lon"]
-                        save_settings(settings)
-                except Exception:
-                    pass
-                if not info:
-                    resp_txt = f"Não consegui achar **{city_req}** 😅 Me diz no formato tipo: *Ilhéus, BA* ou *São Paulo, SP*."
-                else:
-                    w = fetch_weather_days(info["lat"], info["lon"], days=2)
-                    if not w:
-                        resp_txt = "Deu ruim pra puxar a previsão agora 😅 Tenta de novo já já."
-                    else:
-                        resp_txt = format_weather_reply(info["city"], w, int(acao.get("day_offset") or 0))
-                add_event("weather", f"{city_req} / d+{int(acao.get('day_offset') or 0)}")
-
-            elif acao.get("action") == "TASK_DONE":
-                if tarefas:
-                    removida = tarefas.pop(0)
-                    salvar_tarefas(tarefas)
-                    resp_txt = f"Top! ✅ Marquei como feito: **{removida['descricao']}**."
-                    add_event("task_done", resp_txt)
-                    update_summary_with_llm(f"Concluiu: {removida['descricao']}")
-                else:
-                    resp_txt = "Não tem nada na agenda agora — tá suave 😄"
-
-            else:
-                # CHAT NORMAL
-                mems = search_memories(user_txt)
-                ctx_mem = "\n".join([m[2] for m in mems])
-                sys_prompt = f"""{ZOE_PERSONA}
-
-Informações do usuário (resumo vivo):
-{load_summary()}
-
-Contexto de memória (pode usar se for relevante):
-{ctx_mem}
-
-Regras rápidas:
-- Responda em PT-BR.
-- Seja direta e prática.
-- Use gírias leves e emojis às vezes.
-- Se a pergunta pedir algo que depende de dados atuais, sugira usar /web.
-""".strip()
-
-                msgs = [{"role": "system", "content": sys_prompt}] + to_llm_messages(st.session_state.memoria, limit=20)
-                try:
-                    resp_txt = client.chat.completions.create(
-                        model=MODEL_ID,
-                        messages=msgs,
-                        temperature=0.2
-                    ).choices[0].message.content
-                except Exception:
-                    resp_txt = "Ops, deu um errinho pra gerar a resposta agora 😅 Tenta de novo?"
-
-                # Auto-web: se a resposta ficou "não sei / usa /web", a Zoe pesquisa sozinha e volta com algo útil
-                if should_auto_web(user_txt, resp_txt):
-                    q = user_txt
-                    results = buscar_tavily(q, max_results=5)
-                    if results:
-                        web_used = True
-                        data = _llm_answer_from_web(user_txt, results)
-                        resp_txt = _render_web_json(data) if data else "Consegui buscar, mas deu ruim pra montar a resposta 😅 Tenta de novo?"
-                        add_event("web_search", f"Q: {q}")
-                    else:
-                        # sem resultado — mantém a resposta original
-                        pass
-
-        meta_flags = {}
-        if web_used:
-            meta_flags["web_used"] = True
-        if weather_used:
-            meta_flags["weather_used"] = True
-        if finance_used:
-            meta_flags["finance_used"] = True
-        chat_add("assistant", resp_txt, **meta_flags)
-        add_event("chat_assistant", resp_txt)
-
-        # Se veio de voz, TTS curtinho (opcional)
-        if usou_voz_proc and resp_txt:
-            b = falar_bytes(resp_txt[:180])
-            if b:
-                st.session_state.last_audio_bytes = b
-
-        clear_pending()
-
-        st.rerun()
-
-# =========================
-# AUTO-REFRESH (somente quando o app está ocioso, pra não interromper resposta)
-# =========================
-if not st.session_state.get("pending_input"):
-    st_autorefresh(interval=AUTO_REFRESH_MS, key="tick")
+perf.lap("turno")
+_prof.finish()
@@ -0,0 +1,82 @@
+// Sidebar como drawer (sem overlay bloqueando clique) — roda no documento do app
+(function(){
+  const doc = window.parent.document;
+
+  // limpeza de versões antigas (overlay que travava clique)
+  try {
+    const old = doc.getElementById('sb-overlay');
+    if (old) old.remove();
+  } catch(e) {}
+
+  function getSidebar(){
+    return doc.querySelector('section[data-testid="stSidebar"]');
+  }
+  function setDim(on){
+    doc.body.classList.toggle("sb-dim-on", !!on);
+  }
+
+  function openSidebar(){
+    const sb = getSidebar();
+    if (!sb){ setDim(false); return; }
+    sb.classList.add("sb-open");
+    setDim(true);
+  }
+
+  function closeSidebar(){
+    const sb = getSidebar();
+    if (sb) sb.classList.remove("sb-open");
+    setDim(false);
+  }
+
+  function isOpen(){
+    const sb = getSidebar();
+    return !!(sb && sb.classList.contains("sb-open"));
+  }
+
+  function toggleSidebar(){
+    if (isOpen()) closeSidebar();
+    else openSidebar();
+  }
+
+  function bindGlobalHandlers(){
+    if (doc.body.dataset.sbGlobalBound) return;
+    doc.body.dataset.sbGlobalBound = "1";
+
+    doc.addEventListener("keydown", (e) => {
+      if (e.key === "Escape") closeSidebar();
+    });
+
+    // Hamburger por delegação: o script roda uma vez por aba e o botão é re-renderizado à vontade.
+    // Fecha ao clicar fora (capture = true). Sem overlay = nunca trava a tela.
+    doc.addEventListener("click", (e) => {
+      if (e.target.closest && e.target.closest("#hamb-btn")) {
+        e.preventDefault();
+        e.stopPropagation();
+        toggleSidebar();
+        return;
+      }
+      if (!isOpen()) return;
+      const sb = getSidebar();
+      if (sb && sb.contains(e.target)) return;
+
+      closeSidebar();
+    }, true);
+  }
+
+  // força estado limpo ao carregar (evita tela cinza presa)
+  closeSidebar();
+
+  // Rebind porque o Streamlit re-renderiza
+  const iv = setInterval(() => {
+    bindGlobalHandlers();
+
+    // auto-corrige dim caso o DOM tenha re-renderizado
+    const sb = getSidebar();
+    setDim(!!(sb && sb.classList.contains("sb-open")));
+  }, 250);
+
+  setTimeout(()=>clearInterval(iv), 20000);
+
+  // segurança extra: se algo ficar “preso”, ESC sempre limpa
+  window.parent.__closeSidebar = closeSidebar;
+})();
@@ -0,0 +1,6 @@
+"""
+Núcleo da Zoe: lógica, storage e integrações, importável sem Streamlit.
+
+O app.py (UI) e os benchmarks usam os submódulos direto, ex.:
+    from assistente.intencoes import decidir_acao
+"""
@@ -0,0 +1,337 @@
+"""
+Motor das rotinas proativas (briefing, guarda-chuva, água, fechamento) por prazo.
+
+Cada rotina tem um horário (dos settings), uma janela de recuperação e a última
+execução gravada no SQLite. Ela vence quando o horário de hoje já passou e a
+última execução é anterior a ele — tick atrasado, aba fechada na hora ou rerun
+que pulou o minuto não perdem mais o dia; passou da janela, fica pra amanhã.
+Antes de disparar, a chave rotina:<nome>:<dia> é reivindicada no livro de
+despachos, então sai uma vez só mesmo com app + bot rodando.
+
+Rotina nova:
+    @rotina("agua_tarde", horario=lambda s: "15:00", janela_min=60)
+    def _agua_tarde(ctx) -> None: ...
+
+O briefing é montado BRIEFING_ANTECEDENCIA_MIN antes (rotina briefing_preparo,
+guardado em rotinas_prontas) e na hora só é enviado.
+
+No app o tick chama rodar_vencidas() e os timers do navegador acordam o servidor
+em proximos_prazos(). Fora do app, iniciar_worker() passa por todos os usuários
+(usuario.listar()) e dorme até o próximo prazo de qualquer um deles — sem varrer
+minuto a minuto; settings mudados e usuários novos entram na passada seguinte.
+"""
+import json
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from . import despacho, usuario
+from .clima import chuva_entre, pico_calor, series_horarias
+from .config import (
+    BRIEFING_ANTECEDENCIA_MIN, CLIMA_SAIDA_HORAS, DB_PATH, ROTINA_JANELA_MIN, ROTINA_JANELA_PADRAO_MIN, ROTINA_WORKER_MAX_ESPERA_S,
+)
+from .memoria import add_event, init_db
+from .rotinas import build_briefing, build_closing_prompt, chave_tarefas_briefing, clima_briefing
+from .storage import carregar_tarefas, load_daily_state, load_settings, save_daily_state
+from .tarefas import normalizar_tarefa
+from .telegram import chat_do_usuario, enviar_telegram
+from .tempo import em_horario_silencioso, format_dt, now_br, now_floor_minute, parse_dt, parse_hhmm, today_key
+from .usuario import caminho
+
+_tabelas_prontas: set = set()   # por arquivo (cada usuário tem o seu banco)
+_worker: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+
+
+class Rotina:
+    def __init__(self, nome: str, horario, acao, janela_min: Optional[int] = None, silencio: bool = True):
+        self.nome = nome
+        self.horario = horario            # settings -> "HH:MM" | None (desligada)
+        self.acao = acao                  # ctx -> None
+        self.janela = timedelta(minutes=janela_min or ROTINA_JANELA_MIN.get(nome, ROTINA_JANELA_PADRAO_MIN))
+        self.silencio = silencio          # True = não sai no horário silencioso (espera, se a janela deixar)
+
+
+ROTINAS: dict = {}
+
+def rotina(nome: str, horario, janela_min: Optional[int] = None, silencio: bool = True):
+    """Decorator: registra a função como ação da rotina `nome`."""
+    def deco(fn):
+        ROTINAS[nome] = Rotina(nome, horario, fn, janela_min, silencio)
+        return fn
+    return deco
+
+
+# =========================
+# ÚLTIMA EXECUÇÃO (SQLite)
+# =========================
+def _db():
+    path = caminho(DB_PATH)
+    conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    if path not in _tabelas_prontas:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS rotinas_execucao (
+            nome TEXT PRIMARY KEY,
+            ultima TEXT NOT NULL,
+            ts TEXT NOT NULL
+        )
+        """)
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS rotinas_prontas (
+            nome TEXT PRIMARY KEY,
+            dia TEXT NOT NULL,
+            dados TEXT NOT NULL,
+            ts TEXT NOT NULL
+        )
+        """)
+        conn.commit()
+        _tabelas_prontas.add(path)
+    return conn
+
+def ultimas_execucoes() -> dict:
+    """{nome: prazo da última execução (YYYY-MM-DD HH:MM)}."""
+    try:
+        conn = _db()
+        rows = conn.execute("SELECT nome, ultima FROM rotinas_execucao").fetchall()
+        conn.close()
+        return dict(rows)
+    except Exception:
+        return {}
+
+def marcar_execucao(nome: str, prazo: datetime) -> None:
+    try:
+        conn = _db()
+        conn.execute(
+            "INSERT INTO rotinas_execucao(nome, ultima, ts) VALUES (?,?,?) "
+            "ON CONFLICT(nome) DO UPDATE SET ultima = excluded.ultima, ts = excluded.ts WHERE excluded.ultima > ultima",
+            (nome, format_dt(prazo), now_br().strftime("%Y-%m-%d %H:%M:%S"))
+        )
+        conn.commit()
+        conn.close()
+    except Exception:
+        pass
+
+
+def guardar_pronto(nome: str, dia: str, dados: dict) -> None:
+    """Artefato montado antes da hora (ex.: o texto do briefing), um por rotina."""
+    try:
+        conn = _db()
+        conn.execute(
+            "INSERT OR REPLACE INTO rotinas_prontas(nome, dia, dados, ts) VALUES (?,?,?,?)",
+            (nome, dia, json.dumps(dados, ensure_ascii=False), now_br().strftime("%Y-%m-%d %H:%M:%S"))
+        )
+        conn.commit()
+        conn.close()
+    except Exception:
+        pass
+
+def pegar_pronto(nome: str, dia: str) -> Optional[dict]:
+    try:
+        conn = _db()
+        row = conn.execute("SELECT dados FROM rotinas_prontas WHERE nome = ? AND dia = ?", (nome, dia)).fetchone()
+        conn.close()
+        return json.loads(row[0]) if row else None
+    except Exception:
+        return None
+
+
+# =========================
+# PRAZOS
+# =========================
+def _horario(r: Rotina, settings: dict) -> Optional[tuple]:
+    try:
+        return parse_hhmm(r.horario(settings or {}) or "")
+    except Exception:
+        return None
+
+def prazo_atual(r: Rotina, settings: dict, agora: datetime) -> Optional[datetime]:
+    """Último horário da rotina <= agora (hoje, ou ontem se o de hoje ainda não chegou)."""
+    hm = _horario(r, settings)
+    if not hm:
+        return None
+    dt = agora.replace(hour=hm[0], minute=hm[1], second=0, microsecond=0)
+    return dt if dt <= agora else dt - timedelta(days=1)
+
+def vencidas(settings: dict, agora: datetime) -> list:
+    """[(rotina, prazo)] que devem sair agora."""
+    ultimas = ultimas_execucoes()
+    out = []
+    for r in ROTINAS.values():
+        prazo = prazo_atual(r, settings, agora)
+        if prazo is None or agora - prazo > r.janela:
+            continue
+        ultima = ultimas.get(r.nome)
+        if ultima and parse_dt(ultima) >= prazo:
+            continue
+        if r.silencio and em_horario_silencioso(agora):
+            continue
+        out.append((r, prazo))
+    return out
+
+def proximos_prazos(settings: dict, agora: datetime) -> list:
+    """Próximo horário de cada rotina ligada, em ordem (timers do navegador / worker)."""
+    out = []
+    for r in ROTINAS.values():
+        hm = _horario(r, settings)
+        if not hm:
+            continue
+        dt = agora.replace(hour=hm[0], minute=hm[1], second=0, microsecond=0)
+        if dt <= agora:
+            dt += timedelta(days=1)
+        out.append(dt)
+    return sorted(set(out))
+
+def rodar_vencidas(ctx: dict, origem: str = "app") -> list:
+    """
+    Dispara as rotinas vencidas. ctx: settings, agora, tarefas, daily_state e,
+    opcional, notificar(titulo, corpo). Devolve os nomes das que saíram daqui.
+    """
+    saiu = []
+    for r, prazo in vencidas(ctx["settings"], ctx["agora"]):
+        if despacho.reivindicar(despacho.chave_rotina(r.nome, today_key(prazo)), origem):
+            try:
+                r.acao(dict(ctx, prazo=prazo))
+                saiu.append(r.nome)
+            except Exception as e:
+                print(f"[rotinas] {r.nome}: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+        marcar_execucao(r.nome, prazo)   # saiu daqui ou de outro processo: esse prazo está resolvido
+    return saiu
+
+
+# =========================
+# ROTINAS PADRÃO
+# =========================
+def _notificar(ctx: dict, titulo: str, corpo: str) -> None:
+    if ctx.get("notificar"):
+        ctx["notificar"](titulo, corpo)
+
+def _clima(ctx: dict) -> Optional[dict]:
+    if "clima" not in ctx:
+        ctx["clima"] = clima_briefing(ctx["settings"])  # uma leitura/requisição por passada, pra todas as rotinas
+    return ctx["clima"]
+
+def _horaria(ctx: dict) -> Optional[dict]:
+    return series_horarias(_clima(ctx))
+
+def _horario_briefing(s: dict) -> Optional[str]:
+    return s.get("briefing_time", "07:00") if s.get("briefing_enabled", True) else None
+
+def _antes(hhmm: Optional[str], minutos: int) -> Optional[str]:
+    hm = parse_hhmm(hhmm or "")
+    if not hm:
+        return None
+    total = (hm[0] * 60 + hm[1] - minutos) % (24 * 60)
+    return f"{total // 60:02d}:{total % 60:02d}"
+
+@rotina("briefing_preparo", horario=lambda s: _antes(_horario_briefing(s), BRIEFING_ANTECEDENCIA_MIN), silencio=False)
+def _briefing_preparo(ctx: dict) -> None:
+    """Monta o briefing antes da hora (clima com fallback + tarefas); o envio só lê o pronto."""
+    envio = ctx["prazo"] + timedelta(minutes=BRIEFING_ANTECEDENCIA_MIN)
+    w = _clima(ctx)
+    guardar_pronto("briefing", today_key(envio), {
+        "texto": build_briefing(ctx["settings"], ctx["tarefas"], envio, w=w or {}),
+        "clima": w,
+        "tarefas": chave_tarefas_briefing(ctx["tarefas"], envio),
+    })
+
+@rotina("briefing", horario=_horario_briefing)
+def _briefing(ctx: dict) -> None:
+    pronto = pegar_pronto("briefing", today_key(ctx["prazo"]))
+    if pronto and pronto.get("clima") and pronto.get("tarefas") == chave_tarefas_briefing(ctx["tarefas"], ctx["agora"]):
+        msg = pronto["texto"]
+    else:
+        # preparo perdido, sem clima ou tarefas mudaram: remonta; com o clima do preparo nem vai na rede
+        w = (pronto or {}).get("clima")
+        msg = build_briefing(ctx["settings"], ctx["tarefas"], ctx["agora"], w=w)
+    enviar_telegram(msg, chat_do_usuario(ctx["settings"]))
+    _notificar(ctx, "Briefing Matinal", "Te mandei o briefing do dia ✅")
+    add_event("briefing", msg)
+    ctx["daily_state"]["briefing_sent"] = today_key(ctx["prazo"])
+    save_daily_state(ctx["daily_state"])
+
+@rotina("umbrella", horario=lambda s: s.get("leave_time", "07:20") if s.get("smart_enabled", True) else None)
+def _guarda_chuva(ctx: dict) -> None:
+    # hora a hora: só a chuva de quando você está na rua (leave_time + CLIMA_SAIDA_HORAS); sem série, o máx do dia
+    h = _horaria(ctx)
+    c = chuva_entre(h, ctx["prazo"], ctx["prazo"] + timedelta(hours=CLIMA_SAIDA_HORAS)) if h else None
+    rain_prob = c["rain_prob"] if c else (_clima(ctx) or {}).get("rain_prob")
+    if isinstance(rain_prob, (int, float)) and rain_prob >= int(ctx["settings"].get("rain_threshold", 60)):
+        quando = f" perto das {c['hora'].strftime('%H')}h" if c else " hoje"
+        m = f"☂️ Chuva forte na previsão{quando} ({int(rain_prob)}%). Se for sair agora, leva guarda-chuva/jaqueta 😄"
+        enviar_telegram(m, chat_do_usuario(ctx["settings"]))
+        _notificar(ctx, "Lembrete (clima)", "Chance alta de chuva — guarda-chuva!")
+        add_event("smart_reminder", m)
+
+@rotina("water", horario=lambda s: "12:00" if s.get("smart_enabled", True) else None)
+def _agua(ctx: dict) -> None:
+    w = _clima(ctx) or {}
+    tmax = w.get("temp_max")
+    if isinstance(tmax, (int, float)) and tmax >= int(ctx["settings"].get("heat_threshold", 30)):
+        h = _horaria(ctx)
+        p = pico_calor(h, ctx["prazo"].date()) if h else None
+        pico = f" (pico lá pelas {p['hora'].strftime('%H')}h)" if p else ""
+        m = f"💧 Hoje tá pra {round(tmax)}°C{pico}. Água agora = menos sofrimento depois 😅"
+        enviar_telegram(m, chat_do_usuario(ctx["settings"]))
+        _notificar(ctx, "Lembrete (saúde)", "Calor forte — água!")
+        add_event("smart_reminder", m)
+
+@rotina("closing", horario=lambda s: s.get("closing_time", "21:30") if s.get("closing_enabled", True) else None,
+        silencio=False)
+def _fechamento(ctx: dict) -> None:
+    m = build_closing_prompt(ctx["agora"])
+    enviar_telegram(m, chat_do_usuario(ctx["settings"]))
+    _notificar(ctx, "Fechamento do dia", "Me conta rapidinho como foi seu dia ✅")
+    add_event("closing_prompt", m)
+    ctx["daily_state"]["closing_sent"] = today_key(ctx["prazo"])
+    ctx["daily_state"]["awaiting_closing"] = True
+    save_daily_state(ctx["daily_state"])
+
+
+# =========================
+# WORKER (fora do app: bot, scripts)
+# =========================
+def rodar_agora(origem: str = "worker") -> list:
+    """Uma passada completa, lendo tudo do disco (usuário atual)."""
+    ctx = {
+        "settings": load_settings(),
+        "agora": now_floor_minute(),
+        "tarefas": [normalizar_tarefa(t) for t in carregar_tarefas()],
+        "daily_state": load_daily_state(),
+    }
+    return rodar_vencidas(ctx, origem)
+
+def _espera_s() -> float:
+    agora = now_br()
+    prazos = proximos_prazos(load_settings(), agora.replace(second=0, microsecond=0))
+    if not prazos:
+        return ROTINA_WORKER_MAX_ESPERA_S
+    return max(1.0, min(ROTINA_WORKER_MAX_ESPERA_S, (prazos[0] - agora).total_seconds() + 1))
+
+def _passada() -> float:
+    """Roda as vencidas de cada usuário conhecido; devolve quanto dormir até o próximo prazo de qualquer um."""
+    espera = float(ROTINA_WORKER_MAX_ESPERA_S)
+    for uid in usuario.listar():
+        try:
+            with usuario.como(uid):
+                init_db()  # usuário que nunca abriu o app ainda não tem as tabelas
+                rodar_agora()
+                espera = min(espera, _espera_s())
+        except Exception:
+            espera = min(espera, 60.0)
+    return espera
+
+def _loop() -> None:
+    while True:
+        time.sleep(_passada())
+
+def iniciar_worker() -> None:
+    """Thread daemon que dorme até o próximo prazo (de todos os usuários) e dispara (um por processo)."""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_loop, name="rotinas", daemon=True)
+            _worker.start()
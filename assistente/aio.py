@@ -0,0 +1,196 @@
+"""
+Camada de I/O assíncrona: um event loop numa thread daemon (um por processo)
+e um único httpx.AsyncClient — um pool de conexões pra Open-Meteo, Yahoo,
+brapi, Tavily, Groq e Telegram.
+
+Cada integração tem a versão `async` (fetch_weather_async, buscar_tavily_async...)
+e a síncrona de sempre, que virou fachada:
+
+    fetch_weather(lat, lon)                  # = aio.rodar(fetch_weather_async(lat, lon))
+    w, res = aio.paralelo(fetch_weather_async(lat, lon), buscar_tavily_async(q))
+
+rodar() leva o contexto de quem chama (usuário atual, profiler do rerun), então
+Streamlit/bot/API continuam chamando as funções síncronas como antes.
+
+Sem httpx, ou com a cassete ligada (gravar/replay), as chamadas caem no
+http()/SDK síncronos numa thread (asyncio.to_thread) — o comportamento e a
+gravação ficam idênticos, só sem o pool compartilhado.
+"""
+import asyncio
+import contextvars
+import threading
+from typing import Optional
+
+from . import cassete
+from .config import AIO_KEEPALIVE, AIO_MAX_CONEXOES, AIO_TIMEOUT_S
+from .conexoes import get_groq, get_secret, get_tavily, http
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+TAVILY_URL = "https://api.tavily.com/search"
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_loop_lock = threading.Lock()
+_clientes: dict = {}   # só mexido dentro do loop
+_soltas: set = set()   # tarefas de disparar() (o loop só guarda referência fraca)
+
+
+# =========================
+# LOOP (thread daemon)
+# =========================
+def _iniciar_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _thread
+    with _loop_lock:
+        if _loop is None or _thread is None or not _thread.is_alive():
+            loop = asyncio.new_event_loop()
+            pronto = threading.Event()
+
+            def rodar_loop():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(pronto.set)
+                loop.run_forever()
+
+            _clientes.clear()
+            _thread = threading.Thread(target=rodar_loop, name="aio", daemon=True)
+            _thread.start()
+            pronto.wait()
+            _loop = loop
+    return _loop
+
+async def _no_contexto(coro, ctx: contextvars.Context):
+    return await asyncio.get_running_loop().create_task(coro, context=ctx)
+
+def rodar(coro, timeout: Optional[float] = None):
+    """Fachada síncrona: roda a corrotina no loop compartilhado e devolve o resultado."""
+    if threading.current_thread() is _thread:
+        coro.close()
+        raise RuntimeError("aio.rodar() dentro do loop — use await")
+    loop = _iniciar_loop()
+    fut = asyncio.run_coroutine_threadsafe(_no_contexto(coro, contextvars.copy_context()), loop)
+    try:
+        return fut.result(timeout)
+    except TimeoutError:
+        fut.cancel()
+        raise
+
+def disparar(coro) -> None:
+    """Agenda sem esperar (ex.: "digitando..." do Telegram). Erros são engolidos."""
+    loop = _iniciar_loop()
+    ctx = contextvars.copy_context()
+
+    def fim(t):
+        _soltas.discard(t)
+        if not t.cancelled():
+            t.exception()  # marca como lida (sem "exception was never retrieved")
+
+    def agendar():
+        t = loop.create_task(coro, context=ctx)
+        _soltas.add(t)
+        t.add_done_callback(fim)
+
+    loop.call_soon_threadsafe(agendar)
+
+async def juntar(*coros) -> list:
+    """asyncio.gather com nome curto (pra usar dentro de outra corrotina)."""
+    return list(await asyncio.gather(*coros))
+
+def paralelo(*coros) -> list:
+    """Várias corrotinas ao mesmo tempo, de código síncrono. Resultados na ordem."""
+    return rodar(juntar(*coros))
+
+
+# =========================
+# HTTP (pool único)
+# =========================
+def _usa_thread() -> bool:
+    """Cassete ligada ou sem httpx: vai pelo http() síncrono numa thread."""
+    return httpx is None or cassete.ativo()
+
+def _http_cliente():
+    c = _clientes.get("http")
+    if c is None:
+        c = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=AIO_MAX_CONEXOES, max_keepalive_connections=AIO_KEEPALIVE),
+            timeout=AIO_TIMEOUT_S,
+            follow_redirects=True,
+        )
+        _clientes["http"] = c
+    return c
+
+async def get(url: str, **kwargs):
+    """Como requests.get (params/headers/timeout); devolve algo com status_code/json()/text/content."""
+    if _usa_thread():
+        return await asyncio.to_thread(lambda: http().get(url, **kwargs))
+    return await _http_cliente().get(url, **kwargs)
+
+async def post(url: str, **kwargs):
+    """Como requests.post (data/json/headers/timeout)."""
+    if _usa_thread():
+        return await asyncio.to_thread(lambda: http().post(url, **kwargs))
+    return await _http_cliente().post(url, **kwargs)
+
+
+# =========================
+# SDKs (Groq / Tavily)
+# =========================
+def _groq_async():
+    """AsyncGroq no mesmo pool, ou None (cassete/sem SDK async → thread)."""
+    if _usa_thread():
+        return None
+    c = _clientes.get("groq")
+    if c is None:
+        try:
+            from groq import AsyncGroq
+        except ImportError:
+            return None
+        key = get_secret("GROQ_API_KEY")
+        if not key:
+            raise RuntimeError("GROQ_API_KEY ausente")
+        c = _clientes["groq"] = AsyncGroq(api_key=key, http_client=_http_cliente())
+    return c
+
+async def groq_chat(**kwargs):
+    """client.chat.completions.create(**kwargs), sem segurar thread."""
+    c = _groq_async()
+    if c is None:
+        return await asyncio.to_thread(lambda: get_groq().chat.completions.create(**kwargs))
+    return await c.chat.completions.create(**kwargs)
+
+async def groq_chat_stream(**kwargs):
+    """groq_chat com stream=True: gerador assíncrono dos chunks (no fallback, cada chunk sai de uma thread)."""
+    c = _groq_async()
+    if c is None:
+        it = await asyncio.to_thread(lambda: iter(get_groq().chat.completions.create(stream=True, **kwargs)))
+        fim = object()
+        while (chunk := await asyncio.to_thread(next, it, fim)) is not fim:
+            yield chunk
+        return
+    async for chunk in await c.chat.completions.create(stream=True, **kwargs):
+        yield chunk
+
+async def groq_transcrever(**kwargs):
+    """client.audio.transcriptions.create(**kwargs)."""
+    c = _groq_async()
+    if c is None:
+        return await asyncio.to_thread(lambda: get_groq().audio.transcriptions.create(**kwargs))
+    return await c.audio.transcriptions.create(**kwargs)
+
+async def tavily_search(query: str, max_results: int = 5) -> dict:
+    """Mesmo payload do TavilyClient.search ({"results": [...]}) — direto na API REST, pelo pool."""
+    if _usa_thread():
+        return await asyncio.to_thread(lambda: get_tavily().search(query=query, max_results=max_results))
+    key = get_secret("TAVILY_API_KEY")
+    if not key:
+        raise RuntimeError("TAVILY_API_KEY ausente")
+    r = await _http_cliente().post(
+        TAVILY_URL,
+        json={"query": query, "max_results": max_results},
+        headers={"Authorization": f"Bearer {key}"},
+        timeout=30,
+    )
+    r.raise_for_status()
+    return r.json()
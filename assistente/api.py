@@ -0,0 +1,275 @@
+"""
+API HTTP do assistente (sem Streamlit): o mesmo pipeline do app e do bot,
+com os mesmos arquivos/bancos/caches, atendendo várias requisições ao mesmo
+tempo (uma thread por conexão, servidor da stdlib — nada pra instalar).
+
+Uso (na raiz do repo):
+    ZOE_API_TOKEN=... python -m assistente.api                        # 127.0.0.1:8787
+    ZOE_API_TOKEN=... python -m assistente.api --host 0.0.0.0 --porta 9000
+    python -m assistente.api --host 127.0.0.1                          # sem token: só local, explícito
+
+Endpoints (JSON; usuário em X-Usuario ou ?usuario=, padrão = usuário padrão):
+    GET    /saude
+    POST   /turn              {"texto": "..."}          → {"texto", "flags", "acao", "ms"}
+    POST   /voice             corpo = áudio (wav/ogg/mp3) → {"transcricao", "texto", ...}
+    GET    /tarefas
+    POST   /tarefas           {"descricao", "data_hora": "YYYY-MM-DD HH:MM"}
+    PATCH  /tarefas/<id>      campos a trocar (descricao, data_hora, status, next_remind_at, recorrencia...)
+    DELETE /tarefas/<id>
+
+Com ZOE_API_TOKEN definido, toda requisição precisa de "Authorization: Bearer <token>".
+Sem token o servidor só sobe com --host 127.0.0.1 (ou localhost) explícito, e aí
+X-Usuario/?usuario= são ignorados: tudo cai no usuário padrão.
+"""
+import argparse
+import hmac
+import json
+import re
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from . import perf, storage, usuario
+from .conexoes import get_secret
+from .llm import transcrever_bytes
+from .memoria import add_event, init_db
+from .pipeline import conversar
+from .tarefas import alterar_por_id, normalizar_recorrencia, normalizar_tarefa, remarcar
+from .tempo import parse_dt
+
+API_MAX_BODY = 25 * 1024 * 1024    # áudio do Whisper vai até ~25 MB
+HOSTS_LOCAIS = ("127.0.0.1", "localhost")
+CAMPOS_TAREFA = ("descricao", "data_hora", "status", "next_remind_at", "snoozed_until", "remind_count", "recorrencia")
+
+_dbs_prontos: set = set()
+
+
+class ErroAPI(Exception):
+    def __init__(self, status: int, msg: str):
+        super().__init__(msg)
+        self.status = status
+
+
+def _validar_tarefa(d: dict, parcial: bool = False) -> dict:
+    out = {k: d[k] for k in CAMPOS_TAREFA if k in d}
+    if not parcial and (not str(out.get("descricao") or "").strip() or not out.get("data_hora")):
+        raise ErroAPI(400, "descricao e data_hora são obrigatórios")
+    if out.get("recorrencia") is not None:
+        out["recorrencia"] = normalizar_recorrencia(out["recorrencia"])
+        if out["recorrencia"] is None:
+            raise ErroAPI(400, "recorrencia inválida (tipo diaria/uteis/semanal/mensal/horas + hora/dias/dia/n)")
+    for k in ("data_hora", "next_remind_at", "snoozed_until"):
+        if out.get(k):
+            try:
+                parse_dt(str(out[k]))
+            except Exception:
+                raise ErroAPI(400, f"{k} fora do formato YYYY-MM-DD HH:MM")
+    return out
+
+
+# =========================
+# ROTAS
+# =========================
+def rota_turn(corpo: dict) -> dict:
+    texto = str(corpo.get("texto") or "").strip()
+    if not texto:
+        raise ErroAPI(400, "texto vazio")
+    t0 = time.perf_counter()
+    turno = conversar(texto, via="api")
+    return {"texto": turno["texto"], "flags": turno["flags"], "acao": turno["acao"],
+            "ms": round((time.perf_counter() - t0) * 1000, 1)}
+
+def rota_voice(audio: bytes, mime: str) -> dict:
+    if not audio:
+        raise ErroAPI(400, "corpo vazio (mande o áudio cru)")
+    ext = (mime.split("/")[-1].split(";")[0] or "wav").strip()
+    transcrito = str(transcrever_bytes(audio, f"audio.{ext}", mime or "audio/wav") or "").strip()
+    if not transcrito:
+        raise ErroAPI(422, "não deu pra transcrever o áudio")
+    r = rota_turn({"texto": transcrito})
+    r["transcricao"] = transcrito
+    return r
+
+def rota_tarefas_listar() -> dict:
+    return {"tarefas": [normalizar_tarefa(t) for t in storage.carregar_tarefas()]}
+
+def rota_tarefas_criar(corpo: dict) -> dict:
+    nova = normalizar_tarefa(_validar_tarefa(corpo))
+    _, erro = storage.atualizar_tarefas(lambda lista: lista + [nova])
+    if erro:
+        raise ErroAPI(500, erro)
+    add_event("task_create", f"(api) {nova['descricao']} @ {nova['data_hora']}")
+    return {"tarefa": nova}
+
+def rota_tarefas_alterar(tid: str, corpo: dict) -> dict:
+    campos = _validar_tarefa(corpo, parcial=True)
+    achou = []
+
+    def aplicar(t: dict) -> dict:
+        achou.append(True)
+        if campos.get("data_hora"):
+            t = remarcar(t, parse_dt(str(campos["data_hora"])))  # mudou o horário: lembra no novo, do zero
+        t.update(campos)  # o que veio explícito (status, remind_count...) vale por cima
+        return t
+
+    lista, erro = storage.atualizar_tarefas(alterar_por_id(tid, aplicar))
+    if erro:
+        raise ErroAPI(500, erro)
+    tarefa = next((t for t in lista if t.get("id") == tid), None)
+    if not achou or tarefa is None:
+        raise ErroAPI(404, "tarefa não encontrada")
+    return {"tarefa": tarefa}
+
+def rota_tarefas_apagar(tid: str) -> dict:
+    removidas = []
+
+    def remover(t: dict) -> None:
+        removidas.append(t)
+        return None
+
+    _, erro = storage.atualizar_tarefas(alterar_por_id(tid, remover))
+    if erro:
+        raise ErroAPI(500, erro)
+    if not removidas:
+        raise ErroAPI(404, "tarefa não encontrada")
+    add_event("task_done", f"(api) removida: {removidas[-1].get('descricao', '')}")
+    return {"ok": True}
+
+
+# =========================
+# SERVIDOR
+# =========================
+class Handler(BaseHTTPRequestHandler):
+    server_version = "ZoeAPI/1"
+    protocol_version = "HTTP/1.1"   # keep-alive (cliente de carga reaproveita a conexão)
+
+    def log_message(self, fmt, *args):
+        pass  # perf/telemetria já registram; nada de uma linha por requisição no stderr
+
+    def _responder(self, status: int, payload: dict) -> None:
+        b = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(b)))
+        if status >= 400:
+            self.close_connection = True  # o corpo pode não ter sido lido: não reaproveita a conexão
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(b)
+
+    def _corpo(self) -> bytes:
+        try:
+            n = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            raise ErroAPI(400, "Content-Length inválido")
+        if n < 0:
+            raise ErroAPI(400, "Content-Length inválido")  # read(-1) leria até o cliente fechar
+        if n > API_MAX_BODY:
+            raise ErroAPI(413, "corpo grande demais")
+        return self.rfile.read(n) if n else b""
+
+    def _json(self) -> dict:
+        raw = self._corpo()
+        try:
+            d = json.loads(raw or b"{}")
+        except Exception:
+            raise ErroAPI(400, "JSON inválido")
+        if not isinstance(d, dict):
+            raise ErroAPI(400, "esperava um objeto JSON")
+        return d
+
+    def _autorizado(self) -> bool:
+        token = get_secret("ZOE_API_TOKEN")
+        if not token:
+            return True
+        auth = self.headers.get("Authorization") or ""
+        return hmac.compare_digest(auth.encode("utf-8"), f"Bearer {token}".encode("utf-8"))
+
+    def _usuario(self, qs: dict) -> str:
+        if not get_secret("ZOE_API_TOKEN"):
+            return ""  # sem autenticação, o cliente não escolhe de quem são os dados
+        return self.headers.get("X-Usuario") or (qs.get("usuario") or [""])[0] or ""
+
+    def _rotear(self, metodo: str) -> None:
+        url = urlparse(self.path)
+        qs = parse_qs(url.query)
+        status, payload = 200, {}
+        try:
+            if not self._autorizado():
+                raise ErroAPI(401, "não autorizado")
+            with usuario.como(self._usuario(qs) or None):
+                uid = usuario.atual()
+                prof = perf.RerunProfiler(kind="api")
+                if uid not in _dbs_prontos:
+                    init_db()
+                    _dbs_prontos.add(uid)
+                payload = self._despachar(metodo, url.path.rstrip("/") or "/")
+                perf.lap(f"api:{metodo} {re.sub(r'/tarefas/[^/]+', '/tarefas/:id', url.path)}")
+                prof.finish()
+        except ErroAPI as e:
+            status, payload = e.status, {"erro": str(e)}
+        except Exception as e:
+            status, payload = 500, {"erro": f"{type(e).__name__}: {e}"}
+        self._responder(status, payload)
+
+    def _despachar(self, metodo: str, path: str) -> dict:
+        m_id = re.fullmatch(r"/tarefas/([\w-]+)", path)
+        if metodo == "GET" and path == "/saude":
+            return {"ok": True, "usuario": usuario.atual()}
+        if metodo == "POST" and path == "/turn":
+            return rota_turn(self._json())
+        if metodo == "POST" and path == "/voice":
+            return rota_voice(self._corpo(), self.headers.get("Content-Type") or "audio/wav")
+        if path == "/tarefas":
+            if metodo == "GET":
+                return rota_tarefas_listar()
+            if metodo == "POST":
+                return rota_tarefas_criar(self._json())
+        if m_id:
+            if metodo == "PATCH":
+                return rota_tarefas_alterar(m_id.group(1), self._json())
+            if metodo == "DELETE":
+                return rota_tarefas_apagar(m_id.group(1))
+        raise ErroAPI(404, f"{metodo} {path} não existe")
+
+    def do_GET(self):
+        self._rotear("GET")
+
+    def do_POST(self):
+        self._rotear("POST")
+
+    def do_PATCH(self):
+        self._rotear("PATCH")
+
+    def do_DELETE(self):
+        self._rotear("DELETE")
+
+
+def servidor(host: str = "127.0.0.1", porta: int = 8787) -> ThreadingHTTPServer:
+    srv = ThreadingHTTPServer((host, porta), Handler)
+    srv.daemon_threads = True
+    return srv
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", help="padrão 127.0.0.1; sem ZOE_API_TOKEN é obrigatório e tem de ser local")
+    ap.add_argument("--porta", type=int, default=8787)
+    args = ap.parse_args(argv)
+    if not get_secret("ZOE_API_TOKEN") and args.host not in HOSTS_LOCAIS:
+        ap.error("defina ZOE_API_TOKEN (ou, só pra uso local sem autenticação, passe --host 127.0.0.1)")
+    host = args.host or "127.0.0.1"
+    srv = servidor(host, args.porta)
+    print(f"[api] ouvindo em http://{host}:{args.porta}" + ("" if get_secret("ZOE_API_TOKEN") else " (sem token)"), flush=True)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+Bot do Telegram (sem Streamlit): long polling no getUpdates, cada mensagem
+(texto ou áudio) passa pelo mesmo pipeline do app e a resposta volta na
+thread da mensagem.
+
+Uso (na raiz do repo, com TELEGRAM_TOKEN / TELEGRAM_CHAT_ID / GROQ_API_KEY):
+    python -m assistente.bot
+    python -m assistente.bot --workers 16
+
+Quem pode falar com o bot: o TELEGRAM_CHAT_ID (usa o usuário padrão — mesmas
+tarefas, chat e memória do app) e os chats em TELEGRAM_PERMITIDOS ("id,id,...";
+cada um vira o usuário tg<id>, com seus próprios arquivos). O resto é ignorado.
+
+Várias mensagens rodam em paralelo (pool de threads); as do mesmo chat saem
+em ordem, uma por vez, pra o histórico não embaralhar. As rotinas do usuário
+padrão (briefing, clima, fechamento) rodam numa thread que dorme até o próximo
+horário — com o app aberto junto, o livro de despachos garante uma vez só.
+"""
+import argparse
+import contextvars
+import re
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from . import agendador, aio, perf, usuario
+from .config import TELEGRAM_BOT_WORKERS, TELEGRAM_POLL_TIMEOUT_S, USER_DEFAULT
+from .conexoes import get_secret
+from .llm import transcrever_bytes
+from .memoria import init_db
+from .pipeline import conversar
+from .telegram import iniciar_worker, responder
+
+API = "https://api.telegram.org"
+
+_dbs_prontos: set = set()
+
+
+# =========================
+# API DO TELEGRAM
+# =========================
+async def _api_async(metodo: str, timeout: float = 10, **params) -> Optional[dict]:
+    """Chama a Bot API; devolve o "result" ou None."""
+    try:
+        r = await aio.post(f"{API}/bot{get_secret('TELEGRAM_TOKEN')}/{metodo}", json=params, timeout=timeout)
+        j = r.json()
+        return j.get("result") if j.get("ok") else None
+    except Exception:
+        return None
+
+def _api(metodo: str, timeout: float = 10, **params) -> Optional[dict]:
+    return aio.rodar(_api_async(metodo, timeout, **params))
+
+def digitando(chat_id) -> None:
+    """Mostra "digitando..." sem esperar a resposta do Telegram (não atrasa o turno)."""
+    aio.disparar(_api_async("sendChatAction", chat_id=chat_id, action="typing"))
+
+async def baixar_arquivo_async(file_id: str) -> Optional[bytes]:
+    info = await _api_async("getFile", file_id=file_id)
+    if not info or not info.get("file_path"):
+        return None
+    try:
+        r = await aio.get(f"{API}/file/bot{get_secret('TELEGRAM_TOKEN')}/{info['file_path']}", timeout=30)
+        return r.content if r.status_code == 200 else None
+    except Exception:
+        return None
+
+def baixar_arquivo(file_id: str) -> Optional[bytes]:
+    return aio.rodar(baixar_arquivo_async(file_id))
+
+def markdown_telegram(texto: str) -> str:
+    """O pipeline escreve **negrito** (markdown do chat); o Markdown do Telegram usa *negrito*."""
+    return re.sub(r"\*\*(.+?)\*\*", r"*\1*", texto or "", flags=re.S)
+
+
+# =========================
+# USUÁRIOS
+# =========================
+def usuario_do_chat(chat_id) -> Optional[str]:
+    """Id de usuário pra esse chat, ou None se o chat não tem permissão."""
+    cid = str(chat_id)
+    if cid == str(get_secret("TELEGRAM_CHAT_ID") or ""):
+        return USER_DEFAULT
+    permitidos = {x.strip() for x in str(get_secret("TELEGRAM_PERMITIDOS") or "").split(",") if x.strip()}
+    return f"tg{cid}" if cid in permitidos else None
+
+
+# =========================
+# MENSAGEM
+# =========================
+def processar_mensagem(msg: dict) -> Optional[str]:
+    """Uma mensagem do Telegram → resposta (já enviada). Devolve o texto respondido."""
+    chat_id = (msg.get("chat") or {}).get("id")
+    uid = usuario_do_chat(chat_id)
+    if uid is None:
+        return None
+
+    with usuario.como(uid):
+        prof = perf.RerunProfiler(kind="bot")
+        if uid not in _dbs_prontos:
+            init_db()
+            _dbs_prontos.add(uid)
+
+        texto = (msg.get("text") or "").strip()
+        voz = msg.get("voice") or msg.get("audio")
+        if not texto and voz:
+            digitando(chat_id)
+            b = baixar_arquivo(voz.get("file_id", ""))
+            transcrito = transcrever_bytes(b, "voice.ogg", voz.get("mime_type") or "audio/ogg") if b else None
+            texto = str(transcrito or "").strip()
+            if not texto:
+                responder(chat_id, "Não consegui entender o áudio 😅 Manda de novo ou escreve?", msg.get("message_id"))
+                prof.finish()
+                return None
+        perf.lap("entrada")
+        if not texto:
+            prof.finish()
+            return None
+        if texto.startswith("/start"):
+            texto = "oi"
+
+        digitando(chat_id)
+        turno = conversar(texto, via="telegram")
+        perf.lap("turno")
+
+        resposta = turno["texto"]
+        if voz:
+            resposta = f"🎙️ _{texto}_\n\n{resposta}"
+        responder(chat_id, markdown_telegram(resposta), msg.get("message_id"))
+        perf.lap("resposta")
+        prof.finish()
+        return turno["texto"]
+
+
+class Despachante:
+    """Pool de threads com fila por chat: chats diferentes em paralelo, o mesmo chat em ordem."""
+
+    def __init__(self, workers: int = TELEGRAM_BOT_WORKERS, processar=processar_mensagem):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bot")
+        self.processar = processar
+        self.filas = {}
+        self.lock = threading.Lock()
+
+    def enviar(self, msg: dict) -> None:
+        chat_id = (msg.get("chat") or {}).get("id")
+        with self.lock:
+            fila = self.filas.get(chat_id)
+            if fila is not None:
+                fila.append(msg)  # já tem alguém drenando esse chat
+                return
+            self.filas[chat_id] = deque([msg])
+        self.pool.submit(self._drenar, chat_id)
+
+    def _drenar(self, chat_id) -> None:
+        while True:
+            with self.lock:
+                fila = self.filas[chat_id]
+                if not fila:
+                    del self.filas[chat_id]
+                    return
+                msg = fila.popleft()
+            try:
+                # contexto limpo por mensagem (usuário atual, profiler)
+                contextvars.Context().run(self.processar, msg)
+            except Exception as e:
+                print(f"[bot] erro na mensagem de {chat_id}: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+
+    def fechar(self) -> None:
+        self.pool.shutdown(wait=True)
+
+
+# =========================
+# LONG POLLING
+# =========================
+def rodar(workers: int = TELEGRAM_BOT_WORKERS) -> None:
+    if not get_secret("TELEGRAM_TOKEN"):
+        raise SystemExit("TELEGRAM_TOKEN ausente")
+    iniciar_worker()  # fila de saída (lembretes, fallback das respostas)
+    agendador.iniciar_worker()  # briefing/fechamento de todo usuário saem mesmo com o app fechado
+    despachante = Despachante(workers)
+    offset = None
+    print(f"[bot] ouvindo (workers={workers})", flush=True)
+    try:
+        while True:
+            params = {"timeout": TELEGRAM_POLL_TIMEOUT_S, "allowed_updates": ["message"]}
+            if offset is not None:
+                params["offset"] = offset
+            updates = _api("getUpdates", timeout=TELEGRAM_POLL_TIMEOUT_S + 10, **params)
+            if updates is None:
+                time.sleep(3)  # rede/Telegram fora: tenta de novo sem martelar
+                continue
+            for u in updates:
+                offset = u["update_id"] + 1
+                if u.get("message"):
+                    despachante.enviar(u["message"])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        despachante.fechar()
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, default=TELEGRAM_BOT_WORKERS)
+    args = ap.parse_args(argv)
+    rodar(args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
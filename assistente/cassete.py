@@ -0,0 +1,322 @@
+"""
+Gravação/replay das chamadas externas (Groq, Tavily, Open-Meteo, Yahoo,
+brapi, Telegram) num arquivo JSONL local — a "cassete".
+
+Modos (env ZOE_CASSETE_MODO ou configurar()):
+    off      chamadas reais (padrão)
+    gravar   chamadas reais + grava request/resposta/tempo na cassete
+    replay   nada sai pra rede: responde com o que foi gravado
+
+No replay:
+    ZOE_REPLAY_LATENCIA   "0" (padrão), "gravada" ou um número fixo em ms
+    ZOE_REPLAY_FALHAS     fração de chamadas que falham de propósito (0..1)
+    ZOE_REPLAY_FALHA_TIPO "timeout" (padrão) ou "429"
+    ZOE_REPLAY_SEED       semente das falhas (determinístico)
+
+Casamento: primeiro pela chave exata do request; se não achar (prompt com
+horário, por ex.), cai na próxima gravação ainda não usada com a mesma
+"forma" (operação + parâmetros fixos como model/temperature/response_format,
+sem o conteúdo), na ordem em que foi gravada. Sem nada → CassetteMiss.
+Segredos são trocados por <NOME> antes de gravar, então a cassete pode ir pro git.
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+CASSETE_PADRAO = "cassetes/padrao.jsonl"
+SEGREDOS = ("GROQ_API_KEY", "TAVILY_API_KEY", "BRAPI_TOKEN", "TELEGRAM_TOKEN", "TELEGRAM_CHAT_ID")
+
+_VARIAVEIS = ("messages", "query", "params", "data", "json", "file", "url")
+
+_cfg: dict = {}
+_lock = threading.Lock()
+_fita = None
+
+
+class CassetteMiss(ConnectionError):
+    """Replay sem gravação correspondente."""
+
+
+class RateLimitError(Exception):
+    """429 injetado no replay (mesmo nome/status do SDK, pra telemetria classificar igual)."""
+    status_code = 429
+
+
+class ReplayTimeout(TimeoutError):
+    """Timeout injetado no replay."""
+
+
+def configurar(modo: Optional[str] = None, arquivo: Optional[str] = None, latencia=None,
+               falhas: Optional[float] = None, falha_tipo: Optional[str] = None, seed: Optional[int] = None) -> None:
+    """Sobrescreve as variáveis de ambiente (bench/scripts). Reabre a cassete."""
+    global _fita
+    for k, v in (("modo", modo), ("arquivo", arquivo), ("latencia", latencia),
+                 ("falhas", falhas), ("falha_tipo", falha_tipo), ("seed", seed)):
+        if v is not None:
+            _cfg[k] = v
+    with _lock:
+        _fita = None
+
+def _opt(nome: str, env: str, default):
+    if nome in _cfg:
+        return _cfg[nome]
+    return os.environ.get(env, default)
+
+def modo() -> str:
+    m = str(_opt("modo", "ZOE_CASSETE_MODO", "off")).strip().lower()
+    return m if m in ("gravar", "replay") else "off"
+
+def ativo() -> bool:
+    return modo() != "off"
+
+
+# =========================
+# FITA (arquivo + índice)
+# =========================
+class _Fita:
+    def __init__(self, path: str):
+        self.path = path
+        self.por_chave = {}
+        self.por_forma = {}
+        self.por_op = {}
+        self.usados = set()
+        self.rng = random.Random(int(_opt("seed", "ZOE_REPLAY_SEED", 0) or 0))
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for i, line in enumerate(f):
+                    try:
+                        e = json.loads(line)
+                    except Exception:
+                        continue
+                    e["_i"] = i
+                    self.por_chave.setdefault(e["chave"], []).append(e)
+                    self.por_forma.setdefault(e.get("forma") or e["op"], []).append(e)
+                    self.por_op.setdefault(e["op"], []).append(e)
+
+    def _proxima(self, lista: list) -> Optional[dict]:
+        for e in lista:
+            if e["_i"] not in self.usados:
+                self.usados.add(e["_i"])
+                return e
+        return None
+
+    def achar(self, op: str, forma: str, chave: str) -> Optional[dict]:
+        e = self._proxima(self.por_chave.get(chave, []))
+        if e is None and self.por_chave.get(chave):
+            return self.por_chave[chave][-1]  # repetida: reusa a última
+        return e or self._proxima(self.por_forma.get(forma, [])) or self._proxima(self.por_op.get(op, []))
+
+    def gravar(self, entrada: dict) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entrada, ensure_ascii=False, default=str) + "\n")
+
+def rebobinar() -> None:
+    """Replay: volta a cassete pro começo (toda gravação fica disponível de novo)."""
+    with _lock:
+        if _fita is not None:
+            _fita.usados.clear()
+
+def adicionar(op: str, req: dict, resp, ms: float = 0.0, erro: str = "") -> None:
+    """Grava uma entrada à mão (cassetes sintéticas, ajustes) no arquivo configurado."""
+    chave, req_limpo = _chave(op, req)
+    entrada = {"op": op, "forma": _forma(op, req_limpo), "chave": chave, "req": req_limpo, "resp": resp, "ms": ms}
+    if erro:
+        entrada["erro"] = erro
+    global _fita
+    with _lock:
+        _fita_atual().gravar(entrada)
+        _fita = None  # reindexa na próxima leitura
+
+def _fita_atual() -> _Fita:
+    global _fita
+    if _fita is None:
+        _fita = _Fita(str(_opt("arquivo", "ZOE_CASSETE_ARQUIVO", CASSETE_PADRAO)))
+    return _fita
+
+def _limpar_segredos(texto: str) -> str:
+    from .conexoes import get_secret
+    for nome in SEGREDOS:
+        v = os.environ.get(nome) if modo() == "replay" else get_secret(nome)
+        if v and not str(v).startswith("<"):
+            texto = texto.replace(str(v), f"<{nome}>")
+    return texto
+
+def _chave(op: str, req: dict) -> tuple:
+    txt = _limpar_segredos(json.dumps(req, ensure_ascii=False, sort_keys=True, default=str))
+    return hashlib.sha1(f"{op}|{txt}".encode("utf-8")).hexdigest()[:16], json.loads(txt)
+
+def _forma(op: str, req: dict) -> str:
+    fixos = {k: v for k, v in req.items() if k not in _VARIAVEIS}
+    return f"{op}|{json.dumps(fixos, sort_keys=True, default=str)}"
+
+def segredo_replay(nome: str) -> Optional[str]:
+    """No replay, segredo ausente vira o placeholder gravado (bate com a chave da cassete)."""
+    return f"<{nome}>" if modo() == "replay" and nome in SEGREDOS else None
+
+
+def _reproduzir(op: str, req: dict) -> dict:
+    chave, _ = _chave(op, req)
+    with _lock:
+        fita = _fita_atual()
+        e = fita.achar(op, _forma(op, req), chave)
+        falhar = fita.rng.random() < float(_opt("falhas", "ZOE_REPLAY_FALHAS", 0) or 0)
+    if e is None:
+        raise CassetteMiss(f"sem gravação pra {op} ({chave})")
+
+    lat = str(_opt("latencia", "ZOE_REPLAY_LATENCIA", "0"))
+    ms = float(e.get("ms") or 0) if lat == "gravada" else float(lat or 0)
+    if ms > 0:
+        time.sleep(ms / 1000)
+
+    if falhar:
+        if str(_opt("falha_tipo", "ZOE_REPLAY_FALHA_TIPO", "timeout")) == "429":
+            raise RateLimitError(f"429 injetado em {op}")
+        raise ReplayTimeout(f"timeout injetado em {op}")
+    if e.get("erro"):
+        raise CassetteMiss(f"erro gravado em {op}: {e['erro']}")
+    return e
+
+def _registrar(op: str, req: dict, chamar, serializar):
+    """Executa a chamada real e grava (também grava a exceção, que é re-levantada)."""
+    chave, req_limpo = _chave(op, req)
+    t0 = time.perf_counter()
+    entrada = {"op": op, "forma": _forma(op, req_limpo), "chave": chave, "req": req_limpo}
+    try:
+        resp = chamar()
+        entrada["resp"] = serializar(resp)
+        return resp
+    except Exception as ex:
+        entrada["erro"] = f"{type(ex).__name__}: {ex}"
+        raise
+    finally:
+        entrada["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        with _lock:
+            _fita_atual().gravar(entrada)
+
+
+# =========================
+# HTTP (requests)
+# =========================
+class _Resposta:
+    """O pedaço de requests.Response que o pacote usa."""
+
+    def __init__(self, d: dict):
+        self.status_code = int(d.get("status", 200))
+        self.headers = d.get("headers") or {}
+        self.text = d.get("text") or ""
+        self.content = self.text.encode("utf-8")
+        self.ok = 200 <= self.status_code < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if not self.ok:
+            import requests
+            raise requests.HTTPError(f"HTTP {self.status_code}", response=self)
+
+def _ser_http(r) -> dict:
+    return {"status": r.status_code, "headers": {"Content-Type": r.headers.get("Content-Type", "")}, "text": r.text}
+
+
+class _HTTP:
+    def _req(self, metodo: str, url: str, **kwargs):
+        import requests
+        req = {"url": url, "params": kwargs.get("params"), "data": kwargs.get("data"), "json": kwargs.get("json")}
+        op = f"http:{metodo}:{_limpar_segredos(url.split('?')[0])}"
+        if modo() == "replay":
+            return _Resposta(_reproduzir(op, req)["resp"])
+        return _registrar(op, req, lambda: requests.request(metodo.upper(), url, **kwargs), _ser_http)
+
+    def get(self, url: str, **kwargs):
+        return self._req("get", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self._req("post", url, **kwargs)
+
+def http():
+    """`requests` de verdade, ou o gravador/reprodutor quando a cassete está ligada."""
+    if not ativo():
+        import requests
+        return requests
+    return _HTTP()
+
+
+# =========================
+# SDKs (Groq / Tavily)
+# =========================
+class Obj(dict):
+    """Dict com acesso por atributo (resposta do SDK reconstruída da cassete)."""
+
+    def __getattr__(self, k):
+        try:
+            return _obj(self[k])
+        except KeyError:
+            raise AttributeError(k)
+
+def _obj(v):
+    if isinstance(v, dict) and not isinstance(v, Obj):
+        return Obj(v)
+    if isinstance(v, list):
+        return [_obj(x) for x in v]
+    return v
+
+def _ser_sdk(resp):
+    if isinstance(resp, (str, dict, list)) or resp is None:
+        return resp
+    if hasattr(resp, "model_dump"):
+        return resp.model_dump()
+    return str(resp)
+
+def _sem_arquivo(kwargs: dict) -> dict:
+    """Áudio não vai pra cassete nem pra chave — só o tamanho."""
+    out = dict(kwargs)
+    f = out.get("file")
+    if isinstance(f, tuple) and len(f) >= 2:
+        out["file"] = f"<{f[0]} {len(f[1] or b'')} bytes>"
+    return out
+
+
+class _Metodo:
+    def __init__(self, op: str, real):
+        self.op = op
+        self.real = real
+
+    def __call__(self, **kwargs):
+        req = _sem_arquivo(kwargs)
+        stream = bool(kwargs.get("stream"))
+        if modo() == "replay":
+            resp = _reproduzir(self.op, req)["resp"]
+            return iter(_obj(resp)) if stream else _obj(resp)
+        if self.real is None:
+            raise RuntimeError(f"{self.op}: cliente real indisponível")
+        if stream:
+            chunks = _registrar(self.op, req, lambda: list(self.real(**kwargs)), lambda cs: [_ser_sdk(c) for c in cs])
+            return iter(chunks)
+        return _registrar(self.op, req, lambda: self.real(**kwargs), _ser_sdk)
+
+
+class _No:
+    """Espelha client.chat.completions.create etc. trocando só a folha."""
+
+    def __init__(self, real, op: str, folhas: tuple):
+        self._real = real
+        self._op = op
+        self._folhas = folhas
+
+    def __getattr__(self, k):
+        real = getattr(self._real, k, None) if self._real is not None else None
+        op = f"{self._op}.{k}"
+        if k in self._folhas:
+            return _Metodo(op, real)
+        return _No(real, op, self._folhas)
+
+def envolver(nome: str, real):
+    """Cliente do SDK (ou None no replay) envolvido pela cassete."""
+    folhas = {"groq": ("create",), "tavily": ("search",)}.get(nome, ())
+    return _No(real, nome, folhas)
@@ -0,0 +1,501 @@
+"""Clima via Open-Meteo (sem chave): geocoding, previsão e resposta formatada."""
+import json
+import os
+import re
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+import numpy as np
+
+from . import aio, geo
+from .config import (
+    ATIVIDADE_HORAS, CLIMA_CHUVA_MM, CLIMA_CHUVA_PROB, CLIMA_FRESCO_S, CLIMA_ULTIMO_PATH,
+    CONFORTO_C, GEOCODE_CACHE_MAX, VENTO_FORTE_KMH,
+)
+from .perf import timed
+from .tempo import format_dt, now_br, parse_dt, today_key
+from .usuario import caminho
+
+
+_geo_cache: dict = {}   # nome em minúsculas -> resultado (só os achados)
+
+async def geocode_city_async(city_name: str) -> Optional[dict]:
+    """
+    Resolve cidade -> lat/lon. Município com o nome exato na base local sai dela (geo.buscar,
+    sem rede); o resto vai no Open-Meteo Geocoding (sem chave), com cache em memória. Prefixo
+    da base local ("feira de sant") só se a API não achar nada.
+    """
+    q = (city_name or "").strip()
+    if not q:
+        return None
+    local = geo.buscar(q)
+    if local:
+        return local
+    hit = _geo_cache.get(q.lower())
+    if hit is not None:
+        return hit
+    g = await _geocode_api_async(q)
+    if not g:
+        return geo.buscar(q, prefixo=True)
+    if len(_geo_cache) >= GEOCODE_CACHE_MAX:
+        _geo_cache.pop(next(iter(_geo_cache)))
+    _geo_cache[q.lower()] = g
+    return g
+
+@timed("ext:geocode")
+async def _geocode_api_async(q: str) -> Optional[dict]:
+    try:
+        # a API não entende "Cidade, UF": busca só o nome e escolhe o do estado pedido
+        uf = geo.separar_uf(q)[1]
+        url = "https://geocoding-api.open-meteo.com/v1/search"
+        nome_api = q
+        if uf:
+            nome_api = re.split(r"\s*[,/]\s*|\s+-\s+", q)[0]
+            if nome_api == q:
+                nome_api = q.rsplit(" ", 1)[0]  # "Santa Rita BA"
+        params = {"name": nome_api, "count": 10 if uf else 1, "language": "pt", "format": "json"}
+        r = await aio.get(url, params=params, timeout=6)
+        j = r.json()
+        results = j.get("results") or []
+        if uf:
+            results = [x for x in results if geo.normalizar(x.get("admin1") or "") == geo.normalizar(geo.ESTADOS[uf])]
+        if not results:
+            return None
+        top = results[0]
+        return {
+            "name": top.get("name"),
+            "admin1": top.get("admin1"),
+            "country": top.get("country"),
+            "lat": top.get("latitude"),
+            "lon": top.get("longitude"),
+        }
+    except Exception:
+        return None
+
+def geocode_city(city_name: str) -> Optional[dict]:
+    return aio.rodar(geocode_city_async(city_name))
+
+HORARIA_CAMPOS = {
+    "temperature_2m": "temp",
+    "apparent_temperature": "sensacao",
+    "precipitation_probability": "rain_prob",
+    "precipitation": "chuva_mm",
+    "wind_speed_10m": "vento",
+}
+
+@timed("ext:open-meteo")
+async def fetch_weather_async(lat: float, lon: float) -> Optional[dict]:
+    """Clima de hoje + agora + hora a hora (hoje e amanhã) via Open-Meteo, numa requisição só (sem chave)."""
+    try:
+        url = "https://api.open-meteo.com/v1/forecast"
+        params = {
+            "latitude": lat,
+            "longitude": lon,
+            "current": "temperature_2m,is_day,precipitation,weather_code,wind_speed_10m",
+            "daily": "temperature_2m_max,temperature_2m_min,precipitation_probability_max,precipitation_sum",
+            "hourly": ",".join(HORARIA_CAMPOS),
+            "timezone": "America/Sao_Paulo",
+            "forecast_days": 2,
+        }
+        r = await aio.get(url, params=params, timeout=6)
+        j = r.json()
+
+        cur = j.get("current") or {}
+        daily = j.get("daily") or {}
+        hourly = j.get("hourly") or {}
+
+        def first(arr, default=None):
+            try:
+                return (arr or [default])[0]
+            except Exception:
+                return default
+
+        out = {
+            "temp_now": cur.get("temperature_2m"),
+            "wind": cur.get("wind_speed_10m"),
+            "temp_max": first(daily.get("temperature_2m_max")),
+            "temp_min": first(daily.get("temperature_2m_min")),
+            "rain_prob": first(daily.get("precipitation_probability_max")),
+            "rain_sum": first(daily.get("precipitation_sum")),
+            # listas cruas (vão pro JSON da última boa); series_horarias() vira arrays
+            "horaria": {"t": hourly.get("time") or [], **{nome: hourly.get(campo) or [] for campo, nome in HORARIA_CAMPOS.items()}},
+        }
+        return out
+    except Exception:
+        return None
+
+def fetch_weather(lat: float, lon: float) -> Optional[dict]:
+    return aio.rodar(fetch_weather_async(lat, lon))
+
+# =========================
+# ÚLTIMA PREVISÃO BOA
+# =========================
+# Cada previsão de hoje que chega inteira fica gravada por coordenada. Serve de
+# cache (mais nova que CLIMA_FRESCO_S → nem busca) e de fallback: Open-Meteo
+# lenta/fora não derruba briefing nem lembrete, só usa a última boa do dia.
+
+def _chave_coord(lat: float, lon: float) -> str:
+    return f"{round(float(lat), 2)},{round(float(lon), 2)}"
+
+def _ler_ultimos() -> dict:
+    try:
+        with open(caminho(CLIMA_ULTIMO_PATH), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+def _guardar_ultimo(lat: float, lon: float, w: dict) -> None:
+    try:
+        data = _ler_ultimos()
+        data[_chave_coord(lat, lon)] = {"em": format_dt(now_br()), "w": w}
+        path = caminho(CLIMA_ULTIMO_PATH)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except Exception:
+        pass
+
+def ultimo_clima(lat: float, lon: float) -> Optional[dict]:
+    """Última previsão boa de hoje pra essa coordenada (com "_de": "HH:MM"), ou None."""
+    try:
+        e = _ler_ultimos().get(_chave_coord(lat, lon)) or {}
+        em = parse_dt(e["em"])
+        if today_key(em) != today_key(now_br()):
+            return None  # máx/mín/chuva de ontem não servem pra hoje
+        return dict(e["w"], _de=em.strftime("%H:%M"), _idade_s=(now_br() - em).total_seconds())
+    except Exception:
+        return None
+
+def clima_de_hoje(lat: float, lon: float, fresco_s: float = CLIMA_FRESCO_S) -> Optional[dict]:
+    """fetch_weather com cache/fallback: a última boa se for recente, senão busca; falhou → a última boa do dia."""
+    ultimo = ultimo_clima(lat, lon)
+    if ultimo and ultimo["_idade_s"] <= fresco_s:
+        return {k: v for k, v in ultimo.items() if not k.startswith("_")}
+    w = fetch_weather(lat, lon)
+    if w and w.get("temp_max") is not None:
+        _guardar_ultimo(lat, lon, w)
+        return w
+    return ultimo
+
+PREVISAO_DIAS_PARAMS = {
+    "current": "temperature_2m,is_day,precipitation,weather_code,wind_speed_10m",
+    "daily": "temperature_2m_max,temperature_2m_min,precipitation_probability_max,precipitation_sum",
+    "timezone": "America/Sao_Paulo",
+}
+
+def _dias_de(j: dict) -> dict:
+    cur = j.get("current") or {}
+    daily = j.get("daily") or {}
+    return {
+        "current": {
+            "temp_now": cur.get("temperature_2m"),
+            "wind": cur.get("wind_speed_10m"),
+        },
+        "dates": daily.get("time") or [],
+        "temp_max": daily.get("temperature_2m_max") or [],
+        "temp_min": daily.get("temperature_2m_min") or [],
+        "rain_prob": daily.get("precipitation_probability_max") or [],
+        "rain_sum": daily.get("precipitation_sum") or [],
+    }
+
+@timed("ext:open-meteo")
+async def fetch_weather_days_async(lat: float, lon: float, days: int = 2) -> Optional[dict]:
+    """Clima de hoje + próximos dias via Open‑Meteo (sem chave)."""
+    try:
+        days = max(1, min(7, int(days)))
+        url = "https://api.open-meteo.com/v1/forecast"
+        params = dict(PREVISAO_DIAS_PARAMS, latitude=lat, longitude=lon, forecast_days=days)
+        r = await aio.get(url, params=params, timeout=6)
+        return _dias_de(r.json())
+    except Exception:
+        return None
+
+def fetch_weather_days(lat: float, lon: float, days: int = 2) -> Optional[dict]:
+    return aio.rodar(fetch_weather_days_async(lat, lon, days))
+
+@timed("ext:open-meteo")
+async def fetch_weather_multi_async(coords: list, days: int = 2) -> list:
+    """
+    Várias cidades numa requisição só (latitude/longitude separadas por vírgula).
+    coords = [(lat, lon), ...] → [previsão no formato do fetch_weather_days | None], na mesma ordem.
+    """
+    if not coords:
+        return []
+    try:
+        days = max(1, min(7, int(days)))
+        url = "https://api.open-meteo.com/v1/forecast"
+        params = dict(
+            PREVISAO_DIAS_PARAMS,
+            latitude=",".join(str(lat) for lat, _ in coords),
+            longitude=",".join(str(lon) for _, lon in coords),
+            forecast_days=days,
+        )
+        r = await aio.get(url, params=params, timeout=8)
+        j = r.json()
+        locais = j if isinstance(j, list) else [j]  # uma coordenada só vem como objeto
+        out = [_dias_de(x) if isinstance(x, dict) and x.get("daily") else None for x in locais]
+        return (out + [None] * len(coords))[:len(coords)]
+    except Exception:
+        return [None] * len(coords)
+
+def fetch_weather_multi(coords: list, days: int = 2) -> list:
+    return aio.rodar(fetch_weather_multi_async(coords, days))
+
+# =========================
+# PREVISÃO HORÁRIA (NumPy)
+# =========================
+# As séries de hoje e amanhã vêm na mesma requisição do fetch_weather (e ficam na
+# mesma última previsão boa); series_horarias() transforma em arrays
+# ({"t": datetime64[m], "temp", "sensacao", "rain_prob", "chuva_mm", "vento"}).
+# Chuva, calor e vento viram máscaras/janelas vetorizadas em cima delas.
+def series_horarias(w: Optional[dict]) -> Optional[dict]:
+    """Séries horárias de uma previsão do fetch_weather/clima_de_hoje, ou None (previsão sem elas)."""
+    hj = (w or {}).get("horaria") or {}
+    try:
+        t = np.array(hj.get("t") or [], dtype="datetime64[m]")
+    except Exception:
+        return None
+    if not len(t):
+        return None
+    h = {"t": t}
+    for nome in HORARIA_CAMPOS.values():
+        v = np.array(hj.get(nome) or [], dtype=np.float64)  # None -> nan
+        h[nome] = v if len(v) == len(t) else np.full(len(t), np.nan)
+    return h
+
+def _np_dt(dt) -> np.datetime64:
+    if isinstance(dt, datetime):
+        dt = dt.replace(tzinfo=None)
+    return np.datetime64(dt, "m")
+
+def _py_dt(t: np.datetime64) -> datetime:
+    return t.astype("datetime64[m]").astype(datetime)
+
+def _horas_do_dia(h: dict) -> np.ndarray:
+    return (h["t"].astype("datetime64[h]") - h["t"].astype("datetime64[D]")).astype(int)
+
+def janelas(mask: np.ndarray) -> list:
+    """Trechos contíguos True de uma máscara → [(i_inicio, i_fim_exclusivo)]."""
+    d = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(d == 1).tolist(), np.flatnonzero(d == -1).tolist()))
+
+def mascara_chuva(h: dict) -> np.ndarray:
+    return (np.nan_to_num(h["rain_prob"]) >= CLIMA_CHUVA_PROB) | (np.nan_to_num(h["chuva_mm"]) >= CLIMA_CHUVA_MM)
+
+def chuva_entre(h: dict, ini: datetime, fim: datetime) -> Optional[dict]:
+    """Pico de chance de chuva em [ini, fim): {"rain_prob", "hora"}."""
+    sel = (h["t"] >= _np_dt(ini).astype("datetime64[h]")) & (h["t"] < _np_dt(fim))
+    if not sel.any():
+        return None
+    p = np.where(sel, np.nan_to_num(h["rain_prob"], nan=-1), -1)
+    i = int(np.argmax(p))
+    return {"rain_prob": float(p[i]), "hora": _py_dt(h["t"][i])} if p[i] >= 0 else None
+
+def pico_calor(h: dict, dia: date) -> Optional[dict]:
+    """Maior sensação térmica do dia: {"sensacao", "hora"}."""
+    sel = h["t"].astype("datetime64[D]") == np.datetime64(dia, "D")
+    v = np.where(sel, h["sensacao"], np.nan)
+    if np.isnan(v).all():
+        return None
+    i = int(np.nanargmax(v))
+    return {"sensacao": float(v[i]), "hora": _py_dt(h["t"][i])}
+
+def quando_chove(h: dict, agora: datetime) -> Optional[dict]:
+    """
+    Chovendo agora? E quando muda: {"chovendo", "muda_em" (datetime|None),
+    "ate" (fim da próxima janela de chuva, se ela começa depois)}.
+    """
+    i0 = int(np.searchsorted(h["t"], _np_dt(agora).astype("datetime64[h]"), side="right")) - 1
+    if i0 < 0 or i0 >= len(h["t"]):
+        return None
+    m = mascara_chuva(h)[i0:]
+    chovendo = bool(m[0])
+    muda = np.flatnonzero(m != chovendo)
+    out = {"chovendo": chovendo, "muda_em": _py_dt(h["t"][i0 + muda[0]]) if len(muda) else None, "ate": None}
+    if not chovendo and len(muda):
+        fim = janelas(m[muda[0]:])[0][1] + muda[0]
+        out["ate"] = _py_dt(h["t"][i0 + fim]) if i0 + fim < len(h["t"]) else None
+    return out
+
+def melhor_janela(h: dict, dia: date, duracao_h: int = 1, depois: Optional[datetime] = None) -> Optional[dict]:
+    """
+    Melhor trecho de `duracao_h` horas do dia pra atividade ao ar livre: custo por hora =
+    chance de chuva + graus fora do CONFORTO_C + vento acima do VENTO_FORTE_KMH; soma móvel; menor vence.
+    """
+    duracao_h = max(1, int(duracao_h))
+    horas = _horas_do_dia(h)
+    sel = (h["t"].astype("datetime64[D]") == np.datetime64(dia, "D")) & (horas >= ATIVIDADE_HORAS[0]) & (horas < ATIVIDADE_HORAS[1])
+    if depois is not None:
+        sel &= h["t"] >= _np_dt(depois)
+    sens = np.where(np.isnan(h["sensacao"]), h["temp"], h["sensacao"])
+    custo = (
+        np.nan_to_num(h["rain_prob"], nan=50) / 10
+        + np.clip(sens - CONFORTO_C[1], 0, None) + np.clip(CONFORTO_C[0] - sens, 0, None)
+        + np.clip(np.nan_to_num(h["vento"]) - VENTO_FORTE_KMH, 0, None) / 5
+    )
+    custo = np.where(sel & ~np.isnan(sens), custo, np.inf)
+    if len(custo) < duracao_h:
+        return None
+    soma = np.convolve(custo, np.ones(duracao_h), mode="valid")
+    i = int(np.argmin(soma))
+    if not np.isfinite(soma[i]):
+        return None
+    f = slice(i, i + duracao_h)
+    return {
+        "inicio": _py_dt(h["t"][i]),
+        "fim": _py_dt(h["t"][i]) + timedelta(hours=duracao_h),
+        "temp": float(np.nanmean(sens[f])),
+        "rain_prob": float(np.nanmax(np.nan_to_num(h["rain_prob"][f]))),
+        "vento": float(np.nanmax(np.nan_to_num(h["vento"][f]))),
+    }
+
+def format_quando_chove(city_display: str, info: Optional[dict], agora: datetime) -> str:
+    if not info:
+        return f"Não consegui a previsão hora a hora de {city_display} agora 😅"
+
+    def quando(dt: datetime) -> str:
+        dia = "" if dt.date() == agora.date() else "amanhã " if dt.date() == agora.date() + timedelta(days=1) else f"dia {dt.strftime('%d/%m')} "
+        return f"{dia}por volta das {dt.hour:02d}h"
+
+    if info["chovendo"]:
+        if info["muda_em"]:
+            return f"🌧️ Em {city_display} a chuva deve parar **{quando(info['muda_em'])}**."
+        return f"🌧️ Em {city_display} a previsão é de chuva o resto do período — sem trégua à vista 😕"
+    if info["muda_em"]:
+        ate = f" (até umas {info['ate'].hour:02d}h)" if info.get("ate") else ""
+        return f"🌦️ Em {city_display} agora tá seco; a chuva deve chegar **{quando(info['muda_em'])}**{ate}."
+    return f"🌤️ Em {city_display} não tem chuva na previsão das próximas horas."
+
+def format_melhor_janela(city_display: str, j: Optional[dict], atividade: str, day_offset: int) -> str:
+    label = "amanhã" if day_offset == 1 else "hoje"
+    if not j:
+        return f"Não achei um horário bom {label} em {city_display} pra {atividade} 😅"
+    txt = (f"🏃 Melhor horário {label} pra {atividade} em {city_display}: **{j['inicio'].strftime('%H:%M')}–{j['fim'].strftime('%H:%M')}** "
+           f"(~{round(j['temp'])}°C, chuva {int(j['rain_prob'])}%, vento {round(j['vento'])} km/h)")
+    if j["rain_prob"] >= CLIMA_CHUVA_PROB:
+        txt += "\n☂️ Mesmo no melhor horário a chance de chuva é alta — vale um plano B."
+    elif j["temp"] > CONFORTO_C[1]:
+        txt += "\n💧 Vai estar quente até no melhor horário — leva água."
+    return txt
+
+async def resolve_city_coords_async(settings: dict, city: str) -> Optional[dict]:
+    """
+    Resolve cidade -> coords.
+    Se bater com a cidade padrão e já tiver lat/lon, reaproveita.
+    """
+    s_city = (settings or {}).get("city_name") or ""
+    s_lat = (settings or {}).get("lat")
+    s_lon = (settings or {}).get("lon")
+
+    if city and s_city and city.strip().lower() == s_city.strip().lower() and s_lat is not None and s_lon is not None:
+        return {"city": s_city, "lat": float(s_lat), "lon": float(s_lon)}
+
+    g = await geocode_city_async(city)
+    if not g:
+        return None
+    display = g.get("name") or city
+    admin1 = g.get("admin1")
+    if admin1 and admin1 not in display:
+        display = f"{display}, {admin1}"
+    return {"city": display, "lat": float(g["lat"]), "lon": float(g["lon"])}
+
+def resolve_city_coords(settings: dict, city: str) -> Optional[dict]:
+    return aio.rodar(resolve_city_coords_async(settings, city))
+
+def format_weather_reply(city_display: str, w: dict, day_offset: int) -> str:
+    """Formata uma resposta curta e estável."""
+    try:
+        idx = max(0, min(len(w.get("dates", [])) - 1, int(day_offset)))
+    except Exception:
+        idx = 0
+
+    def pick(arr, i):
+        try:
+            return arr[i]
+        except Exception:
+            return None
+
+    date_str = pick(w.get("dates", []), idx)
+    tmin = pick(w.get("temp_min", []), idx)
+    tmax = pick(w.get("temp_max", []), idx)
+    rp = pick(w.get("rain_prob", []), idx)
+    rsum = pick(w.get("rain_sum", []), idx)
+    now_temp = (w.get("current") or {}).get("temp_now")
+
+    label = "Amanhã" if idx == 1 else "Hoje"
+    d_txt = ""
+    try:
+        if date_str:
+            d = datetime.fromisoformat(str(date_str))
+            d_txt = f" ({d.strftime('%d/%m')})"
+    except Exception:
+        d_txt = ""
+
+    def fmt_c(v):
+        return f"{round(v)}°C" if isinstance(v, (int, float)) else "?"
+    def fmt_pct(v):
+        return f"{int(v)}%" if isinstance(v, (int, float)) else "?"
+    def fmt_mm(v):
+        return f"{round(v, 1)}mm" if isinstance(v, (int, float)) else "?"
+
+    line1 = f"🌦️ **{label}{d_txt} em {city_display}:** {fmt_c(tmin)}–{fmt_c(tmax)} | chance de chuva **{fmt_pct(rp)}**"
+    extras = []
+    if isinstance(now_temp, (int, float)) and idx == 0:
+        extras.append(f"agora {fmt_c(now_temp)}")
+    if isinstance(rsum, (int, float)):
+        extras.append(f"chuva acumulada {fmt_mm(rsum)}")
+
+    if extras:
+        line1 += " (" + " | ".join(extras) + ")"
+
+    # dica simples
+    if isinstance(rp, (int, float)) and rp >= 60:
+        line1 += "\n☂️ Leva guarda-chuva pra não tomar prejuízo 😄"
+    elif isinstance(tmax, (int, float)) and tmax >= 30:
+        line1 += "\n💧 Vai estar quente — água e protetor ajudam demais."
+
+    return line1
+
+def format_weather_comparacao(infos: list, ws: list, day_offset: int) -> str:
+    """Várias cidades lado a lado: uma linha por cidade + quem tá mais quente/chuvosa."""
+    linhas, quentes, chuvosas = [], [], []
+    data_txt = ""
+    for info, w in zip(infos, ws):
+        if not w:
+            linhas.append(f"• **{info['city']}**: previsão indisponível agora")
+            continue
+        idx = max(0, min(len(w.get("dates", [])) - 1, int(day_offset)))
+
+        def pick(k):
+            try:
+                return w[k][idx]
+            except Exception:
+                return None
+
+        tmin, tmax, rp = pick("temp_min"), pick("temp_max"), pick("rain_prob")
+        if not data_txt and pick("dates"):
+            try:
+                data_txt = f" ({datetime.fromisoformat(str(pick('dates'))).strftime('%d/%m')})"
+            except Exception:
+                pass
+        faixa = f"{round(tmin)}–{round(tmax)}°C" if isinstance(tmin, (int, float)) and isinstance(tmax, (int, float)) else "?"
+        chuva = f"{int(rp)}%" if isinstance(rp, (int, float)) else "?"
+        emoji = "🌧️" if isinstance(rp, (int, float)) and rp >= 60 else "🌤️"
+        linhas.append(f"{emoji} **{info['city']}**: {faixa} | chuva {chuva}")
+        if isinstance(tmax, (int, float)):
+            quentes.append((tmax, info["city"]))
+        if isinstance(rp, (int, float)):
+            chuvosas.append((rp, info["city"]))
+
+    label = "Amanhã" if day_offset == 1 else "Hoje"
+    out = [f"🌦️ **{label}{data_txt}:**"] + linhas
+    extras = []
+    if len(quentes) > 1:
+        extras.append(f"mais quente: {max(quentes)[1]}")
+    if len(chuvosas) > 1 and max(chuvosas)[0] > 0:
+        extras.append(f"mais chuva: {max(chuvosas)[1]}")
+    if extras:
+        out.append("→ " + " · ".join(extras))
+    return "\n".join(out)
@@ -0,0 +1,59 @@
+"""
+Segredos e clientes das APIs (Groq/Tavily), criados sob demanda.
+Procura a chave em variável de ambiente e, se o Streamlit estiver rodando,
+em st.secrets — assim o pacote funciona fora do app (bot, benchmarks...).
+
+Com a cassete ligada (ver cassete.py) os clientes e o http() passam pelo
+gravador/reprodutor; no replay nenhuma chave é necessária.
+"""
+import os
+
+from . import cassete
+
+_clients: dict = {}
+
+
+def get_secret(name: str, default=None):
+    v = os.environ.get(name)
+    if v:
+        return v
+    try:
+        import streamlit as st
+        v = st.secrets.get(name, default)
+    except Exception:
+        v = default
+    return v or cassete.segredo_replay(name) or default
+
+def http():
+    """Módulo `requests` (ou o equivalente da cassete). Use http().get/post nas integrações."""
+    return cassete.http()
+
+def get_groq():
+    """Cliente Groq (singleton). Levanta RuntimeError se não tiver GROQ_API_KEY."""
+    k = ("groq", cassete.modo())
+    if k not in _clients:
+        if cassete.modo() == "replay":
+            _clients[k] = cassete.envolver("groq", None)
+            return _clients[k]
+        key = get_secret("GROQ_API_KEY")
+        if not key:
+            raise RuntimeError("GROQ_API_KEY ausente")
+        from groq import Groq
+        real = Groq(api_key=key)
+        _clients[k] = cassete.envolver("groq", real) if cassete.ativo() else real
+    return _clients[k]
+
+def get_tavily():
+    """Cliente Tavily (singleton). Levanta RuntimeError se não tiver TAVILY_API_KEY."""
+    k = ("tavily", cassete.modo())
+    if k not in _clients:
+        if cassete.modo() == "replay":
+            _clients[k] = cassete.envolver("tavily", None)
+            return _clients[k]
+        key = get_secret("TAVILY_API_KEY")
+        if not key:
+            raise RuntimeError("TAVILY_API_KEY ausente")
+        from tavily import TavilyClient
+        real = TavilyClient(api_key=key)
+        _clients[k] = cassete.envolver("tavily", real) if cassete.ativo() else real
+    return _clients[k]
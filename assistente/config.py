@@ -0,0 +1,135 @@
+"""Constantes do app: persona, caminhos, horários e defaults."""
+from zoneinfo import ZoneInfo
+
+
+# =========================
+# ASSISTENTE (NOME/PERSONA)
+# =========================
+ASSISTANT_NAME = "Zoe"
+ASSISTANT_TAGLINE = "Parceira bro 🤜🤛"
+ASSISTANT_ONE_LINER = "Jovem, animada, informal, direta ao ponto — gírias leves e uns emojis na medida."
+
+
+ZOE_PERSONA = f"""
+Você é {ASSISTANT_NAME}, uma assistente com vibe de parceira “bro” (descontraída).
+Estilo de fala:
+- Português do Brasil.
+- Tom jovem, animado e informal.
+- Use emojis às vezes (sem exagero).
+- Pode usar gírias leves como “bora”, “top”, “beleza”, “fechou”.
+- Seja prática e não enrole.
+- Pareça alguém que tomaria um café com o usuário (acolhedora, mas objetiva).
+- Quando precisar negar algo, seja firme e educada.
+- Evite textão: prefira respostas curtas e úteis.
+""".strip()
+
+
+# =========================
+# CONFIG
+# =========================
+# MUDANÇA: Modelo mais rápido para evitar lentidão
+MODEL_ID = "llama-3.1-8b-instant"
+ARQUIVO_TAREFAS = "tarefas.json"
+
+FUSO_BR = ZoneInfo("America/Sao_Paulo")
+DB_PATH = "jarvis_memory.db"
+SUMMARY_PATH = "summary.txt"
+
+REMINDER_SCHEDULE_MIN = [0, 10, 30, 120]
+QUIET_START = 22
+QUIET_END = 7
+
+# Tick do servidor (rotinas/alertas). Os horários exatos ficam com os timers do navegador
+# (próximos lembretes + rotinas), então o tick é só rede de segurança.
+AUTO_REFRESH_MS = 300_000  # 5 min
+CLIENT_TIMERS_MAX = 5           # quantos lembretes futuros vão pro navegador
+CLIENT_TIMERS_HORIZON_H = 12    # só agenda o que cai nas próximas N horas
+CLIENT_TIMER_SLACK_MS = 1500    # dispara um pouco depois do minuto virar no servidor
+
+# =========================
+# ROTINAS (BRIEFING / LEMBRETES / FECHAMENTO)
+# =========================
+SETTINGS_PATH = "miga_settings.json"
+DAILY_STATE_PATH = "miga_daily_state.json"
+
+DEFAULT_SETTINGS = {
+    "city_name": "Ilhéus, BA",
+    "lat": None,
+    "lon": None,
+    "briefing_enabled": True,
+    "briefing_time": "07:00",
+    "smart_enabled": True,
+    "leave_time": "07:20",          # horário típico de sair (pra lembrete de chuva)
+    "rain_threshold": 60,           # % chance de chuva pra lembrar guarda-chuva
+    "heat_threshold": 30,           # °C pra lembrete de água
+    "closing_enabled": True,
+    "closing_time": "21:30",
+    "avatar_path": "avatar.png",
+    "telegram_chat_id": "",         # chat desse usuário; vazio: tg<id> usa o próprio id, o padrão usa TELEGRAM_CHAT_ID
+    "retention_days": {},           # override por kind, ex: {"alert": 7} (ver EVENT_RETENTION_DAYS)
+}
+
+# =========================
+# STORAGE CHAT (PERSISTÊNCIA DIÁRIA)
+# =========================
+CHAT_HISTORY_PATH = "chat_history.json"
+CHAT_MAX_MESSAGES = 400
+
+# =========================
+# ARQUIVOS ESTÁTICOS (servidos pelo Streamlit em /app/static)
+# =========================
+STATIC_DIR = "static"
+STATIC_URL_PREFIX = "app/static/"
+ASSETS_DIR = "assets"             # fontes do CSS/JS da UI (publicados em STATIC_DIR com hash)
+AVATAR_SIZE = 96                 # px (quadrado); topbar mostra em 34px, 96 cobre telas 2x/3x
+AVATAR_QUALITY = 80              # WEBP
+AVATAR_MAX_INLINE_BYTES = 64 * 1024   # avatar maior que isso (upload antigo) é reduzido ao carregar
+
+# =========================
+# USUÁRIOS (cada um com seu diretório; ver assistente/usuario.py)
+# =========================
+USER_DEFAULT = "default"         # usa o cwd (onde os dados sempre ficaram)
+USERS_DIR = "usuarios"
+
+# =========================
+# TELEGRAM (fila de saída; ver assistente/telegram.py)
+# =========================
+TELEGRAM_FILA_DB = "telegram_fila.db"   # no cwd: um bot/token por instalação, todos os usuários
+TELEGRAM_CHAT_INTERVALO_S = 1.0          # mín. entre mensagens pro mesmo chat
+TELEGRAM_GLOBAL_POR_S = 25               # teto global (o Telegram corta em ~30/s)
+TELEGRAM_AGRUPAR_S = 2.0                 # espera até N s juntando rajadas pro mesmo chat
+TELEGRAM_MAX_TENTATIVAS = 8
+TELEGRAM_BACKOFF_MAX_S = 300
+TELEGRAM_BOT_WORKERS = 8                 # mensagens processadas em paralelo (ordem mantida por chat)
+TELEGRAM_POLL_TIMEOUT_S = 50             # long polling do getUpdates
+
+# =========================
+# I/O ASSÍNCRONO (aio.py)
+# =========================
+AIO_MAX_CONEXOES = 32                    # pool único (httpx) pra todas as integrações
+AIO_KEEPALIVE = 16
+AIO_TIMEOUT_S = 20.0                     # padrão quando a chamada não passa timeout
+
+# =========================
+# MOTOR DE ROTINAS (ver assistente/agendador.py)
+# =========================
+# janela de recuperação: até quanto tempo depois do horário a rotina ainda sai
+ROTINA_JANELA_MIN = {"briefing": 180, "briefing_preparo": 190, "umbrella": 30, "water": 120, "closing": 150}
+ROTINA_JANELA_PADRAO_MIN = 60
+ROTINA_WORKER_MAX_ESPERA_S = 600         # worker relê settings/usuários pelo menos a cada 10 min
+BRIEFING_ANTECEDENCIA_MIN = 10           # briefing é montado esse tanto antes e só enviado na hora
+
+# =========================
+# PREVISÃO (última boa, ver clima.clima_de_hoje)
+# =========================
+CLIMA_ULTIMO_PATH = "clima_ultimo.json"  # última previsão boa por coordenada (fallback se a Open-Meteo falhar)
+CLIMA_FRESCO_S = 1800                    # mais nova que isso: usa sem buscar de novo
+
+# previsão horária (vem junto no fetch_weather; clima.series_horarias) e janelas de chuva/calor/vento
+CLIMA_CHUVA_PROB = 50                    # hora "de chuva": probabilidade >= isso...
+CLIMA_CHUVA_MM = 0.2                     # ...ou precipitação prevista >= isso (mm/h)
+CLIMA_SAIDA_HORAS = 3                    # guarda-chuva olha do leave_time até N horas depois
+ATIVIDADE_HORAS = (5, 21)                # "melhor horário pra correr": só entre essas horas
+CONFORTO_C = (15, 25)                    # sensação térmica confortável pra atividade ao ar livre
+VENTO_FORTE_KMH = 25
+GEOCODE_CACHE_MAX = 256                  # cidades já resolvidas (geocode_city), em memória
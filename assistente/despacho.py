@@ -0,0 +1,98 @@
+"""
+Livro de despachos: garante que cada lembrete/rotina sai uma vez só,
+não importa quantas abas, ticks ou workers (bot, API) estejam rodando.
+
+Antes de mandar Telegram/notificação/TTS, quem vai disparar "reivindica" a
+chave numa tabela SQLite com PRIMARY KEY. O INSERT é atômico: só um
+processo consegue inserir; os outros recebem False e não mandam nada.
+
+Chaves:
+    tarefa:<id>::<next_remind_at>     (cada reagendamento é um despacho novo)
+    rotina:<nome>:<YYYY-MM-DD>        (briefing, umbrella, water, closing)
+"""
+import sqlite3
+from datetime import timedelta
+
+from .config import DB_PATH
+from .tempo import now_br
+from .usuario import caminho
+
+DESPACHO_RETENCAO_DIAS = 30
+
+_tabelas_prontas: set = set()   # por arquivo (cada usuário tem o seu banco)
+
+
+def chave_tarefa(tarefa: dict) -> str:
+    next_at = tarefa.get("next_remind_at") or tarefa.get("data_hora")
+    return f"tarefa:{tarefa.get('id')}::{next_at}"
+
+def chave_rotina(nome: str, dia: str) -> str:
+    return f"rotina:{nome}:{dia}"
+
+
+def _db():
+    path = caminho(DB_PATH)
+    conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    if path not in _tabelas_prontas:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS despachos (
+            chave TEXT PRIMARY KEY,
+            ts TEXT NOT NULL,
+            origem TEXT
+        )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_despachos_ts ON despachos(ts)")
+        conn.execute(
+            "DELETE FROM despachos WHERE ts < ?",
+            ((now_br() - timedelta(days=DESPACHO_RETENCAO_DIAS)).strftime("%Y-%m-%d %H:%M:%S"),)
+        )
+        conn.commit()
+        _tabelas_prontas.add(path)
+    return conn
+
+def reivindicar(chave: str, origem: str = "") -> bool:
+    """
+    True = é sua, pode disparar. False = alguém já disparou.
+    Se o banco falhar, devolve True (melhor avisar duas vezes do que nenhuma).
+    """
+    try:
+        conn = _db()
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO despachos(chave, ts, origem) VALUES (?,?,?)",
+            (chave, now_br().strftime("%Y-%m-%d %H:%M:%S"), origem or None)
+        )
+        conn.commit()
+        conn.close()
+        return cur.rowcount == 1
+    except Exception:
+        return True
+
+def reivindicar_varios(chaves: list, origem: str = "") -> list:
+    """Várias chaves numa transação só; devolve as que ficaram com você (na ordem)."""
+    if not chaves:
+        return []
+    try:
+        conn = _db()
+        ts = now_br().strftime("%Y-%m-%d %H:%M:%S")
+        minhas = []
+        with conn:
+            for chave in chaves:
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO despachos(chave, ts, origem) VALUES (?,?,?)", (chave, ts, origem or None)
+                )
+                if cur.rowcount == 1:
+                    minhas.append(chave)
+        conn.close()
+        return minhas
+    except Exception:
+        return list(chaves)
+
+def ja_despachado(chave: str) -> bool:
+    try:
+        conn = _db()
+        row = conn.execute("SELECT 1 FROM despachos WHERE chave = ?", (chave,)).fetchone()
+        conn.close()
+        return row is not None
+    except Exception:
+        return False
@@ -0,0 +1,75 @@
+"""
+Publica bytes em STATIC_DIR com hash do conteúdo no nome (avatar-3f2a9c1b.webp),
+pra o Streamlit servir como arquivo estático e o navegador cachear.
+Nome muda só quando o conteúdo muda; versões antigas do mesmo prefixo são apagadas.
+"""
+import hashlib
+import os
+import tempfile
+from typing import Optional
+
+from .config import STATIC_DIR, STATIC_URL_PREFIX
+
+_publicados: dict = {}   # (nome, hash) -> arquivo já escrito nesse processo
+
+
+def publicar(conteudo: bytes, nome: str, ext: str) -> Optional[str]:
+    """Grava (se ainda não existir) e devolve o nome do arquivo, ou None se falhar."""
+    if not conteudo:
+        return None
+    h = hashlib.sha1(conteudo).hexdigest()[:10]
+    fn = f"{nome}-{h}{ext}"
+    if _publicados.get((nome, h)) == fn:
+        return fn
+    try:
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        path = os.path.join(STATIC_DIR, fn)
+        if not os.path.exists(path):
+            fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=STATIC_DIR)
+            with os.fdopen(fd, "wb") as f:
+                f.write(conteudo)
+            os.replace(tmp, path)
+        for velho in os.listdir(STATIC_DIR):
+            if velho != fn and velho.startswith(f"{nome}-") and velho.endswith(ext):
+                try:
+                    os.remove(os.path.join(STATIC_DIR, velho))
+                except Exception:
+                    pass
+        _publicados[(nome, h)] = fn
+        return fn
+    except Exception:
+        return None
+
+_arquivos: dict = {}     # caminho -> (mtime_ns, bytes)
+
+def ler_arquivo(path: str) -> bytes:
+    """Conteúdo do arquivo, relido só quando o mtime muda."""
+    try:
+        m = os.stat(path).st_mtime_ns
+    except OSError:
+        return b""
+    hit = _arquivos.get(path)
+    if hit and hit[0] == m:
+        return hit[1]
+    with open(path, "rb") as f:
+        data = f.read()
+    _arquivos[path] = (m, data)
+    return data
+
+def publicar_arquivo(path: str, nome: str, ext: str) -> Optional[str]:
+    """publicar() do conteúdo de um arquivo-fonte (ex: assets/zoe.css -> zoe-<hash>.css)."""
+    try:
+        return publicar(ler_arquivo(path), nome, ext)
+    except Exception:
+        return None
+
+def url(fn: str) -> str:
+    return STATIC_URL_PREFIX + fn
+
+def servindo() -> bool:
+    """True se o Streamlit estiver com server.enableStaticServing ligado."""
+    try:
+        import streamlit as st
+        return bool(st.get_option("server.enableStaticServing"))
+    except Exception:
+        return False
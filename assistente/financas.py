@@ -0,0 +1,232 @@
+"""Cotações B3 (Yahoo Finance direto, brapi.dev como fallback) e respostas prontas."""
+import os
+import re
+from datetime import datetime
+
+from .config import FUSO_BR
+from . import aio
+from .conexoes import get_secret
+from .perf import timed
+
+
+def _extract_b3_ticker(texto: str) -> str:
+    """Tenta extrair um ticker B3 do texto (ex: KNCR11, PETR4)."""
+    if not texto:
+        return ""
+    m = re.search(r"\b([A-Za-z]{4}\d{1,2})\b", str(texto))
+    if not m:
+        return ""
+    return m.group(1).upper()
+
+_B3_TICKER_RE = re.compile(r"^[A-Z]{4}\d{1,2}$")
+
+def _is_b3_ticker(ticker: str) -> bool:
+    t = (ticker or "").strip().upper()
+    return bool(_B3_TICKER_RE.match(t))
+
+def _to_yahoo_symbol(ticker: str) -> str:
+    """Converte ticker B3 (ex: KNCR11) -> símbolo Yahoo (ex: KNCR11.SA)."""
+    t = (ticker or "").strip().upper()
+    if not t:
+        return ""
+    if t.endswith(".SA"):
+        return t
+    # padrão B3 (ações/FIIs) costuma usar sufixo .SA no Yahoo
+    if _is_b3_ticker(t):
+        return f"{t}.SA"
+    return t
+
+@timed("ext:yahoo")
+async def fetch_yahoo_quote_async(ticker: str) -> dict:
+    """Consulta cotação direta no Yahoo Finance (sem chave)."""
+    symbol = _to_yahoo_symbol(ticker)
+    if not symbol:
+        return {}
+
+    headers = {
+        "User-Agent": "Mozilla/5.0",
+        "Accept": "application/json,text/plain,*/*",
+    }
+
+    # Tenta endpoint de quote primeiro (mais leve), depois chart (tem meta também).
+    urls = [
+        f"https://query1.finance.yahoo.com/v7/finance/quote?symbols={symbol}",
+        f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?interval=1m&range=1d",
+    ]
+
+    last_err = None
+    for url in urls:
+        try:
+            r = await aio.get(url, headers=headers, timeout=8)
+            if r.status_code != 200:
+                last_err = f"HTTP {r.status_code}"
+                continue
+            j = r.json() if r.content else {}
+            if "quoteResponse" in j:
+                items = (j.get("quoteResponse") or {}).get("result") or []
+                it = items[0] if items else {}
+                if isinstance(it, dict) and it.get("regularMarketPrice") is not None:
+                    it["_provider"] = "yahoo"
+                    it["_symbol"] = symbol
+                    return it
+            if "chart" in j:
+                res = (((j.get("chart") or {}).get("result") or [])[:1] or [{}])[0] or {}
+                meta = res.get("meta") or {}
+                if isinstance(meta, dict) and meta.get("regularMarketPrice") is not None:
+                    out = dict(meta)
+                    out["_provider"] = "yahoo"
+                    out["_symbol"] = symbol
+                    return out
+            last_err = "payload vazio"
+        except Exception as e:
+            last_err = str(e)
+
+    return {"_error": f"yahoo_fail:{last_err}"}
+
+def fetch_yahoo_quote(ticker: str) -> dict:
+    return aio.rodar(fetch_yahoo_quote_async(ticker))
+
+@timed("ext:brapi")
+async def fetch_brapi_quote_async(ticker: str) -> dict:
+    """Consulta cotação via brapi.dev (usa dados do Yahoo)."""
+    ticker = (ticker or "").strip().upper()
+    if not ticker:
+        return {}
+    token = os.environ.get("BRAPI_TOKEN") or get_secret("BRAPI_TOKEN", None)
+
+    # brapi costuma aceitar tanto 'KNCR11' quanto 'KNCR11.SA' — tenta ambos
+    candidates = []
+    if ticker:
+        candidates.append(ticker)
+    if _is_b3_ticker(ticker):
+        candidates.append(f"{ticker}.SA")
+    if ticker.endswith(".SA") and _is_b3_ticker(ticker[:-3]):
+        candidates.append(ticker[:-3])
+
+    headers = {"User-Agent": "Mozilla/5.0", "Accept": "application/json"}
+
+    last_err = None
+    for tk in list(dict.fromkeys([c for c in candidates if c])):  # dedupe preservando ordem
+        url = f"https://brapi.dev/api/quote/{tk}"
+        params = {"range": "1d", "interval": "1d"}
+        if token:
+            params["token"] = token
+        try:
+            r = await aio.get(url, params=params, headers=headers, timeout=8)
+            if r.status_code != 200:
+                last_err = f"HTTP {r.status_code}"
+                continue
+            j = r.json() if r.content else {}
+            res = (j.get("results") or [])
+            if not res:
+                last_err = "results vazio"
+                continue
+            it = res[0] or {}
+            if isinstance(it, dict) and it:
+                it["_provider"] = "brapi"
+                it["_symbol"] = tk
+                return it
+            last_err = "item inválido"
+        except Exception as e:
+            last_err = str(e)
+
+    return {"_error": f"brapi_fail:{last_err}"}
+
+def fetch_brapi_quote(ticker: str) -> dict:
+    return aio.rodar(fetch_brapi_quote_async(ticker))
+
+def fetch_finance_quote(ticker: str) -> dict:
+    """Tenta cotação por múltiplas fontes (prioriza Yahoo direto, depois brapi)."""
+    # 1) Yahoo direto (normalmente mais estável do que depender de token da brapi)
+    q = fetch_yahoo_quote(ticker)
+    if q and not q.get("_error") and q.get("regularMarketPrice") is not None:
+        return q
+
+    # 2) brapi
+    q2 = fetch_brapi_quote(ticker)
+    if q2 and not q2.get("_error") and q2.get("regularMarketPrice") is not None:
+        return q2
+
+    # 3) se ambos falharam, devolve o erro mais útil
+    if q and q.get("_error"):
+        return q
+    if q2 and q2.get("_error"):
+        return q2
+    return {}
+
+def local_ticker_info_answer(ticker: str) -> str:
+    """Respostas locais (sem web) para tickers bem conhecidos — evita busca ruim."""
+    t = (ticker or "").strip().upper()
+    if t == "KNCR11":
+        return (
+            "**KNCR11** é o ticker do FII **Kinea Rendimentos Imobiliários** (B3).\n\n"
+            "- Tipo: geralmente classificado como **fundo de papel** (focado em crédito).\n"
+            "- Onde investe: majoritariamente em **CRIs** (Certificados de Recebíveis Imobiliários) e instrumentos de renda fixa ligados ao mercado imobiliário.\n"
+            "- Como costuma gerar rendimento: juros/recebíveis desses títulos (e pode variar com inflação/juros, dependendo do portfólio).\n\n"
+            "Se você me disser o que você quer analisar (risco, dividendos, preço, comparação com outro FII), eu direciono certinho."
+        )
+    return f"Esse ticker (**{t}**) parece ser da B3, mas eu precisaria pesquisar pra te dar a descrição exata sem chutar."
+
+def _fmt_money(v) -> str:
+    try:
+        return f"R$ {float(v):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    except Exception:
+        return "—"
+
+def format_quote_answer(ticker: str, quote: dict) -> str:
+    """Monta resposta humaninha da cotação."""
+    ticker = (ticker or "").strip().upper()
+
+    # erros / vazio
+    if not quote or (isinstance(quote, dict) and quote.get("_error") and quote.get("regularMarketPrice") is None):
+        return (
+            f"Não consegui puxar a cotação de **{ticker}** agora 😅 "
+            "(pode ser instabilidade/limite na fonte). Tenta de novo em alguns segundos."
+        )
+
+    price = quote.get("regularMarketPrice") or quote.get("price") or quote.get("regularMarketLastPrice")
+    change_pct = quote.get("regularMarketChangePercent") or quote.get("changePercent")
+    upd = quote.get("regularMarketTime") or quote.get("updatedAt")  # epoch ou string
+    name = quote.get("longName") or quote.get("shortName") or quote.get("name") or ticker
+
+    # horário (se vier em epoch)
+    upd_txt = ""
+    try:
+        if isinstance(upd, (int, float)) and upd > 10_000:
+            dt = datetime.fromtimestamp(float(upd), tz=FUSO_BR)
+            upd_txt = dt.strftime("%d/%m %H:%M")
+        elif isinstance(upd, str) and upd:
+            upd_txt = str(upd)
+    except Exception:
+        upd_txt = ""
+
+    provider = (quote.get("_provider") or "").lower()
+    footer = ""
+    if provider == "yahoo":
+        footer = "📌 *Dados via Yahoo Finance (consulta direta).*"
+
+    elif provider == "brapi":
+        footer = "📌 *Dados via brapi.dev (Yahoo Finance).*"
+
+    else:
+        footer = "📌 *Dados via fonte externa.*"
+
+
+    parts = [f"💹 **{ticker}** ({name}) tá em **{_fmt_money(price)}**"]
+    try:
+        if isinstance(change_pct, (int, float)):
+            parts.append(f"({float(change_pct):+.2f}% no dia)")
+    except Exception:
+        pass
+    if upd_txt:
+        parts.append(f"• atualizado {upd_txt}")
+    return (" ".join(parts).strip() + "\n\n" + footer).strip()
+
+def fetch_brapi_dividends_hint(ticker: str) -> dict:
+    """Tenta obter alguma info de dividendos (se a API fornecer)."""
+    q = fetch_brapi_quote(ticker)
+    # dependendo do payload, isso pode existir
+    div = q.get("dividendsData") or q.get("dividends") or {}
+    if isinstance(div, dict) and div:
+        return {"quote": q, "div": div}
+    return {"quote": q, "div": {}}
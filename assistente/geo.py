@@ -0,0 +1,217 @@
+"""
+Geocoder offline de municípios brasileiros: "Ilhéus, BA", "ilheus ba",
+"Ilhéus/BA", "ilhéus bahia" → lat/lon sem rede. Só o que não está na base
+(cidade estrangeira, município fora do arquivo) vai pra API do Open-Meteo.
+
+A base (assistente/dados/municipios.csv: nome,uf,lat,lon,capital) é carregada
+uma vez, na primeira busca, em arrays compactos:
+    chaves  nomes normalizados (sem acento, minúsculos), ORDENADOS — índice de
+            prefixo por bisect: "feira de sant" acha "feira de santana"
+    lat/lon float32, uf uint8 (índice em UFS_ORDEM), capital bool
+e um dict chave → posições pros acertos exatos (homônimos: "valenca" → BA e RJ).
+
+De onde vem o arquivo: a lista de municípios do IBGE (5.570, nome + UF, via
+brutils/data/cities_code.json) casada por nome e UF com o GeoNames (cities500,
+CC-BY 4.0). Ficou a sede de 5.507; os outros 63 (nome sem par no GeoNames, ou
+dois lugares homônimos longe um do outro no mesmo estado, sem como saber qual é
+a sede) ficaram de fora e caem na API. Conferência: 1.891 sedes batem a menos de
+5 km com o GeoNames cities1000 (lugar cujo nome = município), e 156 das 157
+cidades da lista digitada antes batem a menos de 10 km (São José/SC está entre
+os 63).
+
+Busca por prefixo ("feira de sant") é só a última opção: buscar() acha o nome
+exato, e o prefixo só vale com prefixo=True — o geocode_city chama assim
+depois da API, pra "caxias" não virar Caxias do Sul.
+
+Pra trocar a base (ex.: lista nova do IBGE com coordenadas):
+    python -m assistente.geo --importar municipios.csv
+(aceita o CSV com codigo_uf/latitude/longitude do IBGE ou um já no formato acima).
+"""
+import argparse
+import csv
+import os
+import re
+import sys
+import threading
+import unicodedata
+from bisect import bisect_left
+from typing import Optional
+
+import numpy as np
+
+MUNICIPIOS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dados", "municipios.csv")
+
+ESTADOS = {
+    "AC": "Acre", "AL": "Alagoas", "AP": "Amapá", "AM": "Amazonas", "BA": "Bahia", "CE": "Ceará",
+    "DF": "Distrito Federal", "ES": "Espírito Santo", "GO": "Goiás", "MA": "Maranhão", "MT": "Mato Grosso",
+    "MS": "Mato Grosso do Sul", "MG": "Minas Gerais", "PA": "Pará", "PB": "Paraíba", "PR": "Paraná",
+    "PE": "Pernambuco", "PI": "Piauí", "RJ": "Rio de Janeiro", "RN": "Rio Grande do Norte",
+    "RS": "Rio Grande do Sul", "RO": "Rondônia", "RR": "Roraima", "SC": "Santa Catarina",
+    "SP": "São Paulo", "SE": "Sergipe", "TO": "Tocantins",
+}
+UFS = set(ESTADOS)
+UFS_ORDEM = sorted(ESTADOS)
+UF_IBGE = {
+    11: "RO", 12: "AC", 13: "AM", 14: "RR", 15: "PA", 16: "AP", 17: "TO", 21: "MA", 22: "PI", 23: "CE",
+    24: "RN", 25: "PB", 26: "PE", 27: "AL", 28: "SE", 29: "BA", 31: "MG", 32: "ES", 33: "RJ", 35: "SP",
+    41: "PR", 42: "SC", 43: "RS", 50: "MS", 51: "MT", 52: "GO", 53: "DF",
+}
+PREFIXO_MIN = 4   # "sao" sozinho não vira São Paulo
+
+_base: Optional[dict] = None
+_base_lock = threading.Lock()
+
+
+def normalizar(s: str) -> str:
+    """Sem acento, minúsculo, só letras/dígitos separados por um espaço."""
+    s = unicodedata.normalize("NFKD", s or "")
+    s = "".join(c for c in s if not unicodedata.combining(c)).lower()
+    return re.sub(r"[^a-z0-9]+", " ", s).strip()
+
+_ESTADOS_NORM = sorted(((normalizar(n), uf) for uf, n in ESTADOS.items()), key=lambda x: -len(x[0]))
+
+
+# =========================
+# BASE (carregada uma vez)
+# =========================
+def _carregar(path: str = MUNICIPIOS_PATH) -> dict:
+    nomes, ufs, lats, lons, caps = [], [], [], [], []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for r in csv.DictReader(f):
+                if r.get("uf") not in UFS:
+                    continue
+                nomes.append(r["nome"])
+                ufs.append(UFS_ORDEM.index(r["uf"]))
+                lats.append(float(r["lat"]))
+                lons.append(float(r["lon"]))
+                caps.append(str(r.get("capital") or "0").strip() == "1")
+    except Exception:
+        pass
+    chaves = [normalizar(n) for n in nomes]
+    ordem = sorted(range(len(chaves)), key=lambda i: chaves[i])
+    exato: dict = {}
+    for i, k in enumerate(chaves):
+        exato.setdefault(k, []).append(i)
+    return {
+        "nomes": nomes,
+        "uf": np.array(ufs, dtype=np.uint8),
+        "lat": np.array(lats, dtype=np.float32),
+        "lon": np.array(lons, dtype=np.float32),
+        "capital": np.array(caps, dtype=bool),
+        "chaves": [chaves[i] for i in ordem],   # ordenadas: índice de prefixo
+        "ordem": np.array(ordem, dtype=np.int32),
+        "exato": exato,
+    }
+
+def base() -> dict:
+    global _base
+    if _base is None:
+        with _base_lock:
+            if _base is None:
+                _base = _carregar()
+    return _base
+
+
+# =========================
+# BUSCA
+# =========================
+def separar_uf(texto: str) -> tuple:
+    """"Ilhéus, BA" / "ilheus ba" / "Ilhéus - Bahia" → ("ilheus", "BA"); sem UF → (nome, None)."""
+    k = re.sub(r"\b(?:brasil|brazil|br)$", "", normalizar(texto)).strip()
+    partes = k.rsplit(" ", 1)
+    if len(partes) == 2 and partes[1].upper() in UFS:
+        return partes[0], partes[1].upper()
+    for nome_estado, uf in _ESTADOS_NORM:
+        if k.endswith(" " + nome_estado):
+            return k[: -len(nome_estado)].strip(), uf
+    return k, None
+
+def _resultado(b: dict, i: int) -> dict:
+    uf = UFS_ORDEM[int(b["uf"][i])]
+    return {
+        "name": b["nomes"][i],
+        "admin1": ESTADOS[uf],
+        "uf": uf,
+        "country": "Brasil",
+        "lat": round(float(b["lat"][i]), 4),
+        "lon": round(float(b["lon"][i]), 4),
+    }
+
+def _prefixo(b: dict, k: str) -> list:
+    """Posições cujo nome normalizado começa com k (bisect no array ordenado)."""
+    chaves = b["chaves"]
+    i = bisect_left(chaves, k)
+    out = []
+    while i < len(chaves) and chaves[i].startswith(k):
+        out.append(int(b["ordem"][i]))
+        i += 1
+    return out
+
+def buscar(texto: str, prefixo: bool = False) -> Optional[dict]:
+    """
+    Município brasileiro → {"name", "admin1", "uf", "country", "lat", "lon"} (mesmo formato
+    do geocode_city), ou None se não estiver na base.
+    Homônimo sem UF: capital primeiro, senão o primeiro da base. Com prefixo=True, sem nome
+    exato, aceita um prefixo que seja de um nome só.
+    """
+    k, uf = separar_uf(texto)
+    if not k:
+        return None
+    b = base()
+    cands = list(b["exato"].get(k) or [])
+    por_prefixo = prefixo and not cands and len(k) >= PREFIXO_MIN
+    if por_prefixo:
+        cands = _prefixo(b, k)
+    if uf is not None:
+        cands = [i for i in cands if UFS_ORDEM[int(b["uf"][i])] == uf]
+    if not cands or (por_prefixo and len({b["nomes"][i] for i in cands}) > 1):
+        return None  # "porto" → Porto Alegre/Seguro/Velho... (ou Porto, Portugal): deixa pra API
+    cands.sort(key=lambda i: not bool(b["capital"][i]))
+    return _resultado(b, cands[0])
+
+
+# =========================
+# IMPORTAÇÃO (lista completa do IBGE)
+# =========================
+def importar(origem: str, destino: str = MUNICIPIOS_PATH) -> int:
+    """Converte um CSV de municípios (formato IBGE com codigo_uf/latitude/longitude, ou nome/uf/lat/lon) pro da base."""
+    linhas = []
+    with open(origem, "r", encoding="utf-8-sig") as f:
+        for r in csv.DictReader(f):
+            uf = r.get("uf") or UF_IBGE.get(int(r.get("codigo_uf") or 0))
+            if uf not in UFS:
+                continue
+            linhas.append({
+                "nome": r["nome"].strip(),
+                "uf": uf,
+                "lat": round(float(r.get("lat") or r["latitude"]), 4),
+                "lon": round(float(r.get("lon") or r["longitude"]), 4),
+                "capital": 1 if str(r.get("capital") or "0").strip() in ("1", "true", "True") else 0,
+            })
+    linhas.sort(key=lambda r: (r["uf"], normalizar(r["nome"])))
+    tmp = destino + ".tmp"
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=["nome", "uf", "lat", "lon", "capital"], lineterminator="\n")
+        w.writeheader()
+        w.writerows(linhas)
+    os.replace(tmp, destino)
+    global _base
+    _base = None
+    return len(linhas)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--importar", metavar="CSV", help="substitui a base pelos municípios desse CSV")
+    ap.add_argument("cidade", nargs="*", help="busca de teste (ex.: ilheus ba)")
+    args = ap.parse_args(argv)
+    if args.importar:
+        print(f"{importar(args.importar)} municípios em {MUNICIPIOS_PATH}", flush=True)
+    if args.cidade:
+        print(buscar(" ".join(args.cidade), prefixo=True), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
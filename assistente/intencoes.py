@@ -0,0 +1,249 @@
+"""
+Intenções e roteamento: guarda-corpos por regex, comandos slash, clima,
+finanças e heurísticas — o LLM só entra quando nada disso resolve.
+"""
+import re
+from typing import Optional
+
+from .financas import _extract_b3_ticker
+from .geo import UFS
+from .llm import router_llm
+from .texto import limpar_texto
+
+
+_WEEKDAY_PT = [
+    "segunda-feira", "terça-feira", "quarta-feira",
+    "quinta-feira", "sexta-feira", "sábado", "domingo"
+]
+
+def is_date_question(tnorm: str) -> bool:
+    # cobre variações tipo: "que dia é/era hoje?", "qual a data de hoje?", "hoje é que dia?"
+    return bool(re.search(r"\b(que dia (e|é|era) hoje|qual a data( de hoje)?|data de hoje|hoje (e|é) que dia)\b", tnorm))
+
+def is_time_question(tnorm: str) -> bool:
+    if _CHUVA_HORARIO.search(tnorm) or _MELHOR_HORARIO.search(tnorm):
+        return False  # "que horas para de chover?" é clima, não relógio
+    return bool(re.search(r"\b(que horas|horas s[aã]o|que hora)\b", tnorm))
+
+def is_memory_question(tnorm: str) -> bool:
+    # usuário pedindo pra lembrar o que foi dito/perguntado antes
+    pats = [
+        r"o que eu (te )?perguntei", r"o que eu falei", r"o que eu disse",
+        r"qual foi minha (ultima|última) pergunta", r"qual foi a (ultima|última) coisa que eu",
+        r"lembra( do)? que eu", r"você lembra( do)? que eu"
+    ]
+    return any(re.search(p, tnorm) for p in pats)
+
+def summarize_previous_user_messages(memoria: list, k: int = 4) -> str:
+    # pega as últimas mensagens do usuário (exclui a atual, que já está no fim)
+    user_msgs = [m.get("content","").strip() for m in (memoria or []) if m.get("role") == "user" and str(m.get("content","")).strip()]
+    if len(user_msgs) <= 1:
+        return "Ainda não tenho histórico suficiente aqui nesse chat 😅"
+    prev = user_msgs[:-1][-k:]
+    bullets = "\n".join([f"- {x}" for x in prev])
+    return f"Você tinha me perguntado isso aqui mais cedo:\n{bullets}"
+
+def is_task_create_intent(tnorm: str) -> bool:
+    # Só cria tarefa quando o usuário realmente pede um lembrete/tarefa
+    triggers = [
+        "me lembra", "me lembre", "lembra de", "lembrete", "agenda", "agende", "agendar",
+        "marca pra", "marcar pra", "marcar para", "anota", "anote", "cria uma tarefa", "criar uma tarefa",
+        "me avisa", "me notifica", "programa um lembrete", "seta um lembrete", "coloca na agenda"
+    ]
+    if any(t in tnorm for t in triggers):
+        return True
+
+    # recorrência com horário: “todo dia às 8h tomar remédio”, “toda terça 19h academia”
+    if re.search(r"\b(tod[oa]s? (os |as )?(dias?|segunda|ter[cç]a|quarta|quinta|sexta|s[aá]bado|domingo|m[eê]s)|diariamente|dias [uú]teis)\b", tnorm) \
+            and re.search(r"\b\d{1,2} ?h(\d{2})?\b|\b\d{1,2} \d{2}\b|\b\d{1,2} horas\b|meio dia|da (manh[aã]|tarde|noite)", tnorm):
+        return True
+    if re.search(r"\ba cada \d+ ?h(oras?)?\b|\bde \d+ em \d+ ?h(oras?)?\b", tnorm):
+        return True
+
+    # formato “amanhã 15:00 pagar conta” (sem 'me lembra'), bem típico
+    if re.search(r"\b(hoje|amanh[aã]|depois de amanh[aã]|segunda|ter[cç]a|quarta|quinta|sexta|s[aá]bado|domingo)\b", tnorm) and re.search(r"\b\d{1,2}:\d{2}\b", tnorm):
+        return True
+    if re.search(r"\b\d{1,2}/\d{1,2}(/\d{2,4})?\b", tnorm) and (re.search(r"\b\d{1,2}:\d{2}\b", tnorm) or "às" in tnorm or "as " in tnorm):
+        return True
+
+    return False
+
+def is_task_done_intent(tnorm: str) -> bool:
+    triggers = [
+        "marcar como feito", "marca como feito", "conclui", "concluí", "concluido", "concluído",
+        "feito", "já fiz", "ja fiz", "finalizei", "remover tarefa", "remove tarefa", "apagar tarefa",
+        "deletar tarefa", "cancelar tarefa"
+    ]
+    return any(t in tnorm for t in triggers)
+
+def response_looks_like_non_answer(resp_txt: str) -> bool:
+    r = limpar_texto(resp_txt or "")
+    bad = [
+        "nao sei", "não sei", "nao tenho certeza", "não tenho certeza", "nao consigo",
+        "não consigo", "nao tenho acesso", "não tenho acesso", "nao lembro", "não lembro",
+        "preciso de mais contexto", "nao encontrei", "não encontrei", "use /web", "usa /web"
+    ]
+    return any(b in r for b in bad)
+
+def should_auto_web(user_txt: str, resp_txt: str) -> bool:
+    # Só dispara web quando a resposta claramente é “não sei/usa web”.
+    t = limpar_texto(user_txt or "")
+    # não faz web pra perguntas de memória/local
+    if is_memory_question(t) or is_time_question(t) or is_date_question(t):
+        return False
+    # evita web quando o usuário explicitamente não quer web
+    if "sem web" in t or "não use web" in t or "nao use web" in t:
+        return False
+    return response_looks_like_non_answer(resp_txt)
+
+def parse_slash_command(raw: str) -> Optional[dict]:
+    """
+    Comandos começando com '/' NÃO podem passar por limpar_texto (que remove '/').
+    Aceita: /web <consulta>  |  /web  (sem consulta)  |  /chat
+    """
+    s = (raw or "").strip()
+    m = re.match(r"^/(web|chat)\b\s*(.*)$", s, flags=re.IGNORECASE)
+    if not m:
+        return None
+    cmd = (m.group(1) or "").lower()
+    arg = (m.group(2) or "").strip()
+    if cmd == "web":
+        # Se o user forçou /web mas a intenção é cotação, usa o caminho de finanças (mais confiável).
+        tnorm = limpar_texto(arg)
+        tck = _extract_b3_ticker(arg)
+        if tck and any(k in tnorm for k in ["cotacao", "cotação", "preco", "preço", "valor", "quanto", "cotação hoje", "preço hoje"]):
+            return {"action": "FINANCE_QUOTE", "ticker": tck, "from_slash_web": True}
+        return {"action": "WEB_SEARCH", "search_query": arg}
+    if cmd == "chat":
+        return {"action": "CHAT"}
+    return None
+
+# perguntas que pedem a previsão hora a hora (clima.series_horarias)
+_ATIVIDADE = r"(correr|corrida|caminhar|caminhada|pedalar|pedal|andar de bike|andar de bicicleta|treinar|malhar)"
+_MELHOR_HORARIO = re.compile(r"\b(?:melhor|bom|boa) (?:horario|horário|hora)\b.*\b" + _ATIVIDADE + r"\b"
+                             r"|\bque horas?\b.*\b(?:da|dá|e bom|é bom)\b.*\b" + _ATIVIDADE + r"\b")
+_CHUVA_HORARIO = re.compile(r"\b(?:para|parar|passa|passar|estia|estiar)\b.*\bchov|\bchuva\b.*\b(?:para|passa)\b"
+                            r"|\b(?:que horas?|quando|ate que horas|até que horas)\b.*\b(?:chov|chuva)")
+
+def separar_cidades(trecho: str) -> list:
+    """"Ilhéus, Salvador e Itabuna" → 3 cidades; "Ilhéus, BA" continua uma (UF gruda na anterior)."""
+    partes = [p.strip(" .?!") for p in re.split(r"\s*[,;/]\s*|\s+e\s+", trecho or "") if p.strip(" .?!")]
+    out = []
+    for p in partes:
+        if out and p.upper() in UFS:
+            out[-1] += f", {p.upper()}"
+        else:
+            out.append(p)
+    return out
+
+def _cidades_na_frase(raw: str) -> list:
+    """Lista de cidades no fim da frase original (com vírgulas), ou [] se for uma só."""
+    m = re.search(r".*\b(?:em|no|na|pra|para)\s+(.+)$", (raw or "").strip(), flags=re.IGNORECASE | re.S)
+    if not m:
+        return []
+    trecho = re.sub(r"\b(?:hoje|amanh[aã])\b", " ", m.group(1), flags=re.IGNORECASE)
+    cidades = [c for c in separar_cidades(trecho) if len(c) >= 2]
+    return cidades if len(cidades) >= 2 else []
+
+def detect_weather_request(raw: str, settings: dict) -> Optional[dict]:
+    """
+    Detecta pedidos de clima/previsão e responde via Open‑Meteo (sem depender de busca/LLM).
+    - Se o usuário não disser a cidade, usa settings['city_name'].
+    - Entende 'amanhã'.
+    - "pergunta": "chuva_horario" (quando chove/para) ou "melhor_horario" (+ "atividade").
+    - Várias cidades ("em Ilhéus, Salvador e Itabuna") → "cidades": [...] (comparação).
+    """
+    t = limpar_texto(raw)
+
+    pergunta, atividade = None, None
+    m_ativ = _MELHOR_HORARIO.search(t)
+    if m_ativ:
+        pergunta, atividade = "melhor_horario", m_ativ.group(1) or m_ativ.group(2)
+    elif _CHUVA_HORARIO.search(t):
+        pergunta = "chuva_horario"
+
+    # Evita falso positivo com "tempo" em outros contextos.
+    is_weather = pergunta is not None or any(k in t for k in ["previsao do tempo", "previsão do tempo", "clima", "temperatura", "vai chover", "chuva"])
+    is_weather = is_weather or bool(re.search(r"\bcomo (?:ta|tá|esta|está|vai estar|vai ta|vai tá) o tempo\b", t))
+    if not is_weather:
+        # 'tempo' sozinho é ambíguo; só aceita se vier junto de pista meteorológica.
+        if "tempo" not in t or not any(x in t for x in ["previs", "chuva", "temperatur", "clima"]):
+            return None
+
+    day_offset = 1 if any(x in t for x in ["amanha", "amanhã"]) else 0
+
+    # tira "pra correr", "para de chover" etc. antes de procurar a cidade no fim da frase
+    t_cidade = re.sub(r"\b(?:pra|para|de|a)\s+" + _ATIVIDADE + r"\b", " ", t)
+    t_cidade = re.sub(r"\b(?:para|parar|passa|passar)\s+de\s+chover\b|\bchover\b", " ", t_cidade)
+    t_cidade = re.sub(r"\s+", " ", t_cidade).strip()
+
+    # Tentativa leve de extrair cidade no final da frase: "em X", "para X", "no X", "na X"
+    city = None
+    m = re.search(r"(?:\bem\b|\bpara\b|\bpra\b|\bno\b|\bna\b)\s+([a-zà-ÿ0-9\s\-\.,]+)$", t_cidade, flags=re.IGNORECASE)
+    if m:
+        city = (m.group(1) or "").strip()
+        city = re.sub(r"\b(hoje|amanha|amanhã)\b", "", city).strip(" ,.-")
+        if len(city) < 2:
+            city = None
+
+    if not city:
+        city = (settings or {}).get("city_name") or "Ilhéus, BA"
+
+    acao = {"action": "WEATHER", "city": city, "day_offset": day_offset}
+    cidades = _cidades_na_frase(raw) if not pergunta else []
+    if cidades:
+        acao["cidades"] = cidades
+        acao["city"] = cidades[0]
+    if pergunta:
+        acao["pergunta"] = pergunta
+        if atividade:
+            acao["atividade"] = atividade
+    return acao
+
+def decidir_acao_heuristica(texto: str, settings: dict) -> Optional[dict]:
+    """Passos determinísticos do roteamento (sem rede). None = precisa do LLM."""
+    # 0) comandos slash primeiro (sem limpar_texto)
+    cmd = parse_slash_command(texto)
+    if cmd:
+        return cmd
+
+    # 1) clima via API (sem web/LLM)
+    wreq = detect_weather_request(texto, settings)
+    if wreq:
+        return wreq
+
+    # 2) finanças (cotação/dividendos) — tenta resolver por API antes de web/LLM
+    t = limpar_texto(texto)
+    ticker = _extract_b3_ticker(texto)
+
+    if ticker:
+        wants_price = any(k in t for k in ["cotacao", "cotação", "preco", "preço", "quanto ta", "quanto tá", "valor", "price"])
+        wants_div = any(k in t for k in ["dividendo", "dividendos", "rendimento", "rendimentos", "provento", "proventos", "pagamento", "data-com", "data com", "quando vou receber"])
+        if wants_price:
+            return {"action": "FINANCE_QUOTE", "ticker": ticker}
+        if wants_div:
+            return {"action": "FINANCE_DIVIDENDS", "ticker": ticker}
+
+
+        # Se a pergunta for "o que é/quem é/sobre" + ticker, faz uma busca mais esperta (evita dicionário/Wikipedia aleatório).
+        wants_info = any(k in t for k in [
+            "o que e", "oq e", "o q e", "que e", "sobre", "significa", "defina", "explica", "do que se trata",
+            "fii", "fundo", "etf", "acao", "ação"
+        ])
+        if wants_info:
+            # Query expandida pra puxar páginas de finanças brasileiras
+            if ticker == "KNCR11":
+                return {"action": "LOCAL_TICKER_INFO", "ticker": ticker}
+            # Query expandida pra puxar páginas de finanças brasileiras (evita dicionário aleatório)
+            return {"action": "WEB_SEARCH", "search_query": f"{ticker} FII B3 descrição"}
+    # 3) heurística simples de coisas que pedem web
+    if any(x in t for x in ["cotacao", "cotação", "preco", "preço", "noticia", "notícia", "quem ganhou", "resultado", "últimas", "atualizacao", "atualização"]):
+        return {"action": "WEB_SEARCH", "search_query": texto}
+    return None
+
+def decidir_acao(texto: str, tarefas: list, settings: dict, memoria: list = None) -> dict:
+    acao = decidir_acao_heuristica(texto, settings)
+    if acao:
+        return acao
+    # 4) fallback: roteador via LLM
+    return router_llm(texto, tarefas, memoria)
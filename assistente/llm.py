@@ -0,0 +1,286 @@
+"""Chamadas ao LLM (Groq): roteador, extração de tarefa, resumo vivo, resposta web e Whisper."""
+import json
+import re
+
+from .config import ASSISTANT_NAME, MODEL_ID, ZOE_PERSONA
+from . import aio
+from .perf import timed
+from .telemetria import llm_call
+from .storage import load_summary, save_summary
+from .tarefas import ajustar_futuro, normalizar_recorrencia, parse_recorrencia, parse_relativo, primeira_ocorrencia
+from .tempo import format_dt, now_floor_minute, parse_dt, parse_hhmm
+from .web import _format_tavily_sources
+
+
+# =========================
+# RESUMO VIVO
+# =========================
+@timed("ext:groq:summary")
+async def update_summary_with_llm_async(new_info: str):
+    if not new_info:
+        return
+    resumo_atual = load_summary()
+    prompt = f"""
+{ZOE_PERSONA}
+
+Atualize o RESUMO VIVO do usuário. Mantenha curto (max 20 linhas).
+
+RESUMO ATUAL:
+{resumo_atual}
+
+NOVA INFO:
+{new_info}
+
+Devolva APENAS o resumo novo.
+""".strip()
+    try:
+        with llm_call("update_summary_with_llm", MODEL_ID) as call:
+            resp = call.done(await aio.groq_chat(
+                model=MODEL_ID,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.2
+            )).choices[0].message.content
+        save_summary(resp)
+    except Exception:
+        pass
+
+def update_summary_with_llm(new_info: str):
+    return aio.rodar(update_summary_with_llm_async(new_info))
+
+
+# =========================
+# PARSER NLP
+# =========================
+@timed("ext:groq:extrair_tarefa")
+async def extrair_dados_tarefa_async(texto: str):
+    agora = now_floor_minute()
+    rec = parse_recorrencia(texto)
+    if rec:
+        r = normalizar_recorrencia(rec["recorrencia"])
+        hora = parse_hhmm(rec["recorrencia"].get("hora") or "")
+        inicio = agora.replace(hour=hora[0], minute=hora[1]) if hora else None
+        occ = primeira_ocorrencia(r, agora, inicio) if r else None
+        if occ:
+            return {"descricao": rec["descricao"] or texto, "data_hora": format_dt(occ), "recorrencia": r}
+
+    delta = parse_relativo(texto)
+    if delta:
+        return {"descricao": texto.split(" em ")[0].split(" daqui ")[0], "data_hora": format_dt(agora + delta)}
+
+    prompt = f"""
+{ZOE_PERSONA}
+
+Agora é {format_dt(agora)}. O user disse: "{texto}".
+Extraia JSON: {{"descricao": "...", "data_hora": "YYYY-MM-DD HH:MM"}}
+Se hora não for dita, assuma o próximo horário lógico.
+""".strip()
+
+    try:
+        with llm_call("extrair_dados_tarefa", MODEL_ID) as call:
+            resp = call.done(await aio.groq_chat(
+                model=MODEL_ID,
+                messages=[{"role": "user", "content": prompt}],
+                response_format={"type": "json_object"},
+            ))
+            data = json.loads(resp.choices[0].message.content)
+            dt = parse_dt(data["data_hora"])
+        data["data_hora"] = format_dt(ajustar_futuro(dt, agora))
+        if rec:
+            # "todo sábado comprar pão": a frase tinha a regra, o horário veio do LLM
+            r = normalizar_recorrencia(dict(rec["recorrencia"], hora=dt.strftime("%H:%M")))
+            occ = primeira_ocorrencia(r, agora) if r else None
+            if occ:
+                data["data_hora"] = format_dt(occ)
+                data["recorrencia"] = r
+        return data
+    except Exception:
+        return None
+
+def extrair_dados_tarefa(texto: str):
+    return aio.rodar(extrair_dados_tarefa_async(texto))
+
+
+# =========================
+# CHAT CONTEXTO (LIMPEZA)
+# =========================
+def to_llm_messages(memoria: list, limit: int = 20) -> list:
+    """Converte o histórico do Streamlit (que pode ter chaves extras) para o formato aceito pelo LLM."""
+    out = []
+    if not memoria:
+        return out
+    for m in memoria[-limit:]:
+        try:
+            role = m.get("role")
+            content = m.get("content")
+        except Exception:
+            continue
+        if role not in ("user", "assistant", "system"):
+            continue
+        if content is None:
+            continue
+        out.append({"role": role, "content": str(content)})
+    return out
+
+def format_recent_dialogue(memoria: list, limit: int = 8) -> str:
+    """Cria um resumo curtinho do diálogo recente (pra roteamento/decisão)."""
+    parts = []
+    for m in to_llm_messages(memoria, limit=limit):
+        who = "Usuário" if m["role"] == "user" else ASSISTANT_NAME
+        txt = m["content"].strip().replace("\n", " ")
+        if len(txt) > 160:
+            txt = txt[:160] + "…"
+        parts.append(f"- {who}: {txt}")
+    return "\n".join(parts).strip()
+
+
+# =========================
+# ROUTER
+# =========================
+@timed("ext:groq:router")
+async def router_llm_async(texto: str, tarefas: list, memoria: list = None) -> dict:
+    agora = format_dt(now_floor_minute())
+    resumo_tarefas = "\n".join([f"{i}: {t['descricao']}" for i, t in enumerate(tarefas)])
+    recent_chat = format_recent_dialogue((memoria or [])[:-1], limit=10)
+
+    prompt = f"""
+{ZOE_PERSONA}
+
+Agora é {agora}.
+Tarefas pendentes:
+{resumo_tarefas}
+
+Conversa recente (pra manter contexto):
+{recent_chat}
+
+Mensagem do usuário: "{texto}"
+
+Você vai escolher **UMA** ação.
+
+Regras MUITO importantes (pra não viajar):
+1) **TASK_CREATE** só quando o usuário pedir explicitamente um lembrete/tarefa.
+   Exemplos: "me lembra...", "lembrete", "agenda/agende", "anota", "marca pra...", "me avisa", "me notifica".
+   Perguntas tipo "o que é X?", "que dia é hoje?", "qual a hora?", "explica X" **NÃO** são tarefas.
+2) **TASK_DONE** só quando o usuário pedir pra concluir/remover uma tarefa.
+   Exemplos: "marcar como feito", "já fiz", "concluí", "remove/apaga a tarefa".
+3) **WEB_SEARCH** quando a pergunta depende de dados atuais (notícia, preço, resultado, "hoje/atual") OU quando você não tem confiança alta pra responder sem pesquisar.
+4) Caso contrário, use **CHAT**.
+
+Se escolher TASK_DONE, use "task_index" da tarefa mais relacionada. Se não tiver, use -1.
+Se escolher WEB_SEARCH, "search_query" deve ser uma consulta curta e objetiva (ou "" se não aplicar).
+
+Responda APENAS o JSON:
+{{
+  "action": "TASK_CREATE" ou "TASK_DONE" ou "WEB_SEARCH" ou "CHAT",
+  "task_index": (número da tarefa ou -1),
+  "minutes": (minutos para adiar ou 0),
+  "search_query": (termo de busca ou "")
+}}
+""".strip()
+
+    default_response = {"action": "CHAT", "task_index": -1, "minutes": 0, "search_query": ""}
+
+    try:
+        with llm_call("router_llm", MODEL_ID) as call:
+            resp = call.done(await aio.groq_chat(
+                model=MODEL_ID,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0,
+            ))
+            raw = resp.choices[0].message.content
+            match = re.search(r"\{.*\}", raw, re.DOTALL)
+            if not match:
+                call.parse_failed("sem JSON na resposta")
+                return default_response
+            data = json.loads(match.group(0))
+        if "Action" in data and "action" not in data:
+            data["action"] = data["Action"]
+        if "action" not in data:
+            data["action"] = "CHAT"
+        return data
+    except Exception:
+        return default_response
+
+def router_llm(texto: str, tarefas: list, memoria: list = None) -> dict:
+    return aio.rodar(router_llm_async(texto, tarefas, memoria))
+
+
+# =========================
+# WEB / AUDIO
+# =========================
+@timed("ext:groq:web_answer")
+async def _llm_answer_from_web_async(user_question: str, tavily_results: list) -> dict:
+    """Pede pro LLM responder *somente* com base nas fontes, em JSON."""
+    sources_txt = _format_tavily_sources(tavily_results, limit=5)
+    user_question = (user_question or "").strip()
+
+    prompt = f"""{ZOE_PERSONA}
+
+Você recebeu fontes de busca na web.
+
+REGRAS (anti-alucinação):
+- Responda APENAS com base nas FONTES abaixo.
+- Se as fontes não trouxerem a informação necessária, diga claramente que **não achou**.
+- NÃO invente números (preço, %, datas, dividendos). Se não estiver nas fontes, não use.
+- Se citar um número, ele deve aparecer em algum Trecho das fontes.
+- Traga no máximo 3 fontes.
+
+FONTES:
+{sources_txt}
+
+PERGUNTA:
+{user_question}
+
+Retorne JSON estrito (apenas JSON) no formato:
+{{
+  "answer": "resposta final, curta e útil (tom da Zoe)",
+  "confidence": 0-100,
+  "missing": ["o que faltou nas fontes (opcional)"],
+  "used_sources": [
+    {{"title": "título", "url": "url", "note": "o que essa fonte sustenta"}}
+  ]
+}}
+
+Dica: Se não tiver fonte confiável, coloque confidence baixo e explique no campo answer.
+""".strip()
+
+    try:
+        with llm_call("_llm_answer_from_web", MODEL_ID) as call:
+            resp = call.done(await aio.groq_chat(
+                model=MODEL_ID,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.2,
+                response_format={"type": "json_object"},
+            )).choices[0].message.content
+            data = json.loads(resp)
+            if not isinstance(data, dict):
+                call.parse_failed("JSON não é objeto")
+                return {}
+        return data
+    except Exception:
+        return {}
+
+def _llm_answer_from_web(user_question: str, tavily_results: list) -> dict:
+    return aio.rodar(_llm_answer_from_web_async(user_question, tavily_results))
+
+@timed("ext:groq:whisper")
+async def transcrever_bytes_async(b: bytes, nome: str = "audio.wav", mime: str = "audio/wav"):
+    """Áudio cru → texto (Whisper aceita wav, ogg/opus do Telegram, mp3...). None se falhar."""
+    try:
+        with llm_call("ouvir_audio", "whisper-large-v3") as call:
+            return call.done(await aio.groq_transcrever(
+                file=(nome, b, mime),
+                model="whisper-large-v3",
+                response_format="text",
+                language="pt",
+            ))
+    except Exception:
+        return None
+
+def transcrever_bytes(b: bytes, nome: str = "audio.wav", mime: str = "audio/wav"):
+    return aio.rodar(transcrever_bytes_async(b, nome, mime))
+
+def ouvir_audio(uploaded_file):
+    try:
+        return transcrever_bytes(uploaded_file.getvalue())
+    except Exception:
+        return None
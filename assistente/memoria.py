@@ -0,0 +1,575 @@
+"""
+Memória longa em SQLite: eventos, busca FTS5 (bm25 + recência), recall
+semântico local (numpy) e manutenção (retenção, rollup, optimize, vacuum).
+Chame init_db() uma vez antes de usar.
+"""
+import json
+import os
+import sqlite3
+import time
+import unicodedata
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+
+from .config import ASSISTANT_NAME, DB_PATH
+from .storage import trava_arquivo
+from .usuario import caminho
+from .perf import timed
+from .tempo import format_dt, now_br, parse_dt, today_key
+from .texto import limpar_texto
+
+
+# Tokenizer sem acento: "ilheus" acha "Ilhéus" e vice-versa.
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+
+# Peso por tipo de evento no ranking (o que o usuário disse vale mais que alerta automático)
+MEMORY_KIND_WEIGHTS = {
+    "chat_user": 1.0,
+    "daily_review": 1.3,
+    "task_create": 1.2,
+    "task_done": 1.0,
+    "chat_assistant": 0.8,
+    "web_search": 0.7,
+    "ticker_info_local": 0.7,
+    "briefing": 0.5,
+    "smart_reminder": 0.4,
+    "alert": 0.4,
+    "weather": 0.4,
+    "finance_quote": 0.4,
+    "chat_digest": 0.9,
+}
+MEMORY_RECENCY_HALF_LIFE_DAYS = 30   # meia-vida do bônus de recência
+MEMORY_CANDIDATES_FACTOR = 5         # pega N× candidatos por bm25 e re-ranqueia
+MEMORY_LIKE_WINDOW = 2000            # fallback LIKE só olha os últimos N eventos
+MEMORY_RRF_K = 60                    # constante do Reciprocal Rank Fusion (FTS + semântico)
+
+# Manutenção: retenção por kind (dias; None = guarda pra sempre)
+EVENT_RETENTION_DAYS = {
+    "alert": 30,
+    "smart_reminder": 30,
+    "weather": 30,
+    "finance_quote": 60,
+    "finance_dividends": 60,
+    "web_search": 90,
+    "briefing": 90,
+    "closing_prompt": 90,
+    "closing_prompt_manual": 90,
+    "task_snooze": 90,
+    "task_silence": 90,
+}
+CHAT_ROLLUP_KINDS = ("chat_user", "chat_assistant")
+CHAT_ROLLUP_AFTER_DAYS = 30          # chat mais velho que isso vira 1 digest por dia
+CHAT_DIGEST_LINE_CHARS = 200
+CHAT_DIGEST_MAX_CHARS = 4000
+MAINTENANCE_INTERVAL_H = 24
+MAINTENANCE_MAX_ROLLUP_DAYS = 60     # limita trabalho por execução
+INCREMENTAL_VACUUM_PAGES = 2000
+
+# Recall semântico local (n-gramas de caractere com hashing, sem serviço externo)
+SEM_INDEX_PATH = "jarvis_memory.sem"        # registros (id, vetor uint8) append-only, lido via memmap
+SEM_DF_PATH = "jarvis_memory.sem.df.npy"    # document frequency por bucket (+ total de docs no fim)
+SEM_DIM = 512                                # potência de 2
+SEM_NGRAMS = (3, 4)
+SEM_DTYPE = np.dtype([("id", "<i8"), ("v", "u1", (SEM_DIM,))])
+SEM_CHUNK_ROWS = 65536                       # linhas por bloco no top-k (limita RAM)
+SEM_MIN_SCORE = 0.2
+SEM_SYNC_BATCH = 5000                         # lote do backfill (o tick para entre lotes, ao passar de SEM_SYNC_TICK_S)
+SEM_SYNC_TICK_S = 2.0                        # backfill por chamada da manutenção (tick), até alcançar o banco
+SEM_COMPACT_DEAD_RATIO = 0.2
+SEM_SKIP_KINDS = frozenset({
+    "alert", "smart_reminder", "weather", "finance_quote", "finance_dividends",
+    "task_snooze", "task_silence",
+})
+
+_PT_STOPWORDS = frozenset("""
+a o as os um uma uns umas de do da dos das no na nos nas em por para pra pro pelo pela
+pelos pelas com sem sob sobre entre ate até ao aos à às e ou mas nem que se como quando
+onde porque pois ja já nao não sim mais menos muito muita muitos muitas pouco bem mal
+eu tu ele ela nos nós vos vós eles elas voce você voces vocês me te se lhe lhes mim ti
+meu minha meus minhas teu tua teus tuas seu sua seus suas nosso nossa isso isto aquilo
+esse essa esses essas este esta estes estas aquele aquela aqueles aquelas ai aí la lá
+aqui ali e é era eram foi ser ter tem tinha tá ta to tô estou esta está estava vai vou
+qual quais quem oq q tipo coisa coisas lembra lembre
+""".split())
+
+def build_fts_query(text: str, max_terms: int = 12) -> str:
+    """
+    Monta uma query FTS5 segura a partir de texto livre:
+    tokeniza, remove stopwords PT-BR e gera termos com prefixo unidos por OR.
+    Devolve "" se não sobrar nada útil.
+    """
+    t = limpar_texto(text)
+    terms = []
+    for tok in t.split():
+        if len(tok) < 2 or tok in _PT_STOPWORDS:
+            continue
+        if tok not in terms:
+            terms.append(tok)
+        if len(terms) >= max_terms:
+            break
+    # aspas duplas neutralizam qualquer sintaxe FTS (AND/OR/NEAR, -, :, ...)
+    return " OR ".join(f'"{tok}"*' for tok in terms)
+
+def _memory_score(bm25_score: float, ts: str, kind: str, agora: datetime) -> float:
+    """Relevância final: bm25 (menor = melhor) × peso do tipo × bônus de recência."""
+    base = -float(bm25_score or 0.0)
+    weight = MEMORY_KIND_WEIGHTS.get(kind, 0.6)
+    try:
+        age_days = max(0.0, (agora - parse_dt(ts[:16])).total_seconds() / 86400)
+    except Exception:
+        age_days = 365.0
+    recency = 0.5 ** (age_days / MEMORY_RECENCY_HALF_LIFE_DAYS)
+    return base * weight * (1.0 + recency)
+
+def db():
+    conn = sqlite3.connect(caminho(DB_PATH), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    return conn
+
+def _fts_needs_rebuild(conn) -> bool:
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'events_fts'").fetchone()
+    return bool(row) and "remove_diacritics" not in (row[0] or "")
+
+def init_db():
+    conn = db()
+    # auto_vacuum só vale depois de um VACUUM; faz uma vez só (bancos antigos)
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+    except Exception:
+        pass
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        content TEXT NOT NULL,
+        meta TEXT
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_events_ts ON events(ts)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_events_kind_ts ON events(kind, ts)")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS memory_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    """)
+    try:
+        # Bancos antigos: FTS sem remove_diacritics -> recria e reindexa uma vez
+        if _fts_needs_rebuild(conn):
+            conn.execute("DROP TRIGGER IF EXISTS events_ai")
+            conn.execute("DROP TRIGGER IF EXISTS events_ad")
+            conn.execute("DROP TRIGGER IF EXISTS events_au")
+            conn.execute("DROP TABLE IF EXISTS events_fts")
+        conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS events_fts
+        USING fts5(content, content='events', content_rowid='id', tokenize='{FTS_TOKENIZER}')
+        """)
+        conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS events_ai
+        AFTER INSERT ON events
+        BEGIN
+            INSERT INTO events_fts(rowid, content) VALUES (new.id, new.content);
+        END;
+        """)
+        conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS events_ad
+        AFTER DELETE ON events
+        BEGIN
+            INSERT INTO events_fts(events_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        END;
+        """)
+        conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS events_au
+        AFTER UPDATE ON events
+        BEGIN
+            INSERT INTO events_fts(events_fts, rowid, content) VALUES ('delete', old.id, old.content);
+            INSERT INTO events_fts(rowid, content) VALUES (new.id, new.content);
+        END;
+        """)
+        n_fts = conn.execute("SELECT COUNT(*) FROM events_fts_docsize").fetchone()[0]
+        n_ev = conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        if n_fts != n_ev:
+            conn.execute("INSERT INTO events_fts(events_fts) VALUES('rebuild')")
+    except Exception:
+        pass
+    conn.commit()
+    conn.close()
+
+def add_event(kind: str, content: str, meta: str = ""):
+    content = (content or "").strip()
+    if not content:
+        return
+    conn = db()
+    ts = now_br().strftime("%Y-%m-%d %H:%M:%S")
+    cur = conn.execute("INSERT INTO events(ts, kind, content, meta) VALUES (?,?,?,?)", (ts, kind, content, meta))
+    conn.commit()
+    conn.close()
+    if kind not in SEM_SKIP_KINDS:
+        semantic_index_add([(cur.lastrowid, content)])
+
+def _sem_normalize(text: str) -> str:
+    t = unicodedata.normalize("NFKD", limpar_texto(text))
+    t = "".join(ch for ch in t if not unicodedata.combining(ch))
+    words = [w for w in t.split() if w not in _PT_STOPWORDS]
+    return f" {' '.join(words)} " if words else ""
+
+def _sem_vector(text: str) -> Optional[np.ndarray]:
+    """Vetor TF (log) L2-normalizado de n-gramas de caractere, com hashing vetorizado."""
+    norm = _sem_normalize(text)
+    if len(norm) < 4:
+        return None
+    codes = np.frombuffer(norm.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    shift = np.uint64(64 - (SEM_DIM.bit_length() - 1))
+    counts = np.zeros(SEM_DIM, dtype=np.float32)
+    for n in SEM_NGRAMS:
+        m = len(codes) - n + 1
+        if m <= 0:
+            continue
+        h = np.zeros(m, dtype=np.uint64)
+        for k in range(n):
+            h = h * np.uint64(1_000_003) + codes[k:k + m]
+        buckets = (h * np.uint64(0x9E3779B97F4A7C15)) >> shift
+        counts += np.bincount(buckets.astype(np.int64), minlength=SEM_DIM).astype(np.float32)
+    vec = np.log1p(counts)
+    nv = float(np.linalg.norm(vec))
+    return vec / nv if nv > 0 else None
+
+def _sem_load_df() -> np.ndarray:
+    try:
+        df = np.load(caminho(SEM_DF_PATH))
+        if df.shape == (SEM_DIM + 1,):
+            return df
+    except Exception:
+        pass
+    return np.zeros(SEM_DIM + 1, dtype=np.float64)
+
+def _sem_save_df(df: np.ndarray) -> None:
+    tmp = caminho(SEM_DF_PATH) + f".{uuid.uuid4().hex[:6]}.tmp.npy"
+    np.save(tmp, df)
+    os.replace(tmp, caminho(SEM_DF_PATH))
+
+def _sem_open() -> Optional[np.ndarray]:
+    """Abre o índice via memmap (só lê registros completos)."""
+    try:
+        n = os.path.getsize(caminho(SEM_INDEX_PATH)) // SEM_DTYPE.itemsize
+    except OSError:
+        return None
+    if n <= 0:
+        return None
+    return np.memmap(caminho(SEM_INDEX_PATH), dtype=SEM_DTYPE, mode="r", shape=(n,))
+
+def semantic_index_add(items: list) -> int:
+    """
+    Indexa [(event_id, content), ...] no fim do arquivo (append-only) e atualiza o DF.
+    Devolve quantos entraram.
+    """
+    recs = []
+    for event_id, content in items:
+        v = _sem_vector(content)
+        if v is None:
+            continue
+        r = np.zeros((), dtype=SEM_DTYPE)
+        r["id"] = int(event_id)
+        r["v"] = np.round(v * 255).astype(np.uint8)
+        recs.append(r)
+    if not recs:
+        return 0
+    block = np.stack(recs)
+    try:
+        # append + DF sob a mesma trava da compactação: nada se perde entre abas/processos
+        with trava_arquivo(caminho(SEM_INDEX_PATH)):
+            with open(caminho(SEM_INDEX_PATH), "ab") as f:
+                f.write(block.tobytes())
+            df = _sem_load_df()
+            df[:SEM_DIM] += (block["v"] > 0).sum(axis=0)
+            df[SEM_DIM] += len(block)
+            _sem_save_df(df)
+    except Exception:
+        return 0
+    return len(block)
+
+def _sem_cursor(conn) -> int:
+    """Último id já passado pro índice (indexado ou curto demais pra virar vetor)."""
+    mm = _sem_open()
+    fim = int(mm["id"][-64:].max()) if mm is not None else 0
+    return max(fim, int(_meta_get(conn, "sem_sync_last_id") or 0))
+
+def semantic_atrasado(conn) -> bool:
+    """Tem evento depois do cursor? (MAX(id) sai do rowid: barato pra chamar todo tick)"""
+    ultimo = conn.execute("SELECT MAX(id) FROM events").fetchone()[0]
+    return bool(ultimo) and int(ultimo) > _sem_cursor(conn)
+
+def semantic_sync(conn, limit: int = SEM_SYNC_BATCH, max_s: Optional[float] = None) -> int:
+    """
+    Indexa eventos que ainda não estão no índice (banco antigo, digests do rollup...),
+    em lotes de `limit` até alcançar o banco — ou até passar de max_s (o resto fica pra
+    próxima chamada; o cursor fica no memory_meta). Devolve quantos entraram.
+    """
+    t0 = time.perf_counter()
+    total = 0
+    marks = ",".join("?" for _ in SEM_SKIP_KINDS)
+    # trava própria do backfill: duas abas/processos não indexam o mesmo trecho duas vezes
+    with trava_arquivo(caminho(SEM_INDEX_PATH) + ".sync"):
+        last_id = _sem_cursor(conn)
+        topo = int(conn.execute("SELECT MAX(id) FROM events").fetchone()[0] or 0)
+        while True:
+            rows = conn.execute(
+                f"SELECT id, content FROM events WHERE id > ? AND kind NOT IN ({marks}) ORDER BY id LIMIT ?",
+                (last_id, *SEM_SKIP_KINDS, limit)
+            ).fetchall()
+            if not rows:
+                if topo > last_id:  # o que sobrou é só kind que não entra (alertas...): cursor vai pro fim
+                    _meta_set(conn, "sem_sync_last_id", str(topo))
+                    conn.commit()
+                break
+            n = semantic_index_add(rows)
+            if not n and any(_sem_vector(c) is not None for _, c in rows):
+                break  # falhou a gravação: não anda o cursor, tenta de novo depois
+            total += n
+            last_id = int(rows[-1][0])
+            _meta_set(conn, "sem_sync_last_id", str(last_id))
+            conn.commit()
+            if len(rows) < limit or (max_s is not None and time.perf_counter() - t0 >= max_s):
+                break
+    return total
+
+def semantic_compact(conn) -> int:
+    """Remove do índice os ids que a retenção/rollup já apagou. Devolve quantos saíram."""
+    alive_ids = np.fromiter((r[0] for r in conn.execute("SELECT id FROM events")), dtype=np.int64)
+    # trava exclusiva: ninguém faz append num arquivo que está pra ser substituído
+    with trava_arquivo(caminho(SEM_INDEX_PATH)):
+        mm = _sem_open()
+        if mm is None:
+            return 0
+        keep = np.isin(np.asarray(mm["id"]), alive_ids)
+        dead = int((~keep).sum())
+        if dead < SEM_COMPACT_DEAD_RATIO * len(mm):
+            return 0
+        kept = np.asarray(mm[keep])
+        del mm
+        tmp = caminho(SEM_INDEX_PATH) + f".{uuid.uuid4().hex[:6]}.tmp"
+        kept.tofile(tmp)
+        os.replace(tmp, caminho(SEM_INDEX_PATH))
+        df = np.zeros(SEM_DIM + 1, dtype=np.float64)
+        if len(kept):
+            df[:SEM_DIM] = (kept["v"] > 0).sum(axis=0)
+            df[SEM_DIM] = len(kept)
+        _sem_save_df(df)
+    return dead
+
+def semantic_search(query: str, k: int = 8) -> list:
+    """
+    Top-k por cosseno (CPU, vetorizado em blocos). O IDF entra só do lado da query,
+    assim o índice é append-only e não precisa ser reescrito quando o DF muda.
+    Devolve [(event_id, score), ...].
+    """
+    try:
+        qv = _sem_vector(query)
+        mm = _sem_open()
+        if qv is None or mm is None:
+            return []
+        df = _sem_load_df()
+        idf = np.log((df[SEM_DIM] + 1) / (df[:SEM_DIM] + 1)) + 1
+        qw = (qv * idf).astype(np.float32)
+        qw /= float(np.linalg.norm(qw)) * 255
+        # query curta só acende poucos buckets: lê só essas colunas (bem menos conversão)
+        nz = np.flatnonzero(qw)
+        qn = qw[nz]
+
+        best_ids = np.empty(0, dtype=np.int64)
+        best_sc = np.empty(0, dtype=np.float32)
+        for start in range(0, len(mm), SEM_CHUNK_ROWS):
+            chunk = mm[start:start + SEM_CHUNK_ROWS]
+            sc = np.take(chunk["v"], nz, axis=1).astype(np.float32) @ qn
+            if len(sc) > k:
+                top = np.argpartition(sc, -k)[-k:]
+            else:
+                top = np.arange(len(sc))
+            best_ids = np.concatenate([best_ids, np.asarray(chunk["id"][top])])
+            best_sc = np.concatenate([best_sc, sc[top]])
+            if len(best_sc) > k:
+                keep = np.argpartition(best_sc, -k)[-k:]
+                best_ids, best_sc = best_ids[keep], best_sc[keep]
+
+        order = np.argsort(-best_sc)
+        return [(int(best_ids[i]), float(best_sc[i])) for i in order if best_sc[i] >= SEM_MIN_SCORE]
+    except Exception:
+        return []
+
+@timed("db:search_memories")
+def search_memories(query: str, limit: int = 8):
+    """
+    Busca na memória longa: FTS5 (bm25) com query segura, re-ranqueada por
+    recência e tipo de evento, fundida (RRF) com o recall semântico local.
+    Devolve [(ts, kind, content), ...].
+    """
+    fts_q = build_fts_query(query)
+    sem = semantic_search(query, k=limit)
+    if not fts_q and not sem:
+        return []
+    conn = db()
+    try:
+        ranked = []
+        if fts_q:
+            cand = conn.execute(
+                "SELECT e.id, e.ts, e.kind, e.content, bm25(events_fts) FROM events_fts "
+                "JOIN events e ON e.id = events_fts.rowid "
+                "WHERE events_fts MATCH ? ORDER BY bm25(events_fts) LIMIT ?",
+                (fts_q, limit * MEMORY_CANDIDATES_FACTOR)
+            ).fetchall()
+            agora = now_br()
+            cand.sort(key=lambda r: _memory_score(r[4], r[1], r[2], agora), reverse=True)
+            ranked = [r[:4] for r in cand]
+
+        # Reciprocal Rank Fusion: FTS (literal) + semântico (parecido)
+        fused, by_id = {}, {}
+        for pos, r in enumerate(ranked):
+            by_id[r[0]] = r
+            fused[r[0]] = fused.get(r[0], 0.0) + 1.0 / (MEMORY_RRF_K + pos)
+        for pos, (eid, _) in enumerate(sem):
+            fused[eid] = fused.get(eid, 0.0) + 1.0 / (MEMORY_RRF_K + pos)
+        missing = [eid for eid, _ in sem if eid not in by_id]
+        if missing:
+            marks = ",".join("?" for _ in missing)
+            for r in conn.execute(f"SELECT id, ts, kind, content FROM events WHERE id IN ({marks})", missing):
+                by_id[r[0]] = r
+        order = sorted((eid for eid in fused if eid in by_id), key=lambda eid: fused[eid], reverse=True)
+        rows = [tuple(by_id[eid][1:]) for eid in order[:limit]]
+    except Exception:
+        # FTS indisponível: LIKE só na janela recente (nunca varre a tabela toda)
+        rows = conn.execute(
+            "SELECT ts, kind, content FROM events "
+            "WHERE id > (SELECT COALESCE(MAX(id), 0) - ? FROM events) AND content LIKE ? "
+            "ORDER BY id DESC LIMIT ?",
+            (MEMORY_LIKE_WINDOW, f"%{(query or '').strip()}%", limit)
+        ).fetchall()
+    conn.close()
+    return rows
+
+def _meta_get(conn, key: str) -> Optional[str]:
+    row = conn.execute("SELECT value FROM memory_meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+def _meta_set(conn, key: str, value: str) -> None:
+    conn.execute(
+        "INSERT INTO memory_meta(key, value) VALUES (?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, value)
+    )
+
+def _rollup_chat_day(conn, day: str) -> int:
+    """Troca as mensagens de chat de um dia por 1 evento chat_digest. Devolve quantas sumiram."""
+    marks = ",".join("?" for _ in CHAT_ROLLUP_KINDS)
+    rows = conn.execute(
+        f"SELECT id, ts, kind, content FROM events "
+        f"WHERE kind IN ({marks}) AND ts >= ? AND ts < ? ORDER BY id",
+        (*CHAT_ROLLUP_KINDS, day, day + "~")
+    ).fetchall()
+    if not rows:
+        return 0
+    d = datetime.strptime(day, "%Y-%m-%d")
+    lines = [f"Conversa de {d.strftime('%d/%m/%Y')}:"]
+    size = len(lines[0])
+    for _, _, kind, content in rows:
+        who = "Usuário" if kind == "chat_user" else ASSISTANT_NAME
+        txt = " ".join(str(content).split())
+        if len(txt) > CHAT_DIGEST_LINE_CHARS:
+            txt = txt[:CHAT_DIGEST_LINE_CHARS] + "…"
+        line = f"- {who}: {txt}"
+        if size + len(line) > CHAT_DIGEST_MAX_CHARS:
+            lines.append("- …")
+            break
+        lines.append(line)
+        size += len(line) + 1
+    conn.execute(
+        "INSERT INTO events(ts, kind, content, meta) VALUES (?,?,?,?)",
+        (rows[-1][1], "chat_digest", "\n".join(lines), json.dumps({"rolled_up": len(rows)}))
+    )
+    conn.executemany("DELETE FROM events WHERE id = ?", [(r[0],) for r in rows])
+    return len(rows)
+
+def run_memory_maintenance(settings: Optional[dict] = None, force: bool = False) -> dict:
+    """
+    Manutenção da memória longa (no máx. 1x a cada MAINTENANCE_INTERVAL_H):
+    retenção por kind, rollup do chat antigo em digests diários,
+    optimize do FTS e incremental vacuum.
+    """
+    stats = {"ran": False, "deleted": 0, "rolled_up": 0, "digests": 0, "sem_removed": 0, "sem_indexed": 0, "vacuum_pages": 0}
+    agora = now_br()
+    conn = db()
+    try:
+        # backfill do índice semântico (banco grande que já existia): um pedaço por tick até alcançar
+        try:
+            if semantic_atrasado(conn):
+                stats["sem_indexed"] = semantic_sync(conn, max_s=SEM_SYNC_TICK_S)
+        except Exception:
+            pass
+        last = _meta_get(conn, "maintenance_last_run")
+        if not force and last:
+            try:
+                if agora - parse_dt(last) < timedelta(hours=MAINTENANCE_INTERVAL_H):
+                    return stats
+            except Exception:
+                pass
+        stats["ran"] = True
+
+        # 1) retenção por kind (usa idx_events_kind_ts)
+        retention = dict(EVENT_RETENTION_DAYS)
+        retention.update((settings or {}).get("retention_days") or {})
+        for kind, days in retention.items():
+            if days is None:
+                continue
+            cutoff = (agora - timedelta(days=int(days))).strftime("%Y-%m-%d %H:%M:%S")
+            cur = conn.execute("DELETE FROM events WHERE kind = ? AND ts < ?", (kind, cutoff))
+            stats["deleted"] += max(0, cur.rowcount)
+        conn.commit()
+
+        # 2) rollup: chat antigo -> 1 digest por dia
+        cutoff_day = today_key(agora - timedelta(days=CHAT_ROLLUP_AFTER_DAYS))
+        marks = ",".join("?" for _ in CHAT_ROLLUP_KINDS)
+        days = [r[0] for r in conn.execute(
+            f"SELECT DISTINCT substr(ts, 1, 10) FROM events "
+            f"WHERE kind IN ({marks}) AND ts < ? ORDER BY 1 LIMIT ?",
+            (*CHAT_ROLLUP_KINDS, cutoff_day, MAINTENANCE_MAX_ROLLUP_DAYS)
+        ).fetchall()]
+        for day in days:
+            n = _rollup_chat_day(conn, day)
+            if n:
+                stats["rolled_up"] += n
+                stats["digests"] += 1
+            conn.commit()
+
+        # 3) FTS: junta segmentos (busca fica estável mesmo com muito insert/delete)
+        try:
+            conn.execute("INSERT INTO events_fts(events_fts) VALUES('optimize')")
+        except Exception:
+            pass
+
+        # 4) índice semântico: tira ids apagados e indexa o que faltou (digests novos)
+        try:
+            stats["sem_removed"] = semantic_compact(conn)
+            stats["sem_indexed"] += semantic_sync(conn, max_s=SEM_SYNC_TICK_S)
+        except Exception:
+            pass
+
+        _meta_set(conn, "maintenance_last_run", format_dt(agora))
+        conn.commit()
+
+        # 5) devolve páginas livres pro disco
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if free:
+            pages = min(int(free), INCREMENTAL_VACUUM_PAGES)
+            conn.execute(f"PRAGMA incremental_vacuum({pages})").fetchall()
+            stats["vacuum_pages"] = pages
+        conn.execute("PRAGMA optimize")
+        return stats
+    except Exception:
+        return stats
+    finally:
+        conn.close()
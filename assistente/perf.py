@@ -0,0 +1,194 @@
+"""
+Profiler por rerun: mede cada fase do script e cada chamada externa,
+guarda numa janela rolante no SQLite e calcula p50/p95 por fase.
+
+Uso no app:
+    prof = RerunProfiler()       # no topo do script
+    lap("css")                   # fecha a fase que terminou aqui
+    prof.finish()                # no fim (ou antes de st.rerun)
+
+Nas integrações, @timed("ext:open-meteo") registra no profiler do rerun atual
+(se não houver nenhum — bot, benchmark — não faz nada).
+"""
+import contextvars
+import functools
+import inspect
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Optional
+
+from .config import DB_PATH
+from .tempo import now_br
+from .usuario import caminho
+
+PERF_MAX_ROWS = 20_000        # janela rolante (amostras)
+PERF_STATS_ROWS = 5_000       # amostras usadas no p50/p95
+PERF_SLOW_RERUN_MS = 2_000    # rerun acima disso aparece destacado no painel
+
+_current: contextvars.ContextVar = contextvars.ContextVar("perf_current", default=None)
+_tabelas_prontas: set = set()   # por arquivo (cada usuário tem o seu banco)
+
+
+class RerunProfiler:
+    """Acumula as fases de um rerun e grava tudo de uma vez no finish()."""
+
+    def __init__(self, kind: str = "rerun"):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.t0 = time.perf_counter()
+        self.t_lap = self.t0
+        self.samples = []
+        self.finished = False
+        _current.set(self)
+
+    def record(self, phase: str, ms: float) -> None:
+        self.samples.append((phase, float(ms)))
+
+    def lap(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.record(phase, (now - self.t_lap) * 1000)
+        self.t_lap = now
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.t0) * 1000
+
+    def finish(self) -> None:
+        if self.finished:
+            return
+        self.finished = True
+        self.record(f"total:{self.kind}", self.total_ms())
+        if _current.get() is self:
+            _current.set(None)
+        save_samples(self.run_id, self.samples)
+
+
+def current() -> Optional[RerunProfiler]:
+    return _current.get()
+
+def lap(phase: str) -> None:
+    p = _current.get()
+    if p is not None:
+        p.lap(phase)
+
+@contextmanager
+def phase(name: str):
+    """Mede um trecho (ex: chamada externa) sem mexer no relógio das laps."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        p = _current.get()
+        if p is not None:
+            p.record(name, (time.perf_counter() - t0) * 1000)
+
+def timed(name: str):
+    """Decorator: registra a duração de cada chamada como fase `name` (funciona em `async def` também)."""
+    def deco(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def awrapper(*args, **kwargs):
+                with phase(name):
+                    return await fn(*args, **kwargs)
+            return awrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+# =========================
+# STORAGE (janela rolante)
+# =========================
+def _db():
+    path = caminho(DB_PATH)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    if path not in _tabelas_prontas:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS perf_samples (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts TEXT NOT NULL,
+            run_id TEXT NOT NULL,
+            phase TEXT NOT NULL,
+            ms REAL NOT NULL
+        )
+        """)
+        _tabelas_prontas.add(path)
+    return conn
+
+def save_samples(run_id: str, samples: list) -> None:
+    if not samples:
+        return
+    try:
+        ts = now_br().strftime("%Y-%m-%d %H:%M:%S")
+        conn = _db()
+        conn.executemany(
+            "INSERT INTO perf_samples(ts, run_id, phase, ms) VALUES (?,?,?,?)",
+            [(ts, run_id, p, ms) for p, ms in samples]
+        )
+        conn.execute(
+            "DELETE FROM perf_samples WHERE id <= (SELECT MAX(id) FROM perf_samples) - ?",
+            (PERF_MAX_ROWS,)
+        )
+        conn.commit()
+        conn.close()
+    except Exception:
+        pass
+
+def _pct(sorted_vals: list, q: float) -> float:
+    return sorted_vals[min(len(sorted_vals) - 1, int(len(sorted_vals) * q))]
+
+def perf_stats(rows: int = PERF_STATS_ROWS) -> list:
+    """[{phase, n, p50, p95, max}] das últimas `rows` amostras, fases mais caras primeiro."""
+    try:
+        conn = _db()
+        data = conn.execute(
+            "SELECT phase, ms FROM perf_samples WHERE id > (SELECT COALESCE(MAX(id), 0) FROM perf_samples) - ?",
+            (rows,)
+        ).fetchall()
+        conn.close()
+    except Exception:
+        return []
+    by_phase = {}
+    for p, ms in data:
+        by_phase.setdefault(p, []).append(ms)
+    out = []
+    for p, vals in by_phase.items():
+        vals.sort()
+        out.append({"phase": p, "n": len(vals), "p50": _pct(vals, 0.5), "p95": _pct(vals, 0.95), "max": vals[-1]})
+    out.sort(key=lambda r: r["p95"], reverse=True)
+    return out
+
+def slowest_runs(limit: int = 5) -> list:
+    """Os reruns mais lentos da janela: [(ts, run_id, total_ms, fase_mais_cara, ms_fase)]."""
+    try:
+        conn = _db()
+        runs = conn.execute(
+            "SELECT ts, run_id, ms FROM perf_samples WHERE phase LIKE 'total:%' "
+            "ORDER BY ms DESC LIMIT ?", (limit,)
+        ).fetchall()
+        out = []
+        for ts, run_id, total in runs:
+            top = conn.execute(
+                "SELECT phase, ms FROM perf_samples WHERE run_id = ? AND phase NOT LIKE 'total:%' "
+                "ORDER BY ms DESC LIMIT 1", (run_id,)
+            ).fetchone() or ("?", 0.0)
+            out.append((ts, run_id, total, top[0], top[1]))
+        conn.close()
+        return out
+    except Exception:
+        return []
+
+def format_perf_stats(stats: list, limit: int = 20) -> str:
+    """Tabela markdown curtinha (sidebar e /stats)."""
+    if not stats:
+        return "Sem amostras de performance ainda."
+    lines = ["| fase | n | p50 | p95 | máx |", "|---|---:|---:|---:|---:|"]
+    for r in stats[:limit]:
+        lines.append(f"| `{r['phase']}` | {r['n']} | {r['p50']:.0f}ms | {r['p95']:.0f}ms | {r['max']:.0f}ms |")
+    return "\n".join(lines)
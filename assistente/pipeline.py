@@ -0,0 +1,391 @@
+"""
+Um turno de conversa, sem UI: comandos (/fechamento, /stats), resposta do
+fechamento, atalhos (hora/data/memória), roteamento (decidir_acao) e o
+handler de cada ação. Usado pelo app (Streamlit), pelo bot do Telegram e
+pela API — quem chama só cuida de mostrar/mandar a resposta.
+
+    r = processar_turno(texto, historico, settings, daily_state)
+    r["texto"], r["flags"]      # resposta + {web_used, weather_used, finance_used}
+
+`historico` é o chat do dia já com a mensagem do usuário no fim. O evento
+"chat_user" fica por conta de quem chama (o app registra uma vez só, mesmo
+com rerun no meio); o resto dos eventos de memória é registrado aqui.
+"""
+import re
+from datetime import timedelta
+from typing import Optional
+
+from .clima import (
+    clima_de_hoje, fetch_weather_days, fetch_weather_multi_async, format_melhor_janela, format_quando_chove,
+    format_weather_comparacao, format_weather_reply, melhor_janela, quando_chove, resolve_city_coords,
+    resolve_city_coords_async, series_horarias,
+)
+from .config import MODEL_ID, ZOE_PERSONA
+from .financas import (
+    _extract_b3_ticker, fetch_brapi_dividends_hint, fetch_brapi_quote_async, fetch_finance_quote,
+    format_quote_answer, local_ticker_info_answer,
+)
+from .intencoes import (
+    _WEEKDAY_PT, decidir_acao, is_date_question, is_memory_question, is_task_create_intent,
+    is_task_done_intent, is_time_question, should_auto_web, summarize_previous_user_messages,
+)
+from .llm import _llm_answer_from_web, extrair_dados_tarefa, to_llm_messages, update_summary_with_llm
+from .memoria import add_event, search_memories
+from .rotinas import build_closing_prompt
+from . import aio, perf, storage, telemetria
+from .storage import anexar_chat, load_daily_state, load_settings, load_summary, save_daily_state, save_settings
+from .tarefas import alterar_por_id, concluir_tarefa, descrever_recorrencia, normalizar_tarefa
+from .tempo import now_br, now_floor_minute
+from .texto import limpar_texto
+from .web import _render_web_json, buscar_tavily, buscar_tavily_async
+
+_CHAT = {"action": "CHAT", "task_index": -1, "minutes": 0, "search_query": ""}
+
+
+
+# =========================
+# TURNO
+# =========================
+def processar_turno(user_txt: str, historico: list, settings: dict, daily_state: dict) -> dict:
+    """
+    Devolve {"texto", "flags", "acao", "tarefas", "erro_tarefas", "web_query"}.
+    Mexe em daily_state["awaiting_closing"] (e grava) quando abre/fecha o fechamento.
+    """
+    user_txt = str(user_txt or "").strip()
+    t = {
+        "user_txt": user_txt,
+        "tnorm": limpar_texto(user_txt),
+        "historico": historico or [],
+        "settings": settings if settings is not None else {},
+        "daily_state": daily_state if daily_state is not None else {},
+        "tarefas": [normalizar_tarefa(x) for x in storage.carregar_tarefas()],
+        "flags": {},
+        "acao": "",
+        "erro_tarefas": "",
+        "web_query": "",
+    }
+    texto = _comando(t)
+    if texto is None:
+        texto = _rotear(t)
+        add_event("chat_assistant", texto)
+    return {
+        "texto": texto,
+        "flags": t["flags"],
+        "acao": t["acao"],
+        "tarefas": t["tarefas"],
+        "erro_tarefas": t["erro_tarefas"],
+        "web_query": t["web_query"],
+    }
+
+def conversar(user_txt: str, via: str = "") -> dict:
+    """
+    Turno completo pros front-ends sem sessão (bot, API): lê settings/estado do disco,
+    põe a mensagem no chat do dia, roda processar_turno e grava a resposta no chat.
+    O chat só fica travado na leitura/gravação (storage.anexar_chat, trava entre processos),
+    não durante o turno (LLM/rede), então vários turnos do mesmo usuário rodam juntos —
+    e com o app aberto — sem perder mensagem.
+    """
+    extra = {"via": via} if via else {}
+    _, historico, _ = anexar_chat({"role": "user", "content": user_txt, **extra})
+    add_event("chat_user", user_txt)
+
+    turno = processar_turno(user_txt, historico, load_settings(), load_daily_state())
+
+    anexar_chat({"role": "assistant", "content": turno["texto"], **extra, **turno["flags"]})
+    return turno
+
+def _comando(t: dict) -> Optional[str]:
+    """Comandos e atalhos determinísticos. None = segue pro roteamento."""
+    low = t["user_txt"].lower()
+    ds = t["daily_state"]
+
+    if low.startswith("/fechamento"):
+        t["acao"] = "CLOSING_PROMPT"
+        ds["awaiting_closing"] = True
+        save_daily_state(ds)
+        texto = build_closing_prompt(now_floor_minute())
+        add_event("closing_prompt_manual", texto)
+        return texto
+
+    if low.startswith("/stats"):
+        t["acao"] = "STATS"
+        texto = "⚙️ **Performance por fase** (últimos reruns)\n\n" + perf.format_perf_stats(perf.perf_stats())
+        texto += "\n\n🤖 **Chamadas ao LLM** (últimos 7 dias)\n\n" + telemetria.format_llm_stats(
+            telemetria.llm_stats(), telemetria.llm_daily()
+        )
+        return texto
+
+    if ds.get("awaiting_closing") and not t["user_txt"].startswith("/"):
+        t["acao"] = "CLOSING_REVIEW"
+        add_event("daily_review", t["user_txt"])
+        update_summary_with_llm(f"Fechamento do dia: {t['user_txt']}")
+        ds["awaiting_closing"] = False
+        save_daily_state(ds)
+        texto = "Fechou 😄 Registrei teu fechamento de hoje. Amanhã eu já ajusto o teu briefing/lembretes com base nisso."
+        add_event("chat_assistant", texto)
+        return texto
+
+    texto = None
+    if is_time_question(t["tnorm"]):
+        agora_br = now_br()
+        texto = f"Agora no Brasil são **{agora_br.strftime('%H:%M')}** ({agora_br.strftime('%d/%m/%Y')})."
+    elif is_date_question(t["tnorm"]):
+        agora_br = now_br()
+        texto = f"Hoje é **{_WEEKDAY_PT[agora_br.weekday()]}**, **{agora_br.strftime('%d/%m/%Y')}**."
+    elif is_memory_question(t["tnorm"]):
+        texto = summarize_previous_user_messages(t["historico"], k=5)
+    if texto is not None:
+        t["acao"] = "SHORTCUT"
+        add_event("chat_assistant", texto)
+    return texto
+
+def _rotear(t: dict) -> str:
+    acao = decidir_acao(t["user_txt"], t["tarefas"], t["settings"], t["historico"])
+
+    # Guarda-corpos: evita a Zoe criar/concluir tarefa sem o usuário pedir
+    if acao.get("action") == "TASK_CREATE" and not is_task_create_intent(t["tnorm"]):
+        acao = dict(_CHAT)  # era pergunta, não tarefa
+    if acao.get("action") == "TASK_DONE" and not is_task_done_intent(t["tnorm"]):
+        acao = dict(_CHAT)  # não pediu pra concluir nada
+
+    t["acao"] = acao.get("action") or "CHAT"
+    handler = ACOES.get(t["acao"], _acao_chat)
+    return handler(t, acao)
+
+
+# =========================
+# AÇÕES
+# =========================
+def _atualizar_tarefas(t: dict, mudanca) -> None:
+    lista, erro = storage.atualizar_tarefas(mudanca)
+    t["tarefas"] = [normalizar_tarefa(x) for x in lista]
+    t["erro_tarefas"] = erro
+
+def _acao_task_create(t: dict, acao: dict) -> str:
+    d = extrair_dados_tarefa(t["user_txt"])
+    if not d:
+        return "Beleza… mas não peguei a data/hora 😅 Ex: *me lembra de X amanhã às 15:00*."
+    d = normalizar_tarefa(d)
+    _atualizar_tarefas(t, lambda lista: lista + [d])
+    texto = f"Fechou! ✅ Agendei **{d['descricao']}** pra **{d['data_hora']}**."
+    if d.get("recorrencia"):
+        texto = f"Fechou! ✅ **{d['descricao']}** — 🔁 {descrever_recorrencia(d['recorrencia'])} (próxima: **{d['data_hora']}**)."
+    add_event("task_create", texto)
+    update_summary_with_llm(f"Nova tarefa: {d['descricao']} @ {d['data_hora']}")
+    return texto
+
+def _acao_task_done(t: dict, acao: dict) -> str:
+    if not t["tarefas"]:
+        return "Não tem nada na agenda agora — tá suave 😄"
+    removida = t["tarefas"][0]
+    agora = now_floor_minute()
+    _atualizar_tarefas(t, alterar_por_id(removida["id"], lambda x: concluir_tarefa(x, agora)))
+    texto = f"Top! ✅ Marquei como feito: **{removida['descricao']}**."
+    prox = next((x for x in t["tarefas"] if x.get("id") == removida["id"]), None)
+    if prox:
+        texto += f" 🔁 Próxima: **{prox['data_hora']}**."
+    add_event("task_done", texto)
+    update_summary_with_llm(f"Concluiu: {removida['descricao']}")
+    return texto
+
+def _acao_local_ticker_info(t: dict, acao: dict) -> str:
+    ticker = (acao.get("ticker") or "").strip().upper()
+    add_event("ticker_info_local", ticker)
+    return local_ticker_info_answer(ticker)
+
+def _acao_finance_quote(t: dict, acao: dict) -> str:
+    t["flags"]["finance_used"] = True
+    ticker = (acao.get("ticker") or "").strip().upper()
+    quote = fetch_finance_quote(ticker)
+    add_event("finance_quote", f"{ticker}: {(quote or {}).get('regularMarketPrice')}")
+    return format_quote_answer(ticker, quote)
+
+def _acao_finance_dividends(t: dict, acao: dict) -> str:
+    t["flags"]["finance_used"] = True
+    ticker = (acao.get("ticker") or "").strip().upper()
+    pack = fetch_brapi_dividends_hint(ticker)
+    quote = (pack or {}).get("quote") or {}
+    div = (pack or {}).get("div") or {}
+    add_event("finance_dividends", ticker)
+
+    # Se a API não trouxer dividendos, não chuta — direciona pro /web ou pede o rendimento por cota
+    if div:
+        return f"Tenho alguns dados de dividendos pra **{ticker}**, mas a estrutura da API pode variar.\n\nSe você me disser quantas cotas você tem, eu calculo o total. 😉"
+    base = format_quote_answer(ticker, quote) + "\n\n" if quote else ""
+    return (
+        base
+        + f"Sobre **dividendos/rendimentos** de **{ticker}**: eu não consegui puxar isso da API agora (nem sempre vem no payload).\n"
+        + "Pra eu calcular certinho quanto você vai receber e as datas, me manda o **rendimento por cota** do último mês (ex: `R$ 1,05/cota`) "
+        + f"ou usa **/web** assim: `/web rendimento por cota e data de pagamento {ticker}`"
+    )
+
+def _resultados_parecem_relevantes(res: list, ticker: str) -> bool:
+    if not ticker or not res:
+        return False
+    tck = ticker.lower()
+    for it in res:
+        if not isinstance(it, dict):
+            continue
+        txt = f"{it.get('title','')} {it.get('content','')} {it.get('url','')}".lower()
+        # bom sinal: menciona o ticker
+        if tck in txt:
+            return True
+        # bom sinal: contexto Brasil/B3/FII
+        if any(k in txt for k in ["fii", "fundo imobili", "b3", "bolsa", "cvm", "cri", "kinea", "rendimentos imobili"]):
+            return True
+    return False
+
+def _acao_web_search(t: dict, acao: dict) -> str:
+    q = (acao.get("search_query") or "").strip()
+
+    # Se o usuário digitou só "/web" (sem consulta), não faz busca vazia.
+    if not q:
+        add_event("web_search", "Q: (vazio)")
+        return "Manda o que você quer pesquisar depois do **/web** 😄\nEx: `/web previsão do tempo em Ilhéus`"
+    t["web_query"] = q
+    user_txt = t["user_txt"]
+
+    # --- Busca com "boost" para tickers B3/FIIs ---
+    ticker_guess = _extract_b3_ticker(q) or _extract_b3_ticker(user_txt)
+    tnorm_q = limpar_texto(q)
+    wants_ticker_info = bool(ticker_guess) and any(k in tnorm_q for k in [
+        "o que e", "oq e", "o q e", "que e", "sobre", "significa", "defina", "explica",
+        "fii", "fundo", "acao", "ação", "etf"
+    ])
+
+    # 1ª tentativa; com ticker, o nome (brapi) já vem junto — a 2ª tentativa precisa dele
+    qdata = {}
+    if ticker_guess and wants_ticker_info:
+        results, qdata = aio.paralelo(buscar_tavily_async(q, max_results=5), fetch_brapi_quote_async(ticker_guess))
+    else:
+        results = buscar_tavily(q, max_results=5)
+
+    # 2ª tentativa (só quando parece ticker e os resultados vieram nada a ver)
+    if ticker_guess and wants_ticker_info and (not results or not _resultados_parecem_relevantes(results, ticker_guess)):
+        qdata = qdata or {}
+        nome = (qdata.get("longName") or qdata.get("shortName") or qdata.get("companyName") or "").strip()
+        q2 = re.sub(r"\s+", " ", f"{ticker_guess} {nome} FII fundo imobiliário B3 descrição".strip())
+        results2 = buscar_tavily(q2, max_results=5)
+        if results2:
+            results = results2
+            t["web_query"] = q2
+
+    add_event("web_search", f"Q: {q}")
+    if not results:
+        return "Não consegui puxar resultados confiáveis da web agora 😅 Tenta reformular a pergunta ou tentar daqui a pouco."
+    t["flags"]["web_used"] = True
+    # Se foi /web, não deixa o '/web' contaminar a pergunta pro LLM
+    question_for_llm = q if user_txt.lower().startswith("/web") else user_txt
+    data = _llm_answer_from_web(question_for_llm, results)
+    return _render_web_json(data) if data else "Achei umas fontes, mas deu ruim pra montar a resposta 😅"
+
+def _acao_weather(t: dict, acao: dict) -> str:
+    t["flags"]["weather_used"] = True
+    settings = t["settings"]
+    city_req = (acao.get("city") or settings.get("city_name") or "Ilhéus, BA").strip()
+    day_offset = int(acao.get("day_offset") or 0)
+    if len(acao.get("cidades") or []) > 1:
+        return _responder_cidades(settings, acao["cidades"], day_offset)
+    info = resolve_city_coords(settings, city_req)
+    # Cache: se for a cidade padrão e ainda não tem coords, salva pra evitar geocode toda hora
+    try:
+        if info and (settings.get("city_name", "").strip().lower() == city_req.lower()) and (settings.get("lat") is None or settings.get("lon") is None):
+            settings["city_name"] = info["city"]
+            settings["lat"] = info["lat"]
+            settings["lon"] = info["lon"]
+            save_settings(settings)
+    except Exception:
+        pass
+    add_event("weather", f"{city_req} / d+{day_offset}")
+    if not info:
+        return f"Não consegui achar **{city_req}** 😅 Me diz no formato tipo: *Ilhéus, BA* ou *São Paulo, SP*."
+    if acao.get("pergunta"):
+        return _responder_horaria(info, acao, day_offset)
+    w = fetch_weather_days(info["lat"], info["lon"], days=2)
+    if not w:
+        return "Deu ruim pra puxar a previsão agora 😅 Tenta de novo já já."
+    return format_weather_reply(info["city"], w, day_offset)
+
+async def _previsao_cidades_async(settings: dict, cidades: list, day_offset: int) -> tuple:
+    infos = await aio.juntar(*[resolve_city_coords_async(settings, c) for c in cidades])
+    achadas = [i for i in infos if i]
+    ws = await fetch_weather_multi_async([(i["lat"], i["lon"]) for i in achadas], days=max(2, day_offset + 1))
+    return infos, achadas, ws
+
+def _responder_cidades(settings: dict, cidades: list, day_offset: int) -> str:
+    """Várias cidades: coordenadas em paralelo, previsão de todas numa requisição só."""
+    add_event("weather", f"{' | '.join(cidades)} / d+{day_offset}")
+    infos, achadas, ws = aio.rodar(_previsao_cidades_async(settings, cidades, day_offset))
+    if not achadas:
+        return "Não consegui achar essas cidades 😅 Me manda tipo: *Ilhéus, BA e Salvador, BA*."
+    if not any(ws):
+        return "Deu ruim pra puxar a previsão agora 😅 Tenta de novo já já."
+    texto = format_weather_comparacao(achadas, ws, day_offset)
+    faltou = [c for c, i in zip(cidades, infos) if not i]
+    if faltou:
+        texto += f"\n_(não achei: {', '.join(faltou)})_"
+    return texto
+
+def _responder_horaria(info: dict, acao: dict, day_offset: int) -> str:
+    """Perguntas hora a hora ("que horas para de chover?", "melhor horário pra correr amanhã")."""
+    h = series_horarias(clima_de_hoje(info["lat"], info["lon"]))
+    if not h:
+        return "Deu ruim pra puxar a previsão hora a hora agora 😅 Tenta de novo já já."
+    agora = now_floor_minute()
+    if acao["pergunta"] == "melhor_horario":
+        dia = (agora + timedelta(days=day_offset)).date()
+        j = melhor_janela(h, dia, duracao_h=1, depois=agora if day_offset == 0 else None)
+        return format_melhor_janela(info["city"], j, acao.get("atividade") or "atividade ao ar livre", day_offset)
+    return format_quando_chove(info["city"], quando_chove(h, agora), agora)
+
+async def _chat_stream_async(msgs: list) -> str:
+    with telemetria.llm_call("chat", MODEL_ID) as call:
+        return await call.stream_text_async(aio.groq_chat_stream(model=MODEL_ID, messages=msgs, temperature=0.2))
+
+def _acao_chat(t: dict, acao: dict) -> str:
+    user_txt = t["user_txt"]
+    mems = search_memories(user_txt)
+    ctx_mem = "\n".join([m[2] for m in mems])
+    sys_prompt = f"""{ZOE_PERSONA}
+
+Informações do usuário (resumo vivo):
+{load_summary()}
+
+Contexto de memória (pode usar se for relevante):
+{ctx_mem}
+
+Regras rápidas:
+- Responda em PT-BR.
+- Seja direta e prática.
+- Use gírias leves e emojis às vezes.
+- Se a pergunta pedir algo que depende de dados atuais, sugira usar /web.
+""".strip()
+
+    msgs = [{"role": "system", "content": sys_prompt}] + to_llm_messages(t["historico"], limit=20)
+    try:
+        # streaming só pra medir o TTFT de verdade; a resposta continua indo inteira pro chat
+        with perf.phase("ext:groq:chat"):
+            texto = aio.rodar(_chat_stream_async(msgs))
+    except Exception:
+        texto = "Ops, deu um errinho pra gerar a resposta agora 😅 Tenta de novo?"
+
+    # Auto-web: se a resposta ficou "não sei / usa /web", a Zoe pesquisa sozinha e volta com algo útil
+    if should_auto_web(user_txt, texto):
+        results = buscar_tavily(user_txt, max_results=5)
+        if results:
+            t["flags"]["web_used"] = True
+            data = _llm_answer_from_web(user_txt, results)
+            texto = _render_web_json(data) if data else "Consegui buscar, mas deu ruim pra montar a resposta 😅 Tenta de novo?"
+            add_event("web_search", f"Q: {user_txt}")
+    return texto
+
+ACOES = {
+    "TASK_CREATE": _acao_task_create,
+    "TASK_DONE": _acao_task_done,
+    "LOCAL_TICKER_INFO": _acao_local_ticker_info,
+    "FINANCE_QUOTE": _acao_finance_quote,
+    "FINANCE_DIVIDENDS": _acao_finance_dividends,
+    "WEB_SEARCH": _acao_web_search,
+    "WEATHER": _acao_weather,
+    "CHAT": _acao_chat,
+}
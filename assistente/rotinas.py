@@ -0,0 +1,121 @@
+"""Textos das rotinas proativas: briefing matinal e fechamento do dia."""
+from datetime import datetime
+from typing import Optional
+
+from .clima import clima_de_hoje
+from .tarefas import tasks_today_summary, venceu_no_silencio
+
+
+def clima_briefing(settings: dict) -> Optional[dict]:
+    if settings.get("lat") is None or settings.get("lon") is None:
+        return None
+    return clima_de_hoje(settings["lat"], settings["lon"])
+
+def chave_tarefas_briefing(tarefas: list, dt: datetime) -> list:
+    """O que o briefing mostra das tarefas — igual → o texto pré-montado ainda vale."""
+    ts = tasks_today_summary(tarefas, dt)
+    return [ts["count"]] + [[t.get("id"), t.get("data_hora"), t.get("descricao")] for t in ts["next"]]
+
+def build_briefing(settings: dict, tarefas: list, dt: datetime, w: Optional[dict] = None) -> str:
+    """w = previsão já em mãos (briefing pré-montado); sem ela busca (com fallback na última boa)."""
+    city = settings.get("city_name") or "sua cidade"
+    if w is None:
+        w = clima_briefing(settings)
+    ts = tasks_today_summary(tarefas, dt)
+
+    header = f"☀️ **Briefing Matinal** — {dt.strftime('%d/%m/%Y')}\n📍 *{city}*"
+    parts = [header]
+
+    if w:
+        rain_prob = w.get("rain_prob")
+        tmin = w.get("temp_min")
+        tmax = w.get("temp_max")
+        temp_now = w.get("temp_now")
+
+        chuva_txt = "🌧️" if (isinstance(rain_prob, (int, float)) and rain_prob >= 50) else "🌤️"
+        rp_txt = f"{int(rain_prob)}%" if isinstance(rain_prob, (int, float)) else "?"
+        now_txt = f"{round(temp_now)}°C" if isinstance(temp_now, (int, float)) else "?"
+        min_txt = f"{round(tmin)}°C" if isinstance(tmin, (int, float)) else "?"
+        max_txt = f"{round(tmax)}°C" if isinstance(tmax, (int, float)) else "?"
+
+        de_txt = f" _(previsão das {w['_de']})_" if w.get("_de") else ""
+        parts.append(f"\n{chuva_txt} **Clima hoje:** {min_txt}–{max_txt} | agora {now_txt} | chuva **{rp_txt}**{de_txt}")
+        if isinstance(rain_prob, (int, float)) and rain_prob >= int(settings.get("rain_threshold", 60)):
+            parts.append("☂️ *Dica rápida:* chance alta de chuva — guarda-chuva/jaqueta podem salvar teu dia.")
+        if isinstance(tmax, (int, float)) and tmax >= int(settings.get("heat_threshold", 30)):
+            parts.append("💧 *Dica rápida:* calor forte hoje — água e protetor valem ouro.")
+
+    # tarefas
+    parts.append(f"\n📌 **Hoje:** {ts['count']} tarefa(s) na agenda.")
+    if ts["next"]:
+        lines = []
+        for t in ts["next"]:
+            try:
+                hhmm = (t.get("data_hora","")[-5:])
+            except Exception:
+                hhmm = ""
+            lines.append(f"• **{hhmm}** — {t.get('descricao','')}")
+        parts.append("\n".join(lines))
+    else:
+        parts.append("• Nada marcado — dia livre pra atacar um objetivo grande 😄")
+
+    # foco do dia (simples, sem inventar demais)
+    foco = ts["next"][0]["descricao"] if ts["next"] else "fazer 1 coisa que empurre tua vida pra frente"
+    parts.append(f"\n🎯 **Foco do dia:** {foco}")
+
+    return "\n".join(parts).strip()
+
+def build_lembretes(vencidas: list, agora: datetime) -> dict:
+    """
+    Um disparo pra todas as tarefas vencidas do tick: {"chat", "telegram", "titulo", "corpo", "fala"}.
+    O que venceu no horário silencioso sai como resumo da manhã.
+    """
+    hoje = agora.strftime("%Y-%m-%d")
+
+    def quando(t):
+        dh = t.get("data_hora", "")
+        return dh[-5:] if dh.startswith(hoje) else dh
+
+    if len(vencidas) == 1 and not venceu_no_silencio(vencidas[0]):
+        t = vencidas[0]
+        return {
+            "chat": f"🔔 **Ei! Lembrete na área:** {t['descricao']}\n\n⏰ **{t['data_hora']}**",
+            "telegram": f"🔔 *ALERTA*: {t['descricao']}\n⏰ {t['data_hora']}",
+            "titulo": "Lembrete",
+            "corpo": t["descricao"],
+            "fala": "Atenção, você tem um lembrete.",
+        }
+
+    noite = [t for t in vencidas if venceu_no_silencio(t)]
+    agora_ = [t for t in vencidas if not venceu_no_silencio(t)]
+    chat, tg = [], []
+    if noite:
+        chat.append(f"☀️ **Enquanto você dormia** — {len(noite)} lembrete(s) do horário silencioso:")
+        tg.append(f"☀️ *Enquanto você dormia* ({len(noite)}):")
+        chat += [f"• **{quando(t)}** — {t['descricao']}" for t in noite]
+        tg += [f"• {quando(t)} {t['descricao']}" for t in noite]
+    if agora_:
+        chat.append(f"\n🔔 **Agora** ({len(agora_)}):" if noite else f"🔔 **{len(agora_)} lembretes na área:**")
+        tg.append(f"\n🔔 *Agora* ({len(agora_)}):" if noite else f"🔔 *{len(agora_)} LEMBRETES*")
+        chat += [f"• **{quando(t)}** — {t['descricao']}" for t in agora_]
+        tg += [f"• {quando(t)} {t['descricao']}" for t in agora_]
+
+    n = len(vencidas)
+    lembretes = f"{n} lembrete" + ("s" if n > 1 else "")
+    corpo = " · ".join(t["descricao"] for t in vencidas[:4]) + (" …" if n > 4 else "")
+    return {
+        "chat": "\n".join(chat).strip(),
+        "telegram": "\n".join(tg).strip(),
+        "titulo": lembretes if n > 1 else "Lembrete",
+        "corpo": corpo,
+        "fala": f"Bom dia! Você tem {lembretes} da noite." if noite and not agora_ else f"Atenção, você tem {lembretes}.",
+    }
+
+def build_closing_prompt(dt: datetime) -> str:
+    return (
+        f"🌙 **Fechamento do dia** ({dt.strftime('%d/%m')})\n"
+        "Manda em 1–3 linhas:\n"
+        "1) O que você fez hoje?\n"
+        "2) O que ficou pendente?\n"
+        "3) Leve / normal / pesado?"
+    )
@@ -0,0 +1,437 @@
+"""
+Persistência em arquivos: settings, estado diário, avatar, histórico do chat,
+resumo vivo e tarefas. Nada aqui depende de Streamlit: quem grava devolve a
+mensagem de erro (ou "") e a UI decide como mostrar.
+"""
+import base64
+import copy
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: só a trava entre threads
+    fcntl = None
+
+from . import estatico
+from .config import (
+    ARQUIVO_TAREFAS, AVATAR_MAX_INLINE_BYTES, AVATAR_QUALITY, AVATAR_SIZE, CHAT_HISTORY_PATH, CHAT_MAX_MESSAGES,
+    DAILY_STATE_PATH, DEFAULT_SETTINGS, FUSO_BR, SETTINGS_PATH, SUMMARY_PATH, USER_DEFAULT,
+)
+from .tempo import today_key
+from .usuario import atual as usuario_atual, caminho
+
+
+# =========================
+# SETTINGS / ESTADO DIÁRIO
+# =========================
+def load_settings() -> dict:
+    path = caminho(SETTINGS_PATH)
+    if not os.path.exists(path):
+        return dict(DEFAULT_SETTINGS)
+    try:
+        data = json.loads(open(path, "r", encoding="utf-8").read() or "{}")
+        if not isinstance(data, dict):
+            return dict(DEFAULT_SETTINGS)
+        merged = dict(DEFAULT_SETTINGS)
+        merged.update(data)
+        return merged
+    except Exception:
+        return dict(DEFAULT_SETTINGS)
+
+def save_settings(s: dict) -> None:
+    try:
+        path = caminho(SETTINGS_PATH)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(s, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except Exception:
+        pass
+
+def load_daily_state() -> dict:
+    path = caminho(DAILY_STATE_PATH)
+    if not os.path.exists(path):
+        return {}
+    try:
+        data = json.loads(open(path, "r", encoding="utf-8").read() or "{}")
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+def save_daily_state(s: dict) -> None:
+    try:
+        path = caminho(DAILY_STATE_PATH)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(s, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except Exception:
+        pass
+
+
+# =========================
+# AVATAR
+# =========================
+def _avatar_guess_mime(path: str) -> str:
+    p = (path or "").lower()
+    if p.endswith(".jpg") or p.endswith(".jpeg"):
+        return "image/jpeg"
+    if p.endswith(".webp"):
+        return "image/webp"
+    return "image/png"
+
+def _avatar_thumbnail(data: bytes) -> Optional[bytes]:
+    """Recorte quadrado central + resize pra AVATAR_SIZE, em WEBP. None se o Pillow não der conta."""
+    try:
+        import io
+        from PIL import Image, ImageOps
+        img = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+        img = ImageOps.fit(img.convert("RGBA"), (AVATAR_SIZE, AVATAR_SIZE), Image.LANCZOS)
+        out = io.BytesIO()
+        img.save(out, format="WEBP", quality=AVATAR_QUALITY, method=6)
+        return out.getvalue()
+    except Exception:
+        return None
+
+_avatar_cache: dict = {}   # path -> ((mtime_ns, size), {"data_uri", "static"}); um por usuário
+AVATAR_CACHE_MAX = 512
+
+def _avatar_static_nome() -> str:
+    u = usuario_atual()
+    return "avatar" if u == USER_DEFAULT else f"avatar_{u}"
+
+def _avatar_entry(settings: dict) -> Optional[dict]:
+    ap = caminho((settings or {}).get("avatar_path") or "avatar.png")
+    try:
+        st_ = os.stat(ap)
+    except OSError:
+        return None
+    versao = (st_.st_mtime_ns, st_.st_size)
+    hit = _avatar_cache.get(ap)
+    if hit and hit[0] == versao:
+        return hit[1]
+    try:
+        data = open(ap, "rb").read()
+        if not data:
+            return None
+        mime = _avatar_guess_mime(ap)
+        # avatar antigo (upload cru): reduz só em memória, o arquivo fica como está
+        if len(data) > AVATAR_MAX_INLINE_BYTES:
+            thumb = _avatar_thumbnail(data)
+            if thumb:
+                data, mime = thumb, "image/webp"
+        ext = ".webp" if mime == "image/webp" else (".jpg" if mime == "image/jpeg" else ".png")
+        entry = {
+            "data_uri": f"data:{mime};base64,{base64.b64encode(data).decode('utf-8')}",
+            "static": estatico.publicar(data, _avatar_static_nome(), ext),
+        }
+    except Exception:
+        return None
+    if len(_avatar_cache) >= AVATAR_CACHE_MAX:
+        _avatar_cache.pop(next(iter(_avatar_cache)))
+    _avatar_cache[ap] = (versao, entry)
+    return entry
+
+def load_avatar_data_uri(settings: dict) -> Optional[str]:
+    """Avatar como data-uri (cache em memória por caminho+mtime)."""
+    e = _avatar_entry(settings)
+    return e["data_uri"] if e else None
+
+def load_avatar_src(settings: dict, static: bool = False) -> Optional[str]:
+    """src do <img>: URL estática com hash (navegador cacheia) ou, sem static serving, o data-uri."""
+    e = _avatar_entry(settings)
+    if not e:
+        return None
+    if static and e["static"]:
+        return estatico.url(e["static"])
+    return e["data_uri"]
+
+def save_uploaded_avatar(uploaded_file, settings: dict) -> dict:
+    """Salva o avatar enviado (miniatura quadrada WEBP) e atualiza settings['avatar_path']"""
+    if uploaded_file is None:
+        return settings
+    try:
+        data = uploaded_file.getvalue()
+        thumb = _avatar_thumbnail(data)
+        if thumb:
+            data, ext = thumb, ".webp"
+        else:
+            fn = (uploaded_file.name or "").lower()
+            ext = ".png"
+            if fn.endswith(".jpg") or fn.endswith(".jpeg"):
+                ext = ".jpg"
+            elif fn.endswith(".webp"):
+                ext = ".webp"
+        out_path = "avatar" + ext
+        with open(caminho(out_path), "wb") as f:
+            f.write(data)
+        s = dict(settings or {})
+        s["avatar_path"] = out_path
+        return s
+    except Exception:
+        return settings
+
+
+# =========================
+# STORAGE CHAT (PERSISTÊNCIA DIÁRIA)
+# =========================
+def chat_history_path() -> str:
+    """Caminho absoluto do arquivo de histórico do chat."""
+    return os.path.abspath(caminho(CHAT_HISTORY_PATH))
+
+def load_chat_history() -> tuple:
+    """Carrega histórico do chat do disco. Retorna (day_key, messages)."""
+    path = chat_history_path()
+    today = today_key(datetime.now(FUSO_BR))
+    if not os.path.exists(path):
+        return (today, [])
+    try:
+        raw = json.loads(open(path, "r", encoding="utf-8").read() or "{}")
+        if isinstance(raw, dict):
+            day = str(raw.get("day") or today)
+            msgs = raw.get("messages") or []
+        elif isinstance(raw, list):
+            # compat: versões antigas podem ter salvado só a lista
+            day = today
+            msgs = raw
+        else:
+            return (today, [])
+
+        if not isinstance(msgs, list):
+            msgs = []
+
+        cleaned = []
+        for m in msgs:
+            if not isinstance(m, dict):
+                continue
+            role = m.get("role")
+            content = m.get("content")
+            if role not in ("user", "assistant", "system"):
+                continue
+            if content is None:
+                continue
+            mm = dict(m)
+            mm["role"] = role
+            mm["content"] = str(content)
+            cleaned.append(mm)
+
+        return (day, cleaned)
+    except Exception:
+        return (today, [])
+
+def save_chat_history(day: str, messages: list) -> str:
+    """Salva histórico do chat de forma atômica (resistente a reruns). Devolve o erro ou ""."""
+    path = chat_history_path()
+    base_dir = os.path.dirname(path) or "."
+    os.makedirs(base_dir, exist_ok=True)
+
+    payload = {"day": str(day), "messages": messages}
+    tmp_path = ""
+
+    try:
+        with tempfile.NamedTemporaryFile(
+            mode="w", encoding="utf-8", delete=False, dir=base_dir,
+            prefix=os.path.basename(path) + ".", suffix=".tmp"
+        ) as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+            f.flush()
+            try:
+                os.fsync(f.fileno())
+            except Exception:
+                pass
+            tmp_path = f.name
+
+        os.replace(tmp_path, path)
+        return ""
+    except Exception as e:
+        try:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        except Exception:
+            pass
+        return f"{type(e).__name__}: {e}"
+
+
+def anexar_chat(mensagem: dict, limite: int = CHAT_MAX_MESSAGES) -> tuple:
+    """
+    Acrescenta uma mensagem ao chat do dia relendo o arquivo sob trava (app, bot e API
+    gravam o mesmo chat, cada um num processo). Devolve (dia, mensagens, erro).
+    """
+    with trava_arquivo(chat_history_path()):
+        hoje = today_key(datetime.now(FUSO_BR))
+        dia, msgs = load_chat_history()
+        msgs = ((msgs if dia == hoje else []) + [mensagem])[-limite:]
+        return hoje, msgs, save_chat_history(hoje, msgs)
+
+def limpar_chat() -> tuple:
+    """Zera o chat do dia (sob a mesma trava). Devolve (dia, erro)."""
+    with trava_arquivo(chat_history_path()):
+        hoje = today_key(datetime.now(FUSO_BR))
+        return hoje, save_chat_history(hoje, [])
+
+# =========================
+# RESUMO VIVO
+# =========================
+def load_summary() -> str:
+    path = caminho(SUMMARY_PATH)
+    if not os.path.exists(path):
+        return "Resumo vazio."
+    try:
+        return open(path, "r", encoding="utf-8").read().strip() or "Resumo vazio."
+    except Exception:
+        return "Resumo vazio."
+
+def save_summary(texto: str):
+    if not texto:
+        return
+    with open(caminho(SUMMARY_PATH), "w", encoding="utf-8") as f:
+        f.write(texto)
+
+
+# =========================
+# STORAGE TAREFAS
+# =========================
+def tarefas_path() -> str:
+    """Caminho absoluto para o arquivo de tarefas (evita surpresas com cwd)."""
+    return os.path.abspath(caminho(ARQUIVO_TAREFAS))
+
+def carregar_tarefas() -> list:
+    path = tarefas_path()
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, list) else []
+    except Exception:
+        return []
+
+def salvar_tarefas(lista: list) -> str:
+    """
+    Escrita atômica e resistente a reruns do Streamlit.
+    Usa arquivo temporário *único* no mesmo diretório e faz os.replace().
+    Em caso de erro, não derruba o app: devolve a mensagem de erro ("" se deu certo).
+    """
+    path = tarefas_path()
+    base_dir = os.path.dirname(path) or "."
+    os.makedirs(base_dir, exist_ok=True)
+
+    tmp_path = ""
+    try:
+        # Temp único evita colisão quando o Streamlit dá rerun/autorefresh.
+        with tempfile.NamedTemporaryFile(
+            mode="w", encoding="utf-8", delete=False, dir=base_dir,
+            prefix=os.path.basename(path) + ".", suffix=".tmp"
+        ) as f:
+            json.dump(lista, f, ensure_ascii=False, indent=2)
+            f.flush()
+            try:
+                os.fsync(f.fileno())
+            except Exception:
+                pass
+            tmp_path = f.name
+
+        os.replace(tmp_path, path)
+        return ""
+    except Exception as e:
+        # limpeza best-effort
+        try:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        except Exception:
+            pass
+        return f"{type(e).__name__}: {e}"
+
+
+# =========================
+# TAREFAS COM CONCORRÊNCIA OTIMISTA (compare-and-swap)
+# =========================
+# Cada escrita compara o "carimbo" do arquivo (inode+mtime+tamanho, muda a cada os.replace)
+# com o que foi lido. Se outra sessão gravou no meio, relê e reaplica a mudança em cima
+# da versão nova, em vez de sobrescrever. A trava só cobre o compare+replace (milissegundos).
+TAREFAS_CAS_TENTATIVAS = 8
+
+_travas: dict = {}
+_travas_lock = threading.Lock()
+
+def _carimbo(path: str) -> Optional[tuple]:
+    try:
+        st_ = os.stat(path)
+        return (st_.st_ino, st_.st_mtime_ns, st_.st_size)
+    except OSError:
+        return None
+
+@contextmanager
+def trava_arquivo(path: str):
+    """Exclusão mútua curta em `path`: thread (mesmo processo) + flock no .lock (outros processos)."""
+    with _travas_lock:
+        t = _travas.setdefault(path, threading.Lock())
+    with t:
+        if fcntl is None:
+            yield
+            return
+        with open(path + ".lock", "a") as lf:
+            fcntl.flock(lf.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lf.fileno(), fcntl.LOCK_UN)
+
+def carregar_tarefas_versionado() -> tuple:
+    """(lista, carimbo) — o carimbo vai de volta pro salvar_tarefas_se()."""
+    path = tarefas_path()
+    for _ in range(3):
+        antes = _carimbo(path)
+        lista = carregar_tarefas()
+        if _carimbo(path) == antes:
+            return lista, antes
+    return lista, _carimbo(path)
+
+def salvar_tarefas_se(lista: list, carimbo: Optional[tuple]) -> tuple:
+    """Grava só se ninguém gravou desde `carimbo`. Devolve (gravou, erro)."""
+    path = tarefas_path()
+    with trava_arquivo(path):
+        if _carimbo(path) != carimbo:
+            return False, ""
+        erro = salvar_tarefas(lista)
+        return (not erro), erro
+
+def atualizar_tarefas(mudanca, tentativas: int = TAREFAS_CAS_TENTATIVAS, info: Optional[dict] = None) -> tuple:
+    """
+    Lê → mudanca(lista) → grava com CAS, repetindo em conflito. `mudanca` recebe cópias (profundas) e
+    devolve a lista nova (ou None = nada a mudar); tem que poder rodar de novo sobre dados novos.
+    A última tentativa roda inteira dentro da trava (sempre termina, mesmo sob muita disputa).
+    Devolve (lista_final, erro). `info`, se vier, recebe {"tentativas", "conflitos"}.
+    """
+    path = tarefas_path()
+    lista, erro, conflitos = [], "", 0
+    for i in range(max(1, tentativas)):
+        if i == max(1, tentativas) - 1:
+            with trava_arquivo(path):
+                lista = carregar_tarefas()
+                nova = mudanca(copy.deepcopy(lista))
+                if nova is not None and nova != lista:
+                    erro = salvar_tarefas(nova)
+                    lista = nova if not erro else lista
+            break
+        lista, carimbo = carregar_tarefas_versionado()
+        nova = mudanca(copy.deepcopy(lista))
+        if nova is None or nova == lista:
+            break
+        gravou, erro = salvar_tarefas_se(nova, carimbo)
+        if gravou or erro:
+            lista = nova if gravou else lista
+            break
+        conflitos += 1
+        time.sleep(random.uniform(0, 0.002 * (2 ** i)))
+    if info is not None:
+        info.update({"tentativas": conflitos + 1, "conflitos": conflitos})
+    return lista, erro
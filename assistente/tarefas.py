@@ -0,0 +1,403 @@
+"""Regras das tarefas: normalização, parser de tempo relativo e agenda de alertas."""
+import calendar
+import re
+import uuid
+from datetime import datetime, time, timedelta
+from typing import Optional
+
+from .config import QUIET_END, REMINDER_SCHEDULE_MIN
+from .tempo import em_horario_silencioso, format_dt, now_floor_minute, parse_dt, parse_hhmm, today_key
+from .texto import limpar_texto
+
+
+RECORRENCIA_TIPOS = ("diaria", "uteis", "semanal", "mensal", "horas")
+RECORRENCIA_JANELA_DIAS = 62   # maior distância possível entre duas ocorrências (mensal no dia 31)
+DIAS_SEMANA_CURTO = ["seg", "ter", "qua", "qui", "sex", "sáb", "dom"]
+
+
+def normalizar_tarefa(d: dict) -> dict:
+    agora = now_floor_minute()
+    d = dict(d)
+    if "recorrencia" in d:
+        d["recorrencia"] = normalizar_recorrencia(d["recorrencia"])
+    d.setdefault("id", str(uuid.uuid4())[:8])
+    d.setdefault("status", "ativa")
+    d.setdefault("remind_count", 0)
+    d.setdefault("created_at", format_dt(agora))
+    d.setdefault("next_remind_at", d.get("data_hora"))
+    d.setdefault("snoozed_until", None)
+    return d
+
+def parse_relativo(texto: str):
+    t = limpar_texto(texto)
+    if "daqui um minuto" in t or "daqui 1 minuto" in t or "em 1 minuto" in t:
+        return timedelta(minutes=1)
+    m = re.search(r"(daqui|em)\s+(\d+)\s*(min|h|hora)", t)
+    if not m:
+        return None
+    n = int(m.group(2))
+    u = m.group(3)
+    if "h" in u or "hora" in u:
+        return timedelta(hours=n)
+    return timedelta(minutes=n)
+
+def ajustar_futuro(dt: datetime, agora: datetime) -> datetime:
+    if dt >= agora:
+        return dt
+    tentativa = dt + timedelta(hours=12)
+    if tentativa >= agora:
+        return tentativa
+    return dt + timedelta(days=1)
+
+def tarefas_vencidas(tarefas: list, agora: datetime) -> list:
+    """Todas as que já deviam ter tocado, mais atrasadas primeiro (vazio no horário silencioso)."""
+    if em_horario_silencioso(agora):
+        return []
+    candidates = []
+    for t in tarefas:
+        t = avancar_recorrente(t, agora)
+        if t.get("status") == "silenciada":
+            continue
+        try:
+            nr = parse_dt(t.get("next_remind_at") or t["data_hora"])
+            if agora >= nr:
+                diff = (agora - parse_dt(t["data_hora"])).total_seconds() / 60
+                candidates.append((diff, t))
+        except Exception:
+            continue
+    candidates.sort(key=lambda x: x[0], reverse=True)
+    return [t for _, t in candidates]
+
+def pick_due_task(tarefas: list, agora: datetime) -> Optional[dict]:
+    vencidas = tarefas_vencidas(tarefas, agora)
+    return vencidas[0] if vencidas else None
+
+def venceu_no_silencio(t: dict) -> bool:
+    """Devia ter tocado durante o horário silencioso (vai no resumo da manhã)."""
+    try:
+        return em_horario_silencioso(parse_dt(t.get("next_remind_at") or t["data_hora"]))
+    except Exception:
+        return False
+
+def schedule_next(agora: datetime, t: dict) -> dict:
+    t = dict(t)
+    t["remind_count"] = t.get("remind_count", 0) + 1
+    t["snoozed_until"] = None
+    if t["remind_count"] >= len(REMINDER_SCHEDULE_MIN) and t.get("recorrencia"):
+        prox = concluir_tarefa(t, agora)   # acabaram as cobranças desta: espera a próxima ocorrência
+        if prox:
+            return prox
+    if t["remind_count"] >= len(REMINDER_SCHEDULE_MIN):
+        t["status"] = "silenciada"
+        t["next_remind_at"] = format_dt(agora + timedelta(days=365))
+    else:
+        mins = REMINDER_SCHEDULE_MIN[t["remind_count"]]
+        t["next_remind_at"] = format_dt(agora + timedelta(minutes=mins))
+    return t
+
+def reagendar_lote(vencidas: list, agora: datetime):
+    """Mudança pro storage.atualizar_tarefas: schedule_next em todas as disparadas, numa gravação só.
+    Só mexe na que ainda está no mesmo next_remind_at (outra aba pode ter reagendado/soneca/silenciado)."""
+    esperado = {t.get("id"): t.get("next_remind_at") or t.get("data_hora") for t in vencidas}
+
+    def mudanca(lista: list) -> list:
+        out = []
+        for t in lista:
+            if t.get("id") in esperado:
+                t = avancar_recorrente(normalizar_tarefa(t), agora)   # mesma visão de tarefas_vencidas
+                if (t.get("next_remind_at") or t.get("data_hora")) == esperado[t.get("id")]:
+                    t = schedule_next(agora, t)
+            out.append(t)
+        return out
+    return mudanca
+
+def _fora_do_silencio(dt: datetime) -> datetime:
+    """Primeiro instante >= dt fora do horário silencioso (é quando pick_due_task deixaria disparar)."""
+    if not em_horario_silencioso(dt):
+        return dt
+    fim = dt.replace(hour=QUIET_END, minute=0, second=0, microsecond=0)
+    return fim if fim > dt else fim + timedelta(days=1)
+
+def proximos_lembretes(tarefas: list, agora: datetime, limite: int = 5, horizonte_h: int = 12) -> list:
+    """
+    Próximos disparos futuros, na ordem: [{"at", "tag", "descricao"}].
+    `tag` é o mesmo fingerprint do alerta no servidor (id::next_remind_at), pra notificação não duplicar.
+    """
+    fim = agora + timedelta(hours=horizonte_h)
+    out = []
+    for t in tarefas:
+        t = avancar_recorrente(t, agora)
+        if t.get("status") == "silenciada":
+            if not t.get("recorrencia"):
+                continue
+            t = concluir_tarefa(t, agora) or t   # ocorrência silenciada: a próxima ainda toca
+        try:
+            next_at = t.get("next_remind_at") or t["data_hora"]
+            at = _fora_do_silencio(parse_dt(next_at))
+        except Exception:
+            continue
+        if agora < at <= fim:
+            out.append({"at": at, "tag": f"{t.get('id')}::{next_at}", "descricao": t.get("descricao", "")})
+    out.sort(key=lambda x: x["at"])
+    return out[:limite]
+
+def _ocorrencia_do_dia(t: dict, dt: datetime) -> Optional[dict]:
+    """Recorrente: a tarefa com data_hora na 1ª ocorrência desse dia (None se não cai nele)."""
+    try:
+        inicio = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+        occ = proxima_ocorrencia(t["recorrencia"], inicio - timedelta(minutes=1), parse_dt(t["data_hora"]))
+    except Exception:
+        return None
+    if occ is None or occ.date() != inicio.date():
+        return None
+    return dict(t, data_hora=format_dt(occ))
+
+def tasks_today_summary(tarefas: list, dt: datetime) -> dict:
+    day = today_key(dt)
+    active = [t for t in tarefas if t.get("status") != "silenciada" and not t.get("recorrencia")]
+    todays = [t for t in active if (t.get("data_hora","").startswith(day))]
+    todays += [o for o in (_ocorrencia_do_dia(t, dt) for t in tarefas if t.get("recorrencia")) if o]
+    # ordena pelas próximas
+    todays_sorted = sorted(todays, key=lambda x: x.get("data_hora",""))
+    next3 = todays_sorted[:3]
+    return {"count": len(todays_sorted), "next": next3}
+
+def alterar_por_id(tid: str, fn):
+    """Mudança pro storage.atualizar_tarefas: aplica fn(tarefa) -> tarefa | None (None = remove) só na `tid`."""
+    def mudanca(lista: list) -> list:
+        out = []
+        for t in lista:
+            if t.get("id") == tid:
+                t = fn(t)
+            if t is not None:
+                out.append(t)
+        return out
+    return mudanca
+
+
+# =========================
+# RECORRÊNCIA
+# =========================
+# A tarefa guarda só a regra + a ocorrência da vez (data_hora); as próximas são
+# calculadas na hora (custo constante, não importa há quanto tempo a regra roda).
+#   {"tipo": "diaria",  "hora": "08:00"}
+#   {"tipo": "uteis",   "hora": "08:00"}                 seg–sex
+#   {"tipo": "semanal", "dias": [1, 3], "hora": "19:00"}  0 = segunda
+#   {"tipo": "mensal",  "dia": 10, "hora": "09:00"}       dia 31 em mês curto = último dia
+#   {"tipo": "horas",   "n": 8}                          fase = data_hora
+
+def normalizar_recorrencia(r) -> Optional[dict]:
+    """Regra limpa, ou None se vazia/inválida."""
+    if not isinstance(r, dict) or r.get("tipo") not in RECORRENCIA_TIPOS:
+        return None
+    tipo = r["tipo"]
+    try:
+        if tipo == "horas":
+            n = int(r.get("n") or 0)
+            return {"tipo": tipo, "n": n} if 1 <= n <= 24 * 7 else None
+        hm = parse_hhmm(str(r.get("hora") or ""))
+        if not hm:
+            return None
+        out = {"tipo": tipo, "hora": f"{hm[0]:02d}:{hm[1]:02d}"}
+        if tipo == "semanal":
+            dias = sorted({int(x) for x in (r.get("dias") or []) if 0 <= int(x) <= 6})
+            if not dias:
+                return None
+            out["dias"] = dias
+        if tipo == "mensal":
+            dia = int(r.get("dia") or 0)
+            if not 1 <= dia <= 31:
+                return None
+            out["dia"] = dia
+        return out
+    except Exception:
+        return None
+
+def _ocorrencia_no_dia(rec: dict, d, tz) -> Optional[datetime]:
+    """Horário da regra (não-horas) nesse dia, se a regra cai nele."""
+    tipo = rec["tipo"]
+    if tipo == "uteis" and d.weekday() >= 5:
+        return None
+    if tipo == "semanal" and d.weekday() not in rec["dias"]:
+        return None
+    if tipo == "mensal" and d.day != min(rec["dia"], calendar.monthrange(d.year, d.month)[1]):
+        return None
+    h, m = parse_hhmm(rec["hora"])
+    return datetime.combine(d, time(h, m), tzinfo=tz)
+
+def proxima_ocorrencia(rec: dict, depois: datetime, base: Optional[datetime] = None) -> Optional[datetime]:
+    """Primeira ocorrência estritamente depois de `depois`. `base` (uma ocorrência conhecida) dá a fase do "a cada N horas"."""
+    if rec["tipo"] == "horas":
+        passo = timedelta(hours=rec["n"])
+        base = base or depois
+        return base + ((depois - base) // passo + 1) * passo
+    d0 = depois.date()
+    for i in range(RECORRENCIA_JANELA_DIAS):
+        occ = _ocorrencia_no_dia(rec, d0 + timedelta(days=i), depois.tzinfo)
+        if occ is not None and occ > depois:
+            return occ
+    return None
+
+def ocorrencia_anterior(rec: dict, ate: datetime, base: Optional[datetime] = None) -> Optional[datetime]:
+    """Última ocorrência <= `ate`."""
+    if rec["tipo"] == "horas":
+        passo = timedelta(hours=rec["n"])
+        base = base or ate
+        return base + ((ate - base) // passo) * passo
+    d0 = ate.date()
+    for i in range(RECORRENCIA_JANELA_DIAS):
+        occ = _ocorrencia_no_dia(rec, d0 - timedelta(days=i), ate.tzinfo)
+        if occ is not None and occ <= ate:
+            return occ
+    return None
+
+def remarcar(t: dict, quando: datetime) -> dict:
+    """Cópia da tarefa num horário novo: lembra nele, do zero (contagem, soneca e status zerados)."""
+    t = dict(t)
+    t["data_hora"] = t["next_remind_at"] = format_dt(quando)
+    t["remind_count"] = 0
+    t["snoozed_until"] = None
+    t["status"] = "ativa"
+    return t
+
+def avancar_recorrente(t: dict, agora: datetime) -> dict:
+    """
+    Visão da tarefa em `agora`: se é recorrente e já passou uma ocorrência mais nova
+    que a guardada (app ficou fechado, ocorrência silenciada...), pula pra ela — a
+    mais recente, sem cobrar as perdidas. Tarefa comum volta igual.
+    """
+    rec = t.get("recorrencia")
+    if not rec:
+        return t
+    try:
+        atual = parse_dt(t["data_hora"])
+        ult = ocorrencia_anterior(rec, agora, atual)
+    except Exception:
+        return t
+    if ult is None or ult <= atual:
+        return t
+    return remarcar(t, ult)
+
+def concluir_tarefa(t: dict, agora: datetime) -> Optional[dict]:
+    """Feito: tarefa comum sai da lista (None); recorrente vai pra próxima ocorrência."""
+    rec = t.get("recorrencia")
+    if not rec:
+        return None
+    try:
+        atual = parse_dt(t["data_hora"])
+        prox = proxima_ocorrencia(rec, max(agora, atual), atual)
+    except Exception:
+        return None
+    return remarcar(t, prox) if prox else None
+
+def descrever_recorrencia(rec: Optional[dict]) -> str:
+    """Texto curto da regra: "todo dia às 08:00", "toda ter/qui às 19:00"..."""
+    if not rec:
+        return ""
+    tipo = rec["tipo"]
+    if tipo == "horas":
+        return f"a cada {rec['n']}h"
+    hora = f"às {rec['hora']}"
+    if tipo == "diaria":
+        return f"todo dia {hora}"
+    if tipo == "uteis":
+        return f"dias úteis {hora}"
+    if tipo == "semanal":
+        return f"toda {'/'.join(DIAS_SEMANA_CURTO[d] for d in rec['dias'])} {hora}"
+    return f"todo dia {rec['dia']} {hora}"
+
+
+# =========================
+# RECORRÊNCIA — PARSER PT-BR
+# =========================
+_DIAS_RE = [
+    (r"segunda", 0), (r"ter[cç]a", 1), (r"quarta", 2), (r"quinta", 3),
+    (r"sexta", 4), (r"s[aá]bado", 5), (r"domingo", 6),
+]
+_DIA_SEMANA = r"(?:segunda|ter[cç]a|quarta|quinta|sexta|s[aá]bado|domingo)(?:s?-feiras?|s)?"
+_REC_HORAS = re.compile(r"\b(?:a cada (\d{1,3}) ?h(?:oras?)?|de (\d{1,3}) em \d{1,3} ?h(?:oras?)?)\b")
+_REC_MENSAL = re.compile(
+    r"\b(?:todo m[eê]s,? (?:no )?dia (\d{1,2})|todo dia (\d{1,2})(?!\s*(?:h\b|h\d|:|hora))(?: de cada m[eê]s| do m[eê]s)?)\b"
+)
+_REC_UTEIS = re.compile(r"\b(?:(?:todos os |em |nos )?dias? [uú]te(?:is|l)|(?:de )?segunda a sexta(?:-feira)?)\b")
+_REC_SEMANAL = re.compile(rf"\btod[oa]s? (?:as |os )?{_DIA_SEMANA}(?:(?:,| e) (?:as |os )?{_DIA_SEMANA})*")
+_REC_DIARIA = re.compile(r"\b(?:todos os dias|todo santo dia|todo dia|diariamente)\b")
+_HORA = re.compile(
+    r"\b((?:[àa]s?|ao|por volta das) )?"
+    r"(?:(meio[- ]dia|meia[- ]noite)|(\d{1,2})(?::(\d{2})|h(\d{2})?| ?horas?\b)?(?: (da manh[aã]|da tarde|da noite))?)"
+)
+_GATILHOS = re.compile(
+    r"^\s*(?:me (?:lembr[ae]|avis[ae])(?: de| pra| para| que)?|lembrete(?: de| pra)?:?|anot[ae](?: a[ií])?:?|"
+    r"agend[ae](?:r)?|cria(?:r)? (?:uma )?tarefa(?: de| pra)?:?)\s*", re.I
+)
+
+
+def _hora_no_texto(t: str) -> tuple:
+    """(HH:MM | None, span) — primeira hora explícita ("8h", "8:30", "20 horas", "8 da noite", "meio-dia")."""
+    for m in _HORA.finditer(t):
+        prefixo, nome, h, mi, mi2, periodo = m.groups()
+        if nome:
+            return ("12:00" if "meio" in nome else "00:00"), m.span()
+        sufixo = m.group(0)[len(prefixo or ""):].strip()
+        if not (prefixo or periodo or mi is not None or mi2 is not None or sufixo.endswith(("h", "hora", "horas"))):
+            continue  # número solto (quantidade, dia...) não é hora
+        h = int(h)
+        mi = int(mi or mi2 or 0)
+        if periodo and ("tarde" in periodo or "noite" in periodo) and h < 12:
+            h += 12
+        if h <= 23 and mi <= 59:
+            return f"{h:02d}:{mi:02d}", m.span()
+    return None, None
+
+def _sem_trechos(texto: str, spans: list) -> str:
+    for a, b in sorted((s for s in spans if s), reverse=True):
+        texto = texto[:a] + " " + texto[b:]
+    return texto
+
+def parse_recorrencia(texto: str) -> Optional[dict]:
+    """
+    "todo dia às 8h tomar remédio" → {"recorrencia": {...}, "descricao": "tomar remédio"}.
+    Sem frase de recorrência → None. Sem hora (exceto "a cada N horas"), a regra
+    vem sem "hora" e quem chama completa.
+    """
+    original = texto or ""
+    t = original.lower()
+    rec, span = None, None
+    m = _REC_HORAS.search(t)
+    if m:
+        rec, span = {"tipo": "horas", "n": int(m.group(1) or m.group(2))}, m.span()
+    if rec is None:
+        m = _REC_MENSAL.search(t)
+        if m:
+            rec, span = {"tipo": "mensal", "dia": int(m.group(1) or m.group(2))}, m.span()
+    if rec is None:
+        m = _REC_UTEIS.search(t)
+        if m:
+            rec, span = {"tipo": "uteis"}, m.span()
+    if rec is None:
+        m = _REC_SEMANAL.search(t)
+        if m:
+            trecho = m.group(0)
+            dias = [n for rx, n in _DIAS_RE if re.search(rx, trecho)]
+            rec, span = {"tipo": "semanal", "dias": dias}, m.span()
+    if rec is None:
+        m = _REC_DIARIA.search(t)
+        if m:
+            rec, span = {"tipo": "diaria"}, m.span()
+    if rec is None:
+        return None
+
+    resto = t[:span[0]] + " " * (span[1] - span[0]) + t[span[1]:]   # mantém as posições
+    hora, hspan = _hora_no_texto(resto)
+    if hora:
+        rec["hora"] = hora
+    desc = _GATILHOS.sub("", _sem_trechos(original, [span, hspan]))
+    desc = re.sub(r"\s+", " ", desc)
+    desc = re.sub(r"^(?:[,.:;-]|\b(?:de|pra|para|que|e)\b)\s*|\s*[,.:;-]$", "", desc.strip()).strip()
+    return {"recorrencia": rec, "descricao": desc}
+
+def primeira_ocorrencia(rec: dict, agora: datetime, inicio: Optional[datetime] = None) -> Optional[datetime]:
+    """Primeira ocorrência >= agora ("a cada N horas" começa em `inicio`, ou já)."""
+    if rec["tipo"] == "horas":
+        return proxima_ocorrencia(rec, agora - timedelta(minutes=1), inicio) if inicio else agora
+    return proxima_ocorrencia(rec, agora - timedelta(minutes=1))
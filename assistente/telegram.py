@@ -0,0 +1,300 @@
+"""
+Envio de mensagens pro Telegram (bot token + chat id nos segredos).
+
+enviar_telegram() não faz rede: grava a mensagem na fila (SQLite, sobrevive a
+restart) e acorda um worker em thread, que manda respeitando os limites do
+Telegram — ~1 msg/s por chat e um teto global —, junta rajadas pro mesmo chat
+(vários lembretes no mesmo minuto viram uma mensagem) e tenta de novo com
+backoff (usa o retry_after do 429). Um Telegram lento nunca segura o rerun.
+
+Cada usuário manda pro SEU chat (chat_do_usuario): settings["telegram_chat_id"],
+o próprio id pros usuários tg<id> do bot e, só pro usuário padrão, o
+TELEGRAM_CHAT_ID dos segredos. Usuário sem chat não manda nada.
+
+Vários processos podem ter worker ao mesmo tempo: cada lote é reivindicado
+numa transação (status 'enviando' + lease), então nada sai duplicado; lease
+vencida (worker morreu no meio) volta pra fila.
+"""
+import sqlite3
+import threading
+from bisect import insort
+import time
+from typing import Optional
+
+from .config import (
+    TELEGRAM_AGRUPAR_S, TELEGRAM_BACKOFF_MAX_S, TELEGRAM_CHAT_INTERVALO_S, TELEGRAM_FILA_DB,
+    TELEGRAM_GLOBAL_POR_S, TELEGRAM_MAX_TENTATIVAS, USER_DEFAULT,
+)
+from . import aio, usuario
+from .conexoes import get_secret
+from .perf import timed
+from .storage import load_settings
+
+TELEGRAM_MAX_CHARS = 4096
+LEASE_S = 60
+FILA_RETENCAO_S = 7 * 86400
+
+_tabela_pronta = False
+_ultimo_envio_chat: dict = {}
+_reservas_global: list = []   # horários de envio já reservados (ordenados), pro teto global
+_envio_lock = threading.Lock()
+_acordar = threading.Event()
+_worker: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+
+
+# =========================
+# FILA (SQLite)
+# =========================
+def _db():
+    global _tabela_pronta
+    conn = sqlite3.connect(TELEGRAM_FILA_DB, timeout=10, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    if not _tabela_pronta:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS telegram_fila (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id TEXT NOT NULL,
+            texto TEXT NOT NULL,
+            parse_mode TEXT,
+            criada REAL NOT NULL,
+            proxima REAL NOT NULL,
+            tentativas INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'pendente',
+            lease REAL,
+            erro TEXT
+        )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_telegram_fila_status ON telegram_fila(status, proxima)")
+        conn.execute("DELETE FROM telegram_fila WHERE status = 'enviada' AND criada < ?",
+                     (time.time() - FILA_RETENCAO_S,))
+        _tabela_pronta = True
+    return conn
+
+def chat_do_usuario(settings: Optional[dict] = None) -> Optional[str]:
+    """Chat do Telegram do usuário atual, ou None (aí a mensagem não sai)."""
+    if settings is None:
+        settings = load_settings()
+    cid = str((settings or {}).get("telegram_chat_id") or "").strip()
+    if cid:
+        return cid
+    uid = usuario.atual()
+    if uid.startswith("tg") and uid[2:].lstrip("-").isdigit():
+        return uid[2:]
+    if uid == USER_DEFAULT:
+        return get_secret("TELEGRAM_CHAT_ID") or None
+    return None
+
+def enfileirar(mensagem: str, chat_id: Optional[str], parse_mode: Optional[str] = "Markdown") -> Optional[int]:
+    """Grava na fila e devolve o id (None se não tem chat/banco). Não acorda o worker."""
+    if not chat_id or not mensagem:
+        return None
+    agora = time.time()
+    try:
+        conn = _db()
+        cur = conn.execute(
+            "INSERT INTO telegram_fila(chat_id, texto, parse_mode, criada, proxima) VALUES (?,?,?,?,?)",
+            (str(chat_id), mensagem, parse_mode, agora, agora + TELEGRAM_AGRUPAR_S)
+        )
+        conn.close()
+        return cur.lastrowid
+    except Exception:
+        return None
+
+def enviar_telegram(mensagem: str, chat_id: Optional[str] = None) -> None:
+    """Enfileira e volta na hora; o worker manda em segundo plano. Sem chat_id: o do usuário atual."""
+    if not get_secret("TELEGRAM_TOKEN"):
+        return
+    chat_id = chat_id or chat_do_usuario()
+    if not chat_id or not mensagem:
+        return  # usuário sem chat configurado: não cai no chat de ninguém
+    if enfileirar(mensagem, chat_id) is None:
+        # sem fila (disco/banco com problema): manda direto, como era antes
+        _enviar_agora(get_secret("TELEGRAM_TOKEN"), str(chat_id), mensagem, "Markdown")
+        return
+    iniciar_worker()
+    _acordar.set()
+
+def responder(chat_id: str, texto: str, reply_to: Optional[int] = None) -> bool:
+    """Resposta de conversa (bot): sai na hora, na thread da mensagem, respeitando os limites.
+    Se falhar, cai na fila (sem o reply) pra não perder. True = saiu agora."""
+    token = get_secret("TELEGRAM_TOKEN")
+    if not token or not texto:
+        return False
+    _esperar_vez(str(chat_id))
+    ok, _, permanente, _ = _enviar_agora(token, str(chat_id), texto, "Markdown", reply_to)
+    if not ok and not permanente:
+        enviar_telegram(texto, chat_id=str(chat_id))
+    return ok
+
+def fila_status() -> dict:
+    """{status: quantidade} — pendente / enviando / enviada / falhou."""
+    try:
+        conn = _db()
+        rows = conn.execute("SELECT status, COUNT(*) FROM telegram_fila GROUP BY status").fetchall()
+        conn.close()
+        return dict(rows)
+    except Exception:
+        return {}
+
+
+# =========================
+# ENVIO
+# =========================
+@timed("ext:telegram")
+async def _enviar_agora_async(token: str, chat_id: str, texto: str, parse_mode: Optional[str], reply_to: Optional[int] = None) -> tuple:
+    """Um sendMessage. Devolve (ok, retry_after_s | None, permanente, erro)."""
+    url = f"https://api.telegram.org/bot{token}/sendMessage"
+    data = {"chat_id": chat_id, "text": texto[:TELEGRAM_MAX_CHARS]}
+    if parse_mode:
+        data["parse_mode"] = parse_mode
+    if reply_to:
+        data["reply_to_message_id"] = reply_to
+        data["allow_sending_without_reply"] = True
+    try:
+        r = await aio.post(url, data=data, timeout=10)
+    except Exception as e:
+        return False, None, False, f"{type(e).__name__}: {e}"[:200]
+    if r.status_code == 200:
+        return True, None, False, ""
+    try:
+        j = r.json()
+    except Exception:
+        j = {}
+    desc = str(j.get("description") or r.status_code)[:200]
+    if r.status_code == 429:
+        return False, float((j.get("parameters") or {}).get("retry_after") or 1), False, desc
+    if r.status_code == 400 and parse_mode and "parse" in desc.lower():
+        # Markdown quebrado (ex.: "_" num nome): manda como texto puro
+        return await _enviar_agora_async(token, chat_id, texto, None, reply_to)
+    return False, None, 400 <= r.status_code < 500, desc
+
+def _enviar_agora(token: str, chat_id: str, texto: str, parse_mode: Optional[str], reply_to: Optional[int] = None) -> tuple:
+    return aio.rodar(_enviar_agora_async(token, chat_id, texto, parse_mode, reply_to))
+
+def _vaga_global(t: float) -> float:
+    """Primeiro horário >= t a pelo menos 1/TELEGRAM_GLOBAL_POR_S de toda reserva."""
+    passo = 1.0 / TELEGRAM_GLOBAL_POR_S
+    for r in _reservas_global:
+        if r <= t - passo:
+            continue
+        if r >= t + passo:
+            break
+        t = r + passo
+    return t
+
+def _esperar_vez(chat_id: str) -> None:
+    """Segura até poder mandar pra esse chat sem estourar os limites (por chat e global)."""
+    with _envio_lock:
+        # reserva o horário e solta o lock: quem espera a vez de um chat não trava os outros
+        agora = time.monotonic()
+        t = _vaga_global(max(agora, _ultimo_envio_chat.get(chat_id, 0.0) + TELEGRAM_CHAT_INTERVALO_S))
+        _ultimo_envio_chat[chat_id] = t
+        del _reservas_global[:sum(1 for r in _reservas_global if r < agora - 1.0)]
+        insort(_reservas_global, t)
+    espera = t - time.monotonic()
+    if espera > 0:
+        time.sleep(espera)
+
+def _agrupar(rows: list) -> list:
+    """Linhas (id, chat_id, texto, parse_mode, tentativas) → lotes [(chat_id, parse_mode, [ids], texto)], um por chat."""
+    lotes, cheios = {}, set()
+    for rid, chat_id, texto, parse_mode, _ in rows:
+        lote = lotes.get(chat_id)
+        if lote is None:
+            lotes[chat_id] = (chat_id, parse_mode, [rid], [texto])
+            continue
+        _, pm, ids, textos = lote
+        if chat_id in cheios or pm != parse_mode or sum(len(x) + 2 for x in textos) + len(texto) > TELEGRAM_MAX_CHARS:
+            cheios.add(chat_id)  # o resto desse chat fica pro próximo lote (mantém a ordem)
+            continue
+        ids.append(rid)
+        textos.append(texto)
+    return [(c, pm, ids, "\n\n".join(textos)) for c, pm, ids, textos in lotes.values()]
+
+def processar_fila() -> int:
+    """Uma passada: reivindica um lote por chat, manda, marca. Devolve quantas mensagens saíram."""
+    token = get_secret("TELEGRAM_TOKEN")
+    if not token:
+        return 0
+    agora = time.time()
+    try:
+        conn = _db()
+        conn.execute("BEGIN IMMEDIATE")
+        rows = conn.execute(
+            "SELECT id, chat_id, texto, parse_mode, tentativas FROM telegram_fila "
+            "WHERE (status = 'pendente' AND proxima <= ?) OR (status = 'enviando' AND lease < ?) "
+            "ORDER BY id LIMIT 500", (agora, agora)
+        ).fetchall()
+        lotes = _agrupar(rows)
+        tentativas = {r[0]: r[4] for r in rows}
+        for _, _, ids, _ in lotes:
+            conn.executemany("UPDATE telegram_fila SET status = 'enviando', lease = ? WHERE id = ?",
+                             [(agora + LEASE_S, i) for i in ids])
+        conn.execute("COMMIT")
+    except Exception:
+        return 0
+
+    enviadas = 0
+    for chat_id, parse_mode, ids, texto in lotes:
+        _esperar_vez(chat_id)
+        ok, retry_after, permanente, erro = _enviar_agora(token, chat_id, texto, parse_mode)
+        try:
+            if ok:
+                conn.executemany("UPDATE telegram_fila SET status = 'enviada', lease = NULL, erro = NULL WHERE id = ?",
+                                 [(i,) for i in ids])
+                enviadas += len(ids)
+                continue
+            t = max(tentativas.get(i, 0) for i in ids) + 1
+            espera = retry_after if retry_after is not None else min(TELEGRAM_BACKOFF_MAX_S, 2 ** t)
+            status = "falhou" if permanente or t >= TELEGRAM_MAX_TENTATIVAS else "pendente"
+            conn.executemany(
+                "UPDATE telegram_fila SET status = ?, tentativas = ?, proxima = ?, lease = NULL, erro = ? WHERE id = ?",
+                [(status, t, time.time() + espera, erro, i) for i in ids]  # o lote volta junto
+            )
+        except Exception:
+            pass  # lease vence e o lote volta pra fila
+    conn.close()
+    return enviadas
+
+def _proxima_espera() -> float:
+    try:
+        conn = _db()
+        prox = conn.execute("SELECT MIN(proxima) FROM telegram_fila WHERE status = 'pendente'").fetchone()[0]
+        conn.close()
+    except Exception:
+        return 5.0
+    if prox is None:
+        return 30.0  # nada na fila: acorda de vez em quando (outro processo pode ter enfileirado)
+    return min(30.0, max(0.2, prox - time.time()))
+
+
+# =========================
+# WORKER (thread daemon, um por processo)
+# =========================
+def _loop() -> None:
+    while True:
+        try:
+            processar_fila()
+        except Exception:
+            pass
+        _acordar.wait(timeout=_proxima_espera())
+        _acordar.clear()
+
+def iniciar_worker() -> None:
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_loop, name="telegram-fila", daemon=True)
+            _worker.start()
+
+def drenar(timeout: float = 30.0) -> bool:
+    """Scripts: processa até esvaziar os pendentes (ou estourar o timeout). True = fila vazia."""
+    fim = time.time() + timeout
+    while time.time() < fim:
+        processar_fila()
+        st = fila_status()
+        if not st.get("pendente") and not st.get("enviando"):
+            return True
+        time.sleep(min(0.2, max(0.0, fim - time.time())))
+    return False
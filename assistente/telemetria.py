@@ -0,0 +1,261 @@
+"""
+Telemetria das chamadas ao Groq: uma linha por chamada em `llm_calls`
+(tempo total, TTFT, tokens, modelo, resultado) por ponto de chamada.
+
+Uso:
+    with llm_call("router_llm", MODEL_ID) as call:
+        resp = call.done(get_groq().chat.completions.create(...))
+        data = json.loads(...)        # erro aqui vira "parse-failure"
+
+Resultados: ok | timeout | 429 | parse-failure | error.
+TTFT: medido de verdade no streaming (call.stream_text_async); nas chamadas sem
+streaming usa o queue_time + prompt_time que o Groq devolve no usage.
+A view `llm_daily` soma chamadas/tokens/erros por dia e ponto de chamada;
+p50/p95 saem de llm_stats() (SQLite não tem percentil).
+"""
+import sqlite3
+import time
+from datetime import timedelta
+from typing import Optional
+
+from .config import DB_PATH
+from .tempo import now_br
+from .usuario import caminho
+
+LLM_MAX_ROWS = 50_000         # janela rolante (chamadas)
+LLM_STATS_DAYS = 7            # janela do p50/p95
+
+_PARSE_ERRORS = (ValueError, KeyError, TypeError, IndexError, AttributeError)
+_tabelas_prontas: set = set()   # por arquivo (cada usuário tem o seu banco)
+
+
+def _classificar_erro(e: BaseException) -> str:
+    nome = type(e).__name__
+    status = getattr(e, "status_code", None) or getattr(getattr(e, "response", None), "status_code", None)
+    if status == 429 or nome == "RateLimitError":
+        return "429"
+    if "Timeout" in nome or isinstance(e, TimeoutError):
+        return "timeout"
+    return "error"
+
+def _usage(resp) -> dict:
+    """Tokens e tempos do servidor (campos do Groq; ausentes viram None)."""
+    u = getattr(resp, "usage", None)
+    if u is None:
+        u = getattr(getattr(resp, "x_groq", None), "usage", None)
+    if u is None:
+        return {}
+    get = (lambda k: u.get(k)) if isinstance(u, dict) else (lambda k: getattr(u, k, None))
+    out = {"prompt_tokens": get("prompt_tokens"), "completion_tokens": get("completion_tokens")}
+    q, p = get("queue_time"), get("prompt_time")
+    if q is not None or p is not None:
+        out["server_ttft_ms"] = ((q or 0) + (p or 0)) * 1000
+    return out
+
+
+class LLMCall:
+    """Context manager de uma chamada; grava a linha no __exit__ (nunca engole a exceção)."""
+
+    def __init__(self, site: str, model: str = ""):
+        self.site = site
+        self.model = model
+        self.outcome = "ok"
+        self.error = ""
+        self.ms = None
+        self.ttft_ms = None
+        self.prompt_tokens = None
+        self.completion_tokens = None
+        self.responded = False
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def _elapsed(self) -> float:
+        return (time.perf_counter() - self.t0) * 1000
+
+    def done(self, resp):
+        """Marca a resposta recebida (fecha o relógio) e lê o usage. Devolve a própria resposta."""
+        self.ms = self._elapsed()
+        self.responded = True
+        u = _usage(resp)
+        self.prompt_tokens = u.get("prompt_tokens")
+        self.completion_tokens = u.get("completion_tokens")
+        if self.ttft_ms is None:
+            self.ttft_ms = u.get("server_ttft_ms")
+        self.model = getattr(resp, "model", None) or self.model
+        return resp
+
+    async def stream_text_async(self, chunks) -> str:
+        """Consome o stream (gerador assíncrono, ex.: aio.groq_chat_stream), mede o primeiro token e devolve o texto completo."""
+        partes = []
+        last = None
+        async for chunk in chunks:
+            last = chunk
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                if self.ttft_ms is None:
+                    self.ttft_ms = self._elapsed()
+                partes.append(delta)
+        if last is not None:
+            self.done(last)
+        else:
+            self.ms = self._elapsed()
+            self.responded = True
+        return "".join(partes)
+
+    def parse_failed(self, motivo: str = "") -> None:
+        """Resposta veio, mas não deu pra usar (JSON inválido, campo faltando...)."""
+        self.outcome = "parse-failure"
+        self.error = motivo[:200]
+
+    def __exit__(self, et, e, tb):
+        if self.ms is None:
+            self.ms = self._elapsed()
+        if e is not None:
+            if self.responded and isinstance(e, _PARSE_ERRORS):
+                self.outcome = "parse-failure"
+            elif not self.responded:
+                self.outcome = _classificar_erro(e)
+            else:
+                self.outcome = "error"
+            self.error = f"{type(e).__name__}: {e}"[:200]
+        save_call(self)
+        return False
+
+
+def llm_call(site: str, model: str = "") -> LLMCall:
+    return LLMCall(site, model)
+
+
+# =========================
+# STORAGE
+# =========================
+def _db():
+    path = caminho(DB_PATH)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    if path not in _tabelas_prontas:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS llm_calls (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts TEXT NOT NULL,
+            site TEXT NOT NULL,
+            model TEXT,
+            ms REAL NOT NULL,
+            ttft_ms REAL,
+            prompt_tokens INTEGER,
+            completion_tokens INTEGER,
+            outcome TEXT NOT NULL,
+            error TEXT
+        )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_calls_ts ON llm_calls(ts)")
+        conn.execute("""
+        CREATE VIEW IF NOT EXISTS llm_daily AS
+        SELECT substr(ts, 1, 10) AS dia,
+               site,
+               COUNT(*) AS chamadas,
+               SUM(outcome != 'ok') AS falhas,
+               SUM(outcome = '429') AS rate_limited,
+               COALESCE(SUM(prompt_tokens), 0) AS prompt_tokens,
+               COALESCE(SUM(completion_tokens), 0) AS completion_tokens,
+               COALESCE(SUM(prompt_tokens), 0) + COALESCE(SUM(completion_tokens), 0) AS tokens,
+               AVG(ms) AS ms_medio
+        FROM llm_calls
+        GROUP BY dia, site
+        """)
+        conn.commit()
+        _tabelas_prontas.add(path)
+    return conn
+
+def save_call(call: LLMCall) -> None:
+    try:
+        conn = _db()
+        conn.execute(
+            "INSERT INTO llm_calls(ts, site, model, ms, ttft_ms, prompt_tokens, completion_tokens, outcome, error) "
+            "VALUES (?,?,?,?,?,?,?,?,?)",
+            (now_br().strftime("%Y-%m-%d %H:%M:%S"), call.site, call.model, call.ms, call.ttft_ms,
+             call.prompt_tokens, call.completion_tokens, call.outcome, call.error or None)
+        )
+        conn.execute(
+            "DELETE FROM llm_calls WHERE id <= (SELECT MAX(id) FROM llm_calls) - ?",
+            (LLM_MAX_ROWS,)
+        )
+        conn.commit()
+        conn.close()
+    except Exception:
+        pass
+
+def _pct(sorted_vals: list, q: float) -> Optional[float]:
+    if not sorted_vals:
+        return None
+    return sorted_vals[min(len(sorted_vals) - 1, int(len(sorted_vals) * q))]
+
+def llm_stats(days: int = LLM_STATS_DAYS) -> list:
+    """[{site, n, p50, p95, ttft_p50, tokens, falhas:{outcome: n}}] dos últimos `days` dias, mais lentos primeiro."""
+    try:
+        desde_s = (now_br() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        conn = _db()
+        rows = conn.execute(
+            "SELECT site, ms, ttft_ms, COALESCE(prompt_tokens, 0) + COALESCE(completion_tokens, 0), outcome "
+            "FROM llm_calls WHERE ts >= ?", (desde_s,)
+        ).fetchall()
+        conn.close()
+    except Exception:
+        return []
+    by_site = {}
+    for site, ms, ttft, tokens, outcome in rows:
+        s = by_site.setdefault(site, {"ms": [], "ttft": [], "tokens": 0, "falhas": {}})
+        if outcome == "ok":
+            s["ms"].append(ms)
+            if ttft is not None:
+                s["ttft"].append(ttft)
+        else:
+            s["falhas"][outcome] = s["falhas"].get(outcome, 0) + 1
+        s["tokens"] += tokens
+    out = []
+    for site, s in by_site.items():
+        s["ms"].sort()
+        s["ttft"].sort()
+        out.append({
+            "site": site,
+            "n": len(s["ms"]) + sum(s["falhas"].values()),
+            "p50": _pct(s["ms"], 0.5),
+            "p95": _pct(s["ms"], 0.95),
+            "ttft_p50": _pct(s["ttft"], 0.5),
+            "tokens": s["tokens"],
+            "falhas": s["falhas"],
+        })
+    out.sort(key=lambda r: r["p95"] or 0, reverse=True)
+    return out
+
+def llm_daily(days: int = LLM_STATS_DAYS) -> list:
+    """Gasto de tokens por dia (todas as chamadas): [(dia, chamadas, falhas, tokens)]."""
+    try:
+        conn = _db()
+        rows = conn.execute(
+            "SELECT dia, SUM(chamadas), SUM(falhas), SUM(tokens) FROM llm_daily "
+            "GROUP BY dia ORDER BY dia DESC LIMIT ?", (days,)
+        ).fetchall()
+        conn.close()
+        return rows
+    except Exception:
+        return []
+
+def format_llm_stats(stats: list, daily: Optional[list] = None) -> str:
+    """Tabela markdown por ponto de chamada + tokens por dia (sidebar e /stats)."""
+    if not stats:
+        return "Sem chamadas ao LLM registradas ainda."
+    fmt = lambda v: "—" if v is None else f"{v:.0f}ms"
+    lines = ["| chamada | n | p50 | p95 | TTFT p50 | tokens | falhas |", "|---|---:|---:|---:|---:|---:|---|"]
+    for r in stats:
+        falhas = ", ".join(f"{k}: {v}" for k, v in sorted(r["falhas"].items())) or "—"
+        lines.append(
+            f"| `{r['site']}` | {r['n']} | {fmt(r['p50'])} | {fmt(r['p95'])} | {fmt(r['ttft_p50'])} "
+            f"| {r['tokens']} | {falhas} |"
+        )
+    if daily:
+        lines.append("")
+        lines.append("Tokens por dia: " + " • ".join(f"{dia}: {tok or 0} ({n} chamadas)" for dia, n, _, tok in daily))
+    return "\n".join(lines)
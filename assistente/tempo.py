@@ -0,0 +1,45 @@
+"""Utilitários de data/hora (fuso de Brasília, HH:MM, horário silencioso)."""
+import re
+from datetime import datetime
+from typing import Optional
+
+from .config import FUSO_BR, QUIET_START, QUIET_END
+
+
+def now_br() -> datetime:
+    return datetime.now(FUSO_BR)
+
+def now_floor_minute() -> datetime:
+    a = now_br()
+    return a.replace(second=0, microsecond=0)
+
+def format_dt(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%d %H:%M")
+
+def parse_dt(s: str) -> datetime:
+    return datetime.strptime(s, "%Y-%m-%d %H:%M").replace(tzinfo=FUSO_BR)
+
+def em_horario_silencioso(agora: datetime) -> bool:
+    h = agora.hour
+    return (h >= QUIET_START) or (h < QUIET_END)
+
+def parse_hhmm(hhmm: str) -> Optional[tuple]:
+    try:
+        hhmm = (hhmm or "").strip()
+        m = re.match(r"^(\d{1,2}):(\d{2})$", hhmm)
+        if not m:
+            return None
+        h = max(0, min(23, int(m.group(1))))
+        mi = max(0, min(59, int(m.group(2))))
+        return (h, mi)
+    except Exception:
+        return None
+
+def same_minute(dt: datetime, hhmm: str) -> bool:
+    p = parse_hhmm(hhmm)
+    if not p:
+        return False
+    return dt.hour == p[0] and dt.minute == p[1]
+
+def today_key(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%d")
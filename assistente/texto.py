@@ -0,0 +1,8 @@
+"""Normalização de texto compartilhada (intenções, memória, parser)."""
+import re
+
+
+def limpar_texto(s: str) -> str:
+    s = (s or "").lower()
+    s = re.sub(r"[^a-z0-9áàâãéèêíìîóòôõúùûç\s]", " ", s)
+    return re.sub(r"\s+", " ", s).strip()
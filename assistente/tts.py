@@ -0,0 +1,19 @@
+"""Texto -> fala (edge-tts)."""
+import asyncio
+import os
+import uuid
+
+from .perf import timed
+
+
+@timed("ext:edge-tts")
+def falar_bytes(texto: str):
+    try:
+        import edge_tts
+        out = f"tts_{uuid.uuid4().hex[:5]}.mp3"
+        asyncio.run(edge_tts.Communicate(texto, "pt-BR-FranciscaNeural").save(out))
+        b = open(out, "rb").read()
+        os.remove(out)
+        return b
+    except Exception:
+        return None
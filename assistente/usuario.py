@@ -0,0 +1,116 @@
+"""
+Identidade do usuário e armazenamento separado por usuário.
+
+Cada usuário tem um diretório próprio (USERS_DIR/<id>/) com tudo dele: tarefas,
+chat, resumo, settings, estado diário, avatar, SQLite da memória (com perf e
+telemetria) e índice semântico. Nada é compartilhado entre usuários, então não
+existe lock em arquivo comum. O usuário padrão continua usando o cwd, que é onde
+os dados ficavam antes (instalações de um usuário só não mudam nada).
+
+O usuário atual fica num ContextVar: o app define no topo de cada rerun, e o
+bot/API usam `with como(uid):` por mensagem/requisição.
+
+No app, fora do login do Streamlit, um usuário só é aberto por link assinado
+(?u=<id>&t=<token>, token = HMAC do id com ZOE_USER_SECRET). Gerar o link:
+    python -m assistente.usuario <id>
+"""
+import contextvars
+import hashlib
+import hmac
+import os
+import re
+import sys
+from contextlib import contextmanager
+
+from .config import USER_DEFAULT, USERS_DIR
+from .conexoes import get_secret
+
+_atual: contextvars.ContextVar = contextvars.ContextVar("usuario_atual", default=USER_DEFAULT)
+_dirs_prontos: set = set()
+
+
+def normalizar_id(raw) -> str:
+    """Id seguro pra caminho: [a-z0-9_-], até 48 chars (+ hash curto se precisou cortar/trocar algo)."""
+    s = str(raw or "").strip().lower()
+    if not s:
+        return USER_DEFAULT
+    slug = re.sub(r"[^a-z0-9_-]+", "_", s).strip("_")[:48]
+    if slug != s:
+        slug = f"{slug}_{hashlib.sha1(s.encode('utf-8')).hexdigest()[:6]}".strip("_")
+    return slug or USER_DEFAULT
+
+def definir(uid) -> str:
+    """Define o usuário do contexto atual (rerun do app). Devolve o id normalizado."""
+    u = normalizar_id(uid)
+    _atual.set(u)
+    return u
+
+def atual() -> str:
+    return _atual.get()
+
+@contextmanager
+def como(uid):
+    """Executa um bloco como outro usuário (bot, API, scripts)."""
+    token = _atual.set(normalizar_id(uid))
+    try:
+        yield
+    finally:
+        _atual.reset(token)
+
+def diretorio(uid: str = None) -> str:
+    u = uid or atual()
+    if u == USER_DEFAULT:
+        return "."
+    d = os.path.join(USERS_DIR, u)
+    if d not in _dirs_prontos:
+        os.makedirs(d, exist_ok=True)
+        _dirs_prontos.add(d)
+    return d
+
+def caminho(nome: str) -> str:
+    """Caminho do arquivo `nome` no diretório do usuário atual (absolutos passam direto)."""
+    if os.path.isabs(nome):
+        return nome
+    d = diretorio()
+    return nome if d == "." else os.path.join(d, nome)
+
+def listar() -> list:
+    """Ids com diretório próprio (+ o padrão)."""
+    out = [USER_DEFAULT]
+    try:
+        out += sorted(n for n in os.listdir(USERS_DIR) if os.path.isdir(os.path.join(USERS_DIR, n)))
+    except OSError:
+        pass
+    return out
+
+
+# =========================
+# LINK ASSINADO (app sem login)
+# =========================
+def token_link(uid) -> str:
+    """Token do link de um usuário (HMAC do id com ZOE_USER_SECRET); "" se o segredo não existe."""
+    segredo = get_secret("ZOE_USER_SECRET")
+    if not segredo:
+        return ""
+    return hmac.new(str(segredo).encode("utf-8"), normalizar_id(uid).encode("utf-8"), hashlib.sha256).hexdigest()[:32]
+
+def link_confere(uid, token) -> bool:
+    esperado = token_link(uid)
+    return bool(esperado) and hmac.compare_digest(esperado.encode("utf-8"), str(token or "").encode("utf-8"))
+
+
+def main(argv=None) -> int:
+    args = sys.argv[1:] if argv is None else argv
+    if len(args) != 1:
+        print("uso: python -m assistente.usuario <id>", file=sys.stderr)
+        return 2
+    t = token_link(args[0])
+    if not t:
+        print("ZOE_USER_SECRET ausente", file=sys.stderr)
+        return 1
+    print(f"?u={normalizar_id(args[0])}&t={t}", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Busca na web via Tavily e formatação das respostas com fontes."""
+from . import aio
+from .perf import timed
+
+
+@timed("ext:tavily")
+async def buscar_tavily_async(q: str, max_results: int = 5):
+    """Busca via Tavily e devolve uma lista de fontes (title/url/content)."""
+    q = (q or "").strip()
+    if not q:
+        return []
+    try:
+        r = await aio.tavily_search(q, int(max_results))
+        results = r.get("results", []) or []
+        cleaned = []
+        for it in results:
+            if not isinstance(it, dict):
+                continue
+            title = (it.get("title") or "").strip()
+            url = (it.get("url") or "").strip()
+            content = (it.get("content") or "").strip()
+            if not content and it.get("snippet"):
+                content = str(it.get("snippet") or "").strip()
+            if not (title or url or content):
+                continue
+            cleaned.append({"title": title, "url": url, "content": content})
+        return cleaned
+    except Exception:
+        return []
+
+def buscar_tavily(q: str, max_results: int = 5):
+    return aio.rodar(buscar_tavily_async(q, max_results))
+
+def _format_tavily_sources(results: list, limit: int = 5) -> str:
+    """Formata as fontes de forma legível e rastreável (com URL)."""
+    out = []
+    try:
+        lim = max(1, int(limit))
+    except Exception:
+        lim = 5
+
+    for i, it in enumerate((results or [])[:lim], start=1):
+        if not isinstance(it, dict):
+            continue
+        title = (it.get("title") or "Fonte").strip()
+        url = (it.get("url") or "").strip()
+        content = (it.get("content") or "").strip()
+
+        # deixa o trecho curto (evita prompt gigante)
+        if len(content) > 650:
+            content = content[:650] + "…"
+
+        if url:
+            out.append(f"[{i}] {title}\nURL: {url}\nTrecho: {content}")
+        else:
+            out.append(f"[{i}] {title}\nTrecho: {content}")
+
+    return "\n\n".join(out).strip()
+
+def _render_web_json(data: dict) -> str:
+    """Transforma o JSON do LLM em texto final (com fontes)."""
+    data = data if isinstance(data, dict) else {}
+    ans = (data.get("answer") or "").strip()
+    used = data.get("used_sources") or []
+    conf = data.get("confidence")
+    missing = data.get("missing") or []
+
+    # fallback seguro
+    if not ans:
+        ans = "Achei alguns resultados, mas não ficou confiável o suficiente pra eu cravar 😅"
+
+    lines = [ans]
+
+    # se ficou incerto, deixa explícito (sem drama)
+    try:
+        if isinstance(conf, (int, float)) and float(conf) < 55:
+            lines.append("\n⚠️ *Tô com confiança baixa porque as fontes vieram fracas/contraditórias.*")
+    except Exception:
+        pass
+
+    if missing:
+        # 1-2 itens só, pra não virar textão
+        miss = "; ".join([str(x) for x in missing[:2] if str(x).strip()])
+        if miss:
+            lines.append(f"\n🧩 Faltou nas fontes: {miss}")
+
+    # fontes
+    cleaned = []
+    for it in used[:3]:
+        if not isinstance(it, dict):
+            continue
+        title = (it.get("title") or "Fonte").strip()
+        url = (it.get("url") or "").strip()
+        if url:
+            cleaned.append(f"- [{title}]({url})")
+    if cleaned:
+        lines.append("\n**Fontes:**\n" + "\n".join(cleaned))
+
+    return "\n".join(lines).strip()
@@ -0,0 +1 @@
+"""Benchmarks das funções quentes do pacote assistente (corpora sintéticos, sem rede)."""
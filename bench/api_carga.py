@@ -0,0 +1,133 @@
+"""
+Carga na API HTTP: sobe o servidor (assistente/api.py) numa porta livre,
+num diretório temporário, e dispara requisições concorrentes — turnos que
+não precisam de rede (hora/data/memória) + CRUD de tarefas — com uma conexão
+keep-alive por cliente. Sai com req/s e p50/p95 por rota. O servidor próprio
+sobe com um ZOE_API_TOKEN descartável (sem token a API ignora o X-Usuario);
+com --url, usa o ZOE_API_TOKEN do ambiente, se houver.
+
+Uso (na raiz do repo; `python bench/api_carga.py ...` também funciona):
+    python -m bench.api_carga                          # 16 clientes × 50 requisições
+    python -m bench.api_carga --clientes 64 --requisicoes 100 --usuarios 8
+    python -m bench.api_carga --url http://127.0.0.1:8787   # servidor já rodando
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import secrets
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlparse
+
+if not __package__:  # rodando como script (python bench/x.py): a raiz do repo entra no path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assistente import api
+from assistente.tempo import format_dt, now_floor_minute
+
+TURNOS = ["que horas são?", "que dia é hoje?", "o que eu te perguntei?"]
+
+
+def cliente(host: str, porta: int, n: int, uid: str, seed: int, token: str = "") -> list:
+    """Devolve [(rota, ms, status)]."""
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection(host, porta, timeout=30)
+    ids, out = [], []
+
+    def req(metodo: str, path: str, corpo=None, rota: str = ""):
+        b = json.dumps(corpo).encode("utf-8") if corpo is not None else None
+        headers = {"Content-Type": "application/json", "X-Usuario": uid}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        t0 = time.perf_counter()
+        try:
+            conn.request(metodo, path, body=b, headers=headers)
+            r = conn.getresponse()
+            data = json.loads(r.read() or b"{}")
+            status = r.status
+        except Exception:
+            conn.close()
+            data, status = {}, 0
+        out.append((rota or f"{metodo} {path}", (time.perf_counter() - t0) * 1000, status))
+        return data
+
+    for _ in range(n):
+        x = rng.random()
+        if x < 0.5:
+            req("POST", "/turn", {"texto": rng.choice(TURNOS)}, "POST /turn")
+        elif x < 0.7 or not ids:
+            quando = format_dt(now_floor_minute() + timedelta(hours=rng.randint(1, 72)))
+            d = req("POST", "/tarefas", {"descricao": f"tarefa {rng.randint(0, 9999)}", "data_hora": quando})
+            if d.get("tarefa"):
+                ids.append(d["tarefa"]["id"])
+        elif x < 0.85:
+            req("GET", "/tarefas")
+        elif x < 0.95:
+            req("PATCH", f"/tarefas/{rng.choice(ids)}", {"descricao": "editada"}, "PATCH /tarefas/:id")
+        else:
+            req("DELETE", f"/tarefas/{ids.pop(rng.randrange(len(ids)))}", rota="DELETE /tarefas/:id")
+    conn.close()
+    return out
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--clientes", type=int, default=16)
+    ap.add_argument("--requisicoes", type=int, default=50, help="por cliente")
+    ap.add_argument("--usuarios", type=int, default=4, help="clientes são espalhados entre N usuários")
+    ap.add_argument("--url", help="usa um servidor já rodando em vez de subir um")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    cwd = os.getcwd()
+    token_antes = os.environ.get("ZOE_API_TOKEN")
+    token = token_antes or ("" if args.url else secrets.token_hex(16))
+    with tempfile.TemporaryDirectory(prefix="zoe-api-") as tmp:
+        srv = None
+        if args.url:
+            u = urlparse(args.url)
+            host, porta = u.hostname, u.port or 80
+        else:
+            os.chdir(tmp)
+            os.environ["ZOE_API_TOKEN"] = token
+            srv = api.servidor("127.0.0.1", 0)
+            host, porta = srv.server_address[:2]
+            threading.Thread(target=srv.serve_forever, daemon=True).start()
+        try:
+            print(f"{args.clientes} clientes × {args.requisicoes} requisições, {args.usuarios} usuários "
+                  f"→ http://{host}:{porta}", flush=True)
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.clientes) as ex:
+                futs = [ex.submit(cliente, host, porta, args.requisicoes, f"carga{i % args.usuarios}", args.seed + i, token)
+                        for i in range(args.clientes)]
+                res = [r for f in futs for r in f.result()]
+            total_s = time.perf_counter() - t0
+        finally:
+            if srv is not None:
+                srv.shutdown()
+                srv.server_close()
+            os.chdir(cwd)
+            if token_antes is None:
+                os.environ.pop("ZOE_API_TOKEN", None)
+
+    por_rota = {}
+    for rota, ms, status in res:
+        r = por_rota.setdefault(rota, {"ms": [], "erros": 0})
+        r["ms"].append(ms)
+        r["erros"] += 0 if 200 <= status < 300 else 1
+    print(f"total: {len(res)} req em {total_s:.2f}s = {len(res) / total_s:.0f} req/s", flush=True)
+    for rota, r in sorted(por_rota.items()):
+        ms = sorted(r["ms"])
+        print(f"  {rota:<22} n={len(ms):>5}  p50={ms[len(ms) // 2]:>7.1f}ms  "
+              f"p95={ms[min(len(ms) - 1, int(len(ms) * 0.95))]:>7.1f}ms  erros={r['erros']}", flush=True)
+    return 1 if any(r["erros"] for r in por_rota.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
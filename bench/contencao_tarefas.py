@@ -0,0 +1,115 @@
+"""
+Contenção nas tarefas: N sessões (abas) ao mesmo tempo fazendo
+ler → alterar uma tarefa → gravar no mesmo tarefas.json.
+
+Cada sessão soma +1 no campo "contador" de uma tarefa sorteada, K vezes. No
+fim, a soma dos contadores tinha que ser N×K; o que faltar é atualização
+perdida (uma sessão sobrescreveu a outra). Roda duas vezes:
+    ingênuo  carregar_tarefas → muda → salvar_tarefas (como o app fazia)
+    cas      storage.atualizar_tarefas (compare-and-swap + reaplica no conflito)
+
+Uso (na raiz do repo; `python bench/contencao_tarefas.py ...` também funciona):
+    python -m bench.contencao_tarefas                      # 8 sessões × 50 escritas, threads
+    python -m bench.contencao_tarefas --sessoes 16 --escritas 100 --processos
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+if not __package__:  # rodando como script (python bench/x.py): a raiz do repo entra no path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assistente import storage
+from assistente.tempo import now_floor_minute
+
+from bench.corpora import gerar_tarefas
+
+
+def _somar(tid: str):
+    def mudanca(lista: list) -> list:
+        for t in lista:
+            if t.get("id") == tid:
+                t["contador"] = int(t.get("contador") or 0) + 1
+        return lista
+    return mudanca
+
+def sessao(modo: str, ids: list, escritas: int, seed: int, pasta: str) -> dict:
+    """Uma aba. Devolve {ok, erros, conflitos}."""
+    os.chdir(pasta)  # no modo processo cada worker começa no cwd do pai
+    rng = random.Random(seed)
+    ok = erros = conflitos = 0
+    for _ in range(escritas):
+        tid = rng.choice(ids)
+        if modo == "cas":
+            info = {}
+            _, erro = storage.atualizar_tarefas(_somar(tid), info=info)
+            conflitos += info.get("conflitos", 0)
+        else:
+            lista = _somar(tid)(storage.carregar_tarefas())
+            time.sleep(0)  # cede a vez, como um rerun faz entre ler e gravar
+            erro = storage.salvar_tarefas(lista)
+        if erro:
+            erros += 1
+        else:
+            ok += 1
+    return {"ok": ok, "erros": erros, "conflitos": conflitos}
+
+
+def rodar(modo: str, args, pasta: str) -> dict:
+    base = gerar_tarefas(args.tarefas, base=now_floor_minute())
+    for t in base:
+        t["contador"] = 0
+    storage.salvar_tarefas(base)
+    ids = [t["id"] for t in base]
+
+    Pool = ProcessPoolExecutor if args.processos else ThreadPoolExecutor
+    t0 = time.perf_counter()
+    with Pool(max_workers=args.sessoes) as ex:
+        futs = [ex.submit(sessao, modo, ids, args.escritas, args.seed + i, pasta) for i in range(args.sessoes)]
+        res = [f.result() for f in futs]
+    total_s = time.perf_counter() - t0
+
+    gravadas = sum(r["ok"] for r in res)
+    soma = sum(int(t.get("contador") or 0) for t in storage.carregar_tarefas())
+    r = {
+        "modo": modo,
+        "esperado": gravadas,
+        "obtido": soma,
+        "perdidas": gravadas - soma,
+        "erros": sum(r["erros"] for r in res),
+        "conflitos": sum(r["conflitos"] for r in res),
+        "escritas_s": gravadas / total_s if total_s else 0.0,
+    }
+    print(f"{modo:<8} esperado={r['esperado']:>6}  obtido={r['obtido']:>6}  perdidas={r['perdidas']:>6}  "
+          f"erros={r['erros']:>4}  conflitos={r['conflitos']:>6}  {r['escritas_s']:>8.1f} escritas/s", flush=True)
+    return r
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sessoes", type=int, default=8)
+    ap.add_argument("--escritas", type=int, default=50, help="escritas por sessão")
+    ap.add_argument("--tarefas", type=int, default=20)
+    ap.add_argument("--processos", action="store_true", help="uma sessão por processo (em vez de thread)")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="zoe-contencao-") as tmp:
+        os.chdir(tmp)
+        try:
+            print(f"{args.sessoes} sessões × {args.escritas} escritas em {args.tarefas} tarefas "
+                  f"({'processos' if args.processos else 'threads'})", flush=True)
+            rodar("ingenuo", args, tmp)
+            r_cas = rodar("cas", args, tmp)
+        finally:
+            os.chdir(cwd)
+    return 1 if r_cas["perdidas"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Corpora sintéticos e determinísticos (seed fixa) pros benchmarks:
+tarefas, eventos da memória longa e frases PT-BR típicas do chat.
+"""
+import random
+from datetime import datetime, timedelta
+
+from assistente.config import FUSO_BR
+from assistente.tempo import format_dt
+
+_ACOES = [
+    "pagar conta de luz", "ligar pro dentista", "reunião com o time", "buscar as crianças",
+    "tomar remédio", "mandar relatório", "comprar pão", "academia", "renovar CNH",
+    "pagar boleto do cartão", "aniversário da mãe", "levar o carro na revisão",
+    "responder e-mail do banco", "estudar inglês", "regar as plantas", "consulta médica",
+]
+_PALAVRAS = (
+    "casa carro trabalho reunião projeto mercado comida viagem praia livro filme série amigo "
+    "família dinheiro conta investimento fundo ações dividendos KNCR11 PETR4 Ilhéus Salvador "
+    "chuva sol calor academia corrida dieta médico remédio escola curso inglês python código "
+    "deploy servidor banco cartão boleto aluguel condomínio festa aniversário presente"
+).split()
+_KINDS = [
+    ("chat_user", 40), ("chat_assistant", 40), ("alert", 6), ("task_create", 4),
+    ("weather", 3), ("web_search", 3), ("briefing", 1), ("smart_reminder", 1),
+    ("daily_review", 1), ("finance_quote", 1),
+]
+_CIDADES = ["Ilhéus", "Salvador", "Itabuna", "São Paulo", "Rio de Janeiro", "Recife", "Curitiba"]
+_TICKERS = ["KNCR11", "PETR4", "VALE3", "MXRF11", "HGLG11", "ITUB4"]
+
+_MOLDES_FRASES = [
+    "vai chover amanhã em {cidade}?",
+    "como tá a previsão do tempo em {cidade}",
+    "qual a temperatura hoje",
+    "cotação {ticker} hoje",
+    "quanto tá o preço de {ticker}?",
+    "quando vou receber dividendos do {ticker}",
+    "o que é {ticker}?",
+    "me lembra de {acao} amanhã às {h}:{m:02d}",
+    "me lembra de {acao} daqui {n} min",
+    "{acao} {d}/{mes} {h}:{m:02d}",
+    "já fiz {acao}",
+    "marca como feito {acao}",
+    "/web notícias sobre {palavra}",
+    "/chat",
+    "que horas são?",
+    "que dia é hoje?",
+    "o que eu te perguntei mais cedo?",
+    "quem ganhou o jogo ontem",
+    "me explica {palavra} e/ou {palavra2}",
+    "tô pensando em {palavra}, o que você acha?",
+]
+
+
+def gerar_tarefas(n: int, base: datetime = None, seed: int = 1) -> list:
+    """n tarefas normalizadas, espalhadas de -3 a +30 dias em volta de `base`."""
+    rnd = random.Random(seed)
+    base = base or datetime.now(FUSO_BR).replace(second=0, microsecond=0)
+    out = []
+    for i in range(n):
+        dt = base + timedelta(minutes=rnd.randint(-3 * 1440, 30 * 1440))
+        status = "silenciada" if rnd.random() < 0.1 else "ativa"
+        out.append({
+            "id": f"{i:08x}",
+            "descricao": rnd.choice(_ACOES),
+            "data_hora": format_dt(dt),
+            "status": status,
+            "remind_count": 0,
+            "created_at": format_dt(base),
+            "next_remind_at": format_dt(dt),
+            "snoozed_until": None,
+        })
+    return out
+
+
+def gerar_eventos(n: int, dias: int = 365, seed: int = 2):
+    """Gera n tuplas (ts, kind, content, meta) cobrindo os últimos `dias` dias, em ordem de ts."""
+    rnd = random.Random(seed)
+    kinds = [k for k, _ in _KINDS]
+    pesos = [w for _, w in _KINDS]
+    fim = datetime.now(FUSO_BR)
+    passo = (dias * 86400) / max(1, n)
+    for i in range(n):
+        ts = fim - timedelta(seconds=(n - i) * passo)
+        kind = rnd.choices(kinds, pesos)[0]
+        content = " ".join(rnd.choice(_PALAVRAS) for _ in range(rnd.randint(4, 24)))
+        yield (ts.strftime("%Y-%m-%d %H:%M:%S"), kind, content, "")
+
+
+def gerar_frases(n: int, seed: int = 3) -> list:
+    """n frases de usuário PT-BR (clima, finanças, tarefas, slash, papo)."""
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        molde = rnd.choice(_MOLDES_FRASES)
+        out.append(molde.format(
+            cidade=rnd.choice(_CIDADES), ticker=rnd.choice(_TICKERS), acao=rnd.choice(_ACOES),
+            h=rnd.randint(6, 22), m=rnd.choice([0, 15, 30, 45]), n=rnd.randint(1, 90),
+            d=rnd.randint(1, 28), mes=rnd.randint(1, 12),
+            palavra=rnd.choice(_PALAVRAS), palavra2=rnd.choice(_PALAVRAS),
+        ))
+    return out
+
+
+def fake_weather_days(days: int = 2) -> dict:
+    """Payload no formato de fetch_weather_days (pra formatar sem rede)."""
+    hoje = datetime.now(FUSO_BR).date()
+    return {
+        "current": {"temp_now": 27.4, "wind": 12.0},
+        "dates": [(hoje + timedelta(days=i)).isoformat() for i in range(days)],
+        "temp_max": [31.2 + i for i in range(days)],
+        "temp_min": [22.1 + i for i in range(days)],
+        "rain_prob": [70 - 10 * i for i in range(days)],
+        "rain_sum": [4.3 + i for i in range(days)],
+    }
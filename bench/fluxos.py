@@ -0,0 +1,214 @@
+"""
+Fluxos completos de conversa (clima, cotação, web, criar/concluir tarefa,
+fechamento) rodando sobre a cassete — sem rede, sem chave, determinístico.
+
+Uso (na raiz do repo; `python bench/fluxos.py ...` também funciona):
+    python -m bench.fluxos --sintetica                      # gera cassete fake e roda
+    python -m bench.fluxos --cassete cassetes/real.jsonl    # replay de uma gravação real
+    python -m bench.fluxos --gravar cassetes/real.jsonl     # grava (precisa das chaves)
+    python -m bench.fluxos --sintetica --latencia gravada --falhas 0.1 --falha-tipo 429
+
+Cada fluxo roda N vezes (a cassete é rebobinada antes de cada rodada) e sai
+com p50/p95 do fluxo inteiro + quantas rodadas falharam (resposta vazia/erro).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+if not __package__:  # rodando como script (python bench/x.py): a raiz do repo entra no path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assistente import cassete
+from assistente.clima import fetch_weather_days, format_weather_reply, resolve_city_coords
+from assistente.config import MODEL_ID
+from assistente.financas import _extract_b3_ticker, fetch_finance_quote, format_quote_answer
+from assistente.intencoes import decidir_acao, detect_weather_request
+from assistente.llm import _llm_answer_from_web, extrair_dados_tarefa, update_summary_with_llm
+from assistente.tempo import format_dt, now_floor_minute
+from assistente.web import _render_web_json, buscar_tavily
+
+from bench.corpora import gerar_tarefas
+
+SETTINGS = {"city_name": "Ilhéus, BA", "lat": -14.79, "lon": -39.05}
+
+
+# =========================
+# FLUXOS
+# =========================
+def fluxo_clima() -> str:
+    req = detect_weather_request("vai chover amanhã em Salvador?", SETTINGS)
+    coords = resolve_city_coords(SETTINGS, req["city"])
+    w = fetch_weather_days(coords["lat"], coords["lon"], days=2) if coords else None
+    return format_weather_reply(coords["city"], w, req["day_offset"]) if w else ""
+
+def fluxo_cotacao() -> str:
+    tk = _extract_b3_ticker("cotação PETR4 hoje")
+    q = fetch_finance_quote(tk)
+    return format_quote_answer(tk, q) if q.get("regularMarketPrice") is not None else ""
+
+def fluxo_web() -> str:
+    pergunta = "quem ganhou o jogo do Bahia ontem?"
+    results = buscar_tavily(pergunta, max_results=5)
+    data = _llm_answer_from_web(pergunta, results) if results else {}
+    return _render_web_json(data) if data else ""
+
+def fluxo_criar_tarefa() -> str:
+    data = extrair_dados_tarefa("me lembra de pagar o boleto amanhã às 9h")
+    return json.dumps(data, ensure_ascii=False) if data else ""
+
+def fluxo_concluir_tarefa() -> str:
+    tarefas = gerar_tarefas(20, base=now_floor_minute())
+    acao = decidir_acao("terminei aquela parada do banco", tarefas, SETTINGS)
+    return acao.get("action", "")
+
+def fluxo_fechamento() -> str:
+    update_summary_with_llm("Fechamento do dia: fui na academia e terminei o relatório.")
+    try:
+        with open("summary.txt", "r", encoding="utf-8") as f:
+            return f.read()
+    except Exception:
+        return ""
+
+FLUXOS = [
+    ("clima", fluxo_clima),
+    ("cotacao", fluxo_cotacao),
+    ("web", fluxo_web),
+    ("criar_tarefa", fluxo_criar_tarefa),
+    ("concluir_tarefa", fluxo_concluir_tarefa),
+    ("fechamento", fluxo_fechamento),
+]
+
+
+# =========================
+# CASSETE SINTÉTICA
+# =========================
+def gravar_sintetica() -> None:
+    """Uma gravação plausível por chamada externa dos fluxos (formato igual ao do modo gravar)."""
+    hoje = now_floor_minute()
+    llm = lambda conteudo, p, c: {
+        "model": MODEL_ID,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": conteudo}}],
+        "usage": {"prompt_tokens": p, "completion_tokens": c, "queue_time": 0.02, "prompt_time": 0.01},
+    }
+    http = lambda j: {"status": 200, "headers": {"Content-Type": "application/json"}, "text": json.dumps(j)}
+
+    cassete.adicionar(
+        "http:get:https://geocoding-api.open-meteo.com/v1/search", {},
+        http({"results": [{"name": "Salvador", "admin1": "Bahia", "country": "Brasil",
+                           "latitude": -12.97, "longitude": -38.50}]}), ms=120,
+    )
+    cassete.adicionar(
+        "http:get:https://api.open-meteo.com/v1/forecast", {},
+        http({"current": {"temperature_2m": 28.1, "wind_speed_10m": 14.0},
+              "daily": {"time": [(hoje + timedelta(days=i)).date().isoformat() for i in range(2)],
+                        "temperature_2m_max": [31.0, 30.2], "temperature_2m_min": [23.4, 22.9],
+                        "precipitation_probability_max": [40, 75], "precipitation_sum": [1.2, 6.8]}}), ms=180,
+    )
+    cassete.adicionar(
+        "http:get:https://query1.finance.yahoo.com/v7/finance/quote", {},
+        http({"quoteResponse": {"result": [{"symbol": "PETR4.SA", "regularMarketPrice": 37.12,
+                                            "regularMarketChangePercent": 0.84, "currency": "BRL",
+                                            "regularMarketTime": int(time.time())}]}}), ms=250,
+    )
+    cassete.adicionar(
+        "tavily.search", {"max_results": 5},
+        {"results": [{"title": "Bahia vence em casa", "url": "https://exemplo.com/bahia",
+                      "content": "O Bahia venceu por 2 a 1 na noite de ontem."}]}, ms=900,
+    )
+    cassete.adicionar(
+        "groq.chat.completions.create",
+        {"model": MODEL_ID, "temperature": 0.2, "response_format": {"type": "json_object"}},
+        llm(json.dumps({"answer": "O Bahia venceu por 2 a 1 ontem.", "sources": [1]}), 900, 40), ms=600,
+    )
+    cassete.adicionar(
+        "groq.chat.completions.create",
+        {"model": MODEL_ID, "response_format": {"type": "json_object"}},
+        llm(json.dumps({"descricao": "pagar o boleto",
+                        "data_hora": format_dt(hoje.replace(hour=9, minute=0))}), 400, 30), ms=350,
+    )
+    cassete.adicionar(
+        "groq.chat.completions.create", {"model": MODEL_ID, "temperature": 0},
+        llm('{"action": "TASK_DONE", "task_index": 3, "minutes": 0, "search_query": ""}', 700, 25), ms=300,
+    )
+    cassete.adicionar(
+        "groq.chat.completions.create", {"model": MODEL_ID, "temperature": 0.2},
+        llm("- Treina na academia\n- Entregou o relatório do trabalho", 300, 30), ms=400,
+    )
+
+
+# =========================
+# RODADA
+# =========================
+def rodar(repeticoes: int) -> list:
+    out = []
+    for nome, fn in FLUXOS:
+        tempos, falhas = [], 0
+        for _ in range(repeticoes):
+            cassete.rebobinar()
+            t0 = time.perf_counter()
+            try:
+                ok = bool(fn())
+            except Exception:
+                ok = False
+            tempos.append((time.perf_counter() - t0) * 1000)
+            falhas += 0 if ok else 1
+        tempos.sort()
+        r = {
+            "fluxo": nome,
+            "n": len(tempos),
+            "falhas": falhas,
+            "p50_ms": tempos[len(tempos) // 2],
+            "p95_ms": tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))],
+        }
+        print(f"{nome:<18} n={r['n']:>4}  p50={r['p50_ms']:>8.1f}ms  p95={r['p95_ms']:>8.1f}ms  falhas={falhas}", flush=True)
+        out.append(r)
+    return out
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--cassete", help="replay desse arquivo")
+    ap.add_argument("--gravar", help="grava as chamadas reais nesse arquivo")
+    ap.add_argument("--sintetica", action="store_true", help="gera uma cassete fake num diretório temporário")
+    ap.add_argument("--latencia", default="0", help='"0", "gravada" ou ms fixos (replay)')
+    ap.add_argument("--falhas", type=float, default=0.0, help="fração de chamadas com falha injetada (replay)")
+    ap.add_argument("--falha-tipo", default="timeout", choices=["timeout", "429"])
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("-n", "--repeticoes", type=int, default=20)
+    ap.add_argument("--json", help="salva os resultados nesse arquivo")
+    args = ap.parse_args(argv)
+
+    arquivo = os.path.abspath(args.gravar or args.cassete or "cassete_sintetica.jsonl")
+    json_path = os.path.abspath(args.json) if args.json else None
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="zoe-fluxos-") as tmp:
+        os.chdir(tmp)
+        try:
+            if args.sintetica:
+                arquivo = os.path.join(tmp, "cassete_sintetica.jsonl")
+                cassete.configurar(modo="replay", arquivo=arquivo)
+                gravar_sintetica()
+            if args.gravar:
+                cassete.configurar(modo="gravar", arquivo=arquivo)
+                repeticoes = 1
+            else:
+                cassete.configurar(modo="replay", arquivo=arquivo, latencia=args.latencia,
+                                   falhas=args.falhas, falha_tipo=args.falha_tipo, seed=args.seed)
+                repeticoes = args.repeticoes
+            print(f"Cassete: {arquivo} ({cassete.modo()})", flush=True)
+            resultados = rodar(repeticoes)
+        finally:
+            os.chdir(cwd)
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"cassete": arquivo, "resultados": resultados}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
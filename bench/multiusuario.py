@@ -0,0 +1,87 @@
+"""
+Vários usuários no mesmo processo: cada thread é um usuário fazendo o ciclo típico
+(add_event, salvar/carregar tarefas, search_memories). Compara com todos no mesmo
+usuário (arquivos compartilhados) pra mostrar a contenção que a separação evita.
+
+Uso (na raiz do repo; `python bench/multiusuario.py ...` também funciona):
+    python -m bench.multiusuario                 # 200 usuários, 16 threads
+    python -m bench.multiusuario --usuarios 50 --threads 8 --ciclos 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+if not __package__:  # rodando como script (python bench/x.py): a raiz do repo entra no path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assistente import memoria, storage, usuario
+from assistente.tempo import now_floor_minute
+
+from bench.corpora import gerar_frases, gerar_tarefas
+
+
+def ciclo_usuario(uid: str, ciclos: int, frases: list, tarefas: list) -> tuple:
+    """Devolve (latências em ms, erros) do usuário `uid`."""
+    tempos, erros = [], 0
+    with usuario.como(uid):
+        memoria.init_db()
+        for i in range(ciclos):
+            t0 = time.perf_counter()
+            try:
+                memoria.add_event("chat_user", frases[i % len(frases)])
+                if storage.salvar_tarefas(tarefas):
+                    erros += 1
+                storage.carregar_tarefas()
+                memoria.search_memories(frases[(i * 7) % len(frases)])
+            except Exception:
+                erros += 1
+            tempos.append((time.perf_counter() - t0) * 1000)
+    return tempos, erros
+
+
+def rodar(nome: str, uids: list, args, frases: list, tarefas: list) -> dict:
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as ex:
+        res = list(ex.map(lambda u: ciclo_usuario(u, args.ciclos, frases, tarefas), uids))
+    total_s = time.perf_counter() - t0
+    tempos = sorted(t for ts, _ in res for t in ts)
+    erros = sum(e for _, e in res)
+    r = {
+        "cenario": nome,
+        "ciclos": len(tempos),
+        "erros": erros,
+        "ciclos_s": len(tempos) / total_s if total_s else 0.0,
+        "p50_ms": tempos[len(tempos) // 2],
+        "p95_ms": tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))],
+    }
+    print(f"{nome:<24} {r['ciclos']:>6} ciclos  {r['ciclos_s']:>8.1f}/s  "
+          f"p50={r['p50_ms']:>7.1f}ms  p95={r['p95_ms']:>7.1f}ms  erros={erros}", flush=True)
+    return r
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--usuarios", type=int, default=200)
+    ap.add_argument("--threads", type=int, default=16)
+    ap.add_argument("--ciclos", type=int, default=10, help="ciclos por usuário")
+    args = ap.parse_args(argv)
+
+    frases = gerar_frases(200)
+    tarefas = gerar_tarefas(50, base=now_floor_minute())
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="zoe-multi-") as tmp:
+        os.chdir(tmp)
+        try:
+            print(f"{args.usuarios} usuários × {args.ciclos} ciclos, {args.threads} threads", flush=True)
+            rodar("compartilhado (1 usuário)", ["compartilhado"] * args.usuarios, args, frases, tarefas)
+            rodar("separado (1 dir/usuário)", [f"u{i:04d}" for i in range(args.usuarios)], args, frases, tarefas)
+        finally:
+            os.chdir(cwd)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""
+Benchmark das funções quentes (sem Streamlit, sem rede).
+
+Uso (na raiz do repo; `python bench/run_bench.py ...` também funciona):
+    python -m bench.run_bench                  # 10k tarefas, 1M eventos, 3k frases
+    python -m bench.run_bench --quick          # versão rápida pra rodar a cada mudança
+    python -m bench.run_bench --json atual.json --baseline antes.json --tolerancia 0.25
+
+Tudo roda num diretório temporário (os caminhos do pacote são relativos ao cwd).
+Com --baseline, sai com código 1 se algum p50 piorar mais que a tolerância.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+if not __package__:  # rodando como script (python bench/x.py): a raiz do repo entra no path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assistente import memoria, storage
+from assistente.clima import format_weather_reply
+from assistente.intencoes import decidir_acao_heuristica, detect_weather_request
+from assistente.memoria import build_fts_query, search_memories, semantic_search
+from assistente.tarefas import normalizar_tarefa, pick_due_task, schedule_next, tasks_today_summary
+from assistente.tempo import now_floor_minute
+from assistente.texto import limpar_texto
+
+from bench.corpora import fake_weather_days, gerar_eventos, gerar_frases, gerar_tarefas
+
+SETTINGS = {"city_name": "Ilhéus, BA", "lat": -14.79, "lon": -39.05}
+
+
+def medir(nome: str, fn, entradas, repeticoes: int = 1) -> dict:
+    """Cronometra fn(x) pra cada entrada; devolve média/p50/p95 em microssegundos."""
+    entradas = list(entradas)
+    tempos = []
+    for _ in range(repeticoes):
+        for x in entradas:
+            t0 = time.perf_counter_ns()
+            fn(x)
+            tempos.append(time.perf_counter_ns() - t0)
+    tempos.sort()
+    n = len(tempos)
+    if not n:
+        return {"nome": nome, "n": 0}
+    return {
+        "nome": nome,
+        "n": n,
+        "total_ms": sum(tempos) / 1e6,
+        "media_us": sum(tempos) / n / 1e3,
+        "p50_us": tempos[n // 2] / 1e3,
+        "p95_us": tempos[min(n - 1, int(n * 0.95))] / 1e3,
+        "max_us": tempos[-1] / 1e3,
+    }
+
+
+def popular_memoria(n_eventos: int, lote: int = 50_000) -> dict:
+    """Insere eventos sintéticos direto no SQLite e indexa o semântico. Devolve tempos de setup."""
+    memoria.init_db()
+    t0 = time.perf_counter()
+    conn = memoria.db()
+    buf = []
+    for ev in gerar_eventos(n_eventos):
+        buf.append(ev)
+        if len(buf) >= lote:
+            conn.executemany("INSERT INTO events(ts, kind, content, meta) VALUES (?,?,?,?)", buf)
+            conn.commit()
+            buf = []
+    if buf:
+        conn.executemany("INSERT INTO events(ts, kind, content, meta) VALUES (?,?,?,?)", buf)
+        conn.commit()
+    t_insert = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    memoria.semantic_sync(conn)  # backfill inteiro (lotes até alcançar o banco)
+    t_sem = time.perf_counter() - t0
+    conn.close()
+    return {"insert_s": t_insert, "semantic_index_s": t_sem}
+
+
+def rodar(args) -> dict:
+    agora = now_floor_minute().replace(hour=10, minute=0)  # fora do horário silencioso
+    tarefas = gerar_tarefas(args.tasks, base=agora)
+    frases = gerar_frases(args.frases)
+    msgs = [{"role": "user" if i % 2 == 0 else "assistant", "content": f} for i, f in enumerate(frases[:400])]
+    weather = fake_weather_days(2)
+
+    setup = popular_memoria(args.events)
+    resultados = []
+
+    def add(r):
+        resultados.append(r)
+        print(f"{r['nome']:<34} n={r['n']:>7}  média={r['media_us']:>10.1f}µs  "
+              f"p50={r['p50_us']:>10.1f}µs  p95={r['p95_us']:>10.1f}µs", flush=True)
+
+    # --- funções puras ---
+    add(medir("limpar_texto", limpar_texto, frases, 3))
+    add(medir("detect_weather_request", lambda f: detect_weather_request(f, SETTINGS), frases, 3))
+    add(medir("decidir_acao (heurística)", lambda f: decidir_acao_heuristica(f, SETTINGS), frases, 3))
+    add(medir("build_fts_query", build_fts_query, frases, 3))
+    add(medir("format_weather_reply", lambda i: format_weather_reply("Ilhéus, BA", weather, i % 2), range(2000)))
+    add(medir("normalizar_tarefa", normalizar_tarefa, tarefas[:5000]))
+    add(medir(f"pick_due_task ({len(tarefas)} tarefas)", lambda _: pick_due_task(tarefas, agora), range(20)))
+    add(medir(f"tasks_today_summary ({len(tarefas)})", lambda _: tasks_today_summary(tarefas, agora), range(20)))
+    add(medir("schedule_next", lambda t: schedule_next(agora, t), tarefas[:5000]))
+
+    # --- storage ---
+    add(medir(f"salvar_tarefas ({len(tarefas)})", lambda _: storage.salvar_tarefas(tarefas), range(5)))
+    add(medir(f"carregar_tarefas ({len(tarefas)})", lambda _: storage.carregar_tarefas(), range(5)))
+    add(medir("save_chat_history (400 msgs)", lambda _: storage.save_chat_history("2026-01-01", msgs), range(20)))
+    add(medir("load_chat_history (400 msgs)", lambda _: storage.load_chat_history(), range(20)))
+
+    # --- memória longa ---
+    add(medir("add_event", lambda f: memoria.add_event("chat_user", f), frases[:200]))
+    add(medir(f"search_memories ({args.events} ev)", search_memories, frases[:200]))
+    add(medir(f"semantic_search ({args.events} ev)", semantic_search, frases[:50]))
+    add(medir("manutenção no tick (em dia)", lambda _: memoria.run_memory_maintenance(), range(50)))
+
+    return {
+        "config": {"tasks": args.tasks, "events": args.events, "frases": args.frases},
+        "setup": setup,
+        "resultados": resultados,
+    }
+
+
+def comparar(atual: dict, baseline: dict, tolerancia: float) -> list:
+    """Lista as funções cujo p50 piorou mais que `tolerancia` (fração) em relação ao baseline."""
+    antes = {r["nome"]: r for r in baseline.get("resultados", [])}
+    piores = []
+    for r in atual["resultados"]:
+        b = antes.get(r["nome"])
+        if not b or not b.get("p50_us"):
+            continue
+        delta = (r["p50_us"] - b["p50_us"]) / b["p50_us"]
+        marca = "  <-- REGRESSÃO" if delta > tolerancia else ""
+        print(f"{r['nome']:<34} p50 {b['p50_us']:>10.1f} -> {r['p50_us']:>10.1f}µs ({delta:+.0%}){marca}")
+        if delta > tolerancia:
+            piores.append(r["nome"])
+    return piores
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--tasks", type=int, default=10_000)
+    ap.add_argument("--events", type=int, default=1_000_000)
+    ap.add_argument("--frases", type=int, default=3_000)
+    ap.add_argument("--quick", action="store_true", help="1k tarefas, 20k eventos, 500 frases")
+    ap.add_argument("--json", help="salva os resultados nesse arquivo")
+    ap.add_argument("--baseline", help="JSON de uma rodada anterior pra comparar")
+    ap.add_argument("--tolerancia", type=float, default=0.25)
+    ap.add_argument("--dir", help="diretório de trabalho (padrão: temporário)")
+    args = ap.parse_args(argv)
+    if args.quick:
+        args.tasks, args.events, args.frases = 1_000, 20_000, 500
+
+    json_path = os.path.abspath(args.json) if args.json else None
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="zoe-bench-") as tmp:
+        os.chdir(args.dir or tmp)
+        try:
+            print(f"Populando {args.events} eventos em {os.getcwd()} ...", flush=True)
+            out = rodar(args)
+        finally:
+            os.chdir(cwd)
+
+    print(f"\nsetup: insert {out['setup']['insert_s']:.1f}s | índice semântico {out['setup']['semantic_index_s']:.1f}s")
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(out, f, ensure_ascii=False, indent=2)
+    if baseline:
+        print()
+        if comparar(out, baseline, args.tolerancia):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
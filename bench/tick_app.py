@@ -0,0 +1,91 @@
+"""
+Custo do tick do app medido pelo profiler (perf): rerun inteiro × só o fragmento.
+
+Antes, o st_autorefresh rerodava o script todo a cada AUTO_REFRESH_MS (CSS, topbar,
+sidebar, chat); hoje só o fragmento tick() roda. Aqui os dois caminhos rodam via
+streamlit.testing (AppTest, sem navegador) sobre o mesmo diretório:
+    rerun   at.run() normal — o que cada refresh custava
+    tick    rerun só do fragmento — o que o run_every dispara agora
+e sai com p50/p95 de total:rerun / total:tick e das fases, lidos do próprio perf.
+
+Uso (na raiz do repo, precisa do streamlit instalado; `python bench/tick_app.py` também funciona):
+    python -m bench.tick_app                        # 200 de cada, 200 tarefas, 24 msgs no chat
+    python -m bench.tick_app --n 500 --tarefas 10000
+"""
+import argparse
+import functools
+import os
+import sys
+import tempfile
+
+if not __package__:  # rodando como script (python bench/x.py): a raiz do repo entra no path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assistente import perf, storage
+
+from bench.corpora import gerar_tarefas
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def preparar(args) -> None:
+    """Tarefas + chat do dia no diretório atual; chaves falsas só pro app passar da checagem."""
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    os.environ.setdefault("TAVILY_API_KEY", "bench")
+    storage.salvar_tarefas(gerar_tarefas(args.tarefas))
+    for i in range(args.chat):
+        storage.anexar_chat({"role": "user" if i % 2 == 0 else "assistant", "content": f"mensagem {i} " * 20})
+
+
+def rodar(args) -> None:
+    from streamlit.testing.v1 import AppTest
+    import streamlit.testing.v1.local_script_runner as lsr
+
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+    for _ in range(args.n):
+        at.run()
+
+    # AppTest não dispara o run_every: pede o rerun só do fragmento, como o navegador faz
+    fragmentos = list(at._fragment_storage._fragments)
+    rerun_data = lsr.RerunData
+    lsr.RerunData = functools.partial(rerun_data, fragment_id_queue=fragmentos,
+                                      is_fragment_scoped_rerun=True, is_auto_rerun=True)
+    try:
+        for _ in range(args.n):
+            at.run()
+    finally:
+        lsr.RerunData = rerun_data
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=200, help="reruns de cada tipo")
+    ap.add_argument("--tarefas", type=int, default=200)
+    ap.add_argument("--chat", type=int, default=24, help="mensagens no chat do dia")
+    args = ap.parse_args(argv)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="zoe-tick-") as tmp:
+        os.chdir(tmp)
+        try:
+            print(f"{args.n} reruns + {args.n} ticks, {args.tarefas} tarefas, {args.chat} msgs no chat", flush=True)
+            preparar(args)
+            rodar(args)
+            stats = perf.perf_stats(rows=perf.PERF_MAX_ROWS)
+        finally:
+            os.chdir(cwd)
+
+    stats.sort(key=lambda r: (not r["phase"].startswith("total:"), -r["p95"]))
+    for r in stats:
+        print(f"{r['phase']:<20} n={r['n']:>5}  p50={r['p50']:>8.1f}ms  p95={r['p95']:>8.1f}ms  máx={r['max']:>8.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())